@@ -0,0 +1,37 @@
+"""keyset pagination indexes
+
+Revision ID: 3f9c2a1d7b4e
+Revises: 
+Create Date: 2026-10-18 07:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a1d7b4e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_controls_org_id_control_id", "controls", ["org_id", "control_id"]),
+    ("ix_evidence_files_org_id_uploaded_date", "evidence_files", ["org_id", "uploaded_date", "evidence_id"]),
+    ("ix_approval_queue_org_id_requested_date", "approval_queue", ["org_id", "requested_date", "step_id"]),
+    ("ix_approval_queue_org_id_status_requested_date", "approval_queue", ["org_id", "status", "requested_date", "step_id"]),
+    ("ix_policies_org_id_policy_id", "policies", ["org_id", "policy_id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction; avoids locking large tenant tables
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
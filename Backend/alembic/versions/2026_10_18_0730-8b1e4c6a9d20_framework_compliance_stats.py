@@ -0,0 +1,61 @@
+"""framework compliance stats
+
+Revision ID: 8b1e4c6a9d20
+Revises: 3f9c2a1d7b4e
+Create Date: 2026-10-18 07:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4c6a9d20'
+down_revision = '3f9c2a1d7b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "controls",
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="not-implemented")
+    )
+    op.add_column("controls", sa.Column("status_updated_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_controls_status", "controls", ["status"])
+
+    op.create_table(
+        "framework_compliance_stats",
+        sa.Column("framework_id", sa.Integer(), sa.ForeignKey("frameworks.framework_id"), primary_key=True),
+        sa.Column("org_id", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("implemented", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("partial", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("not_implemented", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_framework_compliance_stats_org_id", "framework_compliance_stats", ["org_id"])
+
+    # Backfill from existing controls (same result as `python -m app.services.compliance_stats rebuild`)
+    op.execute("""
+        INSERT INTO framework_compliance_stats
+            (framework_id, org_id, total, implemented, partial, not_implemented, updated_at)
+        SELECT f.framework_id,
+               f.org_id,
+               COUNT(c.control_id),
+               COUNT(c.control_id) FILTER (WHERE c.status = 'implemented'),
+               COUNT(c.control_id) FILTER (WHERE c.status = 'partial'),
+               COUNT(c.control_id) FILTER (WHERE c.status = 'not-implemented'),
+               NOW()
+        FROM frameworks f
+        LEFT JOIN controls c ON c.framework_id = f.framework_id AND c.is_active
+        GROUP BY f.framework_id, f.org_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_framework_compliance_stats_org_id", table_name="framework_compliance_stats")
+    op.drop_table("framework_compliance_stats")
+    op.drop_index("ix_controls_status", table_name="controls")
+    op.drop_column("controls", "status_updated_at")
+    op.drop_column("controls", "status")
@@ -0,0 +1,32 @@
+"""policy_control_links control_id index
+
+Revision ID: c4d7e2f1a8b3
+Revises: 8b1e4c6a9d20
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7e2f1a8b3'
+down_revision = '8b1e4c6a9d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Backs the policy_linked EXISTS in the controls listing
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_policy_control_links_control_id", "policy_control_links", ["control_id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_policy_control_links_control_id", table_name="policy_control_links",
+            postgresql_concurrently=True, if_exists=True
+        )
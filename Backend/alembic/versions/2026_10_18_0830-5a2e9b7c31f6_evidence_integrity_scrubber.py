@@ -0,0 +1,51 @@
+"""evidence integrity scrubber
+
+Revision ID: 5a2e9b7c31f6
+Revises: c4d7e2f1a8b3
+Create Date: 2026-10-18 08:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a2e9b7c31f6'
+down_revision = 'c4d7e2f1a8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("evidence_files", sa.Column("integrity_status", sa.String(length=20), nullable=True))
+    op.add_column("evidence_files", sa.Column("last_verified_at", sa.DateTime(), nullable=True))
+
+    op.create_table(
+        "evidence_scrub_checkpoints",
+        sa.Column("org_id", sa.Integer(), primary_key=True),
+        sa.Column("last_evidence_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("objects_verified", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bytes_verified", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("failures", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+
+    # Scrubber batches: WHERE org_id = ? AND evidence_id > ? ORDER BY evidence_id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_evidence_files_org_id_evidence_id", "evidence_files", ["org_id", "evidence_id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_evidence_files_org_id_evidence_id", table_name="evidence_files",
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_table("evidence_scrub_checkpoints")
+    op.drop_column("evidence_files", "last_verified_at")
+    op.drop_column("evidence_files", "integrity_status")
@@ -0,0 +1,46 @@
+"""content addressed evidence
+
+Revision ID: e7b3d5a9c204
+Revises: 5a2e9b7c31f6
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3d5a9c204'
+down_revision = '5a2e9b7c31f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing objects stay at their legacy paths until
+    # `python -m app.services.evidence_blobs dedupe` moves them
+    op.create_table(
+        "evidence_blobs",
+        sa.Column("org_id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("object_path", sa.String(length=500), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_evidence_files_org_id_file_hash", "evidence_files", ["org_id", "file_hash"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_evidence_files_org_id_file_hash", table_name="evidence_files",
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_table("evidence_blobs")
@@ -0,0 +1,31 @@
+"""outbox events
+
+Revision ID: 1d6f8a2b4c97
+Revises: e7b3d5a9c204
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d6f8a2b4c97'
+down_revision = 'e7b3d5a9c204'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox_events",
+        sa.Column("event_id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("topic", sa.String(length=100), nullable=False),
+        sa.Column("event_key", sa.String(length=255), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("outbox_events")
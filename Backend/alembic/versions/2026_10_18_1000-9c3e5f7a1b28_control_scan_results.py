@@ -0,0 +1,36 @@
+"""control scan results
+
+Revision ID: 9c3e5f7a1b28
+Revises: 1d6f8a2b4c97
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5f7a1b28'
+down_revision = '1d6f8a2b4c97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "control_scan_results",
+        sa.Column("control_id", sa.Integer(), sa.ForeignKey("controls.control_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("org_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("passed", sa.Boolean(), nullable=False),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.Column("agent_id", sa.String(length=100), nullable=True),
+        sa.Column("scan_timestamp", sa.DateTime(), nullable=False),
+        sa.Column("received_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_control_scan_results_org_id", "control_scan_results", ["org_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_control_scan_results_org_id", table_name="control_scan_results")
+    op.drop_table("control_scan_results")
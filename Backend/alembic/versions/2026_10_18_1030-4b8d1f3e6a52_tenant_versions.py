@@ -0,0 +1,30 @@
+"""tenant versions
+
+Revision ID: 4b8d1f3e6a52
+Revises: 9c3e5f7a1b28
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8d1f3e6a52'
+down_revision = '9c3e5f7a1b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tenant_versions",
+        sa.Column("org_id", sa.Integer(), primary_key=True),
+        sa.Column("scope", sa.String(length=50), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tenant_versions")
@@ -0,0 +1,76 @@
+"""full text search
+
+Revision ID: 6e2a9c4f8d13
+Revises: 4b8d1f3e6a52
+Create Date: 2026-10-18 11:00:00.000000
+
+Stored tsvector columns maintained by PostgreSQL (GENERATED ... STORED, so
+writers need no changes) with GIN indexes, plus pg_trgm indexes for
+substring / fuzzy matching on control codes and policy names. Queried by
+app.services.search. Adding the generated columns rewrites both tables.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2a9c4f8d13'
+down_revision = '4b8d1f3e6a52'
+branch_labels = None
+depends_on = None
+
+
+# Codes are indexed with the 'simple' configuration (no stemming or stop words: "CIS 1.1", "BR-001")
+CONTROLS_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(internal_code, '') || ' ' || coalesce(original_code, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, left(coalesce(description, ''), 100000)), 'C')"
+)
+# left(): to_tsvector fails on documents whose lexemes exceed 1 MB
+POLICIES_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(policy_name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(policy_type, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, left(coalesce(policy_document, ''), 100000)), 'C')"
+)
+
+COLUMNS = [
+    ("controls", CONTROLS_SEARCH_VECTOR),
+    ("policies", POLICIES_SEARCH_VECTOR),
+]
+
+INDEXES = [
+    ("ix_controls_search_vector", "controls", "USING gin (search_vector)"),
+    ("ix_policies_search_vector", "policies", "USING gin (search_vector)"),
+]
+
+STATISTICS_TARGET = 1000
+
+TRIGRAM_INDEXES = [
+    ("ix_controls_internal_code_trgm", "controls", "USING gin (internal_code gin_trgm_ops)"),
+    ("ix_controls_original_code_trgm", "controls", "USING gin (original_code gin_trgm_ops)"),
+    ("ix_policies_policy_name_trgm", "policies", "USING gin (policy_name gin_trgm_ops)"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, expression in COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({expression}) STORED"
+        )
+        # More most-common-lexeme stats: rare terms are otherwise estimated at ~0.3% of the
+        # table and list queries walk the keyset index instead of the GIN index
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN search_vector SET STATISTICS {STATISTICS_TARGET}")
+    # CONCURRENTLY cannot run inside a transaction; avoids locking large tenant tables
+    with op.get_context().autocommit_block():
+        for name, table, method in INDEXES + TRIGRAM_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {method}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES + TRIGRAM_INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    for table, _ in reversed(COLUMNS):
+        op.drop_column(table, "search_vector")
+    # pg_trgm is left installed: other objects may depend on it
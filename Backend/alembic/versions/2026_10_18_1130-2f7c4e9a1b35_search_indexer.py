@@ -0,0 +1,69 @@
+"""search indexer
+
+Revision ID: 2f7c4e9a1b35
+Revises: 6e2a9c4f8d13
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f7c4e9a1b35'
+down_revision = '6e2a9c4f8d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("evidence_files", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    # Sync reads WHERE updated_at > watermark: rows without one would never be indexed incrementally
+    op.execute("UPDATE evidence_files SET updated_at = coalesce(reviewed_date, uploaded_date) WHERE updated_at IS NULL")
+    op.execute("UPDATE controls SET updated_at = coalesce(status_updated_at, created_at, now()) WHERE updated_at IS NULL")
+
+    op.create_table(
+        "search_index_watermarks",
+        sa.Column("index_name", sa.String(length=100), primary_key=True),
+        sa.Column("last_updated_at", sa.DateTime(), nullable=True),
+        sa.Column("last_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("documents_indexed", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "search_index_tombstones",
+        sa.Column("tombstone_id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("index_name", sa.String(length=100), nullable=False),
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_search_index_tombstones_index_name_tombstone_id", "search_index_tombstones", ["index_name", "tombstone_id"]
+    )
+
+    # Sync batches: WHERE (updated_at, id) > (?, ?) ORDER BY updated_at, id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_controls_updated_at_control_id", "controls", ["updated_at", "control_id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "ix_evidence_files_updated_at_evidence_id", "evidence_files", ["updated_at", "evidence_id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_evidence_files_updated_at_evidence_id", table_name="evidence_files",
+            postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index(
+            "ix_controls_updated_at_control_id", table_name="controls",
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_index("ix_search_index_tombstones_index_name_tombstone_id", table_name="search_index_tombstones")
+    op.drop_table("search_index_tombstones")
+    op.drop_table("search_index_watermarks")
+    op.drop_column("evidence_files", "updated_at")
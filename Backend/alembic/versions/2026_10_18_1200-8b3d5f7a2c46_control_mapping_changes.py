@@ -0,0 +1,31 @@
+"""control mapping changes
+
+Revision ID: 8b3d5f7a2c46
+Revises: 2f7c4e9a1b35
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3d5f7a2c46'
+down_revision = '2f7c4e9a1b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Change log behind the in-memory mapping graphs (app.services.control_graph)
+    op.create_table(
+        "control_mapping_changes",
+        sa.Column("org_id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), primary_key=True),
+        sa.Column("mapping_id", sa.Integer(), primary_key=True),
+        sa.Column("changed_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("control_mapping_changes")
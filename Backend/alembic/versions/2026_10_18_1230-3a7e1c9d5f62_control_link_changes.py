@@ -0,0 +1,42 @@
+"""control link changes
+
+Revision ID: 3a7e1c9d5f62
+Revises: 8b3d5f7a2c46
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7e1c9d5f62'
+down_revision = '8b3d5f7a2c46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Change log behind the in-memory impact indexes (app.services.impact)
+    op.create_table(
+        "control_link_changes",
+        sa.Column("org_id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), primary_key=True),
+        sa.Column("control_id", sa.Integer(), primary_key=True),
+        sa.Column("changed_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    # Reloading a changed control's risk links
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_risk_controls_control_id", "risk_controls", ["control_id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_risk_controls_control_id", table_name="risk_controls",
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_table("control_link_changes")
@@ -0,0 +1,31 @@
+"""control status changes
+
+Revision ID: 5d8b2f6a9c17
+Revises: 3a7e1c9d5f62
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8b2f6a9c17'
+down_revision = '3a7e1c9d5f62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Change log behind the in-memory risk models and simulation snapshots
+    op.create_table(
+        "control_status_changes",
+        sa.Column("org_id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), primary_key=True),
+        sa.Column("control_id", sa.Integer(), primary_key=True),
+        sa.Column("changed_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("control_status_changes")
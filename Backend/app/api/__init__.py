@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
 # Import all routers
-from app.api import frameworks, controls, policies, evidence, approvals
+from app.api import frameworks, controls, policies, evidence, approvals, compliance, scans, search, mappings, impact, risk, simulations
 
-__all__ = ["frameworks", "controls", "policies", "evidence", "approvals"]
+__all__ = ["frameworks", "controls", "policies", "evidence", "approvals", "compliance", "scans", "search", "mappings", "impact", "risk", "simulations"]
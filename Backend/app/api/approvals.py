@@ -1,40 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
+from app.config import settings
+from app.pagination import Keyset
 from app.models.approval import ApprovalQueue, ApprovalWorkflowStep
+from app.models.control import Control
+from app.schemas.approval import ApprovalResponse, ApprovalWorkflowStepResponse
 from app.dependencies import get_current_user, CurrentUser
+from app.services import compliance_stats, outbox
 
 router = APIRouter()
 
-@router.get("/", response_model=List[dict])
+@router.get("/", response_model=List[ApprovalResponse])
 async def get_approvals(
+    response: Response,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get approval queue items"""
-    query = db.query(ApprovalQueue).filter(ApprovalQueue.org_id == current_user.org_id)
+    """Get approval queue items (newest first, keyset paginated)"""
+    query = select(ApprovalQueue).where(ApprovalQueue.org_id == current_user.org_id)
     
     if status in ['pending', 'approved', 'rejected']:
-        query = query.filter(ApprovalQueue.status == status)
+        query = query.where(ApprovalQueue.status == status)
     
-    approvals = query.order_by(ApprovalQueue.requested_date.desc()).all()
+    keyset = Keyset(ApprovalQueue.org_id, ApprovalQueue.requested_date, ApprovalQueue.step_id, descending=True, pinned=1)
+    result = await db.execute(keyset.apply(query, cursor, limit))
+    approvals = keyset.finalize(result.scalars().all(), limit, response)
     return approvals
 
-@router.get("/{approval_id}", response_model=dict)
+@router.get("/{approval_id}", response_model=ApprovalResponse)
 async def get_approval(
     approval_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get approval request by ID"""
-    approval = db.query(ApprovalQueue).filter(
-        ApprovalQueue.step_id == approval_id,
-        ApprovalQueue.org_id == current_user.org_id
-    ).first()
+    result = await db.execute(
+        select(ApprovalQueue).where(
+            ApprovalQueue.step_id == approval_id,
+            ApprovalQueue.org_id == current_user.org_id
+        )
+    )
+    approval = result.scalars().first()
     
     if not approval:
         raise HTTPException(status_code=404, detail="Approval request not found")
@@ -45,14 +59,18 @@ async def get_approval(
 async def approve_request(
     approval_id: int,
     comments: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Approve a control status change request"""
-    approval = db.query(ApprovalQueue).filter(
-        ApprovalQueue.step_id == approval_id,
-        ApprovalQueue.org_id == current_user.org_id
-    ).first()
+    # Row lock: a concurrent approver waits here and then sees the request as processed
+    result = await db.execute(
+        select(ApprovalQueue).where(
+            ApprovalQueue.step_id == approval_id,
+            ApprovalQueue.org_id == current_user.org_id
+        ).with_for_update()
+    )
+    approval = result.scalars().first()
     
     if not approval:
         raise HTTPException(status_code=404, detail="Approval request not found")
@@ -80,19 +98,55 @@ async def approve_request(
         approval.approval_date = datetime.utcnow()
         approval.comments = comments
         
-        # TODO: Update control status in controls table
-        # TODO: Send Kafka audit event
+        result = await db.execute(
+            select(Control).where(
+                Control.control_id == approval.control_id,
+                Control.org_id == current_user.org_id
+            ).with_for_update()
+        )
+        control = result.scalars().first()
+        if control:
+            previous_status = control.status
+            await compliance_stats.set_control_status(db, control, approval.proposed_status)
+            
+            # Audit event commits with the status change (relayed to Kafka by the outbox)
+            outbox.audit_event(
+                db,
+                event_type="control_status_change",
+                resource_type="control",
+                resource_id=control.internal_code,
+                action="approve",
+                user_id=current_user.user_id,
+                org_id=current_user.org_id,
+                metadata={
+                    "approval_id": approval_id,
+                    "previous_status": previous_status,
+                    "new_status": approval.proposed_status,
+                    "levels": approval.max_levels,
+                    "comments": comments
+                }
+            )
+            await compliance_stats.record_status_changes(db, control.org_id, [control.control_id])
         
         message = "Request fully approved - control status updated"
     else:
         # Move to next approval level
         approval.current_level += 1
         
-        # TODO: Send notification to next level approver
+        outbox.notification_event(
+            db,
+            notification_type="approval_escalated",
+            severity="info",
+            title=f"Approval request {approval_id} awaiting level {approval.current_level}",
+            message=f"Approved at level {approval.current_level - 1} by user {current_user.user_id}",
+            recipients=[f"approval_level:{approval.current_level}"],
+            key=f"{current_user.org_id}:approval:{approval_id}",
+            metadata={"approval_id": approval_id, "org_id": current_user.org_id}
+        )
         
         message = f"Request approved at level {approval.current_level - 1}. Escalated to level {approval.current_level}."
     
-    db.commit()
+    await db.commit()
     
     return {
         "message": message,
@@ -106,14 +160,17 @@ async def approve_request(
 async def reject_request(
     approval_id: int,
     comments: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Reject a control status change request"""
-    approval = db.query(ApprovalQueue).filter(
-        ApprovalQueue.step_id == approval_id,
-        ApprovalQueue.org_id == current_user.org_id
-    ).first()
+    result = await db.execute(
+        select(ApprovalQueue).where(
+            ApprovalQueue.step_id == approval_id,
+            ApprovalQueue.org_id == current_user.org_id
+        ).with_for_update()
+    )
+    approval = result.scalars().first()
     
     if not approval:
         raise HTTPException(status_code=404, detail="Approval request not found")
@@ -142,10 +199,33 @@ async def reject_request(
     approval.approval_date = datetime.utcnow()
     approval.comments = comments
     
-    # TODO: Send Kafka audit event
-    # TODO: Send rejection notification to requester
+    outbox.audit_event(
+        db,
+        event_type="approval_rejected",
+        resource_type="approval",
+        resource_id=str(approval_id),
+        action="reject",
+        user_id=current_user.user_id,
+        org_id=current_user.org_id,
+        metadata={
+            "control_id": approval.control_id,
+            "proposed_status": approval.proposed_status,
+            "level": approval.current_level,
+            "comments": comments
+        }
+    )
+    outbox.notification_event(
+        db,
+        notification_type="approval_rejected",
+        severity="warning",
+        title=f"Approval request {approval_id} rejected",
+        message=comments,
+        recipients=[f"user:{approval.requested_by}"],
+        key=f"{current_user.org_id}:approval:{approval_id}",
+        metadata={"approval_id": approval_id, "org_id": current_user.org_id}
+    )
     
-    db.commit()
+    await db.commit()
     
     return {
         "message": "Request rejected",
@@ -155,23 +235,29 @@ async def reject_request(
         "comments": comments
     }
 
-@router.get("/{approval_id}/history", response_model=List[dict])
+@router.get("/{approval_id}/history", response_model=List[ApprovalWorkflowStepResponse])
 async def get_approval_history(
     approval_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get approval workflow history"""
-    approval = db.query(ApprovalQueue).filter(
-        ApprovalQueue.step_id == approval_id,
-        ApprovalQueue.org_id == current_user.org_id
-    ).first()
+    result = await db.execute(
+        select(ApprovalQueue).where(
+            ApprovalQueue.step_id == approval_id,
+            ApprovalQueue.org_id == current_user.org_id
+        )
+    )
+    approval = result.scalars().first()
     
     if not approval:
         raise HTTPException(status_code=404, detail="Approval request not found")
     
-    history = db.query(ApprovalWorkflowStep).filter(
-        ApprovalWorkflowStep.approval_queue_id == approval_id
-    ).order_by(ApprovalWorkflowStep.level).all()
+    result = await db.execute(
+        select(ApprovalWorkflowStep)
+        .where(ApprovalWorkflowStep.approval_queue_id == approval_id)
+        .order_by(ApprovalWorkflowStep.level)
+    )
+    history = result.scalars().all()
     
     return history
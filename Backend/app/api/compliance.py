@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.models.framework import Framework
+from app.schemas.compliance import ComplianceSummary, FrameworkComplianceStats
+from app.dependencies import get_current_user, CurrentUser
+from app.services import compliance_stats
+
+router = APIRouter()
+
+@router.get("/summary", response_model=ComplianceSummary)
+async def get_compliance_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Org-wide 3-state compliance summary with per-framework breakdown"""
+    return await compliance_stats.get_org_summary(db, current_user.org_id)
+
+@router.get("/frameworks/{framework_code}", response_model=FrameworkComplianceStats)
+async def get_framework_compliance(
+    framework_code: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """3-state compliance statistics for a single framework"""
+    result = await db.execute(
+        select(Framework).where(
+            Framework.framework_code == framework_code.upper(),
+            Framework.org_id == current_user.org_id
+        )
+    )
+    framework = result.scalars().first()
+    
+    if not framework:
+        raise HTTPException(status_code=404, detail="Framework not found")
+    
+    stats = await compliance_stats.get_framework_stats(db, framework.framework_id)
+    counts = {
+        "total": stats.total if stats else 0,
+        "implemented": stats.implemented if stats else 0,
+        "partial": stats.partial if stats else 0,
+        "not_implemented": stats.not_implemented if stats else 0,
+    }
+    
+    return {
+        "framework_id": framework.framework_id,
+        "framework_code": framework.framework_code,
+        "framework_name": framework.framework_name,
+        **counts,
+        "compliance_score": compliance_stats.compliance_score(counts["implemented"], counts["partial"], counts["total"])
+    }
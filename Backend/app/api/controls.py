@@ -1,80 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select, func, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from app.database import get_db
+from app.database import get_async_db
+from app.config import settings
+from app.pagination import Keyset
 from app.models.control import Control
+from app.models.framework import Framework
+from app.models.approval import ApprovalQueue
+from app.models.evidence import EvidenceFile
+from app.models.policy import PolicyControlLink
 from app.schemas.control import ControlCreate, ControlUpdate, ControlResponse, ControlWithStatus, ControlStatusUpdate
 from app.dependencies import get_current_user, CurrentUser
+from app import etags
+from app.services import compliance_stats, outbox, tenant_versions
+from app.services import search as search_service
+from app.services.catalog_cache import catalog_cache
 
 router = APIRouter()
 
+def _enrichment_columns():
+    """
+    Correlated aggregates for ControlWithStatus. PostgreSQL evaluates them only
+    for the rows that survive LIMIT, so a page is one round trip with no N+1.
+    """
+    evidence_count = (
+        select(func.count(EvidenceFile.evidence_id))
+        .where(EvidenceFile.control_id == Control.control_id)
+        .correlate(Control)
+        .scalar_subquery()
+    )
+    last_scan = (
+        select(func.max(EvidenceFile.uploaded_date))
+        .where(EvidenceFile.control_id == Control.control_id, EvidenceFile.source == 'automated')
+        .correlate(Control)
+        .scalar_subquery()
+    )
+    policy_linked = (
+        exists()
+        .where(PolicyControlLink.control_id == Control.control_id)
+        .correlate(Control)
+    )
+    return (
+        policy_linked.label("policy_linked"),
+        evidence_count.label("evidence_count"),
+        last_scan.label("last_scan"),
+    )
+
 @router.get("/", response_model=List[ControlWithStatus])
 async def get_controls(
+    request: Request,
+    response: Response,
     framework: Optional[str] = None,
-    status: Optional[str] = None,
+    status: Optional[Literal["implemented", "partial", "not-implemented"]] = None,
     severity: Optional[str] = None,
     search: Optional[str] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get all controls with filtering"""
-    query = db.query(Control).filter(Control.org_id == current_user.org_id)
+    """Get all controls with status, policy link, evidence count and last scan (single query, ETag / 304 aware)"""
+    etag, not_modified, _ = await etags.check(request, db, current_user.org_id, tenant_versions.CONTROLS)
+    if not_modified:
+        return not_modified
+    etags.apply(response, etag)
+    
+    query = select(Control, *_enrichment_columns()).where(Control.org_id == current_user.org_id)
     
     if framework:
-        query = query.join(Control.framework).filter(Framework.framework_code == framework.upper())
+        query = query.join(Control.framework).where(Framework.framework_code == framework.upper())
+    
+    if status:
+        query = query.where(Control.status == status)
     
     if severity:
-        query = query.filter(Control.severity == severity.lower())
+        query = query.where(Control.severity == severity.lower())
     
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Control.title.ilike(search_term)) |
-            (Control.internal_code.ilike(search_term)) |
-            (Control.original_code.ilike(search_term))
-        )
-    
-    controls = query.offset(skip).limit(limit).all()
+        control_clause, _ = await search_service.match_clauses(db, search)
+        query = query.where(control_clause)
     
-    # TODO: Add status, policy_linked, evidence_count from joins
-    return controls
+    keyset = Keyset(Control.org_id, Control.control_id, pinned=1)
+    result = await db.execute(keyset.apply(query, cursor, limit))
+    controls = [
+        ControlWithStatus.model_validate(control).model_copy(update={
+            "policy_linked": bool(policy_linked),
+            "evidence_count": evidence_count or 0,
+            "last_scan": last_scan
+        })
+        for control, policy_linked, evidence_count, last_scan in result.all()
+    ]
+    return keyset.finalize(controls, limit, response)
 
 @router.get("/{control_id}", response_model=ControlResponse)
 async def get_control(
     control_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get control by internal ID"""
-    control = db.query(Control).filter(
-        Control.internal_code == control_id,
-        Control.org_id == current_user.org_id
-    ).first()
+    """Get control by internal ID (served from the catalog cache)"""
+    version = await tenant_versions.current(db, current_user.org_id, tenant_versions.CONTROLS)
     
-    if not control:
+    async def load():
+        result = await db.execute(
+            select(Control).where(
+                Control.internal_code == control_id,
+                Control.org_id == current_user.org_id
+            )
+        )
+        control = result.scalars().first()
+        return ControlResponse.model_validate(control).model_dump_json().encode() if control else None
+    
+    body = await catalog_cache.get_or_load(current_user.org_id, f"control:{control_id}:v{version}", load)
+    if body is None:
         raise HTTPException(status_code=404, detail="Control not found")
     
-    return control
+    return Response(content=body, media_type="application/json")
 
 @router.post("/", response_model=ControlResponse, status_code=status.HTTP_201_CREATED)
 async def create_control(
     control: ControlCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Create a new custom control"""
     # Generate internal code
-    last_control = db.query(Control).filter(Control.org_id == current_user.org_id).order_by(Control.control_id.desc()).first()
+    result = await db.execute(
+        select(Control)
+        .where(Control.org_id == current_user.org_id)
+        .order_by(Control.control_id.desc())
+        .limit(1)
+    )
+    last_control = result.scalars().first()
     next_sequence = (last_control.control_id + 1) if last_control else 1
     internal_code = f"BR-{next_sequence:03d}"
     
     db_control = Control(**control.dict(), internal_code=internal_code)
     db.add(db_control)
-    db.commit()
-    db.refresh(db_control)
+    await db.flush()
+    await compliance_stats.control_added(db, db_control)
+    await compliance_stats.record_status_changes(db, db_control.org_id, [db_control.control_id])
+    await db.commit()
+    await db.refresh(db_control)
+    await catalog_cache.invalidate(db_control.org_id)
     
     return db_control
 
@@ -82,40 +152,80 @@ async def create_control(
 async def update_control_status(
     control_id: str,
     status_update: ControlStatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Update control implementation status (triggers approval workflow)"""
-    control = db.query(Control).filter(
-        Control.internal_code == control_id,
-        Control.org_id == current_user.org_id
-    ).first()
+    # Row lock: concurrent status writers would otherwise compute stats deltas from the same old status
+    result = await db.execute(
+        select(Control).where(
+            Control.internal_code == control_id,
+            Control.org_id == current_user.org_id
+        ).with_for_update()
+    )
+    control = result.scalars().first()
     
     if not control:
         raise HTTPException(status_code=404, detail="Control not found")
     
     if status_update.request_approval:
-        # TODO: Create approval request in approval_queue
-        pass
+        # Status changes only once the final approval level signs off
+        db.add(ApprovalQueue(
+            org_id=current_user.org_id,
+            control_id=control.control_id,
+            proposed_status=status_update.status,
+            requested_by=current_user.user_id,
+            comments=status_update.comments
+        ))
+    else:
+        previous_status = control.status
+        if await compliance_stats.set_control_status(db, control, status_update.status):
+            outbox.audit_event(
+                db,
+                event_type="control_status_change",
+                resource_type="control",
+                resource_id=control.internal_code,
+                action="update",
+                user_id=current_user.user_id,
+                org_id=current_user.org_id,
+                metadata={
+                    "previous_status": previous_status,
+                    "new_status": status_update.status,
+                    "comments": status_update.comments
+                }
+            )
+            await compliance_stats.record_status_changes(db, control.org_id, [control.control_id])
+    
+    await db.commit()
+    await db.refresh(control)
     
     return control
 
 @router.delete("/{control_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_control(
     control_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Delete control (soft delete)"""
-    control = db.query(Control).filter(
-        Control.internal_code == control_id,
-        Control.org_id == current_user.org_id
-    ).first()
+    # Row lock: two concurrent deletes must not both see is_active and decrement the stats twice
+    result = await db.execute(
+        select(Control).where(
+            Control.internal_code == control_id,
+            Control.org_id == current_user.org_id
+        ).with_for_update()
+    )
+    control = result.scalars().first()
     
     if not control:
         raise HTTPException(status_code=404, detail="Control not found")
     
-    control.is_active = False
-    db.commit()
+    if control.is_active:
+        # Deactivate first so a rebuild fallback inside control_removed no longer counts this control
+        control.is_active = False
+        await compliance_stats.control_removed(db, control)
+    await compliance_stats.record_status_changes(db, control.org_id, [control.control_id])
+    await db.commit()
+    await catalog_cache.invalidate(control.org_id)
     
     return None
@@ -1,57 +1,212 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-import hashlib
-from datetime import datetime
+import logging
 
-from app.database import get_db
+from app.database import get_async_db
+from app.models.control import Control
 from app.models.evidence import EvidenceFile
+from app.schemas.evidence import EvidenceLinkRequest, EvidenceResponse
 from app.dependencies import get_current_user, CurrentUser
 from app.config import settings
+from app.pagination import Keyset
+from app.services import evidence_blobs, search_indexer, tenant_versions
+from app.services.evidence_service import evidence_service, EvidenceTooLargeError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/", response_model=List[dict])
+@router.get("/", response_model=List[EvidenceResponse])
 async def get_evidence(
+    response: Response,
     control_id: Optional[str] = None,
     source: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get evidence files"""
-    query = db.query(EvidenceFile).filter(EvidenceFile.org_id == current_user.org_id)
+    """Get evidence files (newest first, keyset paginated)"""
+    query = select(EvidenceFile).where(EvidenceFile.org_id == current_user.org_id)
     
     if control_id:
         # TODO: Join with Control to filter by internal_code
         pass
     
     if source in ['automated', 'manual']:
-        query = query.filter(EvidenceFile.source == source)
+        query = query.where(EvidenceFile.source == source)
     
-    evidence_files = query.all()
+    keyset = Keyset(EvidenceFile.org_id, EvidenceFile.uploaded_date, EvidenceFile.evidence_id, descending=True, pinned=1)
+    result = await db.execute(keyset.apply(query, cursor, limit))
+    evidence_files = keyset.finalize(result.scalars().all(), limit, response)
     return evidence_files
 
+async def _get_control(db: AsyncSession, control_id: str, org_id: int) -> Control:
+    result = await db.execute(
+        select(Control).where(
+            Control.internal_code == control_id,
+            Control.org_id == org_id
+        )
+    )
+    control = result.scalars().first()
+    if not control:
+        raise HTTPException(status_code=404, detail="Control not found")
+    return control
+
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
 async def upload_evidence(
     file: UploadFile = File(...),
     control_id: str = Form(...),
     notes: Optional[str] = Form(None),
     compliance_period: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Upload manual evidence file"""
-    # Validate file size
-    contents = await file.read()
-    if len(contents) > settings.MAX_UPLOAD_SIZE:
-        raise HTTPException(status_code=400, detail="File too large")
-    
+    """
+    Upload manual evidence file.
+    The body is streamed to MinIO in chunks (hashed on the fly), never read into memory.
+    Content already stored for the tenant is not stored again.
+    """
     # Validate file extension
     file_ext = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
     if file_ext not in settings.ALLOWED_EVIDENCE_EXTENSIONS:
         raise HTTPException(status_code=400, detail=f"File type .{file_ext} not allowed")
     
-    # Calculate SHA256 hash
-    file_hash = hashlib.sha256(contents).hexdigest()
+    # Validate file size (known up front once the multipart part is spooled)
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail="File too large")
+    
+    control = await _get_control(db, control_id, current_user.org_id)
+    
+    # Blocking MinIO I/O runs off the event loop
+    try:
+        staging_path, file_hash, file_size = await run_in_threadpool(
+            evidence_service.upload_stream,
+            file.file,
+            file.filename,
+            control_id,
+            current_user.org_id,
+            file.content_type,
+            settings.MAX_UPLOAD_SIZE
+        )
+    except EvidenceTooLargeError:
+        raise HTTPException(status_code=400, detail="File too large")
+    except Exception as e:
+        logger.error(f"Evidence upload failed for {control_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to store evidence file")
+    finally:
+        await file.close()
+    
+    # Reference the tenant's copy of this content; only new content is kept
+    try:
+        file_path, created = await evidence_blobs.add_reference(
+            db, current_user.org_id, file_hash, file_size,
+            evidence_service.content_path(current_user.org_id, file_hash)
+        )
+        if created:
+            await run_in_threadpool(evidence_service.promote, staging_path, file_path)
+    except Exception as e:
+        await db.rollback()
+        await run_in_threadpool(evidence_service.delete_file, staging_path)
+        logger.error(f"Evidence store failed for {control_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to store evidence file")
+    
+    evidence = EvidenceFile(
+        org_id=current_user.org_id,
+        control_id=control.control_id,
+        file_name=file.filename,
+        file_path=file_path,
+        file_hash=file_hash,
+        file_type=file.content_type,
+        file_size=file_size,
+        source='manual',
+        uploaded_by=current_user.user_id,
+        compliance_period=compliance_period,
+        notes=notes
+    )
+    db.add(evidence)
+    await tenant_versions.bump(db, current_user.org_id, tenant_versions.CONTROLS)
+    await db.commit()
+    await db.refresh(evidence)
+    
+    if not created:
+        await run_in_threadpool(evidence_service.delete_file, staging_path)
+    
+    return {
+        "message": "Evidence uploaded",
+        "evidence_id": evidence.evidence_id,
+        "file_path": file_path,
+        "file_hash": file_hash,
+        "file_size": file_size,
+        "deduplicated": not created
+    }
+
+@router.post("/link", response_model=EvidenceResponse, status_code=status.HTTP_201_CREATED)
+async def link_evidence(
+    link: EvidenceLinkRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Skip-upload fast path: attach content the tenant has already stored, by SHA256.
+    Returns 404 when the hash is unknown; upload the file instead.
+    """
+    file_hash = link.file_hash.lower()
+    blob = await evidence_blobs.find_blob(db, current_user.org_id, file_hash)
+    if not blob:
+        raise HTTPException(status_code=404, detail="Unknown content hash, upload the file")
+    
+    control = await _get_control(db, link.control_id, current_user.org_id)
+    file_path, _ = await evidence_blobs.add_reference(db, current_user.org_id, file_hash, blob.size, blob.object_path)
+    
+    evidence = EvidenceFile(
+        org_id=current_user.org_id,
+        control_id=control.control_id,
+        file_name=link.file_name,
+        file_path=file_path,
+        file_hash=file_hash,
+        file_size=blob.size,
+        source='manual',
+        uploaded_by=current_user.user_id,
+        compliance_period=link.compliance_period,
+        notes=link.notes
+    )
+    db.add(evidence)
+    await tenant_versions.bump(db, current_user.org_id, tenant_versions.CONTROLS)
+    await db.commit()
+    await db.refresh(evidence)
+    
+    return evidence
+
+@router.delete("/{evidence_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_evidence(
+    evidence_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Delete evidence record (shared content is removed by gc once unreferenced)"""
+    result = await db.execute(
+        select(EvidenceFile).where(
+            EvidenceFile.evidence_id == evidence_id,
+            EvidenceFile.org_id == current_user.org_id
+        )
+    )
+    evidence = result.scalars().first()
+    
+    if not evidence:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    
+    shared = await evidence_blobs.release_reference(db, evidence.org_id, evidence.file_hash, evidence.file_path)
+    await db.delete(evidence)
+    search_indexer.tombstone(db, search_indexer.EVIDENCE, evidence.evidence_id)
+    await tenant_versions.bump(db, evidence.org_id, tenant_versions.CONTROLS)
+    await db.commit()
+    
+    # Legacy per-upload objects belong to this row alone
+    if not shared:
+        await run_in_threadpool(evidence_service.delete_file, evidence.file_path)
     
-    #
+    return None
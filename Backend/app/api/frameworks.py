@@ -1,76 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import json
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.framework import Framework
 from app.schemas.framework import FrameworkCreate, FrameworkUpdate, FrameworkResponse, FrameworkWithStats
 from app.dependencies import get_current_user, CurrentUser
+from app import etags
+from app.services import compliance_stats, tenant_versions
+from app.services.catalog_cache import catalog_cache
 
 router = APIRouter()
 
+_framework_list = TypeAdapter(List[FrameworkResponse])
+
 @router.get("/", response_model=List[FrameworkResponse])
 async def get_frameworks(
+    request: Request,
     org_id: Optional[int] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get all frameworks for organization"""
-    query = db.query(Framework)
+    """Get all frameworks for organization (own org served from the catalog cache, ETag / 304 aware)"""
+    query = select(Framework).where(Framework.org_id == (org_id or current_user.org_id))
+    if is_active is not None:
+        query = query.where(Framework.is_active == is_active)
     
-    if org_id:
-        query = query.filter(Framework.org_id == org_id)
-    else:
-        query = query.filter(Framework.org_id == current_user.org_id)
+    if org_id and org_id != current_user.org_id:
+        # Another tenant's catalog: read directly, never cached or ETagged under their org
+        result = await db.execute(query)
+        return result.scalars().all()
     
-    if is_active is not None:
-        query = query.filter(Framework.is_active == is_active)
+    org_id = current_user.org_id
+    etag, not_modified, version = await etags.check(request, db, org_id, tenant_versions.FRAMEWORKS)
+    if not_modified:
+        return not_modified
     
-    frameworks = query.all()
-    return frameworks
+    async def load():
+        result = await db.execute(query)
+        return _framework_list.dump_json(
+            _framework_list.validate_python(result.scalars().all(), from_attributes=True)
+        )
+    
+    body = await catalog_cache.get_or_load(org_id, f"frameworks:{is_active}:v{version}", load)
+    response = Response(content=body, media_type="application/json")
+    etags.apply(response, etag)
+    return response
 
 @router.get("/{framework_code}", response_model=FrameworkWithStats)
 async def get_framework(
     framework_code: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get framework by code with statistics"""
-    framework = db.query(Framework).filter(
-        Framework.framework_code == framework_code.upper(),
-        Framework.org_id == current_user.org_id
-    ).first()
+    """Get framework by code with statistics (framework row from the catalog cache)"""
+    framework_code = framework_code.upper()
+    version = await tenant_versions.current(db, current_user.org_id, tenant_versions.FRAMEWORKS)
     
-    if not framework:
+    async def load():
+        result = await db.execute(
+            select(Framework).where(
+                Framework.framework_code == framework_code,
+                Framework.org_id == current_user.org_id
+            )
+        )
+        framework = result.scalars().first()
+        return FrameworkResponse.model_validate(framework).model_dump_json().encode() if framework else None
+    
+    body = await catalog_cache.get_or_load(current_user.org_id, f"framework:{framework_code}:v{version}", load)
+    if body is None:
         raise HTTPException(status_code=404, detail="Framework not found")
+    framework = json.loads(body)
     
-    # TODO: Calculate stats from controls
-    stats = {
-        "implemented": 0,
-        "partial": 0,
-        "not_implemented": 0,
-        "compliance_score": 0.0
-    }
+    # Materialized counters (maintained on control status changes), never cached
+    framework_stats = await compliance_stats.get_framework_stats(db, framework["framework_id"])
+    stats = {"control_count": 0, "implemented": 0, "partial": 0, "not_implemented": 0, "compliance_score": 0.0}
+    if framework_stats:
+        stats = {
+            "control_count": framework_stats.total,
+            "implemented": framework_stats.implemented,
+            "partial": framework_stats.partial,
+            "not_implemented": framework_stats.not_implemented,
+            "compliance_score": compliance_stats.compliance_score(
+                framework_stats.implemented, framework_stats.partial, framework_stats.total
+            )
+        }
     
-    return {**framework.__dict__, **stats}
+    return {**framework, **stats}
 
 @router.post("/", response_model=FrameworkResponse, status_code=status.HTTP_201_CREATED)
 async def create_framework(
     framework: FrameworkCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Create a new custom framework"""
     # Check if framework code already exists
-    existing = db.query(Framework).filter(Framework.framework_code == framework.framework_code.upper()).first()
+    result = await db.execute(
+        select(Framework).where(Framework.framework_code == framework.framework_code.upper())
+    )
+    existing = result.scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Framework code already exists")
     
     db_framework = Framework(**framework.dict())
     db.add(db_framework)
-    db.commit()
-    db.refresh(db_framework)
+    await db.flush()
+    await compliance_stats.create_stats_row(db, db_framework)
+    await tenant_versions.bump(db, db_framework.org_id, tenant_versions.FRAMEWORKS)
+    await db.commit()
+    await db.refresh(db_framework)
+    await catalog_cache.invalidate(db_framework.org_id)
     
     return db_framework
 
@@ -78,14 +122,17 @@ async def create_framework(
 async def update_framework(
     framework_code: str,
     framework_update: FrameworkUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Update framework details"""
-    framework = db.query(Framework).filter(
-        Framework.framework_code == framework_code.upper(),
-        Framework.org_id == current_user.org_id
-    ).first()
+    result = await db.execute(
+        select(Framework).where(
+            Framework.framework_code == framework_code.upper(),
+            Framework.org_id == current_user.org_id
+        )
+    )
+    framework = result.scalars().first()
     
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
@@ -93,27 +140,34 @@ async def update_framework(
     for key, value in framework_update.dict(exclude_unset=True).items():
         setattr(framework, key, value)
     
-    db.commit()
-    db.refresh(framework)
+    await tenant_versions.bump(db, framework.org_id, tenant_versions.FRAMEWORKS)
+    await db.commit()
+    await db.refresh(framework)
+    await catalog_cache.invalidate(framework.org_id)
     
     return framework
 
 @router.delete("/{framework_code}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_framework(
     framework_code: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Delete framework (soft delete)"""
-    framework = db.query(Framework).filter(
-        Framework.framework_code == framework_code.upper(),
-        Framework.org_id == current_user.org_id
-    ).first()
+    result = await db.execute(
+        select(Framework).where(
+            Framework.framework_code == framework_code.upper(),
+            Framework.org_id == current_user.org_id
+        )
+    )
+    framework = result.scalars().first()
     
     if not framework:
         raise HTTPException(status_code=404, detail="Framework not found")
     
     framework.is_active = False
-    db.commit()
+    await tenant_versions.bump(db, framework.org_id, tenant_versions.FRAMEWORKS)
+    await db.commit()
+    await catalog_cache.invalidate(framework.org_id)
     
     return None
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_async_db
+from app.models.control import Control
+from app.schemas.impact import ImpactResponse
+from app.dependencies import get_current_user, CurrentUser
+from app.services import impact
+
+router = APIRouter()
+
+@router.get("/controls/{control_id}", response_model=ImpactResponse)
+async def get_control_impact(
+    control_id: str,
+    max_depth: int = Query(3, ge=0, le=settings.CONTROL_GRAPH_MAX_DEPTH, description="Mapping hops to follow (0 = none)"),
+    min_confidence: float = Query(0.5, ge=0.0, le=1.0, description="Minimum path confidence of mapped controls"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Frameworks, policies, risks and mapped controls affected if this control is not implemented"""
+    source = await db.scalar(
+        select(Control.control_id).where(
+            Control.internal_code == control_id,
+            Control.org_id == current_user.org_id,
+            Control.is_active == True
+        )
+    )
+    if source is None:
+        raise HTTPException(status_code=404, detail="Control not found")
+
+    return await impact.analyze(db, current_user.org_id, source, max_depth, min_confidence)
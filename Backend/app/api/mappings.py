@@ -0,0 +1,161 @@
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.database import get_async_db
+from app.models.control import Control, ControlMapping
+from app.schemas.mapping import (
+    MappingCreate, MappingUpdate, MappingResponse, SatisfiesResponse, CentralityResponse
+)
+from app.dependencies import get_current_user, CurrentUser
+from app.services import control_graph
+from app.services.control_graph import control_graphs
+
+router = APIRouter()
+
+async def _active_controls(db: AsyncSession, org_id: int, control_ids) -> Dict[int, Control]:
+    """Active controls by id (inactive ones stay in the graph but are not reported)"""
+    result = await db.execute(
+        select(Control).where(
+            Control.org_id == org_id,
+            Control.control_id.in_(set(control_ids)),
+            Control.is_active == True
+        )
+    )
+    return {control.control_id: control for control in result.scalars()}
+
+async def _get_mapping(db: AsyncSession, org_id: int, mapping_id: int) -> ControlMapping:
+    mapping = await db.get(ControlMapping, mapping_id)
+    if mapping is None or mapping.org_id != org_id:
+        raise HTTPException(status_code=404, detail="Mapping not found")
+    return mapping
+
+@router.post("/", response_model=MappingResponse, status_code=status.HTTP_201_CREATED)
+async def create_mapping(
+    mapping: MappingCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Map a control to a control of another framework"""
+    if mapping.source_control_id == mapping.target_control_id:
+        raise HTTPException(status_code=400, detail="A control cannot map to itself")
+    found = await db.scalar(
+        select(func.count(Control.control_id)).where(
+            Control.org_id == current_user.org_id,
+            Control.control_id.in_([mapping.source_control_id, mapping.target_control_id])
+        )
+    )
+    if found != 2:
+        raise HTTPException(status_code=404, detail="Control not found")
+
+    db_mapping = ControlMapping(**mapping.dict(), org_id=current_user.org_id)
+    db.add(db_mapping)
+    await db.flush()
+    await control_graph.record_changes(db, current_user.org_id, [db_mapping.mapping_id])
+    await db.commit()
+    await db.refresh(db_mapping)
+
+    return db_mapping
+
+@router.patch("/{mapping_id}", response_model=MappingResponse)
+async def update_mapping(
+    mapping_id: int,
+    mapping_update: MappingUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Change a mapping's type or confidence"""
+    mapping = await _get_mapping(db, current_user.org_id, mapping_id)
+    for field, value in mapping_update.dict(exclude_unset=True).items():
+        setattr(mapping, field, value)
+    await control_graph.record_changes(db, current_user.org_id, [mapping.mapping_id])
+    await db.commit()
+    await db.refresh(mapping)
+
+    return mapping
+
+@router.delete("/{mapping_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_mapping(
+    mapping_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Delete a mapping"""
+    mapping = await _get_mapping(db, current_user.org_id, mapping_id)
+    await db.delete(mapping)
+    await control_graph.record_changes(db, current_user.org_id, [mapping_id])
+    await db.commit()
+
+    return None
+
+@router.get("/controls/{control_id}/satisfies", response_model=SatisfiesResponse)
+async def get_satisfied_controls(
+    control_id: str,
+    framework_id: Optional[List[int]] = Query(None, description="Only report controls of these frameworks"),
+    max_depth: int = Query(3, ge=1, le=settings.CONTROL_GRAPH_MAX_DEPTH, description="Mapping hops to follow"),
+    min_confidence: float = Query(0.1, ge=0.0, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Controls that implementing this control satisfies, directly or through other mappings"""
+    start = time.perf_counter()
+    source = await db.scalar(
+        select(Control.control_id).where(
+            Control.internal_code == control_id,
+            Control.org_id == current_user.org_id
+        )
+    )
+    if source is None:
+        raise HTTPException(status_code=404, detail="Control not found")
+
+    graph = await control_graphs.get(db, current_user.org_id)
+    hits = graph.satisfies(source, max_depth, min_confidence, framework_id, limit)
+    controls = await _active_controls(db, current_user.org_id, [i for hit in hits for i in hit[3]])
+    satisfies = [
+        {
+            "control_id": target,
+            "internal_code": controls[target].internal_code,
+            "original_code": controls[target].original_code,
+            "title": controls[target].title,
+            "framework_id": controls[target].framework_id,
+            "confidence": round(confidence, 4),
+            "hops": hops,
+            "path": [controls[i].internal_code if i in controls else str(i) for i in path],
+        }
+        for target, confidence, hops, path in hits
+        if target in controls
+    ]
+    return {"control": control_id, "satisfies": satisfies, "took_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+@router.get("/centrality", response_model=CentralityResponse)
+async def get_central_controls(
+    framework_id: Optional[List[int]] = Query(None, description="Only rank controls of these frameworks"),
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Critical controls: PageRank over the tenant's confidence-weighted mappings"""
+    start = time.perf_counter()
+    graph = await control_graphs.get(db, current_user.org_id)
+    ranked = await control_graphs.central(graph, limit, framework_id)
+    controls = await _active_controls(db, current_user.org_id, [control for control, _ in ranked])
+    return {
+        "controls": [
+            {
+                "control_id": control,
+                "internal_code": controls[control].internal_code,
+                "original_code": controls[control].original_code,
+                "title": controls[control].title,
+                "framework_id": controls[control].framework_id,
+                "score": score,
+            }
+            for control, score in ranked
+            if control in controls
+        ],
+        "took_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
@@ -1,32 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
+from app.config import settings
+from app.pagination import Keyset
 from app.models.policy import Policy, PolicyControlLink
 from app.schemas.policy import PolicyCreate, PolicyUpdate, PolicyResponse, PolicyWithControls, PolicyControlLinkCreate
 from app.dependencies import get_current_user, CurrentUser
+from app import etags
+from app.services import impact, tenant_versions
+from app.services import search as search_service
 
 router = APIRouter()
 
 @router.get("/", response_model=List[PolicyWithControls])
 async def get_policies(
+    request: Request,
+    response: Response,
     status: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Get all policies"""
-    query = db.query(Policy).filter(Policy.org_id == current_user.org_id)
+    """Get all policies (keyset paginated on org_id, policy_id; ETag / 304 aware)"""
+    etag, not_modified, _ = await etags.check(request, db, current_user.org_id, tenant_versions.POLICIES)
+    if not_modified:
+        return not_modified
+    etags.apply(response, etag)
+    
+    query = select(Policy).where(Policy.org_id == current_user.org_id)
     
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Policy.policy_name.ilike(search_term)) |
-            (Policy.description.ilike(search_term))
-        )
+        _, policy_clause = await search_service.match_clauses(db, search)
+        query = query.where(policy_clause)
     
-    policies = query.all()
+    keyset = Keyset(Policy.org_id, Policy.policy_id, pinned=1)
+    result = await db.execute(keyset.apply(query, cursor, limit))
+    policies = keyset.finalize(result.scalars().all(), limit, response)
     
     # TODO: Add linked_controls count
     return policies
@@ -34,14 +48,17 @@ async def get_policies(
 @router.get("/{policy_id}", response_model=PolicyResponse)
 async def get_policy(
     policy_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get policy by ID"""
-    policy = db.query(Policy).filter(
-        Policy.policy_id == policy_id,
-        Policy.org_id == current_user.org_id
-    ).first()
+    result = await db.execute(
+        select(Policy).where(
+            Policy.policy_id == policy_id,
+            Policy.org_id == current_user.org_id
+        )
+    )
+    policy = result.scalars().first()
     
     if not policy:
         raise HTTPException(status_code=404, detail="Policy not found")
@@ -51,36 +68,42 @@ async def get_policy(
 @router.post("/", response_model=PolicyResponse, status_code=status.HTTP_201_CREATED)
 async def create_policy(
     policy: PolicyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Create new governance policy"""
     db_policy = Policy(**policy.dict())
     db.add(db_policy)
-    db.commit()
-    db.refresh(db_policy)
+    await tenant_versions.bump(db, db_policy.org_id, tenant_versions.POLICIES)
+    await db.commit()
+    await db.refresh(db_policy)
     
     return db_policy
 
 @router.post("/link", status_code=status.HTTP_201_CREATED)
 async def link_policy_to_control(
     link: PolicyControlLinkCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Link policy to control"""
     # Check if link already exists
-    existing = db.query(PolicyControlLink).filter(
-        PolicyControlLink.policy_id == link.policy_id,
-        PolicyControlLink.control_id == link.control_id
-    ).first()
+    result = await db.execute(
+        select(PolicyControlLink).where(
+            PolicyControlLink.policy_id == link.policy_id,
+            PolicyControlLink.control_id == link.control_id
+        )
+    )
+    existing = result.scalars().first()
     
     if existing:
         raise HTTPException(status_code=400, detail="Policy already linked to this control")
     
     db_link = PolicyControlLink(**link.dict())
     db.add(db_link)
-    db.commit()
+    await tenant_versions.bump(db, current_user.org_id, tenant_versions.CONTROLS, tenant_versions.POLICIES)
+    await impact.record_link_changes(db, current_user.org_id, [link.control_id])
+    await db.commit()
     
     return {"message": "Policy linked successfully"}
 
@@ -88,19 +111,24 @@ async def link_policy_to_control(
 async def unlink_policy_from_control(
     policy_id: int,
     control_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
     """Unlink policy from control"""
-    link = db.query(PolicyControlLink).filter(
-        PolicyControlLink.policy_id == policy_id,
-        PolicyControlLink.control_id == control_id
-    ).first()
+    result = await db.execute(
+        select(PolicyControlLink).where(
+            PolicyControlLink.policy_id == policy_id,
+            PolicyControlLink.control_id == control_id
+        )
+    )
+    link = result.scalars().first()
     
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
     
-    db.delete(link)
-    db.commit()
+    await db.delete(link)
+    await tenant_versions.bump(db, current_user.org_id, tenant_versions.CONTROLS, tenant_versions.POLICIES)
+    await impact.record_link_changes(db, current_user.org_id, [control_id])
+    await db.commit()
     
     return None
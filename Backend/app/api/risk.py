@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.schemas.risk import RiskHeatmapResponse, TopRisksResponse
+from app.dependencies import get_current_user, CurrentUser
+from app.services import risk_engine
+
+router = APIRouter()
+
+@router.get("/heatmap", response_model=RiskHeatmapResponse)
+async def get_risk_heatmap(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Open risks by likelihood x impact with their residual risk after control mitigation"""
+    return await risk_engine.heatmap(db, current_user.org_id)
+
+@router.get("/top", response_model=TopRisksResponse)
+async def get_top_risks(
+    limit: int = Query(10, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Open risks with the highest residual risk"""
+    return await risk_engine.top_risks(db, current_user.org_id, limit)
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_async_db
+from app.schemas.scan import ScanIngestResponse
+from app.dependencies import get_current_user, CurrentUser
+from app.services import scan_ingest
+
+router = APIRouter()
+
+@router.post("/bulk", response_model=ScanIngestResponse)
+async def ingest_scan_results(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Ingest a batch of scan results as NDJSON (application/x-ndjson), one result per line:
+    {"internal_code": "BR-001", "status": "pass", "scan_timestamp": "...", "agent_id": "...", "details": {...}}
+
+    Valid lines are stored even when others are rejected; rejected lines are reported by line number.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Batch exceeds {settings.SCAN_INGEST_MAX_BYTES // (1024 * 1024)} MB"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.SCAN_INGEST_MAX_BYTES:
+        raise too_large
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.SCAN_INGEST_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    
+    try:
+        return await scan_ingest.ingest(db, current_user.org_id, b"".join(chunks))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
@@ -0,0 +1,29 @@
+import time
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.database import get_async_db
+from app.schemas.search import SearchResponse
+from app.dependencies import get_current_user, CurrentUser
+from app.services import search as search_service
+
+router = APIRouter()
+
+SEARCH_KINDS = ["controls", "policies"]
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words, \"phrases\", -exclusions or control codes"),
+    kinds: List[str] = Query(SEARCH_KINDS, description="controls, policies"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Ranked search over controls and policies with highlighted snippets (full-text + trigram on PostgreSQL)"""
+    start = time.perf_counter()
+    hits = await search_service.search(
+        db, current_user.org_id, q, [kind for kind in kinds if kind in SEARCH_KINDS], limit
+    )
+    return {"query": q, "hits": hits, "took_ms": round((time.perf_counter() - start) * 1000, 2)}
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.schemas.simulation import SimulationRequest, SimulationResponse
+from app.dependencies import get_current_user, CurrentUser
+from app.services import simulation
+
+router = APIRouter()
+
+@router.post("/", response_model=SimulationResponse)
+async def simulate(
+    request: SimulationRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """What-if: framework scores and residual risk if the proposed control changes were made (nothing is written)"""
+    scenarios = []
+    for scenario in request.scenarios:
+        for change in scenario.changes:
+            if change.status is None and change.policy_enforced is None and change.scan_passed is None:
+                raise HTTPException(status_code=400, detail=f"Change for {change.control} proposes nothing")
+        scenarios.append(simulation.Scenario(
+            name=scenario.name,
+            changes=[
+                simulation.Change(change.control, change.status, change.policy_enforced, change.scan_passed)
+                for change in scenario.changes
+            ],
+            follow_mappings=scenario.follow_mappings,
+            min_confidence=scenario.min_confidence,
+            max_depth=scenario.max_depth
+        ))
+
+    return await simulation.run(db, current_user.org_id, scenarios, request.framework_codes, request.top_risks)
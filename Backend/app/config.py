@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -14,17 +14,102 @@ class Settings(BaseSettings):
     DB_ECHO: bool = False
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 40
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = server default
+    DB_APPLICATION_NAME: str = "blackroses-backend"
+    ASYNC_DATABASE_URL: Optional[str] = None  # Derived from DATABASE_URL (asyncpg) when unset
     
     # Kafka
     KAFKA_BOOTSTRAP_SERVERS: str = "kafka:29092"
     KAFKA_TOPIC_CONTROLS_SCANS: str = "controls.scans"
     KAFKA_TOPIC_NOTIFICATIONS: str = "notifications.alerts"
     KAFKA_TOPIC_AUDIT: str = "audit.trail"
+    KAFKA_LINGER_MS: int = 5  # producer batching window
+    KAFKA_BATCH_SIZE: int = 256 * 1024  # bytes per partition batch
+    
+    # Transactional outbox relay
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_MS: int = 50  # idle wait before polling the outbox again
+    OUTBOX_SEND_TIMEOUT: int = 30  # seconds to wait for a batch to be acknowledged
+    
+    # Compliance decision engine (controls.scans consumer)
+    DECISION_ENGINE_GROUP_ID: str = "blackroses-decision-engine"
+    DECISION_BATCH_SIZE: int = 500  # scan results per poll / transaction
+    DECISION_POLL_TIMEOUT_MS: int = 500
+    DECISION_INDEX_TTL: int = 60  # seconds before an org's policy link index is reloaded
+    
+    # Bulk scan ingestion (NDJSON)
+    SCAN_INGEST_MAX_BYTES: int = 32 * 1024 * 1024
+    SCAN_INGEST_MAX_LINES: int = 100000
+    SCAN_INGEST_MAX_ERRORS: int = 100  # rejected lines reported back per request
+    
+    # Framework / control catalog cache (per org)
+    CATALOG_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # local tier per worker (0 disables)
+    CATALOG_CACHE_TTL: int = 300  # seconds
+    CATALOG_CACHE_REDIS_URL: Optional[str] = None  # e.g. redis://redis:6379/0 (shared tier)
+    CATALOG_CACHE_LOCAL_TTL: int = 5  # local tier TTL when Redis is configured
+    
+    # Kafka / MinIO clients connect in the background after startup
+    CLIENT_CONNECT_RETRY_INITIAL: float = 1.0  # seconds before the first retry
+    CLIENT_CONNECT_RETRY_MAX: float = 30.0  # backoff cap
+    
+    # Health / readiness probes
+    HEALTH_PROBE_TIMEOUT: float = 2.0  # seconds per dependency
+    HEALTH_CACHE_TTL: float = 5.0  # seconds a probe report is reused
+    HEALTH_CRITICAL_DEPENDENCIES: List[str] = ["postgres"]  # others only degrade readiness
     
     # Elasticsearch
     ELASTICSEARCH_URL: str = "http://elasticsearch:9200"
     ELASTICSEARCH_INDEX_CONTROLS: str = "compliance-controls"
     ELASTICSEARCH_INDEX_EVIDENCE: str = "compliance-evidence"
+    SEARCH_INDEX_SLICES: int = 4  # parallel reindex slices (one bulk request in flight each)
+    SEARCH_INDEX_BULK_DOCS: int = 1000  # documents per _bulk request and per sync batch
+    SEARCH_INDEX_BULK_BYTES: int = 5 * 1024 * 1024  # _bulk body cap
+    SEARCH_INDEX_MAX_RETRIES: int = 8  # per bulk request (429, 502, 503, 504, connection errors)
+    SEARCH_INDEX_RETRY_INITIAL: float = 0.5  # seconds; doubles per retry
+    SEARCH_INDEX_RETRY_MAX: float = 30.0
+    SEARCH_INDEX_REQUEST_TIMEOUT: float = 60.0
+    SEARCH_INDEX_POLL_INTERVAL_MS: int = 1000  # sync idle time when caught up
+    SEARCH_INDEX_SETTLE_MS: int = 1000  # sync skips rows changed more recently (commit in flight)
+    SEARCH_INDEX_SHARDS: int = 1
+    SEARCH_INDEX_REPLICAS: int = 1  # restored after the reindex load (0 while loading)
+    SEARCH_INDEX_REFRESH_INTERVAL: str = "1s"  # restored after the reindex load (-1 while loading)
+    
+    # Cross-framework control mapping graph (in memory, per worker and org)
+    CONTROL_GRAPH_MAX_TENANTS: int = 16  # graphs kept, least recently used evicted
+    CONTROL_GRAPH_MAX_AGE: int = 3600  # seconds before a full reload (keep below the retention)
+    CONTROL_GRAPH_CHANGE_RETENTION: int = 86400  # seconds mapping changes stay in the change log
+    CONTROL_GRAPH_COMPACT_EDGES: int = 50000  # overlay edges before the CSR is rebuilt in memory
+    CONTROL_GRAPH_MAX_DEPTH: int = 6  # hop limit for transitive queries
+    
+    # Mapping suggestions (python -m app.services.mapping_suggestions)
+    MAPPING_SUGGEST_TOP_K: int = 3  # candidates per control and other framework
+    MAPPING_SUGGEST_THRESHOLD: float = 0.35  # minimum cosine similarity of the control texts
+    MAPPING_SUGGEST_EQUIVALENT: float = 0.8  # similarity from which a suggestion is "equivalent"
+    MAPPING_SUGGEST_WORKERS: int = 0  # similarity processes (0 = one per CPU)
+    MAPPING_SUGGEST_BLOCK_ROWS: int = 1024  # controls multiplied per task (bounds worker memory)
+    
+    # Impact analysis (control -> policy / risk reverse index, in memory per worker and org)
+    IMPACT_INDEX_MAX_TENANTS: int = 16  # indexes kept, least recently used evicted
+    IMPACT_INDEX_MAX_AGE: int = 3600  # seconds before a full reload (keep below the retention)
+    IMPACT_INDEX_MAX_CHANGES: int = 50000  # changed controls above which the index is reloaded in full
+    IMPACT_CHANGE_RETENTION: int = 86400  # seconds link changes stay in the change log
+    
+    # Control status change log (read by the risk engine and simulation caches)
+    CONTROL_STATUS_CHANGE_RETENTION: int = 86400  # seconds status changes stay in the change log
+    
+    # Risk engine (inherent / residual risk, in memory per worker and org)
+    RISK_ENGINE_MAX_TENANTS: int = 16  # models kept, least recently used evicted
+    RISK_ENGINE_MAX_AGE: int = 3600  # seconds before a full reload (keep below the retention)
+    RISK_ENGINE_MAX_CHANGES: int = 50000  # changed controls above which the model is reloaded in full
+    RISK_DEFAULT_EFFECTIVENESS: float = 0.5  # risk links without a mitigation_effectiveness
+    
+    # What-if simulation (POST /api/v1/simulations/, snapshots in memory per worker and org)
+    SIMULATION_MAX_TENANTS: int = 16  # snapshots kept, least recently used evicted
+    SIMULATION_MAX_AGE: int = 3600  # seconds before a full reload (keep below the retention)
+    SIMULATION_MAX_CHANGES: int = 50000  # changed controls above which the snapshot is reloaded in full
+    SIMULATION_MAX_SCENARIOS: int = 20  # scenarios per request
+    SIMULATION_MAX_PROPOSED: int = 5000  # proposed control changes per scenario
     
     # MinIO / S3
     MINIO_ENDPOINT: str = "minio:9000"
@@ -44,6 +129,7 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = "jwt-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified tokens cached per worker (0 disables)
     
     # Audit Retention
     AUDIT_RETENTION_MONTHS: int = 24
@@ -60,6 +146,10 @@ class Settings(BaseSettings):
     
     # File Upload
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100 MB
+    EVIDENCE_UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes read/hashed per step
+    EVIDENCE_UPLOAD_PART_SIZE: int = 5 * 1024 * 1024  # MinIO multipart part size (S3 minimum)
+    EVIDENCE_SCRUB_WORKERS: int = 8  # keep <= MinIO client's HTTP pool size (10)
+    EVIDENCE_SCRUB_BATCH_SIZE: int = 200
     ALLOWED_EVIDENCE_EXTENSIONS: List[str] = [
         "pdf", "docx", "xlsx", "txt", "json", 
         "png", "jpg", "jpeg", "zip", "csv"
@@ -1,20 +1,85 @@
 from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.config import settings
+from app import metrics
+from contextvars import ContextVar
+from typing import Optional
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+class _InstrumentedPoolMixin:
+    """Records checkout latency, saturation wait time and pool occupancy"""
+
+    engine_label = "default"
+
+    def _do_get(self):
+        saturated = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            metrics.DB_POOL_CHECKOUT_TIMEOUTS.labels(self.engine_label).inc()
+            raise
+        elapsed = time.perf_counter() - start
+        metrics.DB_POOL_CHECKOUT_SECONDS.labels(self.engine_label).observe(elapsed)
+        if saturated:
+            metrics.DB_POOL_WAIT_SECONDS.labels(self.engine_label).observe(elapsed)
+        self._record_occupancy()
+        return conn
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._record_occupancy()
+
+    def _record_occupancy(self):
+        metrics.DB_POOL_IN_USE.labels(self.engine_label).set(self.checkedout())
+        metrics.DB_POOL_OVERFLOW.labels(self.engine_label).set(max(self.overflow(), 0))
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    engine_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def _pg_options() -> str:
+    """Session settings applied once per physical connection (libpq 'options')"""
+    options = ["-c timezone=UTC"]
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options.append(f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}")
+    return " ".join(options)
+
+def _pg_server_settings() -> dict:
+    """Same session settings in asyncpg's server_settings form"""
+    server_settings = {
+        "timezone": "UTC",
+        "application_name": settings.DB_APPLICATION_NAME
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    return server_settings
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     pool_pre_ping=True,
-    echo=settings.DB_ECHO
+    echo=settings.DB_ECHO,
+    connect_args={
+        "options": _pg_options(),
+        "application_name": settings.DB_APPLICATION_NAME
+    }
 )
 
 # Session factory
@@ -24,21 +89,70 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+def _async_url(url: str) -> str:
+    """Map a sync PostgreSQL URL onto the asyncpg driver"""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+# Async engine used by the API routers (keeps the event loop free during queries)
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    echo=settings.DB_ECHO,
+    connect_args={"server_settings": _pg_server_settings()}
+)
+
+for _label in ("sync", "async"):
+    metrics.DB_POOL_CAPACITY.labels(_label).set(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 # Database event listeners
+# Session settings (timezone, statement_timeout) are passed as connect-time
+# options, so there is no per-checkout round trip.
 @event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
 def receive_connect(dbapi_conn, connection_record):
     """Log database connections"""
     logger.info("Database connection established")
 
-@event.listens_for(engine, "checkout")
-def receive_checkout(dbapi_conn, connection_record, connection_proxy):
-    """Set session timezone to UTC"""
-    cursor = dbapi_conn.cursor()
-    cursor.execute("SET timezone='UTC'")
-    cursor.close()
+# Per-request query accounting: [statements, seconds], set by app.middleware.MetricsMiddleware.
+# Listeners run in the request's context (async sessions too: greenlets inherit it).
+request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_db_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_db_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is not None and starts:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - starts.pop()
+
+def track_queries(sync_engine):
+    """Count statements and time for the current request (pass AsyncEngine.sync_engine for async engines)"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+track_queries(engine)
+track_queries(async_engine.sync_engine)
 
 # Dependency for FastAPI
 def get_db():
@@ -52,6 +166,14 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Async database session dependency for FastAPI endpoints.
+    Usage: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Helper functions
 def init_db():
     """Initialize database tables (use Alembic in production)"""
@@ -1,11 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from jose import JWTError, jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import threading
+import time
 
-from app.database import get_db
 from app.config import settings
 
 # Security scheme
@@ -32,24 +34,80 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+class TokenCache:
+    """
+    Bounded LRU cache of verified JWT payloads.
+    Entries are keyed by the SHA256 of the token (raw tokens are never kept)
+    and expire together with the token's `exp` claim.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if exp is None or self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(exp), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+# Verified token cache (per worker process)
+token_cache = TokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+
 def verify_token(token: str) -> dict:
-    """Verify and decode JWT token"""
+    """Verify and decode JWT token (served from the verified-token cache when possible)"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    token_cache.set(token, payload)
+    return payload
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> CurrentUser:
     """
     Get current authenticated user from JWT token.
+    Does not open a database session; claims are trusted once the signature is verified.
     Usage: current_user: CurrentUser = Depends(get_current_user)
     """
     token = credentials.credentials
@@ -66,10 +124,14 @@ async def get_current_user(
             detail="Invalid authentication credentials"
         )
     
-    # TODO: Fetch user from database
-    # user = db.query(User).filter(User.user_id == user_id).first()
-    # if not user or not user.is_active:
-    #     raise HTTPException(status_code=401, detail="User not found or inactive")
+    # JWT "sub" is a string claim; user ids are integers in the database
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
     
     return CurrentUser(user_id=user_id, email=email, role=role, org_id=org_id)
 
@@ -77,7 +139,11 @@ async def get_current_active_user(
     current_user: CurrentUser = Depends(get_current_user)
 ) -> CurrentUser:
     """Ensure user is active"""
-    # In production, check user.is_active from database
+    # In production, check user.is_active from database here (opt-in per route,
+    # so plain get_current_user stays DB-free):
+    # user = (await db.execute(select(User).where(User.user_id == current_user.user_id))).scalars().first()
+    # if not user or not user.is_active:
+    #     raise HTTPException(status_code=401, detail="User not found or inactive")
     return current_user
 
 def require_role(required_roles: list[str]):
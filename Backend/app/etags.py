@@ -0,0 +1,72 @@
+"""
+Conditional GET support for tenant-scoped list endpoints.
+
+The ETag is derived from the tenant's version counter for the endpoint's
+scope (app.services.tenant_versions) plus the request's path and query, so
+checking If-None-Match costs one primary-key lookup: a match returns 304
+before the list query runs or the payload is serialized.
+
+The version is read before the list query, so a body is never tagged with
+a version newer than its data. The app version and the response encoding are
+part of the tag: a deploy invalidates every tag, and a gzip and an identity
+body never share one (strong ETags are per representation).
+
+The version is returned too, so a body cached per version
+(app.services.catalog_cache) is keyed by the same counter as its tag.
+
+Usage:
+    etag, not_modified, version = await etags.check(request, db, current_user.org_id, tenant_versions.CONTROLS)
+    if not_modified:
+        return not_modified
+    etags.apply(response, etag)
+"""
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services import tenant_versions
+
+# Revalidate on every use; only the client that fetched it may store the body
+CACHE_CONTROL = "private, no-cache"
+VARY = "Accept-Encoding, Authorization"
+
+
+def make_etag(request: Request, org_id: int, scope: str, version: int) -> str:
+    gzip = "gzip" in request.headers.get("accept-encoding", "")
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    raw = f"{settings.VERSION}|{org_id}|{scope}|{version}|{request.url.path}?{query}|{'gz' if gzip else 'id'}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/"x" matches "x" """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def apply(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.headers["Vary"] = VARY
+
+
+async def check(request: Request, db: AsyncSession, org_id: int, scope: str) -> Tuple[str, Optional[Response], int]:
+    """
+    Returns:
+        tuple: (etag, 304 response or None when the body must be sent, scope version)
+    """
+    version = await tenant_versions.current(db, org_id, scope)
+    etag = make_etag(request, org_id, scope, version)
+    if matches(request.headers.get("if-none-match"), etag):
+        not_modified = Response(status_code=304)
+        apply(not_modified, etag)
+        return etag, not_modified, version
+    return etag, None, version
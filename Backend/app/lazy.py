@@ -0,0 +1,72 @@
+"""
+Deferred imports for optional subsystems.
+
+Client libraries for storage (minio), messaging (kafka), the shared cache
+(redis), search / outbound HTTP (httpx, elasticsearch), AI (langchain) and
+analytics (numpy, scipy) cost several hundred milliseconds to import, and every
+gunicorn worker pays that before it can serve. Modules that need them bind a proxy instead:
+
+    minio = lazy_import("minio")
+    ...
+    client = minio.Minio(...)   # imported here, on first attribute access
+
+`except lazy.Error:` clauses are fine: the expression is only evaluated
+while an exception is propagating. benchmarks/import_report.py fails when
+`import app.main` exceeds its budget, so regressions (a top-level import of
+one of these) show up there.
+"""
+import importlib
+import sys
+import threading
+import types
+from typing import Dict, Tuple
+
+# Subsystem -> top-level packages it loads (reported by loaded_subsystems())
+SUBSYSTEMS: Dict[str, Tuple[str, ...]] = {
+    "storage": ("minio", "boto3"),
+    "messaging": ("kafka", "confluent_kafka"),
+    "cache": ("redis",),
+    "search": ("httpx", "elasticsearch"),
+    "ai": ("langchain", "langchain_community"),
+    "analytics": ("numpy", "scipy"),
+}
+
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module until an attribute is read, then imports it"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with _lock:  # background connectors may race the event loop for the first import
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module itself if already imported, otherwise a LazyModule for it"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def loaded_subsystems() -> Dict[str, bool]:
+    """Which optional subsystems this process has imported so far"""
+    return {
+        subsystem: any(package in sys.modules for package in packages)
+        for subsystem, packages in SUBSYSTEMS.items()
+    }
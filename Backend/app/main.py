@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from prometheus_client import CONTENT_TYPE_LATEST
 
+from app import metrics as app_metrics
 from app.config import settings
 from app.database import engine, Base
-from app.api import frameworks, controls, policies, evidence, approvals
+from app.middleware import MetricsMiddleware
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services.evidence_service import evidence_service
+from app.services.health import health_checker
+from app.services.kafka_producer import kafka_producer
+from app.api import frameworks, controls, policies, evidence, approvals, compliance, scans, search, mappings, impact, risk, simulations
 
 # Lifespan context manager
 @asynccontextmanager
@@ -19,10 +28,16 @@ async def lifespan(app: FastAPI):
     # Create tables (in production, use Alembic migrations)
     # Base.metadata.create_all(bind=engine)
     
+    # Connect in the background: serve immediately, /health/ready reports them until up
+    kafka_producer.start()
+    evidence_service.start()
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down BlackRoses GRC Platform...")
+    evidence_service.stop()
+    await run_in_threadpool(kafka_producer.close)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -41,17 +56,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # GZip Compression
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Request metrics (added last = outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(frameworks.router, prefix="/api/v1/frameworks", tags=["Frameworks"])
 app.include_router(controls.router, prefix="/api/v1/controls", tags=["Controls"])
 app.include_router(policies.router, prefix="/api/v1/policies", tags=["Policies"])
 app.include_router(evidence.router, prefix="/api/v1/evidence", tags=["Evidence"])
 app.include_router(approvals.router, prefix="/api/v1/approvals", tags=["Approvals"])
+app.include_router(compliance.router, prefix="/api/v1/compliance", tags=["Compliance"])
+app.include_router(scans.router, prefix="/api/v1/scans", tags=["Scans"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+app.include_router(mappings.router, prefix="/api/v1/mappings", tags=["Mappings"])
+app.include_router(impact.router, prefix="/api/v1/impact", tags=["Impact"])
+app.include_router(risk.router, prefix="/api/v1/risks", tags=["Risks"])
+app.include_router(simulations.router, prefix="/api/v1/simulations", tags=["Simulations"])
 
 # Root endpoint
 @app.get("/")
@@ -63,15 +89,22 @@ async def root():
         "docs": "/docs"
     }
 
-# Health check
+# Liveness: the process serves requests; no dependency probes
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+# Readiness: probes dependencies (cached for HEALTH_CACHE_TTL), 503 when a critical one is down
+@app.get("/health/ready")
 @app.get("/health")
-async def health_check():
-    return {
-        "status": "healthy",
-        "database": "connected",
-        "kafka": "connected",
-        "elasticsearch": "connected"
-    }
+async def readiness():
+    report = await health_checker.report()
+    return JSONResponse(report, status_code=200 if health_checker.is_ready(report) else 503)
+
+# Prometheus metrics (all workers when PROMETHEUS_MULTIPROC_DIR is set)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(app_metrics.render(), media_type=CONTENT_TYPE_LATEST)
 
 # API Info
 @app.get("/api/v1/info")
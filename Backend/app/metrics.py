@@ -0,0 +1,292 @@
+"""
+Prometheus metrics for the BlackRoses backend.
+Metric objects are module-level singletons; import and update them where the work happens.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py): every
+worker then writes its values to mmap files in that directory and render()
+aggregates all workers, so any worker can answer a scrape.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "blackroses_http_request_duration_seconds",
+    "Request latency by route template (until the last body chunk is sent)",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "blackroses_http_requests_in_flight",
+    "Requests currently being handled",
+    multiprocess_mode="livesum"
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "blackroses_http_request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "blackroses_http_request_db_seconds",
+    "Time spent executing SQL statements per request",
+    ["route"],
+    buckets=LATENCY_BUCKETS
+)
+
+# Kafka producers (request path and outbox relay)
+KAFKA_PRODUCER_PENDING = Gauge(
+    "blackroses_kafka_producer_pending_records",
+    "Records handed to a producer and not yet acknowledged or failed",
+    multiprocess_mode="livesum"
+)
+KAFKA_SEND_SECONDS = Histogram(
+    "blackroses_kafka_send_seconds",
+    "Time from producer.send() to the broker acknowledgement",
+    ["topic", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+# MinIO (EvidenceService)
+MINIO_OPERATION_SECONDS = Histogram(
+    "blackroses_minio_operation_seconds",
+    "MinIO call latency (streamed reads/writes include the transfer)",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the block's duration with outcome="ok" or "error" (exception re-raised)"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - start)
+
+
+def render() -> bytes:
+    """Exposition text for /metrics: this process, or all workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+# Connection pool
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "blackroses_db_pool_checkout_seconds",
+    "Time to obtain a connection from the pool (including connect on a cold slot)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "blackroses_db_pool_wait_seconds",
+    "Time spent waiting for a connection while the pool was saturated",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "blackroses_db_pool_checkout_timeouts_total",
+    "Checkouts that failed with a pool timeout",
+    ["engine"]
+)
+DB_POOL_IN_USE = Gauge(
+    "blackroses_db_pool_connections_in_use",
+    "Connections currently checked out of the pool",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "blackroses_db_pool_overflow_in_use",
+    "Connections open beyond pool_size (max_overflow usage)",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_CAPACITY = Gauge(
+    "blackroses_db_pool_capacity",
+    "Configured pool_size + max_overflow",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+
+# Transactional outbox relay
+OUTBOX_EVENTS_PUBLISHED = Counter(
+    "blackroses_outbox_events_published_total",
+    "Outbox events acknowledged by Kafka",
+    ["topic"]
+)
+OUTBOX_PUBLISH_FAILURES = Counter(
+    "blackroses_outbox_publish_failures_total",
+    "Outbox batches that failed and will be retried"
+)
+OUTBOX_BATCH_SECONDS = Histogram(
+    "blackroses_outbox_batch_seconds",
+    "Time to publish and delete one outbox batch",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+OUTBOX_DELIVERY_LAG_SECONDS = Histogram(
+    "blackroses_outbox_delivery_lag_seconds",
+    "Time from the business transaction writing an event to Kafka acknowledging it",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+# Compliance decision engine
+DECISION_EVENTS_PROCESSED = Counter(
+    "blackroses_decision_events_processed_total",
+    "Scan results consumed by the decision engine",
+    ["outcome"]  # decided, unknown_control, invalid
+)
+DECISION_STATUS_CHANGES = Counter(
+    "blackroses_decision_status_changes_total",
+    "Control status changes written by the decision engine",
+    ["status"]
+)
+DECISION_BATCH_SECONDS = Histogram(
+    "blackroses_decision_batch_seconds",
+    "Time to decide and persist one batch of scan results",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+# Framework / control catalog cache
+CATALOG_CACHE_LOOKUPS = Counter(
+    "blackroses_catalog_cache_lookups_total",
+    "Catalog cache lookups",
+    ["kind", "result"]  # result: local_hit, redis_hit, miss
+)
+CATALOG_CACHE_HIT_RATIO = Gauge(
+    "blackroses_catalog_cache_hit_ratio",
+    "Hits / lookups since the worker started",
+    multiprocess_mode="liveall"
+)
+CATALOG_CACHE_BYTES = Gauge(
+    "blackroses_catalog_cache_bytes",
+    "Bytes held by the local catalog cache tier",
+    multiprocess_mode="livesum"
+)
+CATALOG_CACHE_ENTRIES = Gauge(
+    "blackroses_catalog_cache_entries",
+    "Entries in the local catalog cache tier",
+    multiprocess_mode="livesum"
+)
+
+# Dependency health probes
+DEPENDENCY_UP = Gauge(
+    "blackroses_dependency_up",
+    "1 if the last health probe of the dependency succeeded",
+    ["dependency"],
+    multiprocess_mode="liveall"
+)
+DEPENDENCY_PROBE_SECONDS = Histogram(
+    "blackroses_dependency_probe_seconds",
+    "Health probe latency per dependency (timeouts included)",
+    ["dependency"],
+    buckets=LATENCY_BUCKETS
+)
+
+# Elasticsearch indexing (app.services.search_indexer)
+SEARCH_INDEX_DOCUMENTS = Counter(
+    "blackroses_search_index_documents_total",
+    "Documents sent to Elasticsearch by outcome",
+    ["index", "outcome"]  # indexed, deleted, stale, failed
+)
+SEARCH_INDEX_RETRIES = Counter(
+    "blackroses_search_index_retries_total",
+    "Bulk requests or items resent",
+    ["reason"]  # rejected (429), error (5xx, connection)
+)
+SEARCH_INDEX_BULK_SECONDS = Histogram(
+    "blackroses_search_index_bulk_seconds",
+    "Time to get one _bulk request acknowledged, retries included",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS
+)
+SEARCH_INDEX_LAG_SECONDS = Histogram(
+    "blackroses_search_index_lag_seconds",
+    "Time from a row change to Elasticsearch acknowledging its document (incremental sync)",
+    ["index"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+
+# Control mapping graph (app.services.control_graph)
+CONTROL_GRAPH_BUILDS = Counter(
+    "blackroses_control_graph_builds_total",
+    "Tenant graph builds",
+    ["kind"]  # full (database load), delta (changes applied), compact (CSR rebuilt in memory)
+)
+CONTROL_GRAPH_BUILD_SECONDS = Histogram(
+    "blackroses_control_graph_build_seconds",
+    "Time to load or update a tenant graph",
+    ["kind"],
+    buckets=LATENCY_BUCKETS
+)
+CONTROL_GRAPH_QUERY_SECONDS = Histogram(
+    "blackroses_control_graph_query_seconds",
+    "Graph query time, database lookups excluded",
+    ["query"],  # satisfies, pagerank
+    buckets=LATENCY_BUCKETS
+)
+CONTROL_GRAPH_EDGES = Gauge(
+    "blackroses_control_graph_edges",
+    "Edges held by the cached tenant graphs",
+    multiprocess_mode="livesum"
+)
+
+# Impact analysis (app.services.impact)
+IMPACT_INDEX_BUILDS = Counter(
+    "blackroses_impact_index_builds_total",
+    "Tenant impact index builds",
+    ["kind"]  # full (database load), delta (changed controls reloaded)
+)
+IMPACT_INDEX_BUILD_SECONDS = Histogram(
+    "blackroses_impact_index_build_seconds",
+    "Time to load or update a tenant impact index",
+    ["kind"],
+    buckets=LATENCY_BUCKETS
+)
+IMPACT_QUERY_SECONDS = Histogram(
+    "blackroses_impact_query_seconds",
+    "Cascade computation time, database lookups excluded",
+    buckets=LATENCY_BUCKETS
+)
+
+# Risk engine (app.services.risk_engine)
+RISK_MODEL_BUILDS = Counter(
+    "blackroses_risk_model_builds_total",
+    "Tenant risk model builds",
+    ["kind"]  # full (database load), status (control status changes applied)
+)
+RISK_MODEL_BUILD_SECONDS = Histogram(
+    "blackroses_risk_model_build_seconds",
+    "Time to load or update a tenant risk model",
+    ["kind"],
+    buckets=LATENCY_BUCKETS
+)
+
+# What-if simulation (app.services.simulation)
+SIMULATION_SNAPSHOT_BUILDS = Counter(
+    "blackroses_simulation_snapshot_builds_total",
+    "Tenant compliance snapshot builds",
+    ["kind"]  # full (database load), status (control status changes applied)
+)
+SIMULATION_SECONDS = Histogram(
+    "blackroses_simulation_seconds",
+    "Time to simulate a request's scenarios, snapshot loads excluded",
+    buckets=LATENCY_BUCKETS
+)
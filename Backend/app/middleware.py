@@ -0,0 +1,79 @@
+"""
+Request instrumentation.
+
+MetricsMiddleware is a plain ASGI middleware rather than BaseHTTPMiddleware,
+which would add a task and a response stream copy per request. Per request
+it records:
+
+  - latency by method, route template and status
+  - the in-flight gauge
+  - SQL statement count and time (via app.database.request_db_stats)
+
+Routes are labelled by their template (/api/v1/controls/{control_id}), not
+the raw path, so label cardinality stays bounded; unmatched paths share one
+label.
+"""
+import time
+
+from app.database import request_db_stats
+from app.metrics import (
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._templates = None  # endpoint -> route path, built on first request
+        self._children = {}  # (method, route, status) -> bound metric children (skips labels() per request)
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")  # set by the router on the shared scope dict
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None:
+            self._templates = {
+                route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500  # if the app raises before starting a response
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = request_db_stats.set(db_stats)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            request_db_stats.reset(token)
+            key = (scope["method"], self._route(scope), status)
+            children = self._children.get(key)
+            if children is None:
+                method, route, _ = key
+                children = self._children[key] = (
+                    HTTP_REQUEST_SECONDS.labels(method, route, str(status)),
+                    HTTP_REQUEST_DB_QUERIES.labels(route),
+                    HTTP_REQUEST_DB_SECONDS.labels(route),
+                )
+            children[0].observe(elapsed)
+            children[1].observe(db_stats[0])
+            children[2].observe(db_stats[1])
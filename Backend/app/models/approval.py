@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -35,6 +35,12 @@ class ApprovalQueue(Base):
     control = relationship("Control", back_populates="approvals")
     workflow_steps = relationship("ApprovalWorkflowStep", back_populates="approval", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination (with and without the status filter)
+        Index("ix_approval_queue_org_id_requested_date", "org_id", "requested_date", "step_id"),
+        Index("ix_approval_queue_org_id_status_requested_date", "org_id", "status", "requested_date", "step_id"),
+    )
+
     def __repr__(self):
         return f"<ApprovalQueue step={self.step_id} control={self.control_id} level={self.current_level}/{self.max_levels}>"
 
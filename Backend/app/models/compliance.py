@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from datetime import datetime
+from app.database import Base
+
+class FrameworkComplianceStats(Base):
+    """
+    Materialized per-framework control counts by 3-state status.
+    Maintained incrementally by app.services.compliance_stats; rebuild with
+    `python -m app.services.compliance_stats rebuild`.
+    """
+    __tablename__ = "framework_compliance_stats"
+
+    framework_id = Column(Integer, ForeignKey("frameworks.framework_id"), primary_key=True)
+    org_id = Column(Integer, nullable=False, index=True)
+
+    total = Column(Integer, nullable=False, default=0)
+    implemented = Column(Integer, nullable=False, default=0)
+    partial = Column(Integer, nullable=False, default=0)
+    not_implemented = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<FrameworkComplianceStats framework={self.framework_id} {self.implemented}/{self.partial}/{self.not_implemented}>"
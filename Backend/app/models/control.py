@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Text, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -26,6 +26,10 @@ class Control(Base):
     requires_user_input = Column(Boolean, default=False)
     user_input_description = Column(Text)  # e.g., "Total device count"
     
+    # 3-state compliance status: implemented, partial, not-implemented
+    status = Column(String(20), default='not-implemented', nullable=False, index=True)
+    status_updated_at = Column(DateTime)
+    
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -37,6 +41,11 @@ class Control(Base):
     policy_links = relationship("PolicyControlLink", back_populates="control", cascade="all, delete-orphan")
     approvals = relationship("ApprovalQueue", back_populates="control", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_controls_org_id_control_id", "org_id", "control_id"),  # keyset pagination
+        Index("ix_controls_updated_at_control_id", "updated_at", "control_id"),  # search index sync
+    )
+
     def __repr__(self):
         return f"<Control {self.internal_code} ({self.original_code}): {self.title}>"
 
@@ -76,3 +85,51 @@ class ControlMapping(Base):
 
     def __repr__(self):
         return f"<ControlMapping {self.source_control_id} -> {self.target_control_id}>"
+
+
+class ControlMappingChange(Base):
+    """
+    Mapping created, updated or deleted under a tenant "mappings" version.
+    Cached mapping graphs (app.services.control_graph) older than a version reload just these mappings.
+    """
+    __tablename__ = "control_mapping_changes"
+
+    org_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, primary_key=True)
+    mapping_id = Column(Integer, primary_key=True)  # no foreign key: deleted mappings are logged too
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ControlMappingChange org={self.org_id} v{self.version} mapping={self.mapping_id}>"
+
+
+class ControlLinkChange(Base):
+    """
+    Control whose policy or risk links changed under a tenant "links" version.
+    Cached impact indexes (app.services.impact) older than a version reload just these controls' links.
+    """
+    __tablename__ = "control_link_changes"
+
+    org_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, primary_key=True)
+    control_id = Column(Integer, primary_key=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ControlLinkChange org={self.org_id} v{self.version} control={self.control_id}>"
+
+
+class ControlStatusChange(Base):
+    """
+    Control created, or whose status or is_active changed, under a tenant "controls" version.
+    Cached risk models and simulation snapshots older than a version re-read just these controls.
+    """
+    __tablename__ = "control_status_changes"
+
+    org_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, primary_key=True)
+    control_id = Column(Integer, primary_key=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ControlStatusChange org={self.org_id} v{self.version} control={self.control_id}>"
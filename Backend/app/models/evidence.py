@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, BigInteger, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -31,10 +31,63 @@ class EvidenceFile(Base):
     reviewed_by = Column(Integer)  # user_id
     reviewed_date = Column(DateTime)
     
+    # Integrity scrubbing (app.services.evidence_scrubber)
+    integrity_status = Column(String(20))  # ok, mismatch, missing, error
+    last_verified_at = Column(DateTime)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # search index sync watermark
 
     # Relationships
     control = relationship("Control", back_populates="evidences")
 
+    __table_args__ = (
+        Index("ix_evidence_files_org_id_uploaded_date", "org_id", "uploaded_date", "evidence_id"),  # keyset pagination
+        Index("ix_evidence_files_org_id_evidence_id", "org_id", "evidence_id"),  # scrubber batches
+        Index("ix_evidence_files_org_id_file_hash", "org_id", "file_hash"),  # content-addressed references
+        Index("ix_evidence_files_updated_at_evidence_id", "updated_at", "evidence_id"),  # search index sync
+    )
+
     def __repr__(self):
         return f"<EvidenceFile {self.file_name} ({self.source}) for control {self.control_id}>"
+
+
+
+class EvidenceBlob(Base):
+    """
+    One stored object per distinct file content per tenant.
+    ref_count is the number of EvidenceFile rows pointing at it (maintained by
+    app.services.evidence_blobs); objects at zero are removed by its `gc` command.
+    """
+    __tablename__ = "evidence_blobs"
+
+    org_id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), primary_key=True)
+    object_path = Column(String(500), nullable=False)  # MinIO path
+    size = Column(BigInteger)  # bytes
+    ref_count = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<EvidenceBlob {self.sha256[:16]} org={self.org_id} refs={self.ref_count}>"
+
+
+class EvidenceScrubCheckpoint(Base):
+    """Per-tenant progress of the evidence integrity scrubber (resume point)"""
+    __tablename__ = "evidence_scrub_checkpoints"
+
+    org_id = Column(Integer, primary_key=True)
+    last_evidence_id = Column(Integer, nullable=False, default=0)  # highest evidence_id verified in this pass
+    
+    objects_verified = Column(Integer, nullable=False, default=0)
+    bytes_verified = Column(BigInteger, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime)  # null while a pass is in progress
+
+    def __repr__(self):
+        return f"<EvidenceScrubCheckpoint org={self.org_id} last={self.last_evidence_id}>"
@@ -1,20 +1,36 @@
 from app.models.framework import Framework
-from app.models.control import Control, ControlGroup, ControlMapping
+from app.models.control import Control, ControlGroup, ControlMapping, ControlMappingChange, ControlLinkChange, ControlStatusChange
 from app.models.policy import Policy, PolicyControlLink
-from app.models.evidence import EvidenceFile
+from app.models.evidence import EvidenceFile, EvidenceBlob, EvidenceScrubCheckpoint
 from app.models.approval import ApprovalQueue, ApprovalWorkflowStep
 from app.models.risk import Risk, RiskControl
+from app.models.compliance import FrameworkComplianceStats
+from app.models.outbox import OutboxEvent
+from app.models.scan import ControlScanResult
+from app.models.tenant_version import TenantVersion
+from app.models.search_index import SearchIndexWatermark, SearchIndexTombstone
 
 __all__ = [
     "Framework",
     "Control",
     "ControlGroup",
     "ControlMapping",
+    "ControlMappingChange",
+    "ControlLinkChange",
+    "ControlStatusChange",
     "Policy",
     "PolicyControlLink",
     "EvidenceFile",
+    "EvidenceBlob",
+    "EvidenceScrubCheckpoint",
     "ApprovalQueue",
     "ApprovalWorkflowStep",
     "Risk",
-    "RiskControl"
+    "RiskControl",
+    "FrameworkComplianceStats",
+    "OutboxEvent",
+    "ControlScanResult",
+    "TenantVersion",
+    "SearchIndexWatermark",
+    "SearchIndexTombstone"
 ]
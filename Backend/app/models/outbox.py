@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON
+from datetime import datetime
+from app.database import Base
+
+class OutboxEvent(Base):
+    """
+    Kafka event written in the same transaction as the change it describes.
+    Drained in event_id order and deleted once acknowledged by app.services.outbox.
+    """
+    __tablename__ = "outbox_events"
+    # Consumers dedupe on event_id, so ids must never be reused; without AUTOINCREMENT
+    # sqlite hands out max(rowid)+1 again once the relay has drained the table
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    event_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)  # sqlite only autoincrements INTEGER
+    topic = Column(String(100), nullable=False)
+    event_key = Column(String(255))  # partition key, e.g. "{org_id}:{resource_type}:{resource_id}"
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.event_id} {self.topic} key={self.event_key}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -29,6 +29,10 @@ class Policy(Base):
     # Relationships
     control_links = relationship("PolicyControlLink", back_populates="policy", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_policies_org_id_policy_id", "org_id", "policy_id"),  # keyset pagination
+    )
+
     def __repr__(self):
         return f"<Policy {self.policy_name} v{self.version}>"
 
@@ -38,7 +42,7 @@ class PolicyControlLink(Base):
 
     link_id = Column(Integer, primary_key=True, index=True)
     policy_id = Column(Integer, ForeignKey("policies.policy_id"), nullable=False)
-    control_id = Column(Integer, ForeignKey("controls.control_id"), nullable=False)
+    control_id = Column(Integer, ForeignKey("controls.control_id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
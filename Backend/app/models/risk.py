@@ -16,7 +16,7 @@ class Risk(Base):
     # Risk assessment
     likelihood = Column(String(20))  # low, medium, high, critical
     impact = Column(String(20))  # low, medium, high, critical
-    risk_score = Column(Float)  # Calculated: likelihood x impact
+    risk_score = Column(Float)  # Calculated: likelihood x impact (python -m app.services.risk_engine rescore)
     
     # Risk status
     status = Column(String(50), default='open', index=True)  # open, mitigating, accepted, closed
@@ -41,7 +41,7 @@ class RiskControl(Base):
 
     risk_control_id = Column(Integer, primary_key=True, index=True)
     risk_id = Column(Integer, ForeignKey("risks.risk_id"), nullable=False)
-    control_id = Column(Integer, ForeignKey("controls.control_id"), nullable=False)
+    control_id = Column(Integer, ForeignKey("controls.control_id"), nullable=False, index=True)
     mitigation_effectiveness = Column(Float)  # 0.0 - 1.0
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
+from datetime import datetime
+from app.database import Base
+
+class ControlScanResult(Base):
+    """
+    Latest automated scan outcome per control.
+    Upserted in bulk by app.services.scan_ingest; older scans never overwrite newer ones.
+    """
+    __tablename__ = "control_scan_results"
+
+    control_id = Column(Integer, ForeignKey("controls.control_id", ondelete="CASCADE"), primary_key=True)
+    org_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(20), nullable=False)  # as reported by the agent: pass, fail, error, ...
+    passed = Column(Boolean, nullable=False)
+    details = Column(JSON)
+    agent_id = Column(String(100))
+    scan_timestamp = Column(DateTime, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ControlScanResult control={self.control_id} {self.status} at {self.scan_timestamp}>"
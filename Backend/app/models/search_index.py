@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from datetime import datetime
+from app.database import Base
+
+class SearchIndexWatermark(Base):
+    """
+    Incremental sync position of one Elasticsearch index (app.services.search_indexer):
+    rows with (updated_at, id) above the watermark have not been indexed yet.
+    """
+    __tablename__ = "search_index_watermarks"
+
+    index_name = Column(String(100), primary_key=True)  # alias, e.g. compliance-controls
+    last_updated_at = Column(DateTime)  # null until the first full reindex or sync
+    last_id = Column(Integer, nullable=False, default=0)
+    documents_indexed = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SearchIndexWatermark {self.index_name} ({self.last_updated_at}, {self.last_id})>"
+
+
+class SearchIndexTombstone(Base):
+    """
+    Hard-deleted row whose document must leave the index.
+    Written in the deleting transaction, removed once Elasticsearch acknowledges the delete.
+    """
+    __tablename__ = "search_index_tombstones"
+    __table_args__ = (
+        Index("ix_search_index_tombstones_index_name_tombstone_id", "index_name", "tombstone_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    tombstone_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)  # sqlite only autoincrements INTEGER
+    index_name = Column(String(100), nullable=False)
+    document_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SearchIndexTombstone {self.index_name}/{self.document_id}>"
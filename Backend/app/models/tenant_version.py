@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+class TenantVersion(Base):
+    """
+    Per-tenant change counter for the data behind a list endpoint.
+    Bumped in the same transaction as the write; ETags are derived from it (app.etags).
+    """
+    __tablename__ = "tenant_versions"
+
+    org_id = Column(Integer, primary_key=True)
+    scope = Column(String(50), primary_key=True)  # frameworks, controls, policies, mappings, links
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<TenantVersion org={self.org_id} {self.scope}={self.version}>"
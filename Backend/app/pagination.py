@@ -0,0 +1,100 @@
+"""
+Keyset (cursor) pagination helpers.
+
+List endpoints order on a unique column tuple, fetch limit + 1 rows and hand
+the client an opaque cursor for the next page in the X-Next-Cursor header.
+Page N costs the same as page 1 because the database seeks straight into the
+matching composite index instead of skipping N * limit rows.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, Select, literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode key values as an opaque, URL-safe cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+class Keyset:
+    """
+    Keyset ordering over a tuple of columns (last column must make the tuple unique).
+
+    `pinned` is the number of leading columns the query already fixes with an
+    equality filter (e.g. org_id). They still drive ORDER BY and index choice
+    but are left out of the seek predicate: PostgreSQL cannot position a btree
+    scan on a row comparison that overlaps an equality key, and would walk
+    the tenant's whole index range instead.
+
+    Usage:
+        keyset = Keyset(Control.org_id, Control.control_id, pinned=1)
+        rows = (await db.execute(keyset.apply(query, cursor, limit))).scalars().all()
+        return keyset.finalize(rows, limit, response)
+    """
+
+    def __init__(self, *columns, descending: bool = False, pinned: int = 0):
+        self.columns = columns
+        self.descending = descending
+        self.pinned = pinned
+
+    def _parse(self, values: List[Any]) -> List[Any]:
+        if len(values) != len(self.columns):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        parsed = []
+        for column, value in zip(self.columns, values):
+            if value is not None and isinstance(column.type, DateTime):
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+            parsed.append(value)
+        return parsed
+
+    def _after(self, values: List[Any]):
+        # Row-value comparison: PostgreSQL turns (a, b) > (x, y) into a single
+        # index range condition on a matching composite index.
+        columns = self.columns[self.pinned:]
+        values = values[self.pinned:]
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key = tuple_(*columns)
+            bound = tuple_(*[literal(v, type_=c.type) for c, v in zip(columns, values)])
+        return key < bound if self.descending else key > bound
+
+    def apply(self, query: Select, cursor: Optional[str], limit: int) -> Select:
+        """Add the seek predicate, ordering and limit + 1 probe row"""
+        if cursor:
+            query = query.where(self._after(self._parse(decode_cursor(cursor))))
+        order = [c.desc() if self.descending else c.asc() for c in self.columns]
+        return query.order_by(*order).limit(limit + 1)
+
+    def cursor_for(self, row: Any) -> str:
+        return encode_cursor([getattr(row, column.key) for column in self.columns])
+
+    def finalize(self, rows: Sequence[Any], limit: int, response: Response) -> List[Any]:
+        """Trim the probe row and publish the next-page cursor"""
+        rows = list(rows)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = self.cursor_for(rows[-1])
+        return rows
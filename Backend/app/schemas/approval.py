@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class ApprovalResponse(BaseModel):
+    step_id: int
+    org_id: int
+    control_id: int
+    proposed_status: str = Field(..., description="implemented, partial, not-implemented")
+    current_level: int
+    max_levels: int
+    requested_by: int
+    requested_date: datetime
+    due_date: Optional[datetime] = None
+    status: str = Field(..., description="pending, approved, rejected")
+    approved_by: Optional[int] = None
+    approval_date: Optional[datetime] = None
+    comments: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ApprovalWorkflowStepResponse(BaseModel):
+    workflow_step_id: int
+    approval_queue_id: int
+    level: int
+    approver_role: Optional[str] = None
+    approver_user_id: Optional[int] = None
+    decision: Optional[str] = None
+    decision_date: Optional[datetime] = None
+    comments: Optional[str] = None
+
+    class Config:
+        from_attributes = True
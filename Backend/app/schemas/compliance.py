@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class FrameworkComplianceStats(BaseModel):
+    framework_id: int
+    framework_code: str
+    framework_name: str
+    total: int = 0
+    implemented: int = 0
+    partial: int = 0
+    not_implemented: int = 0
+    compliance_score: float = Field(0.0, description="(implemented + 0.5 * partial) / total * 100")
+
+class ComplianceSummary(BaseModel):
+    org_id: int
+    total_controls: int = 0
+    implemented: int = 0
+    partial: int = 0
+    not_implemented: int = 0
+    compliance_score: float = 0.0
+    frameworks: List[FrameworkComplianceStats] = []
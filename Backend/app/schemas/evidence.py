@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class EvidenceLinkRequest(BaseModel):
+    """Attach already-stored content to a control without re-uploading it"""
+    control_id: str = Field(..., description="Control internal code (BR-001)")
+    file_hash: str = Field(..., min_length=64, max_length=64, description="SHA256 of the file contents")
+    file_name: str = Field(..., max_length=255)
+    notes: Optional[str] = None
+    compliance_period: Optional[str] = None
+
+class EvidenceResponse(BaseModel):
+    evidence_id: int
+    org_id: int
+    control_id: int
+    file_name: str
+    file_path: str = Field(..., description="MinIO object path")
+    file_hash: str = Field(..., description="SHA256 of the file contents")
+    file_type: Optional[str] = None
+    file_size: Optional[int] = None
+    source: str = Field(..., description="automated or manual")
+    uploaded_by: Optional[int] = None
+    uploaded_date: datetime
+    compliance_period: Optional[str] = None
+    notes: Optional[str] = None
+    status: Optional[str] = None
+    reviewed_by: Optional[int] = None
+    reviewed_date: Optional[datetime] = None
+    integrity_status: Optional[str] = Field(None, description="Last scrubber result: ok, mismatch, missing or error")
+    last_verified_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.mapping import MappedControl
+
+class ImpactControl(BaseModel):
+    control_id: int
+    internal_code: str
+    title: Optional[str]
+    framework_id: Optional[int]
+    status: Optional[str]
+
+class AffectedFramework(BaseModel):
+    framework_id: int
+    framework_code: str
+    framework_name: str
+    controls: int = Field(..., description="Affected controls in this framework")
+
+class AffectedPolicy(BaseModel):
+    policy_id: int
+    policy_name: str
+    owner: Optional[str]
+    via: List[str] = Field(..., description="Internal codes of the affected controls linked to the policy")
+
+class AffectedRisk(BaseModel):
+    risk_id: int
+    risk_title: str
+    status: Optional[str]
+    likelihood: Optional[str]
+    impact: Optional[str]
+    risk_score: Optional[float]
+    via: List[str] = Field(..., description="Internal codes of the affected controls mitigating the risk")
+    mitigation_effectiveness: Optional[float] = Field(None, description="Highest effectiveness among those links")
+
+class ImpactResponse(BaseModel):
+    control: ImpactControl
+    frameworks: List[AffectedFramework]
+    policies: List[AffectedPolicy]
+    risks: List[AffectedRisk]
+    mapped_controls: List[MappedControl]
+    took_ms: float
@@ -1,6 +1,14 @@
 from app.schemas.framework import FrameworkCreate, FrameworkUpdate, FrameworkResponse
 from app.schemas.control import ControlCreate, ControlUpdate, ControlResponse
 from app.schemas.policy import PolicyCreate, PolicyUpdate, PolicyResponse
+from app.schemas.evidence import EvidenceLinkRequest, EvidenceResponse
+from app.schemas.approval import ApprovalResponse, ApprovalWorkflowStepResponse
+from app.schemas.scan import ScanIngestResponse
+from app.schemas.search import SearchHit, SearchResponse
+from app.schemas.mapping import MappingCreate, MappingUpdate, MappingResponse, SatisfiesResponse, CentralityResponse
+from app.schemas.impact import ImpactResponse
+from app.schemas.risk import RiskHeatmapResponse, TopRisksResponse
+from app.schemas.simulation import SimulationRequest, SimulationResponse
 
 __all__ = [
     "FrameworkCreate",
@@ -11,5 +19,22 @@ __all__ = [
     "ControlResponse",
     "PolicyCreate",
     "PolicyUpdate",
-    "PolicyResponse"
+    "PolicyResponse",
+    "EvidenceLinkRequest",
+    "EvidenceResponse",
+    "ApprovalResponse",
+    "ApprovalWorkflowStepResponse",
+    "ScanIngestResponse",
+    "SearchHit",
+    "SearchResponse",
+    "MappingCreate",
+    "MappingUpdate",
+    "MappingResponse",
+    "SatisfiesResponse",
+    "CentralityResponse",
+    "ImpactResponse",
+    "RiskHeatmapResponse",
+    "TopRisksResponse",
+    "SimulationRequest",
+    "SimulationResponse"
 ]
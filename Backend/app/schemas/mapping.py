@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
+from datetime import datetime
+
+MAPPING_TYPES = ['equivalent', 'related', 'parent', 'child']
+
+def _validate_mapping_type(v):
+    if v is not None and v.lower() not in MAPPING_TYPES:
+        raise ValueError(f'Mapping type must be one of: {", ".join(MAPPING_TYPES)}')
+    return v.lower() if v is not None else v
+
+class MappingCreate(BaseModel):
+    source_control_id: int
+    target_control_id: int
+    mapping_type: str = Field('related', description="equivalent, related, parent, child")
+    confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+
+    _mapping_type = validator('mapping_type', allow_reuse=True)(_validate_mapping_type)
+
+class MappingUpdate(BaseModel):
+    mapping_type: Optional[str] = None
+    confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+
+    _mapping_type = validator('mapping_type', allow_reuse=True)(_validate_mapping_type)
+
+class MappingResponse(BaseModel):
+    mapping_id: int
+    org_id: int
+    source_control_id: int
+    target_control_id: int
+    mapping_type: Optional[str]
+    confidence_score: Optional[float]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class MappedControl(BaseModel):
+    control_id: int
+    internal_code: str
+    original_code: str
+    title: str
+    framework_id: int
+    confidence: float = Field(..., description="Product of the confidences along the best path")
+    hops: int
+    path: List[str] = Field(..., description="Internal codes from the queried control to this one")
+
+class SatisfiesResponse(BaseModel):
+    control: str
+    satisfies: List[MappedControl]
+    took_ms: float
+
+class CentralControl(BaseModel):
+    control_id: int
+    internal_code: str
+    original_code: str
+    title: str
+    framework_id: int
+    score: float = Field(..., description="PageRank over confidence-weighted mappings")
+
+class CentralityResponse(BaseModel):
+    controls: List[CentralControl]
+    took_ms: float
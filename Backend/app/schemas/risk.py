@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+class HeatmapCell(BaseModel):
+    likelihood: str
+    impact: str
+    risks: int = Field(..., description="Open risks rated at this likelihood and impact")
+    inherent_score: float = Field(..., description="Likelihood x impact (1 - 16)")
+    residual_avg: float = Field(..., description="Mean residual score after control mitigation")
+    residual_max: float
+
+class RiskHeatmapResponse(BaseModel):
+    cells: List[HeatmapCell]
+    inherent_ratings: Dict[str, int] = Field(..., description="Open risks per inherent rating (low - critical)")
+    residual_ratings: Dict[str, int] = Field(..., description="Open risks per residual rating (low - critical)")
+    open_risks: int
+    unscored: int = Field(..., description="Open risks without a likelihood or impact")
+    inherent_total: float
+    residual_total: float
+    reduction_pct: float = Field(..., description="Share of inherent risk removed by implemented controls")
+    took_ms: float
+
+class ResidualRisk(BaseModel):
+    risk_id: int
+    risk_title: str
+    category: Optional[str]
+    status: Optional[str]
+    owner: Optional[str]
+    likelihood: Optional[str]
+    impact: Optional[str]
+    inherent_score: float
+    residual_score: float
+    residual_rating: str
+    reduction_pct: float
+    controls: int = Field(..., description="Linked controls")
+    mitigating_controls: int = Field(..., description="Linked controls implemented or partially implemented")
+
+class TopRisksResponse(BaseModel):
+    risks: List[ResidualRisk]
+    took_ms: float
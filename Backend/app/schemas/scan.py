@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List
+
+class ScanIngestError(BaseModel):
+    line: int
+    error: str
+
+class ScanIngestResponse(BaseModel):
+    received: int
+    accepted: int
+    rejected: int
+    unknown_controls: int
+    stale: int = 0  # older than the stored result for the control
+    status_changes: int = 0
+    elapsed_ms: float
+    errors: List[ScanIngestError] = []
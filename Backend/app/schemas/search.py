@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SearchHit(BaseModel):
+    kind: str  # control, policy
+    id: int
+    code: Optional[str] = None  # internal_code for controls
+    title: str
+    rank: float
+    snippet: Optional[str] = None  # matched terms wrapped in <mark>
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: List[SearchHit]
+    took_ms: float
@@ -0,0 +1,79 @@
+from pydantic import BaseModel, Field, validator
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+class ProposedChange(BaseModel):
+    control: str = Field(..., description="Internal code of the control (BR-001)")
+    status: Optional[str] = Field(None, description="Proposed status: implemented, partial, not-implemented")
+    policy_enforced: Optional[bool] = Field(None, description="Proposed policy signal (status derived as the decision engine does)")
+    scan_passed: Optional[bool] = Field(None, description="Proposed scan signal (status derived as the decision engine does)")
+
+    @validator('status')
+    def validate_status(cls, v):
+        allowed = ['implemented', 'partial', 'not-implemented']
+        if v is not None and v not in allowed:
+            raise ValueError(f'Status must be one of: {", ".join(allowed)}')
+        return v
+
+class ScenarioRequest(BaseModel):
+    name: Optional[str] = Field(None, max_length=255)
+    changes: List[ProposedChange] = Field(..., min_length=1, max_length=settings.SIMULATION_MAX_PROPOSED)
+    follow_mappings: bool = Field(default=False, description="Raise controls the upgraded controls satisfy through mappings")
+    min_confidence: float = Field(0.8, ge=0.0, le=1.0, description="Minimum path confidence of mapped controls")
+    max_depth: int = Field(2, ge=1, le=settings.CONTROL_GRAPH_MAX_DEPTH, description="Mapping hops to follow")
+
+class SimulationRequest(BaseModel):
+    scenarios: List[ScenarioRequest] = Field(..., min_length=1, max_length=settings.SIMULATION_MAX_SCENARIOS)
+    framework_codes: Optional[List[str]] = Field(None, description="Frameworks to report (default: all active)")
+    top_risks: int = Field(10, ge=0, le=100, description="Risks whose residual risk moves most, per scenario")
+
+class ControlOutcome(BaseModel):
+    control_id: int
+    internal_code: str
+    framework_id: Optional[int]
+    status_before: str
+    status_after: str
+    source: str = Field(..., description="proposed, or mapping (satisfied by an upgraded control)")
+    confidence: Optional[float] = Field(None, description="Path confidence for mapped controls")
+
+class FrameworkOutcome(BaseModel):
+    framework_id: int
+    framework_code: str
+    framework_name: str
+    total: int
+    implemented: int
+    partial: int
+    not_implemented: int
+    compliance_score: float
+    baseline_score: float
+    delta: float
+
+class RiskOutcome(BaseModel):
+    risk_id: int
+    risk_title: str
+    residual_before: float
+    residual_after: float
+
+class RiskSummary(BaseModel):
+    inherent_total: float
+    residual_before: float
+    residual_after: float
+    reduction_pct: float = Field(..., description="Share of inherent risk removed after the changes")
+    residual_ratings_before: Dict[str, int]
+    residual_ratings_after: Dict[str, int]
+
+class ScenarioResult(BaseModel):
+    name: Optional[str]
+    controls: List[ControlOutcome] = Field(..., description="Controls whose status changes")
+    unknown_controls: List[str]
+    frameworks: List[FrameworkOutcome]
+    compliance_score: float = Field(..., description="Org-wide score after the changes")
+    baseline_score: float
+    delta: float
+    risk: Optional[RiskSummary]
+    risks: List[RiskOutcome]
+
+class SimulationResponse(BaseModel):
+    scenarios: List[ScenarioResult]
+    took_ms: float
@@ -1,4 +1,18 @@
-from app.services.kafka_producer import KafkaProducerService
-from app.services.evidence_service import EvidenceService
+"""
+Service classes are re-exported lazily (PEP 562) so importing any
+app.services module does not load the Kafka and MinIO client libraries.
+"""
+import importlib
+
+_EXPORTS = {
+    "KafkaProducerService": "app.services.kafka_producer",
+    "EvidenceService": "app.services.evidence_service",
+}
 
 __all__ = ["KafkaProducerService", "EvidenceService"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
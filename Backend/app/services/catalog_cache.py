@@ -0,0 +1,251 @@
+"""
+Per-tenant read-through cache for the framework / control catalog.
+
+Catalog rows (frameworks, control definitions, control groups) change rarely
+but every UI page re-reads them. Responses are cached as serialized JSON
+bytes keyed by (org_id, key):
+
+  local  - in-process LRU bounded by CATALOG_CACHE_MAX_BYTES with a TTL
+  redis  - optional shared tier (CATALOG_CACHE_REDIS_URL): one hash per org,
+           so invalidating a tenant is a single DEL for every worker
+
+Every key ends with the tenant's version counter for the data it holds
+(app.services.tenant_versions, read from the database before the load, e.g.
+"frameworks:True:v42"). Writers bump that counter in their transaction, so
+once a write commits every worker looks up a new key: an entry is never
+served after its data changed, whatever tier or worker stored it, and a
+load that raced a write at most stores the newer rows under the old
+version. `invalidate(org_id)` after committing only frees the superseded
+entries early; otherwise they age out by TTL and LRU.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import (
+    CATALOG_CACHE_BYTES,
+    CATALOG_CACHE_ENTRIES,
+    CATALOG_CACHE_HIT_RATIO,
+    CATALOG_CACHE_LOOKUPS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Only loaded when CATALOG_CACHE_REDIS_URL is set
+aioredis = lazy_import("redis.asyncio")
+redis_exceptions = lazy_import("redis.exceptions")
+
+REDIS_KEY_PREFIX = "blackroses:catalog:"
+REDIS_RETRY_AFTER = 5.0  # seconds to skip Redis after an error
+
+# Per-entry bookkeeping on top of the payload (key tuple, OrderedDict node, float)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class CatalogCache:
+    """
+    Two-tier cache of serialized catalog responses.
+
+    Values are bytes (the JSON body), so the local tier's footprint is
+    measured rather than estimated and the same value can be stored in Redis.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300,
+        redis_url: Optional[str] = None,
+        local_ttl: float = 5
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.redis_url = redis_url
+        # With a shared tier, keep local copies short-lived (other workers invalidate Redis only)
+        self.local_ttl = min(local_ttl, ttl) if redis_url else ttl
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, bytes]]" = OrderedDict()
+        self._org_keys: Dict[int, Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or bool(self.redis_url)
+
+    # Local tier
+
+    def _local_get(self, org_id: int, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get((org_id, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove((org_id, key))
+                return None
+            self._entries.move_to_end((org_id, key))
+            return value
+
+    def _local_set(self, org_id: int, key: str, value: bytes):
+        size = len(value) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove((org_id, key))
+            self._entries[(org_id, key)] = (time.monotonic() + self.local_ttl, value)
+            self._org_keys.setdefault(org_id, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        self._update_size_metrics()
+
+    def _remove(self, entry_key: Tuple[int, str]):
+        """Drop one local entry (caller holds the lock)"""
+        entry = self._entries.pop(entry_key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry[1]) + ENTRY_OVERHEAD_BYTES
+        org_id, key = entry_key
+        keys = self._org_keys.get(org_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._org_keys[org_id]
+
+    def _update_size_metrics(self):
+        CATALOG_CACHE_BYTES.set(self._bytes)
+        CATALOG_CACHE_ENTRIES.set(len(self._entries))
+
+    # Redis tier
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url, socket_connect_timeout=0.25, socket_timeout=0.25
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        logger.warning(f"Catalog cache Redis unavailable, using the database: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    async def _redis_get(self, org_id: int, key: str) -> Optional[bytes]:
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            return await client.hget(f"{REDIS_KEY_PREFIX}{org_id}", key)
+        except (redis_exceptions.RedisError, OSError, asyncio.TimeoutError) as e:
+            self._redis_failed(e)
+            return None
+
+    async def _redis_set(self, org_id: int, key: str, value: bytes):
+        client = self._client()
+        if client is None:
+            return
+        name = f"{REDIS_KEY_PREFIX}{org_id}"
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.hset(name, key, value)
+                # TTL counts from the first entry after an invalidation, not the latest write
+                pipe.expire(name, int(self.ttl), nx=True)
+                await pipe.execute()
+        except (redis_exceptions.RedisError, OSError, asyncio.TimeoutError) as e:
+            self._redis_failed(e)
+
+    # Public API
+
+    def _record(self, kind: str, result: str):
+        CATALOG_CACHE_LOOKUPS.labels(kind=kind, result=result).inc()
+        if result == "miss":
+            self.misses += 1
+        else:
+            self.hits += 1
+        CATALOG_CACHE_HIT_RATIO.set(self.hits / (self.hits + self.misses))
+
+    async def get(self, org_id: int, key: str) -> Optional[bytes]:
+        kind = key.split(":", 1)[0]
+        value = self._local_get(org_id, key) if self.max_bytes > 0 else None
+        if value is not None:
+            self._record(kind, "local_hit")
+            return value
+        value = await self._redis_get(org_id, key)
+        if value is not None:
+            self._record(kind, "redis_hit")
+            if self.max_bytes > 0:
+                self._local_set(org_id, key, value)
+            return value
+        self._record(kind, "miss")
+        return None
+
+    async def set(self, org_id: int, key: str, value: bytes):
+        if self.max_bytes > 0:
+            self._local_set(org_id, key, value)
+        await self._redis_set(org_id, key, value)
+
+    async def get_or_load(
+        self,
+        org_id: int,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[bytes]]]
+    ) -> Optional[bytes]:
+        """
+        Read through: return the cached bytes, or await `loader` and cache its
+        result. A loader returning None (not found) is not cached. `key` must
+        end with the tenant version the loader's rows are at least as new as.
+        """
+        if not self.enabled:
+            return await loader()
+        value = await self.get(org_id, key)
+        if value is None:
+            value = await loader()
+            if value is not None:
+                await self.set(org_id, key, value)
+        return value
+
+    async def invalidate(self, org_id: int):
+        """Drop every cached catalog response for a tenant (call after commit)"""
+        with self._lock:
+            for key in list(self._org_keys.get(org_id, ())):
+                self._remove((org_id, key))
+        self._update_size_metrics()
+        client = self._client()
+        if client is not None:
+            try:
+                await client.delete(f"{REDIS_KEY_PREFIX}{org_id}")
+            except (redis_exceptions.RedisError, OSError, asyncio.TimeoutError) as e:
+                self._redis_failed(e)
+
+    def clear(self):
+        """Drop the local tier (Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+            self._org_keys.clear()
+            self._bytes = 0
+        self._update_size_metrics()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Per worker process
+catalog_cache = CatalogCache(
+    max_bytes=settings.CATALOG_CACHE_MAX_BYTES,
+    ttl=settings.CATALOG_CACHE_TTL,
+    redis_url=settings.CATALOG_CACHE_REDIS_URL,
+    local_ttl=settings.CATALOG_CACHE_LOCAL_TTL
+)
@@ -0,0 +1,263 @@
+"""
+Materialized compliance statistics.
+
+Per-framework control counts by 3-state status live in
+framework_compliance_stats and are adjusted with atomic increments in the
+same transaction as the control change, so reads never count controls.
+
+Writers that create a control or change its status or is_active also call
+`record_status_changes`: it bumps the tenant's "controls" version and logs
+the control ids under it (control_status_changes), so the in-memory risk
+models and simulation snapshots re-read just those controls.
+
+Full rebuild:
+    python -m app.services.compliance_stats rebuild [--org-id N]
+"""
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.compliance import FrameworkComplianceStats
+from app.models.control import Control, ControlStatusChange
+from app.models.framework import Framework
+from app.services import tenant_versions
+
+logger = logging.getLogger(__name__)
+
+# 3-state status value -> stats column
+STATUS_COLUMNS = {
+    "implemented": "implemented",
+    "partial": "partial",
+    "not-implemented": "not_implemented",
+}
+DEFAULT_STATUS = "not-implemented"
+
+IN_CHUNK = 5000  # control ids per IN (...) when reading logged changes
+
+
+def compliance_score(implemented: int, partial: int, total: int) -> float:
+    """Implemented controls count fully, partially implemented count half"""
+    if not total:
+        return 0.0
+    return round((implemented + 0.5 * partial) / total * 100, 2)
+
+
+async def create_stats_row(db: AsyncSession, framework: Framework):
+    """Start a framework at zero (call when the framework is created)"""
+    db.add(FrameworkComplianceStats(
+        framework_id=framework.framework_id,
+        org_id=framework.org_id,
+        total=0,
+        implemented=0,
+        partial=0,
+        not_implemented=0
+    ))
+
+
+async def apply_deltas(db: AsyncSession, framework_id: int, org_id: int, deltas: Dict[str, int]):
+    """Atomically adjust counters; falls back to a rebuild when the row is missing"""
+    values = {
+        column: getattr(FrameworkComplianceStats, column) + delta
+        for column, delta in deltas.items() if delta
+    }
+    if not values:
+        return
+    result = await db.execute(
+        update(FrameworkComplianceStats)
+        .where(FrameworkComplianceStats.framework_id == framework_id)
+        .values(**values, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        # Framework predates the stats table: materialize it from current rows
+        await db.flush()
+        await rebuild(db, org_id=org_id, framework_id=framework_id)
+
+
+async def control_added(db: AsyncSession, control: Control):
+    status = control.status or DEFAULT_STATUS
+    await apply_deltas(db, control.framework_id, control.org_id, {"total": 1, STATUS_COLUMNS[status]: 1})
+
+
+async def control_removed(db: AsyncSession, control: Control):
+    status = control.status or DEFAULT_STATUS
+    await apply_deltas(db, control.framework_id, control.org_id, {"total": -1, STATUS_COLUMNS[status]: -1})
+
+
+async def set_control_status(db: AsyncSession, control: Control, new_status: str) -> bool:
+    """
+    Update a control's 3-state status and the framework counters.
+
+    Returns:
+        bool: True if the status actually changed
+    """
+    old_status = control.status or DEFAULT_STATUS
+    if old_status == new_status:
+        return False
+
+    control.status = new_status
+    control.status_updated_at = datetime.utcnow()
+
+    if control.is_active:
+        await apply_deltas(db, control.framework_id, control.org_id, {
+            STATUS_COLUMNS[old_status]: -1,
+            STATUS_COLUMNS[new_status]: 1,
+        })
+    return True
+
+
+async def record_status_changes(db: AsyncSession, org_id: int, control_ids: Iterable[int]):
+    """
+    Bump the tenant's "controls" version and log the controls created or
+    changed under it (the caller commits). Call after the controls' row
+    locks; the version bump then serializes the tenant's status writers, so
+    versions commit in order.
+    """
+    await tenant_versions.bump(db, org_id, tenant_versions.CONTROLS)
+    version = await tenant_versions.current(db, org_id, tenant_versions.CONTROLS)
+    now = datetime.utcnow()
+    for control_id in sorted(set(control_ids)):
+        db.add(ControlStatusChange(org_id=org_id, version=version, control_id=control_id, changed_at=now))
+    await db.execute(delete(ControlStatusChange).where(
+        ControlStatusChange.org_id == org_id,
+        ControlStatusChange.changed_at < now - timedelta(seconds=settings.CONTROL_STATUS_CHANGE_RETENTION)
+    ))
+
+
+async def status_changes(db: AsyncSession, org_id: int, version: int, limit: int) -> Optional[List[tuple]]:
+    """
+    Current (control_id, status, is_active) of the controls logged under a
+    "controls" version newer than `version`, or None when more than `limit`
+    controls changed (the caller reloads in full)
+    """
+    changed = sorted(set((await db.execute(
+        select(ControlStatusChange.control_id).distinct().where(
+            ControlStatusChange.org_id == org_id,
+            ControlStatusChange.version > version
+        )
+    )).scalars()))
+    if len(changed) > limit:
+        return None
+    controls = []
+    for offset in range(0, len(changed), IN_CHUNK):
+        controls.extend((await db.execute(
+            select(Control.control_id, Control.status, Control.is_active)
+            .where(Control.org_id == org_id, Control.control_id.in_(changed[offset:offset + IN_CHUNK]))
+        )).all())
+    return controls
+
+
+async def rebuild(db: AsyncSession, org_id: Optional[int] = None, framework_id: Optional[int] = None) -> int:
+    """
+    Recompute stats rows from the controls table.
+
+    Returns:
+        int: Number of frameworks rebuilt
+    """
+    frameworks_query = select(Framework.framework_id, Framework.org_id)
+    counts_query = (
+        select(Control.framework_id, Control.status, func.count())
+        .where(Control.is_active.is_(True))
+        .group_by(Control.framework_id, Control.status)
+    )
+    if org_id is not None:
+        frameworks_query = frameworks_query.where(Framework.org_id == org_id)
+        counts_query = counts_query.where(Control.org_id == org_id)
+    if framework_id is not None:
+        frameworks_query = frameworks_query.where(Framework.framework_id == framework_id)
+        counts_query = counts_query.where(Control.framework_id == framework_id)
+
+    counts: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for fw_id, status, count in (await db.execute(counts_query)).all():
+        counts[fw_id][STATUS_COLUMNS.get(status or DEFAULT_STATUS, "not_implemented")] += count
+
+    frameworks = (await db.execute(frameworks_query)).all()
+    for fw_id, fw_org_id in frameworks:
+        row = counts.get(fw_id, {})
+        await db.merge(FrameworkComplianceStats(
+            framework_id=fw_id,
+            org_id=fw_org_id,
+            total=sum(row.values()),
+            implemented=row.get("implemented", 0),
+            partial=row.get("partial", 0),
+            not_implemented=row.get("not_implemented", 0)
+        ))
+    await db.flush()
+
+    logger.info(f"Compliance stats rebuilt for {len(frameworks)} frameworks (org={org_id or 'all'})")
+    return len(frameworks)
+
+
+async def get_framework_stats(db: AsyncSession, framework_id: int) -> Optional[FrameworkComplianceStats]:
+    result = await db.execute(
+        select(FrameworkComplianceStats).where(FrameworkComplianceStats.framework_id == framework_id)
+    )
+    return result.scalars().first()
+
+
+async def get_org_summary(db: AsyncSession, org_id: int) -> dict:
+    """Org-wide totals plus per-framework breakdown (active frameworks only)"""
+    result = await db.execute(
+        select(Framework.framework_id, Framework.framework_code, Framework.framework_name, FrameworkComplianceStats)
+        .join(FrameworkComplianceStats, FrameworkComplianceStats.framework_id == Framework.framework_id)
+        .where(Framework.org_id == org_id, Framework.is_active.is_(True))
+        .order_by(Framework.framework_code)
+    )
+
+    frameworks = []
+    totals = {"total": 0, "implemented": 0, "partial": 0, "not_implemented": 0}
+    for fw_id, code, name, stats in result.all():
+        frameworks.append({
+            "framework_id": fw_id,
+            "framework_code": code,
+            "framework_name": name,
+            "total": stats.total,
+            "implemented": stats.implemented,
+            "partial": stats.partial,
+            "not_implemented": stats.not_implemented,
+            "compliance_score": compliance_score(stats.implemented, stats.partial, stats.total)
+        })
+        for key in totals:
+            totals[key] += getattr(stats, key)
+
+    return {
+        "org_id": org_id,
+        "total_controls": totals["total"],
+        "implemented": totals["implemented"],
+        "partial": totals["partial"],
+        "not_implemented": totals["not_implemented"],
+        "compliance_score": compliance_score(totals["implemented"], totals["partial"], totals["total"]),
+        "frameworks": frameworks
+    }
+
+
+async def _rebuild_command(org_id: Optional[int]):
+    from app.database import AsyncSessionLocal
+    import app.models.init  # noqa: F401  (register all mappers)
+
+    async with AsyncSessionLocal() as db:
+        count = await rebuild(db, org_id=org_id)
+        await db.commit()
+    print(f"Rebuilt compliance stats for {count} frameworks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compliance statistics maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recompute stats from the controls table")
+    rebuild_parser.add_argument("--org-id", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        asyncio.run(_rebuild_command(args.org_id))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,67 @@
+"""
+Background connection with retry for external clients (Kafka, MinIO).
+
+Services no longer connect when their module is imported: the API starts a
+BackgroundConnector per client from the lifespan hook, so a worker serves
+requests (and health checks report the dependency down) while a slow or
+absent broker is retried with capped exponential backoff. CLIs and jobs
+call the service's connect() once instead.
+"""
+import logging
+import threading
+from typing import Callable, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundConnector:
+    """
+    Calls `connect` from a daemon thread until it returns True.
+
+    `connect` makes one attempt, sets the client on success and returns
+    whether it succeeded (logging its own failure).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], bool],
+        initial_delay: Optional[float] = None,
+        max_delay: Optional[float] = None
+    ):
+        self.name = name
+        self._connect = connect
+        self.initial_delay = initial_delay if initial_delay is not None else settings.CLIENT_CONNECT_RETRY_INITIAL
+        self.max_delay = max_delay if max_delay is not None else settings.CLIENT_CONNECT_RETRY_MAX
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.attempts = 0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"connect-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        delay = self.initial_delay
+        while not self._stop.is_set():
+            self.attempts += 1
+            if self._connect():
+                return
+            logger.info(f"{self.name}: retrying connection in {delay:.1f}s")
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop retrying; an attempt in progress is waited for up to `timeout`"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
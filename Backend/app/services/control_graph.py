@@ -0,0 +1,500 @@
+"""
+In-process cross-framework control mapping graph.
+
+A tenant's control_mappings are held as compressed sparse row (CSR) arrays
+over the tenant's controls (node i is the i-th control by control_id):
+
+  indptr[i]:indptr[i + 1]   positions of the edges leaving node i
+  indices / weights         target node and confidence per position
+  edge_mapping              mapping_id per position
+
+An edge source -> target reads "implementing source satisfies target with
+this confidence". `equivalent` and `related` mappings (UNDIRECTED_TYPES)
+add the reverse edge as well, `related` ones count at
+TYPE_FACTORS["related"], and a mapping without a confidence_score counts as
+DEFAULT_CONFIDENCE.
+
+Queries:
+  satisfies   controls reachable from one control within max_depth hops.
+              A path's confidence is the product of its edges' and every
+              control gets its best path of at most max_depth hops
+              (level-synchronous relaxation, vectorised over the frontier).
+  pagerank    confidence-weighted PageRank: controls that many others map
+              into, directly or transitively, rank highest
+
+Graphs are cached per worker and tenant. Mapping writers call
+`record_changes` in their transaction: it bumps the tenant's "mappings"
+version and logs the mapping ids under the new version. A query that finds a
+newer version reloads only those mappings and applies them to a copy of the
+graph: their old edges get weight 0 in the CSR and their current rows go to
+a small overlay scanned alongside it, until CONTROL_GRAPH_COMPACT_EDGES
+overlay edges trigger an in-memory CSR rebuild. Graphs older than
+CONTROL_GRAPH_MAX_AGE, and changes that reference a control created after
+the graph was built, reload the tenant in full.
+
+Inactive controls stay in the graph (deactivating one is not a mapping
+change); the API leaves them out of its responses.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import (
+    CONTROL_GRAPH_BUILD_SECONDS,
+    CONTROL_GRAPH_BUILDS,
+    CONTROL_GRAPH_EDGES,
+    CONTROL_GRAPH_QUERY_SECONDS,
+)
+from app.models.control import Control, ControlMapping, ControlMappingChange
+from app.services import tenant_versions
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+
+# Weight multiplier per mapping_type (unknown types count as 1.0)
+TYPE_FACTORS = {"equivalent": 1.0, "parent": 1.0, "child": 1.0, "related": 0.5}
+# Symmetric relations: the stored source / target order carries no meaning
+UNDIRECTED_TYPES = ("equivalent", "related")
+DEFAULT_CONFIDENCE = 0.5  # mappings without a confidence_score
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6  # L1 change between iterations
+PAGERANK_MAX_ITERATIONS = 100
+IN_CHUNK = 5000  # mapping ids per IN (...) when applying changes
+
+MAPPING_COLUMNS = (
+    ControlMapping.mapping_id,
+    ControlMapping.source_control_id,
+    ControlMapping.target_control_id,
+    ControlMapping.mapping_type,
+    ControlMapping.confidence_score,
+)
+
+
+class Edges(NamedTuple):
+    """Edge list (COO): node indices, weight and mapping_id per edge"""
+    source: "np.ndarray"
+    target: "np.ndarray"
+    weight: "np.ndarray"
+    mapping: "np.ndarray"
+
+    @classmethod
+    def empty(cls) -> "Edges":
+        return cls(
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def select(self, mask) -> "Edges":
+        return Edges(self.source[mask], self.target[mask], self.weight[mask], self.mapping[mask])
+
+    def concat(self, other: "Edges") -> "Edges":
+        return Edges(*(np.concatenate(pair) for pair in zip(self, other)))
+
+
+def _node_index(node_ids, control_ids) -> Optional["np.ndarray"]:
+    """Node index per control id, or None if any control is not a node"""
+    index = np.searchsorted(node_ids, control_ids)
+    if len(node_ids) == 0 or index.max(initial=0) >= len(node_ids):
+        return None if len(control_ids) else index.astype(np.int32)
+    if not np.array_equal(node_ids[index], control_ids):
+        return None
+    return index.astype(np.int32)
+
+
+def _edge_list(node_ids, rows: Sequence[tuple]) -> Optional[Edges]:
+    """Edges for mapping rows (MAPPING_COLUMNS), or None if one references an unknown control"""
+    if not rows:
+        return Edges.empty()
+    mapping_ids, sources, targets, types, scores = zip(*rows)
+    source = _node_index(node_ids, np.array(sources, dtype=np.int64))
+    target = _node_index(node_ids, np.array(targets, dtype=np.int64))
+    if source is None or target is None:
+        return None
+    weight = np.array([
+        (DEFAULT_CONFIDENCE if score is None else min(max(score, 0.0), 1.0)) * TYPE_FACTORS.get(kind, 1.0)
+        for kind, score in zip(types, scores)
+    ], dtype=np.float32)
+    edges = Edges(source, target, weight, np.array(mapping_ids, dtype=np.int32))
+    undirected = np.array([kind in UNDIRECTED_TYPES for kind in types], dtype=bool)
+    if undirected.any():
+        reverse = edges.select(undirected)
+        edges = edges.concat(Edges(reverse.target, reverse.source, reverse.weight, reverse.mapping))
+    # Zero-confidence edges and self-loops never change a query or a rank
+    return edges.select((edges.weight > 0) & (edges.source != edges.target))
+
+
+class ControlGraph:
+    """
+    Immutable snapshot of one tenant's mapping graph. `apply` returns a new
+    snapshot, so queries never see a half-applied change.
+    """
+
+    def __init__(
+        self,
+        org_id: int,
+        version: int,
+        node_ids,
+        node_framework,
+        indptr,
+        indices,
+        weights,
+        edge_mapping,
+        mapping_order,
+        overlay: Optional[Edges] = None,
+        pagerank_seed=None
+    ):
+        self.org_id = org_id
+        self.version = version
+        self.built_at = time.monotonic()
+        self.node_ids = node_ids  # control_id per node, ascending
+        self.node_framework = node_framework
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights  # 0 = edge removed since the CSR was built
+        self.edge_mapping = edge_mapping
+        self.mapping_order = mapping_order  # CSR positions ordered by mapping_id
+        self.overlay = overlay if overlay is not None else Edges.empty()
+        self.edge_count = int(np.count_nonzero(weights)) + len(self.overlay)
+        self._pagerank_seed = pagerank_seed
+        self._pagerank = None
+        self._pagerank_lock = threading.Lock()
+        self.pagerank_iterations = 0
+
+    # Construction
+
+    @classmethod
+    def build(cls, org_id: int, version: int, controls: Sequence[tuple], mappings: Sequence[tuple]) -> "ControlGraph":
+        """Graph from (control_id, framework_id) rows ordered by control_id and MAPPING_COLUMNS rows"""
+        node_ids = np.array([row[0] for row in controls], dtype=np.int64)
+        node_framework = np.array([row[1] for row in controls], dtype=np.int32)
+        edges = _edge_list(node_ids, mappings)
+        if edges is None:  # mapping to another tenant's control
+            edges = _edge_list(node_ids, [row for row in mappings if _node_index(node_ids, np.array(row[1:3])) is not None])
+        return cls._from_edges(org_id, version, node_ids, node_framework, edges)
+
+    @classmethod
+    def _from_edges(cls, org_id, version, node_ids, node_framework, edges: Edges, pagerank_seed=None) -> "ControlGraph":
+        order = np.argsort(edges.source, kind="stable")
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edges.source, minlength=len(node_ids)), out=indptr[1:])
+        edge_mapping = edges.mapping[order]
+        return cls(
+            org_id, version, node_ids, node_framework, indptr,
+            edges.target[order], edges.weight[order], edge_mapping,
+            np.argsort(edge_mapping, kind="stable"), pagerank_seed=pagerank_seed
+        )
+
+    def _csr_edges(self) -> Edges:
+        """The CSR's live edges as an edge list"""
+        source = np.repeat(np.arange(len(self.node_ids), dtype=np.int32), np.diff(self.indptr))
+        return Edges(source, self.indices, self.weights, self.edge_mapping).select(self.weights > 0)
+
+    def apply(self, version: int, changed: Iterable[int], rows: Sequence[tuple], compact_edges: int) -> Optional["ControlGraph"]:
+        """
+        Snapshot with the mappings in `changed` replaced by their current
+        `rows` (changed ids without a row were deleted). None when a row
+        references a control this graph does not know.
+        """
+        edges = _edge_list(self.node_ids, rows)
+        if edges is None:
+            return None
+        changed = np.unique(np.fromiter(changed, dtype=np.int32))
+        by_mapping = self.edge_mapping[self.mapping_order]
+        left = np.searchsorted(by_mapping, changed, side="left")
+        right = np.searchsorted(by_mapping, changed, side="right")
+        weights = self.weights
+        if (right > left).any():
+            weights = weights.copy()
+            for start, stop in zip(left[right > left], right[right > left]):
+                weights[self.mapping_order[start:stop]] = 0
+        overlay = self.overlay.select(~np.isin(self.overlay.mapping, changed)).concat(edges)
+        seed = self._pagerank if self._pagerank is not None else self._pagerank_seed
+        if len(overlay) > compact_edges:
+            graph = ControlGraph(
+                self.org_id, version, self.node_ids, self.node_framework, self.indptr,
+                self.indices, weights, self.edge_mapping, self.mapping_order, overlay
+            )
+            return ControlGraph._from_edges(
+                self.org_id, version, self.node_ids, self.node_framework,
+                graph._csr_edges().concat(overlay), pagerank_seed=seed
+            )
+        return ControlGraph(
+            self.org_id, version, self.node_ids, self.node_framework, self.indptr,
+            self.indices, weights, self.edge_mapping, self.mapping_order, overlay, pagerank_seed=seed
+        )
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.node_ids, self.node_framework, self.indptr, self.indices, self.weights,
+                  self.edge_mapping, self.mapping_order, *self.overlay)
+        return sum(array.nbytes for array in arrays)
+
+    def node(self, control_id: int) -> Optional[int]:
+        index = int(np.searchsorted(self.node_ids, control_id))
+        if index < len(self.node_ids) and self.node_ids[index] == control_id:
+            return index
+        return None
+
+    # Queries
+
+    def _expand(self, frontier) -> Edges:
+        """Every live edge leaving the frontier nodes"""
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        positions = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+        edges = Edges(
+            np.repeat(frontier, counts), self.indices[positions],
+            self.weights[positions], self.edge_mapping[positions]
+        )
+        if len(self.overlay):
+            edges = edges.concat(self.overlay.select(np.isin(self.overlay.source, frontier)))
+        return edges
+
+    def satisfies(
+        self,
+        control_id: int,
+        max_depth: int = 3,
+        min_confidence: float = 0.0,
+        framework_ids: Optional[Sequence[int]] = None,
+        limit: int = 100
+    ) -> List[Tuple[int, float, int, List[int]]]:
+        """
+        Controls that implementing `control_id` satisfies, best first, as
+        (control_id, confidence, hops, path of control ids from the source).
+        """
+        start = time.perf_counter()
+        source = self.node(control_id)
+        if source is None:
+            return []
+        n = len(self.node_ids)
+        best = np.zeros(n, dtype=np.float32)
+        best[source] = 1.0
+        hops = np.zeros(n, dtype=np.int8)
+        levels = []  # per hop count: (nodes set at that level, ascending; their parents)
+        frontier = np.array([source], dtype=np.int32)
+        for level in range(1, max_depth + 1):
+            edges = self._expand(frontier)
+            confidence = best[edges.source] * edges.weight  # values as of the end of the previous level
+            keep = (confidence >= min_confidence) & (confidence > best[edges.target])
+            if not keep.any():
+                break
+            target, confidence, parent = edges.target[keep], confidence[keep], edges.source[keep]
+            order = np.lexsort((-confidence, target))
+            nodes, first = np.unique(target[order], return_index=True)
+            winners = order[first]
+            best[nodes] = confidence[winners]
+            hops[nodes] = level
+            levels.append((nodes, parent[winners]))
+            frontier = nodes
+
+        found = best > 0
+        found[source] = False
+        if framework_ids:
+            found &= np.isin(self.node_framework, np.asarray(framework_ids, dtype=np.int32))
+        candidates = np.flatnonzero(found)
+        candidates = candidates[np.lexsort((candidates, hops[candidates], -best[candidates]))][:limit]
+        results = [
+            (int(self.node_ids[node]), float(best[node]), int(hops[node]), self._path(levels, node, int(hops[node])))
+            for node in candidates
+        ]
+        CONTROL_GRAPH_QUERY_SECONDS.labels(query="satisfies").observe(time.perf_counter() - start)
+        return results
+
+    def _path(self, levels, node: int, level: int) -> List[int]:
+        """
+        Walk parents back to the source. A parent's confidence used at
+        `level` is the one it had after level - 1, i.e. from the latest level
+        below this one that set it.
+        """
+        path = [node]
+        while level > 0:
+            nodes, parents = levels[level - 1]
+            node = int(parents[np.searchsorted(nodes, node)])
+            path.append(node)
+            level -= 1
+            while level > 0:
+                nodes = levels[level - 1][0]
+                position = np.searchsorted(nodes, node)
+                if position < len(nodes) and nodes[position] == node:
+                    break
+                level -= 1
+        return [int(self.node_ids[i]) for i in reversed(path)]
+
+    @property
+    def has_pagerank(self) -> bool:
+        return self._pagerank is not None
+
+    def pagerank(self) -> "np.ndarray":
+        """PageRank per node (sums to 1); computed once per snapshot, warm-started from the previous one"""
+        with self._pagerank_lock:
+            if self._pagerank is None:
+                start = time.perf_counter()
+                self._pagerank = self._compute_pagerank()
+                CONTROL_GRAPH_QUERY_SECONDS.labels(query="pagerank").observe(time.perf_counter() - start)
+            return self._pagerank
+
+    def _compute_pagerank(self) -> "np.ndarray":
+        n = len(self.node_ids)
+        if n == 0:
+            return np.zeros(0)
+        edges = self._csr_edges().concat(self.overlay)
+        weight = edges.weight.astype(np.float64)
+        out_weight = np.bincount(edges.source, weights=weight, minlength=n)
+        share = weight / out_weight[edges.source]  # live edges only, so every source has out_weight > 0
+        dangling = out_weight == 0
+        seed = self._pagerank_seed
+        rank = seed.copy() if seed is not None and len(seed) == n else np.full(n, 1.0 / n)
+        for iteration in range(1, PAGERANK_MAX_ITERATIONS + 1):
+            incoming = np.bincount(edges.target, weights=rank[edges.source] * share, minlength=n)
+            updated = PAGERANK_DAMPING * (incoming + rank[dangling].sum() / n) + (1 - PAGERANK_DAMPING) / n
+            change = np.abs(updated - rank).sum()
+            rank = updated
+            if change < PAGERANK_TOLERANCE:
+                break
+        self.pagerank_iterations = iteration
+        return rank
+
+    def central(self, limit: int = 20, framework_ids: Optional[Sequence[int]] = None) -> List[Tuple[int, float]]:
+        """(control_id, score) for the highest-ranked controls"""
+        rank = self.pagerank()
+        candidates = np.arange(len(rank))
+        if framework_ids:
+            candidates = candidates[np.isin(self.node_framework, np.asarray(framework_ids, dtype=np.int32))]
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-rank[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.lexsort((candidates, -rank[candidates]))]
+        return [(int(self.node_ids[node]), float(rank[node])) for node in candidates]
+
+
+async def record_changes(db: AsyncSession, org_id: int, mapping_ids: Iterable[int]):
+    """
+    Log created, updated or deleted mappings for the cached graphs (the caller
+    commits). Bumping the version first serializes the tenant's mapping
+    writers, so versions commit in order.
+    """
+    await tenant_versions.bump(db, org_id, tenant_versions.MAPPINGS)
+    version = await tenant_versions.current(db, org_id, tenant_versions.MAPPINGS)
+    now = datetime.utcnow()
+    for mapping_id in sorted(set(mapping_ids)):
+        db.add(ControlMappingChange(org_id=org_id, version=version, mapping_id=mapping_id, changed_at=now))
+    await db.execute(delete(ControlMappingChange).where(
+        ControlMappingChange.org_id == org_id,
+        ControlMappingChange.changed_at < now - timedelta(seconds=settings.CONTROL_GRAPH_CHANGE_RETENTION)
+    ))
+
+
+class ControlGraphCache:
+    """Per-tenant graphs, least recently used evicted beyond max_tenants"""
+
+    def __init__(self, max_tenants: int = 16, max_age: float = 3600, compact_edges: int = 50000):
+        self.max_tenants = max_tenants
+        self.max_age = max_age
+        self.compact_edges = compact_edges
+        self._graphs: "OrderedDict[int, ControlGraph]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def _current(self, graph: Optional[ControlGraph], version: int) -> bool:
+        return graph is not None and graph.version >= version and time.monotonic() - graph.built_at < self.max_age
+
+    async def get(self, db: AsyncSession, org_id: int) -> ControlGraph:
+        """The tenant's graph as of its latest committed mapping change"""
+        version = await tenant_versions.current(db, org_id, tenant_versions.MAPPINGS)
+        graph = self._graphs.get(org_id)
+        if self._current(graph, version):
+            self._graphs.move_to_end(org_id)
+            return graph
+        async with self._locks.setdefault(org_id, asyncio.Lock()):
+            graph = self._graphs.get(org_id)  # refreshed while this request waited
+            if self._current(graph, version):
+                return graph
+            if graph is not None and time.monotonic() - graph.built_at < self.max_age:
+                graph = await self._apply_changes(db, graph, version)
+            else:
+                graph = None
+            if graph is None:
+                graph = await self._load(db, org_id)
+            self._store(org_id, graph)
+            return graph
+
+    async def _load(self, db: AsyncSession, org_id: int) -> ControlGraph:
+        start = time.perf_counter()
+        # Version first: a change committed during the load is applied again next time (idempotent)
+        version = await tenant_versions.current(db, org_id, tenant_versions.MAPPINGS)
+        controls = (await db.execute(
+            select(Control.control_id, Control.framework_id)
+            .where(Control.org_id == org_id)
+            .order_by(Control.control_id)
+        )).all()
+        mappings = (await db.execute(select(*MAPPING_COLUMNS).where(ControlMapping.org_id == org_id))).all()
+        graph = await asyncio.to_thread(ControlGraph.build, org_id, version, controls, mappings)
+        elapsed = time.perf_counter() - start
+        CONTROL_GRAPH_BUILDS.labels(kind="full").inc()
+        CONTROL_GRAPH_BUILD_SECONDS.labels(kind="full").observe(elapsed)
+        logger.info(
+            f"Control graph for org {org_id}: {len(graph.node_ids)} controls, {graph.edge_count} edges, "
+            f"{graph.nbytes / 1e6:.1f} MB, {elapsed * 1000:.0f} ms"
+        )
+        return graph
+
+    async def _apply_changes(self, db: AsyncSession, graph: ControlGraph, version: int) -> Optional[ControlGraph]:
+        start = time.perf_counter()
+        changed = set((await db.execute(
+            select(ControlMappingChange.mapping_id).distinct().where(
+                ControlMappingChange.org_id == graph.org_id,
+                ControlMappingChange.version > graph.version
+            )
+        )).scalars())
+        if len(changed) > self.compact_edges:
+            return None
+        ordered = sorted(changed)
+        rows = []
+        for offset in range(0, len(ordered), IN_CHUNK):
+            rows.extend((await db.execute(select(*MAPPING_COLUMNS).where(
+                ControlMapping.org_id == graph.org_id,
+                ControlMapping.mapping_id.in_(ordered[offset:offset + IN_CHUNK])
+            ))).all())
+        updated = await asyncio.to_thread(graph.apply, version, changed, rows, self.compact_edges)
+        if updated is not None:
+            kind = "compact" if updated.indices is not graph.indices else "delta"
+            CONTROL_GRAPH_BUILDS.labels(kind=kind).inc()
+            CONTROL_GRAPH_BUILD_SECONDS.labels(kind=kind).observe(time.perf_counter() - start)
+        return updated
+
+    def _store(self, org_id: int, graph: ControlGraph):
+        self._graphs[org_id] = graph
+        self._graphs.move_to_end(org_id)
+        while len(self._graphs) > self.max_tenants:
+            evicted, _ = self._graphs.popitem(last=False)
+            self._locks.pop(evicted, None)
+        CONTROL_GRAPH_EDGES.set(sum(cached.edge_count for cached in self._graphs.values()))
+
+    async def central(self, graph: ControlGraph, limit: int, framework_ids: Optional[Sequence[int]] = None):
+        """graph.central, computing the PageRank off the event loop when the snapshot has none yet"""
+        if graph.has_pagerank:
+            return graph.central(limit, framework_ids)
+        return await asyncio.to_thread(graph.central, limit, framework_ids)
+
+    def clear(self):
+        self._graphs.clear()
+        self._locks.clear()
+        CONTROL_GRAPH_EDGES.set(0)
+
+
+control_graphs = ControlGraphCache(
+    max_tenants=settings.CONTROL_GRAPH_MAX_TENANTS,
+    max_age=settings.CONTROL_GRAPH_MAX_AGE,
+    compact_edges=settings.CONTROL_GRAPH_COMPACT_EDGES
+)
@@ -0,0 +1,438 @@
+"""
+3-state compliance decision engine.
+
+Consumes scan results from `controls.scans` (as produced by
+KafkaProducerService.send_control_scan_result) in batches and derives each
+control's status from two signals:
+
+  implemented       active policy linked AND latest scan passed
+  partial           exactly one of the two
+  not-implemented   neither
+
+Policy coverage comes from an in-memory per-org index of PolicyControlLink
+rows (reloaded after DECISION_INDEX_TTL; unknown references are looked up
+individually), so deciding a batch costs one locking SELECT of the affected
+controls. Only controls whose status actually changes are written: one
+UPDATE per target status, framework stats deltas, a bulk insert of audit
+events and each tenant's controls version bump with its status change log
+(ETags, risk and simulation caches), all in one transaction, after which
+the consumer offsets are committed (at-least-once; a replayed batch is a
+no-op).
+
+Scan results are keyed by control, so scaling out is a matter of running
+more consumers in the same group, up to the topic's partition count.
+
+Run:
+    python -m app.services.decision_engine consume [--processes N]
+    python -m app.services.decision_engine replay --file scans.ndjson
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.metrics import DECISION_EVENTS_PROCESSED, DECISION_STATUS_CHANGES, DECISION_BATCH_SECONDS
+from app.models.control import Control
+from app.models.outbox import OutboxEvent
+from app.models.policy import Policy, PolicyControlLink
+from app.services import compliance_stats, outbox
+
+logger = logging.getLogger(__name__)
+
+# Scan result values agents use for a passing check
+PASSING_RESULTS = {"pass", "passed", "compliant", "implemented", "success"}
+
+
+def decide(policy_enforced: bool, control_implemented: bool) -> str:
+    """Map the two signals onto the 3-state status"""
+    if policy_enforced and control_implemented:
+        return "implemented"
+    if policy_enforced or control_implemented:
+        return "partial"
+    return "not-implemented"
+
+
+def scan_passed(result: Any) -> bool:
+    """Interpret a scan result payload ({"status": "pass"}, {"passed": true}, ...)"""
+    if not isinstance(result, dict):
+        return False
+    status = result.get("status")
+    if isinstance(status, str):
+        return status.lower() in PASSING_RESULTS
+    for key in ("passed", "compliant"):
+        if key in result:
+            return bool(result[key])
+    return False
+
+
+class OrgIndex:
+    """Controls of one org and the subset covered by an active policy"""
+
+    def __init__(self, codes: Dict[str, int], enforced: Set[int]):
+        self.codes = codes  # internal_code -> control_id
+        self.control_ids = set(codes.values())
+        self.enforced = enforced
+        self.loaded_at = time.monotonic()
+
+    def resolve(self, control_ref: Any) -> Optional[int]:
+        """Scanners send the internal code (BR-001); numeric ids are accepted too"""
+        control_ref = str(control_ref)
+        control_id = self.codes.get(control_ref)
+        if control_id is None and control_ref.isdigit() and int(control_ref) in self.control_ids:
+            control_id = int(control_ref)
+        return control_id
+
+    def add(self, codes: Dict[str, int], enforced: Iterable[int]):
+        self.codes.update(codes)
+        self.control_ids.update(codes.values())
+        self.enforced.update(enforced)
+
+
+class PolicyLinkIndex:
+    """Read-through cache of OrgIndex, loaded with two queries per org"""
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.DECISION_INDEX_TTL
+        self._orgs: Dict[int, OrgIndex] = {}
+
+    async def load(self, db: AsyncSession, org_id: int) -> OrgIndex:
+        codes = dict((await db.execute(
+            select(Control.internal_code, Control.control_id).where(Control.org_id == org_id)
+        )).all())
+        enforced = set((await db.execute(
+            select(PolicyControlLink.control_id)
+            .join(Policy, Policy.policy_id == PolicyControlLink.policy_id)
+            .where(Policy.org_id == org_id, Policy.is_active.is_(True))
+            .distinct()
+        )).scalars().all())
+        index = OrgIndex(codes, enforced)
+        self._orgs[org_id] = index
+        logger.debug(f"Policy link index loaded for org {org_id}: {len(codes)} controls, {len(enforced)} enforced")
+        return index
+
+    async def get(self, db: AsyncSession, org_id: int) -> OrgIndex:
+        index = self._orgs.get(org_id)
+        if index is None or time.monotonic() - index.loaded_at > self.ttl:
+            index = await self.load(db, org_id)
+        return index
+
+    async def add_missing(self, db: AsyncSession, org_id: int, refs: Iterable[str]) -> OrgIndex:
+        """Look up only the given references (controls created since the org was loaded)"""
+        index = await self.get(db, org_id)
+        refs = set(refs)
+        condition = Control.internal_code.in_(refs)
+        numeric = {int(ref) for ref in refs if ref.isdigit()}
+        if numeric:
+            condition = or_(condition, Control.control_id.in_(numeric))
+        found = dict((await db.execute(
+            select(Control.internal_code, Control.control_id).where(Control.org_id == org_id, condition)
+        )).all())
+        if found:
+            enforced = (await db.execute(
+                select(PolicyControlLink.control_id)
+                .join(Policy, Policy.policy_id == PolicyControlLink.policy_id)
+                .where(PolicyControlLink.control_id.in_(found.values()), Policy.is_active.is_(True))
+            )).scalars().all()
+            index.add(found, enforced)
+        return index
+
+    def invalidate(self, org_id: Optional[int] = None):
+        if org_id is None:
+            self._orgs.clear()
+        else:
+            self._orgs.pop(org_id, None)
+
+
+# Shared per worker process (decision engine and bulk scan ingestion)
+policy_link_index = PolicyLinkIndex()
+
+
+class DecisionEngine:
+    """Decides and persists control status for batches of scan results"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        index: Optional[PolicyLinkIndex] = None,
+        audit: bool = True
+    ):
+        if session_factory is None:
+            from app.database import AsyncSessionLocal as session_factory
+        self.session_factory = session_factory
+        self.index = index or policy_link_index
+        self.audit = audit
+
+    async def _resolve(self, db: AsyncSession, events: Iterable[Dict[str, Any]], stats: Counter) -> Dict[int, tuple]:
+        """Latest scan outcome per control: control_id -> (policy_enforced, passed, scan_timestamp)"""
+        latest = {}
+        indexes: Dict[int, OrgIndex] = {}
+        pending = []  # references not in the index yet
+        for event in events:
+            try:
+                org_id = int(event["org_id"])
+                control_ref = str(event["control_id"])
+            except (KeyError, TypeError, ValueError):
+                stats["invalid"] += 1
+                continue
+
+            index = indexes.get(org_id)
+            if index is None:
+                index = indexes[org_id] = await self.index.get(db, org_id)
+            control_id = index.resolve(control_ref)
+            if control_id is None:
+                pending.append((org_id, control_ref, event))
+                continue
+            # Events for a control arrive in order (same key, same partition): last one wins
+            latest[control_id] = (control_id in index.enforced, scan_passed(event.get("result")), event.get("scan_timestamp"))
+            stats["decided"] += 1
+
+        if pending:
+            refs = defaultdict(set)
+            for org_id, control_ref, _ in pending:
+                refs[org_id].add(control_ref)
+            for org_id, org_refs in refs.items():
+                indexes[org_id] = await self.index.add_missing(db, org_id, org_refs)
+            for org_id, control_ref, event in pending:
+                index = indexes[org_id]
+                control_id = index.resolve(control_ref)
+                if control_id is None:
+                    stats["unknown_control"] += 1
+                    continue
+                latest[control_id] = (control_id in index.enforced, scan_passed(event.get("result")), event.get("scan_timestamp"))
+                stats["decided"] += 1
+        return latest
+
+    async def apply(self, db: AsyncSession, latest: Dict[int, tuple]) -> int:
+        """
+        Write status changes for resolved scan outcomes (the caller commits).
+
+        Args:
+            latest: control_id -> (policy_enforced, passed, scan_timestamp)
+
+        Returns:
+            int: Number of controls whose status changed
+        """
+        if not latest:
+            return 0
+
+        # Lock in id order so concurrent writers (API, other consumers) cannot deadlock
+        current = (await db.execute(
+            select(
+                Control.control_id, Control.internal_code, Control.org_id, Control.framework_id,
+                Control.status, Control.is_active
+            )
+            .where(Control.control_id.in_(latest.keys()))
+            .order_by(Control.control_id)
+            .with_for_update()
+        )).all()
+
+        now = datetime.utcnow()
+        changes: Dict[str, List[int]] = defaultdict(list)  # new status -> control ids
+        audit_rows = []
+        deltas: Dict[tuple, Counter] = defaultdict(Counter)
+        changed: Dict[int, List[int]] = defaultdict(list)  # org id -> changed control ids
+        for control in current:
+            enforced, passed, scanned_at = latest[control.control_id]
+            new_status = decide(enforced, passed)
+            old_status = control.status or compliance_stats.DEFAULT_STATUS
+            if new_status == old_status:
+                continue
+
+            changes[new_status].append(control.control_id)
+            changed[control.org_id].append(control.control_id)
+            if control.is_active:
+                delta = deltas[(control.framework_id, control.org_id)]
+                delta[compliance_stats.STATUS_COLUMNS[old_status]] -= 1
+                delta[compliance_stats.STATUS_COLUMNS[new_status]] += 1
+            if self.audit:
+                audit_rows.append(outbox.audit_row(
+                    event_type="control_status_change",
+                    resource_type="control",
+                    resource_id=control.internal_code,
+                    action="scan_decision",
+                    user_id=None,
+                    org_id=control.org_id,
+                    metadata={
+                        "old_status": old_status,
+                        "new_status": new_status,
+                        "policy_enforced": enforced,
+                        "scan_passed": passed,
+                        "scan_timestamp": scanned_at
+                    }
+                ))
+
+        # At most three UPDATEs (one per target status) however many controls changed
+        for new_status, control_ids in changes.items():
+            await db.execute(
+                update(Control)
+                .where(Control.control_id.in_(control_ids))
+                .values(status=new_status, status_updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            DECISION_STATUS_CHANGES.labels(status=new_status).inc(len(control_ids))
+        if audit_rows:
+            await db.execute(insert(OutboxEvent), audit_rows)
+        for (framework_id, org_id) in sorted(deltas):
+            await compliance_stats.apply_deltas(db, framework_id, org_id, deltas[(framework_id, org_id)])
+        for org_id in sorted(changed):
+            await compliance_stats.record_status_changes(db, org_id, changed[org_id])
+        return sum(len(control_ids) for control_ids in changes.values())
+
+    async def process_batch(self, events: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Decide a batch and write the status changes in one transaction.
+
+        Returns:
+            dict: Event counts by outcome plus the number of status changes
+        """
+        start = time.perf_counter()
+        stats: Counter = Counter()
+        async with self.session_factory() as db:
+            latest = await self._resolve(db, events, stats)
+            stats["changed"] = await self.apply(db, latest)
+            if stats["changed"]:
+                await db.commit()
+
+        for outcome in ("decided", "unknown_control", "invalid"):
+            if stats[outcome]:
+                DECISION_EVENTS_PROCESSED.labels(outcome=outcome).inc(stats[outcome])
+        DECISION_BATCH_SECONDS.observe(time.perf_counter() - start)
+        return dict(stats)
+
+    async def replay(self, lines: Iterable[str], batch_size: Optional[int] = None) -> dict:
+        """Feed recorded scan results (one JSON event per line) through the engine"""
+        batch_size = batch_size or settings.DECISION_BATCH_SIZE
+        totals: Counter = Counter()
+        batch = []
+        start = time.perf_counter()
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                totals.update(await self.process_batch(batch))
+                totals["batches"] += 1
+                batch = []
+        if batch:
+            totals.update(await self.process_batch(batch))
+            totals["batches"] += 1
+
+        elapsed = time.perf_counter() - start
+        events = totals["decided"] + totals["unknown_control"] + totals["invalid"]
+        return {
+            "events": events,
+            "batches": totals["batches"],
+            "decided": totals["decided"],
+            "changed": totals["changed"],
+            "unknown_control": totals["unknown_control"],
+            "invalid": totals["invalid"],
+            "elapsed_s": round(elapsed, 3),
+            "events_per_s": round(events / elapsed, 1) if elapsed else 0.0
+        }
+
+    async def consume(self, consumer, stop: Optional[asyncio.Event] = None):
+        """
+        Poll a kafka-python KafkaConsumer (enable_auto_commit=False) until stopped.
+
+        Offsets are committed only after the batch transaction commits; a failed
+        batch is rewound and retried.
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            polled = await asyncio.to_thread(
+                consumer.poll, timeout_ms=settings.DECISION_POLL_TIMEOUT_MS, max_records=settings.DECISION_BATCH_SIZE
+            )
+            if not polled:
+                continue
+            events = [record.value for records in polled.values() for record in records]
+            try:
+                await self.process_batch(events)
+            except Exception as e:
+                logger.error(f"Decision batch of {len(events)} events failed, retrying: {e}")
+                for partition, records in polled.items():
+                    consumer.seek(partition, records[0].offset)
+                await asyncio.sleep(1)
+                continue
+            await asyncio.to_thread(consumer.commit)
+
+
+# Global instance
+decision_engine = DecisionEngine()
+
+
+def _run_consumer(worker: int):
+    """One consumer group member (runs in its own process)"""
+    from kafka import KafkaConsumer
+    import app.models.init  # noqa: F401  (register all mappers)
+
+    logging.basicConfig(level=logging.INFO)
+    consumer = KafkaConsumer(
+        settings.KAFKA_TOPIC_CONTROLS_SCANS,
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS.split(','),
+        group_id=settings.DECISION_ENGINE_GROUP_ID,
+        client_id=f"decision-engine-{worker}",
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        max_poll_records=settings.DECISION_BATCH_SIZE,
+        value_deserializer=lambda v: json.loads(v.decode('utf-8'))
+    )
+    logger.info(f"Decision engine consumer {worker} started")
+    try:
+        asyncio.run(decision_engine.consume(consumer))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        consumer.close()
+
+
+async def _replay_command(path: str, batch_size: Optional[int]):
+    import app.models.init  # noqa: F401  (register all mappers)
+
+    with open(path) as f:
+        report = await decision_engine.replay(f, batch_size=batch_size)
+    for key, value in report.items():
+        print(f"{key:<16} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="3-state compliance decision engine")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    consume_parser = subparsers.add_parser("consume", help="Consume controls.scans until interrupted")
+    consume_parser.add_argument("--processes", type=int, default=1,
+                                help="Consumer group members to run (useful up to the partition count)")
+    replay_parser = subparsers.add_parser("replay", help="Decide recorded scan results from an NDJSON file")
+    replay_parser.add_argument("--file", required=True)
+    replay_parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "consume":
+        if args.processes == 1:
+            _run_consumer(0)
+            return
+        ctx = multiprocessing.get_context("spawn")  # fresh engines and Kafka connections per process
+        workers = [ctx.Process(target=_run_consumer, args=(i,)) for i in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.join()
+    elif args.command == "replay":
+        asyncio.run(_replay_command(args.file, args.batch_size))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
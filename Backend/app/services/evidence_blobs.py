@@ -0,0 +1,275 @@
+"""
+Content-addressed evidence objects and their reference counts.
+
+Each distinct file is stored once per tenant at
+EvidenceService.content_path(org_id, sha256). evidence_blobs.ref_count is the
+number of EvidenceFile rows pointing at that object and is adjusted with
+atomic increments in the same transaction as the row. Objects are never
+removed inline: `gc` deletes unreferenced objects while holding the blob row
+lock, so a concurrent upload of the same content either revives the row
+before the delete or re-creates object and row after it.
+
+Maintenance:
+    python -m app.services.evidence_blobs dedupe [--org-id N] [--dry-run]
+    python -m app.services.evidence_blobs gc [--org-id N]
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.evidence import EvidenceFile, EvidenceBlob
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PREFIX = "/sha256/"
+
+
+def _increment(org_id: int, file_hash: str, count: int):
+    return (
+        update(EvidenceBlob)
+        .where(EvidenceBlob.org_id == org_id, EvidenceBlob.sha256 == file_hash)
+        .values(ref_count=EvidenceBlob.ref_count + count, updated_at=datetime.utcnow())
+        .returning(EvidenceBlob.object_path)
+    )
+
+
+def _insert(dialect: str, org_id: int, file_hash: str, size: Optional[int], object_path: str, count: int):
+    insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+    return (
+        insert(EvidenceBlob)
+        .values(org_id=org_id, sha256=file_hash, object_path=object_path, size=size, ref_count=count)
+        .on_conflict_do_nothing(index_elements=["org_id", "sha256"])
+        .returning(EvidenceBlob.object_path)
+    )
+
+
+async def find_blob(db: AsyncSession, org_id: int, file_hash: str) -> Optional[EvidenceBlob]:
+    result = await db.execute(
+        select(EvidenceBlob).where(EvidenceBlob.org_id == org_id, EvidenceBlob.sha256 == file_hash)
+    )
+    return result.scalars().first()
+
+
+async def add_reference(
+    db: AsyncSession,
+    org_id: int,
+    file_hash: str,
+    size: Optional[int],
+    object_path: str,
+    count: int = 1
+) -> tuple[str, bool]:
+    """
+    Count new EvidenceFile reference(s) to a blob, creating the blob row if needed.
+    The row stays locked until commit, serializing uploads of the same content.
+
+    Returns:
+        tuple: (object_path of the stored blob, created) - created means the
+        caller must put the object at object_path before committing
+    """
+    dialect = db.get_bind().dialect.name
+    while True:
+        row = (await db.execute(_increment(org_id, file_hash, count))).first()
+        if row is not None:
+            return row.object_path, False
+        row = (await db.execute(_insert(dialect, org_id, file_hash, size, object_path, count))).first()
+        if row is not None:
+            return row.object_path, True
+        # Lost the insert race to a concurrent upload: increment its row instead
+
+
+async def release_reference(db: AsyncSession, org_id: int, file_hash: str, object_path: str) -> bool:
+    """
+    Drop one reference. Unreferenced objects are left for `gc`.
+
+    Returns:
+        bool: False if object_path is not a content-addressed blob (legacy object)
+    """
+    result = await db.execute(
+        update(EvidenceBlob)
+        .where(
+            EvidenceBlob.org_id == org_id,
+            EvidenceBlob.sha256 == file_hash,
+            EvidenceBlob.object_path == object_path,
+            EvidenceBlob.ref_count > 0
+        )
+        .values(ref_count=EvidenceBlob.ref_count - 1, updated_at=datetime.utcnow())
+    )
+    return result.rowcount > 0
+
+
+def _add_references_sync(db: Session, org_id: int, file_hash: str, size: Optional[int], object_path: str, count: int) -> tuple[str, bool]:
+    dialect = db.get_bind().dialect.name
+    while True:
+        row = db.execute(_increment(org_id, file_hash, count)).first()
+        if row is not None:
+            return row.object_path, False
+        row = db.execute(_insert(dialect, org_id, file_hash, size, object_path, count)).first()
+        if row is not None:
+            return row.object_path, True
+
+
+def dedupe(
+    org_id: Optional[int] = None,
+    service=None,
+    session_factory: Optional[Callable[[], Session]] = None,
+    dry_run: bool = False
+) -> dict:
+    """
+    Move legacy per-upload objects to content-addressed keys.
+
+    For every (org, sha256) with legacy rows: copy one legacy object to the
+    content path (unless the blob already exists), repoint the rows, add
+    their references, commit, then delete the legacy objects. Safe to re-run;
+    rows whose objects are all missing are left untouched and reported.
+
+    Returns:
+        dict: Objects/bytes before and after, and space saved
+    """
+    if service is None:
+        from app.services.evidence_service import evidence_service as service
+        service.connect()
+    if session_factory is None:
+        from app.database import SessionLocal as session_factory
+
+    report = defaultdict(int)
+    with session_factory() as db:
+        query = (
+            select(EvidenceFile.org_id, EvidenceFile.file_hash, EvidenceFile.evidence_id,
+                   EvidenceFile.file_path, EvidenceFile.file_size)
+            .where(~EvidenceFile.file_path.contains(CONTENT_PREFIX))
+            .order_by(EvidenceFile.org_id, EvidenceFile.file_hash, EvidenceFile.evidence_id)
+        )
+        if org_id is not None:
+            query = query.where(EvidenceFile.org_id == org_id)
+
+        groups = defaultdict(list)
+        for row in db.execute(query).all():
+            groups[(row.org_id, row.file_hash)].append(row)
+
+        for (group_org_id, file_hash), rows in groups.items():
+            legacy_paths = {row.file_path: row.file_size or 0 for row in rows}
+            blob = db.get(EvidenceBlob, (group_org_id, file_hash))
+            target = blob.object_path if blob is not None else service.content_path(group_org_id, file_hash)
+            size = blob.size if blob is not None else max(legacy_paths.values())
+
+            if not dry_run and blob is None and not service.object_exists(target):
+                source = next((path for path in legacy_paths if service.object_exists(path)), None)
+                if source is None:
+                    logger.warning(f"Dedupe: no stored object for org={group_org_id} sha256={file_hash}, skipping")
+                    report["missing_groups"] += 1
+                    continue
+                service.copy_file(source, target)
+
+            report["groups"] += 1
+            report["rows_relinked"] += len(rows)
+            report["objects_before"] += len(legacy_paths) + (1 if blob is not None else 0)
+            report["bytes_before"] += sum(legacy_paths.values()) + ((blob.size or 0) if blob is not None else 0)
+            report["objects_after"] += 1
+            report["bytes_after"] += size or 0
+            if dry_run:
+                continue
+
+            evidence_ids = [row.evidence_id for row in rows]
+            db.execute(
+                update(EvidenceFile)
+                .where(EvidenceFile.evidence_id.in_(evidence_ids))
+                .values(file_path=target)
+            )
+            _add_references_sync(db, group_org_id, file_hash, size, target, len(rows))
+            db.commit()
+
+            # Rows now point at the blob; legacy copies can go
+            for path in legacy_paths:
+                if path != target and service.delete_file(path):
+                    report["objects_deleted"] += 1
+
+    report = dict(report)
+    saved = report.get("bytes_before", 0) - report.get("bytes_after", 0)
+    report["saved_bytes"] = saved
+    report["saved_pct"] = round(saved / report["bytes_before"] * 100, 1) if report.get("bytes_before") else 0.0
+    report["dry_run"] = dry_run
+    logger.info(
+        f"Evidence dedupe (org={org_id or 'all'}): {report.get('rows_relinked', 0)} rows, "
+        f"{report.get('objects_before', 0)} -> {report.get('objects_after', 0)} objects, saved {saved} bytes"
+    )
+    return report
+
+
+def collect_garbage(
+    org_id: Optional[int] = None,
+    service=None,
+    session_factory: Optional[Callable[[], Session]] = None,
+    batch_size: int = 100
+) -> int:
+    """
+    Delete objects whose blob has no references left.
+
+    Returns:
+        int: Number of objects removed
+    """
+    if service is None:
+        from app.services.evidence_service import evidence_service as service
+        service.connect()
+    if session_factory is None:
+        from app.database import SessionLocal as session_factory
+
+    removed = 0
+    last_key = None
+    with session_factory() as db:
+        while True:
+            query = (
+                select(EvidenceBlob)
+                .where(EvidenceBlob.ref_count == 0)
+                .order_by(EvidenceBlob.org_id, EvidenceBlob.sha256)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            if org_id is not None:
+                query = query.where(EvidenceBlob.org_id == org_id)
+            if last_key is not None:
+                query = query.where(tuple_(EvidenceBlob.org_id, EvidenceBlob.sha256) > tuple_(*last_key))
+            blobs = db.execute(query).scalars().all()
+            if not blobs:
+                break
+
+            # Object is deleted while the row is locked; the row goes on commit
+            for blob in blobs:
+                if service.delete_file(blob.object_path):
+                    db.delete(blob)
+                    removed += 1
+            last_key = (blobs[-1].org_id, blobs[-1].sha256)
+            db.commit()
+
+    logger.info(f"Evidence gc (org={org_id or 'all'}): removed {removed} unreferenced objects")
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed evidence maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    dedupe_parser = subparsers.add_parser("dedupe", help="Migrate legacy objects to content-addressed keys")
+    dedupe_parser.add_argument("--org-id", type=int, default=None)
+    dedupe_parser.add_argument("--dry-run", action="store_true", help="Only report the space that would be saved")
+    gc_parser = subparsers.add_parser("gc", help="Delete objects with no remaining references")
+    gc_parser.add_argument("--org-id", type=int, default=None)
+    args = parser.parse_args()
+
+    import app.models.init  # noqa: F401  (register all mappers)
+    if args.command == "dedupe":
+        report = dedupe(org_id=args.org_id, dry_run=args.dry_run)
+        for key, value in report.items():
+            print(f"{key:<16} {value}")
+    elif args.command == "gc":
+        print(f"Removed {collect_garbage(org_id=args.org_id)} unreferenced objects")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,29 +1,81 @@
-from minio import Minio
-from minio.error import S3Error
 import hashlib
 import logging
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, BinaryIO
 from io import BytesIO
 
 from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import MINIO_OPERATION_SECONDS, timed
+from app.services.connector import BackgroundConnector
 
 logger = logging.getLogger(__name__)
 
+# Loaded by the first connection attempt, off the startup path
+minio = lazy_import("minio")
+minio_commonconfig = lazy_import("minio.commonconfig")
+minio_error = lazy_import("minio.error")
+
+class EvidenceTooLargeError(Exception):
+    """Raised when a streamed upload exceeds the configured size limit"""
+
+
+class HashingReader:
+    """
+    File-like wrapper that hashes and size-checks data as MinIO pulls it.
+    Never holds more than one chunk; aborts as soon as max_size is exceeded.
+    """
+
+    def __init__(self, source: BinaryIO, max_size: Optional[int] = None, chunk_size: Optional[int] = None):
+        self._source = source
+        self.max_size = max_size
+        self.chunk_size = chunk_size or settings.EVIDENCE_UPLOAD_CHUNK_SIZE
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.chunk_size if size is None or size < 0 else min(size, self.chunk_size)
+        data = self._source.read(size)
+        if data:
+            self.size += len(data)
+            if self.max_size is not None and self.size > self.max_size:
+                raise EvidenceTooLargeError(f"Upload exceeds {self.max_size} bytes")
+            self.sha256.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self.sha256.hexdigest()
+
+
 class EvidenceService:
     """
     Service for managing evidence files in MinIO/S3.
     Implements dual evidence system: automated + manual uploads.
+    Does not connect on construction: the API calls start() from its
+    lifespan (background connection with retry), CLIs call connect().
     """
     
     def __init__(self):
-        self.client: Optional[Minio] = None
-        self._initialize_client()
+        self.client: Optional["minio.Minio"] = None
+        self._connector = BackgroundConnector("minio", self._initialize_client)
     
-    def _initialize_client(self):
-        """Initialize MinIO client"""
+    def connect(self) -> bool:
+        """Connect now if not connected (one attempt)"""
+        return self.client is not None or self._initialize_client()
+    
+    def start(self):
+        """Connect in the background, retrying until MinIO is reachable"""
+        if self.client is None:
+            self._connector.start()
+    
+    def stop(self):
+        self._connector.stop(timeout=5)
+    
+    def _initialize_client(self) -> bool:
+        """Initialize MinIO client and ensure the bucket exists (one attempt)"""
         try:
-            self.client = Minio(
+            client = minio.Minio(
                 endpoint=settings.MINIO_ENDPOINT,
                 access_key=settings.MINIO_ACCESS_KEY,
                 secret_key=settings.MINIO_SECRET_KEY,
@@ -31,14 +83,44 @@ class EvidenceService:
             )
             
             # Create bucket if it doesn't exist
-            if not self.client.bucket_exists(settings.MINIO_BUCKET_NAME):
-                self.client.make_bucket(settings.MINIO_BUCKET_NAME)
+            if not client.bucket_exists(settings.MINIO_BUCKET_NAME):
+                client.make_bucket(settings.MINIO_BUCKET_NAME)
                 logger.info(f"Created MinIO bucket: {settings.MINIO_BUCKET_NAME}")
             
+            # Published only once usable, so requests never see a client without its bucket
+            self.client = client
             logger.info(f"MinIO client initialized: {settings.MINIO_ENDPOINT}")
+            return True
         except Exception as e:
             logger.error(f"Failed to initialize MinIO client: {e}")
-            self.client = None
+            return False
+    
+    @staticmethod
+    def content_path(org_id: int, file_hash: str) -> str:
+        """Content-addressed object key: one object per distinct file per tenant"""
+        return f"evidence/{org_id}/sha256/{file_hash[:2]}/{file_hash}"
+    
+    @staticmethod
+    def staging_path(org_id: int) -> str:
+        """
+        Temporary key for streamed uploads whose hash is not known yet.
+        Kept under one prefix so a bucket lifecycle rule can expire orphans.
+        """
+        return f"staging/{org_id}/{uuid.uuid4().hex}"
+    
+    def object_exists(self, file_path: str) -> bool:
+        """Check whether an object is present in MinIO"""
+        if not self.client:
+            raise Exception("MinIO client not initialized")
+        
+        try:
+            with timed(MINIO_OPERATION_SECONDS, operation="stat_object"):
+                self.client.stat_object(settings.MINIO_BUCKET_NAME, file_path)
+            return True
+        except minio_error.S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            raise
     
     def upload_file(
         self,
@@ -49,7 +131,8 @@ class EvidenceService:
         content_type: Optional[str] = None
     ) -> tuple[str, str]:
         """
-        Upload evidence file to MinIO.
+        Upload evidence file to its content-addressed key (skipped if already stored).
+        Callers record the reference with app.services.evidence_blobs.
         
         Returns:
             tuple: (file_path, file_hash)
@@ -57,35 +140,107 @@ class EvidenceService:
         if not self.client:
             raise Exception("MinIO client not initialized")
         
-        # Calculate SHA256 hash
         file_hash = hashlib.sha256(file_data).hexdigest()
-        
-        # Generate object path
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        file_path = f"evidence/{org_id}/{control_id}/{timestamp}_{file_name}"
+        file_path = self.content_path(org_id, file_hash)
         
         try:
-            # Upload to MinIO
-            self.client.put_object(
-                bucket_name=settings.MINIO_BUCKET_NAME,
-                object_name=file_path,
-                data=BytesIO(file_data),
-                length=len(file_data),
-                content_type=content_type or 'application/octet-stream',
-                metadata={
-                    'sha256': file_hash,
-                    'control_id': control_id,
-                    'org_id': str(org_id),
-                    'uploaded_at': datetime.utcnow().isoformat()
-                }
-            )
-            
-            logger.info(f"File uploaded: {file_path} (hash={file_hash[:16]}...)")
-            return file_path, file_hash
+            if self.object_exists(file_path):
+                logger.info(f"File already stored: {file_path}")
+                return file_path, file_hash
             
-        except S3Error as e:
+            with timed(MINIO_OPERATION_SECONDS, operation="put_object"):
+                self.client.put_object(
+                    bucket_name=settings.MINIO_BUCKET_NAME,
+                    object_name=file_path,
+                    data=BytesIO(file_data),
+                    length=len(file_data),
+                    content_type=content_type or 'application/octet-stream',
+                    metadata={
+                        'sha256': file_hash,
+                        'org_id': str(org_id),
+                        'uploaded_at': datetime.utcnow().isoformat()
+                    }
+                )
+        except minio_error.S3Error as e:
+            logger.error(f"MinIO upload error: {e}")
+            raise Exception(f"Failed to upload file: {e}")
+        
+        logger.info(f"File uploaded: {file_path} (hash={file_hash[:16]}...)")
+        return file_path, file_hash
+    
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        file_name: str,
+        control_id: str,
+        org_id: int,
+        content_type: Optional[str] = None,
+        max_size: Optional[int] = None
+    ) -> tuple[str, str, int]:
+        """
+        Stream evidence to a staging key via multipart upload of unknown length.
+        SHA256 and size are computed incrementally, so memory stays bounded by
+        EVIDENCE_UPLOAD_PART_SIZE regardless of file size. Once the hash is
+        known the caller either promotes the staging object to its content
+        path or discards it as a duplicate.
+        
+        Raises:
+            EvidenceTooLargeError: stream exceeded max_size (multipart upload is aborted)
+        
+        Returns:
+            tuple: (staging_path, file_hash, file_size)
+        """
+        if not self.client:
+            raise Exception("MinIO client not initialized")
+        
+        staging_path = self.staging_path(org_id)
+        reader = HashingReader(stream, max_size=max_size)
+        
+        try:
+            # Upload to MinIO (sequential parts keep at most one part in memory)
+            with timed(MINIO_OPERATION_SECONDS, operation="put_object_stream"):
+                self.client.put_object(
+                    bucket_name=settings.MINIO_BUCKET_NAME,
+                    object_name=staging_path,
+                    data=reader,
+                    length=-1,
+                    part_size=settings.EVIDENCE_UPLOAD_PART_SIZE,
+                    num_parallel_uploads=1,
+                    content_type=content_type or 'application/octet-stream',
+                    metadata={
+                        'org_id': str(org_id),
+                        'uploaded_at': datetime.utcnow().isoformat()
+                    }
+                )
+        except minio_error.S3Error as e:
             logger.error(f"MinIO upload error: {e}")
             raise Exception(f"Failed to upload file: {e}")
+        
+        file_hash = reader.hexdigest()
+        logger.info(f"File staged: {staging_path} ({reader.size} bytes, hash={file_hash[:16]}...)")
+        return staging_path, file_hash, reader.size
+    
+    def copy_file(self, source_path: str, file_path: str):
+        """Server-side copy of an object within the evidence bucket"""
+        if not self.client:
+            raise Exception("MinIO client not initialized")
+        
+        try:
+            with timed(MINIO_OPERATION_SECONDS, operation="copy_object"):
+                self.client.copy_object(
+                    bucket_name=settings.MINIO_BUCKET_NAME,
+                    object_name=file_path,
+                    source=minio_commonconfig.CopySource(settings.MINIO_BUCKET_NAME, source_path)
+                )
+        except minio_error.S3Error as e:
+            logger.error(f"MinIO copy error: {e}")
+            raise Exception(f"Failed to copy file: {e}")
+    
+    def promote(self, staging_path: str, file_path: str):
+        """Move a staged upload to its content-addressed key"""
+        self.copy_file(staging_path, file_path)
+        self.delete_file(staging_path)
+        logger.info(f"File stored: {file_path}")
     
     def download_file(self, file_path: str) -> bytes:
         """Download evidence file from MinIO"""
@@ -93,30 +248,57 @@ class EvidenceService:
             raise Exception("MinIO client not initialized")
         
         try:
-            response = self.client.get_object(
-                bucket_name=settings.MINIO_BUCKET_NAME,
-                object_name=file_path
-            )
-            file_data = response.read()
-            response.close()
-            response.release_conn()
+            with timed(MINIO_OPERATION_SECONDS, operation="get_object"):
+                response = self.client.get_object(
+                    bucket_name=settings.MINIO_BUCKET_NAME,
+                    object_name=file_path
+                )
+                file_data = response.read()
+                response.close()
+                response.release_conn()
             
             return file_data
             
-        except S3Error as e:
+        except minio_error.S3Error as e:
             logger.error(f"MinIO download error: {e}")
             raise Exception(f"Failed to download file: {e}")
     
+    def hash_object(self, file_path: str) -> tuple[str, int]:
+        """
+        Stream an object from MinIO and hash it chunk by chunk.
+        
+        Returns:
+            tuple: (sha256 hex digest, size in bytes)
+        """
+        if not self.client:
+            raise Exception("MinIO client not initialized")
+        
+        sha256 = hashlib.sha256()
+        size = 0
+        with timed(MINIO_OPERATION_SECONDS, operation="get_object_stream"):
+            response = self.client.get_object(
+                bucket_name=settings.MINIO_BUCKET_NAME,
+                object_name=file_path
+            )
+            try:
+                for chunk in response.stream(settings.EVIDENCE_UPLOAD_CHUNK_SIZE):
+                    sha256.update(chunk)
+                    size += len(chunk)
+            finally:
+                response.close()
+                response.release_conn()
+        
+        return sha256.hexdigest(), size
+    
     def verify_file_integrity(self, file_path: str, expected_hash: str) -> bool:
         """
-        Verify file integrity using SHA256 hash.
+        Verify file integrity using SHA256 hash (streamed, constant memory).
         
         Returns:
             bool: True if hash matches
         """
         try:
-            file_data = self.download_file(file_path)
-            actual_hash = hashlib.sha256(file_data).hexdigest()
+            actual_hash, _ = self.hash_object(file_path)
             
             if actual_hash == expected_hash:
                 logger.info(f"File integrity verified: {file_path}")
@@ -150,7 +332,7 @@ class EvidenceService:
                 expires=timedelta(seconds=expires)
             )
             return url
-        except S3Error as e:
+        except minio_error.S3Error as e:
             logger.error(f"Failed to generate presigned URL: {e}")
             raise Exception(f"Failed to generate download URL: {e}")
     
@@ -160,15 +342,16 @@ class EvidenceService:
             raise Exception("MinIO client not initialized")
         
         try:
-            self.client.remove_object(
-                bucket_name=settings.MINIO_BUCKET_NAME,
-                object_name=file_path
-            )
+            with timed(MINIO_OPERATION_SECONDS, operation="remove_object"):
+                self.client.remove_object(
+                    bucket_name=settings.MINIO_BUCKET_NAME,
+                    object_name=file_path
+                )
             logger.info(f"File deleted: {file_path}")
             return True
-        except S3Error as e:
+        except minio_error.S3Error as e:
             logger.error(f"MinIO delete error: {e}")
             return False
 
-# Global instance
+# Global instance (not connected until start() / connect())
 evidence_service = EvidenceService()
@@ -0,0 +1,157 @@
+"""
+Dependency health probes for readiness checks.
+
+Probes Postgres, Kafka, MinIO and Elasticsearch concurrently, each bounded
+by HEALTH_PROBE_TIMEOUT, so a report takes as long as the slowest probe (at
+most the timeout) instead of the sum. The report is cached for
+HEALTH_CACHE_TTL seconds and concurrent callers share one in-flight
+refresh, so however often load balancers poll, each worker probes the
+backends at most once per interval.
+
+Readiness fails only when a dependency in HEALTH_CRITICAL_DEPENDENCIES is
+down; the others report "degraded" (e.g. Kafka: events wait in the outbox).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import DEPENDENCY_PROBE_SECONDS, DEPENDENCY_UP
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[Optional[str]]]  # returns optional detail, raises when down
+
+httpx = lazy_import("httpx")  # first readiness probe
+_http = None
+
+
+async def probe_postgres() -> Optional[str]:
+    from app.database import async_engine
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    return None
+
+
+async def probe_kafka() -> Optional[str]:
+    from app.services.kafka_producer import kafka_producer
+    producer = kafka_producer.producer
+    if producer is None:
+        raise RuntimeError("producer not connected (retrying in the background)")
+    # Served from the client's cached cluster metadata while the broker is reachable
+    partitions = await run_in_threadpool(producer.partitions_for, settings.KAFKA_TOPIC_AUDIT)
+    return f"{len(partitions or ())} partitions for {settings.KAFKA_TOPIC_AUDIT}"
+
+
+async def probe_minio() -> Optional[str]:
+    from app.services.evidence_service import evidence_service
+    client = evidence_service.client
+    if client is None:
+        raise RuntimeError("client not connected (retrying in the background)")
+    if not await run_in_threadpool(client.bucket_exists, settings.MINIO_BUCKET_NAME):
+        raise RuntimeError(f"bucket {settings.MINIO_BUCKET_NAME} missing")
+    return None
+
+
+async def probe_elasticsearch() -> Optional[str]:
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(base_url=settings.ELASTICSEARCH_URL)
+    response = await _http.get("/_cluster/health", timeout=settings.HEALTH_PROBE_TIMEOUT)
+    response.raise_for_status()
+    cluster_status = response.json().get("status")
+    if cluster_status == "red":
+        raise RuntimeError("cluster status red")
+    return cluster_status
+
+
+DEFAULT_PROBES: Dict[str, Probe] = {
+    "postgres": probe_postgres,
+    "kafka": probe_kafka,
+    "minio": probe_minio,
+    "elasticsearch": probe_elasticsearch,
+}
+
+
+class HealthChecker:
+    """Concurrent, time-bounded dependency probes with a cached, single-flight report"""
+
+    def __init__(
+        self,
+        probes: Optional[Dict[str, Probe]] = None,
+        timeout: Optional[float] = None,
+        ttl: Optional[float] = None,
+        critical: Optional[Iterable[str]] = None
+    ):
+        self.probes = probes if probes is not None else DEFAULT_PROBES
+        self.timeout = timeout if timeout is not None else settings.HEALTH_PROBE_TIMEOUT
+        self.ttl = ttl if ttl is not None else settings.HEALTH_CACHE_TTL
+        self.critical = set(critical if critical is not None else settings.HEALTH_CRITICAL_DEPENDENCIES)
+        self._report: Optional[dict] = None
+        self._checked_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+        self.probe_runs = 0  # report refreshes (for benchmarks and tests)
+
+    async def _run_probe(self, name: str, probe: Probe) -> dict:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(probe(), timeout=self.timeout)
+            result = {"status": "up"}
+            if detail:
+                result["detail"] = detail
+        except asyncio.TimeoutError:
+            result = {"status": "down", "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": "down", "error": str(e) or type(e).__name__}
+        elapsed = time.perf_counter() - start
+        result["latency_ms"] = round(elapsed * 1000, 1)
+        DEPENDENCY_PROBE_SECONDS.labels(dependency=name).observe(elapsed)
+        DEPENDENCY_UP.labels(dependency=name).set(1 if result["status"] == "up" else 0)
+        if result["status"] == "down":
+            logger.warning(f"Health probe {name} down: {result['error']}")
+        return result
+
+    async def _probe_all(self) -> dict:
+        start = time.perf_counter()
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._run_probe(name, self.probes[name]) for name in names))
+        dependencies = dict(zip(names, results))
+        down = {name for name, result in dependencies.items() if result["status"] != "up"}
+        if down & self.critical:
+            status = "down"
+        elif down:
+            status = "degraded"
+        else:
+            status = "ok"
+        self.probe_runs += 1
+        self._report = {
+            "status": status,
+            "checked_at": datetime.utcnow().isoformat(),
+            "probe_ms": round((time.perf_counter() - start) * 1000, 1),
+            "dependencies": dependencies
+        }
+        self._checked_at = time.monotonic()
+        return self._report
+
+    async def report(self) -> dict:
+        """Cached report; refreshes at most once per ttl however many callers are waiting"""
+        age = time.monotonic() - self._checked_at
+        if self._report is not None and age < self.ttl:
+            return {**self._report, "cached": True, "age_s": round(age, 2)}
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._probe_all())
+        # Shielded: a client disconnecting mid-probe does not cancel the shared refresh
+        report = await asyncio.shield(self._refresh)
+        return {**report, "cached": False, "age_s": 0.0}
+
+    def is_ready(self, report: dict) -> bool:
+        return report["status"] != "down"
+
+
+health_checker = HealthChecker()
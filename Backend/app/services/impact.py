@@ -0,0 +1,376 @@
+"""
+Compliance impact analysis.
+
+When a control stops being implemented, the cascade is:
+
+  mapped controls  controls it satisfies through ControlMapping, directly or
+                   transitively, with their path confidence
+                   (app.services.control_graph)
+  frameworks       the frameworks of the control and of every mapped control
+  policies         active policies linked to any of them (PolicyControlLink)
+  risks            risks any of them mitigates (RiskControl)
+
+Control -> policy and control -> risk links are held per worker and tenant
+in a reverse index (ImpactIndex: link arrays sorted by control_id), so a
+cascade is one vectorised range lookup over the affected controls, plus one
+primary key query per kind of row for names and status.
+
+Writers of PolicyControlLink and RiskControl rows call `record_link_changes`
+in their transaction: it bumps the tenant's "links" version and logs the
+control ids whose links changed under the new version. A query that finds a
+newer version reloads the links of just those controls into a copy of the
+index; an index older than IMPACT_INDEX_MAX_AGE is reloaded in full.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import IMPACT_INDEX_BUILD_SECONDS, IMPACT_INDEX_BUILDS, IMPACT_QUERY_SECONDS
+from app.models.control import Control, ControlLinkChange
+from app.models.framework import Framework
+from app.models.policy import Policy, PolicyControlLink
+from app.models.risk import Risk, RiskControl
+from app.services import tenant_versions
+from app.services.control_graph import control_graphs
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+
+IN_CHUNK = 5000  # control ids per IN (...) when applying changes
+
+
+class Links(NamedTuple):
+    """Control -> linked row edges sorted by control_id, with a value per edge"""
+    control: "np.ndarray"
+    linked: "np.ndarray"
+    value: "np.ndarray"  # mitigation_effectiveness for risk links (NaN = unknown), unused for policy links
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "Links":
+        """(control_id, linked_id[, value]) rows"""
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        columns = list(zip(*rows))
+        control = np.array(columns[0], dtype=np.int64)
+        linked = np.array(columns[1], dtype=np.int64)
+        if len(columns) > 2:
+            value = np.array([np.nan if v is None else v for v in columns[2]], dtype=np.float32)
+        else:
+            value = np.zeros(len(control), dtype=np.float32)
+        order = np.argsort(control, kind="stable")
+        return cls(control[order], linked[order], value[order])
+
+    def replace(self, changed, other: "Links") -> "Links":
+        """Edges of the `changed` controls replaced by `other`"""
+        keep = ~np.isin(self.control, changed)
+        control = np.concatenate([self.control[keep], other.control])
+        order = np.argsort(control, kind="stable")
+        return Links(
+            control[order],
+            np.concatenate([self.linked[keep], other.linked])[order],
+            np.concatenate([self.value[keep], other.value])[order]
+        )
+
+    def of(self, control_ids) -> "Links":
+        """Edges leaving the given (unique) controls"""
+        starts = np.searchsorted(self.control, control_ids, side="left")
+        counts = np.searchsorted(self.control, control_ids, side="right") - starts
+        positions = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+        return Links(self.control[positions], self.linked[positions], self.value[positions])
+
+    def by_linked(self) -> Dict[int, "Links"]:
+        """linked_id -> its edges (views into one sorted copy)"""
+        order = np.argsort(self.linked)
+        control, linked, value = self.control[order], self.linked[order], self.value[order]
+        starts = np.flatnonzero(np.diff(linked, prepend=linked[:1] - 1)).tolist()
+        bounds = starts + [len(linked)]
+        return {
+            key: Links(control[a:b], linked[a:b], value[a:b])
+            for key, a, b in zip(linked[starts].tolist(), bounds[:-1], bounds[1:])
+        }
+
+
+class ImpactIndex:
+    """
+    Immutable snapshot of one tenant's control -> policy / risk links.
+    `apply` returns a new snapshot, so queries never see a half-applied change.
+    """
+
+    def __init__(self, org_id: int, version: int, policies: Links, risks: Links):
+        self.org_id = org_id
+        self.version = version
+        self.built_at = time.monotonic()
+        self.policies = policies
+        self.risks = risks
+
+    @classmethod
+    def build(cls, org_id: int, version: int, policy_rows: Sequence[tuple], risk_rows: Sequence[tuple]) -> "ImpactIndex":
+        """Index from (control_id, policy_id) and (control_id, risk_id, effectiveness) rows"""
+        return cls(org_id, version, Links.from_rows(policy_rows), Links.from_rows(risk_rows))
+
+    def apply(self, version: int, changed: Iterable[int], policy_rows: Sequence[tuple], risk_rows: Sequence[tuple]) -> "ImpactIndex":
+        """Snapshot with the links of the `changed` controls replaced by the given rows"""
+        changed = np.fromiter(changed, dtype=np.int64)
+        return ImpactIndex(
+            self.org_id, version,
+            self.policies.replace(changed, Links.from_rows(policy_rows)),
+            self.risks.replace(changed, Links.from_rows(risk_rows))
+        )
+
+    @property
+    def link_count(self) -> int:
+        return len(self.policies.control) + len(self.risks.control)
+
+    def dependents(self, control_ids: Sequence[int]) -> Tuple[Dict[int, Links], Dict[int, Links]]:
+        """policy_id -> links and risk_id -> links from the given controls"""
+        control_ids = np.unique(np.asarray(control_ids, dtype=np.int64))
+        return self.policies.of(control_ids).by_linked(), self.risks.of(control_ids).by_linked()
+
+
+def _policy_links(org_id: int):
+    return (
+        select(PolicyControlLink.control_id, PolicyControlLink.policy_id)
+        .join(Policy, Policy.policy_id == PolicyControlLink.policy_id)
+        .where(Policy.org_id == org_id)
+    )
+
+
+def _risk_links(org_id: int):
+    return (
+        select(RiskControl.control_id, RiskControl.risk_id, RiskControl.mitigation_effectiveness)
+        .join(Risk, Risk.risk_id == RiskControl.risk_id)
+        .where(Risk.org_id == org_id)
+    )
+
+
+async def record_link_changes(db: AsyncSession, org_id: int, control_ids: Iterable[int]):
+    """
+    Log controls whose policy or risk links were created or deleted for the
+    cached indexes (the caller commits). Bumping the version first
+    serializes the tenant's link writers, so versions commit in order.
+    """
+    await tenant_versions.bump(db, org_id, tenant_versions.LINKS)
+    version = await tenant_versions.current(db, org_id, tenant_versions.LINKS)
+    now = datetime.utcnow()
+    for control_id in sorted(set(control_ids)):
+        db.add(ControlLinkChange(org_id=org_id, version=version, control_id=control_id, changed_at=now))
+    await db.execute(delete(ControlLinkChange).where(
+        ControlLinkChange.org_id == org_id,
+        ControlLinkChange.changed_at < now - timedelta(seconds=settings.IMPACT_CHANGE_RETENTION)
+    ))
+
+
+class ImpactIndexCache:
+    """Per-tenant impact indexes, least recently used evicted beyond max_tenants"""
+
+    def __init__(self, max_tenants: int = 16, max_age: float = 3600, max_changes: int = 50000):
+        self.max_tenants = max_tenants
+        self.max_age = max_age
+        self.max_changes = max_changes  # more changed controls than this reload the tenant
+        self._indexes: "OrderedDict[int, ImpactIndex]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def _current(self, index: Optional[ImpactIndex], version: int) -> bool:
+        return index is not None and index.version >= version and time.monotonic() - index.built_at < self.max_age
+
+    async def get(self, db: AsyncSession, org_id: int) -> ImpactIndex:
+        """The tenant's index as of its latest committed link change"""
+        version = await tenant_versions.current(db, org_id, tenant_versions.LINKS)
+        index = self._indexes.get(org_id)
+        if self._current(index, version):
+            self._indexes.move_to_end(org_id)
+            return index
+        async with self._locks.setdefault(org_id, asyncio.Lock()):
+            index = self._indexes.get(org_id)  # refreshed while this request waited
+            if self._current(index, version):
+                return index
+            if index is not None and time.monotonic() - index.built_at < self.max_age:
+                index = await self._apply_changes(db, index, version)
+            else:
+                index = None
+            if index is None:
+                index = await self._load(db, org_id)
+            self._store(org_id, index)
+            return index
+
+    async def _load(self, db: AsyncSession, org_id: int) -> ImpactIndex:
+        start = time.perf_counter()
+        # Version first: a change committed during the load is applied again next time (idempotent)
+        version = await tenant_versions.current(db, org_id, tenant_versions.LINKS)
+        policy_rows = (await db.execute(_policy_links(org_id))).all()
+        risk_rows = (await db.execute(_risk_links(org_id))).all()
+        index = await asyncio.to_thread(ImpactIndex.build, org_id, version, policy_rows, risk_rows)
+        elapsed = time.perf_counter() - start
+        IMPACT_INDEX_BUILDS.labels(kind="full").inc()
+        IMPACT_INDEX_BUILD_SECONDS.labels(kind="full").observe(elapsed)
+        logger.info(
+            f"Impact index for org {org_id}: {len(policy_rows)} policy links, "
+            f"{len(risk_rows)} risk links, {elapsed * 1000:.0f} ms"
+        )
+        return index
+
+    async def _apply_changes(self, db: AsyncSession, index: ImpactIndex, version: int) -> Optional[ImpactIndex]:
+        start = time.perf_counter()
+        changed = sorted(set((await db.execute(
+            select(ControlLinkChange.control_id).distinct().where(
+                ControlLinkChange.org_id == index.org_id,
+                ControlLinkChange.version > index.version
+            )
+        )).scalars()))
+        if len(changed) > self.max_changes:
+            return None
+        policy_rows, risk_rows = [], []
+        for offset in range(0, len(changed), IN_CHUNK):
+            chunk = changed[offset:offset + IN_CHUNK]
+            policy_rows.extend((await db.execute(
+                _policy_links(index.org_id).where(PolicyControlLink.control_id.in_(chunk))
+            )).all())
+            risk_rows.extend((await db.execute(
+                _risk_links(index.org_id).where(RiskControl.control_id.in_(chunk))
+            )).all())
+        updated = await asyncio.to_thread(index.apply, version, changed, policy_rows, risk_rows)
+        IMPACT_INDEX_BUILDS.labels(kind="delta").inc()
+        IMPACT_INDEX_BUILD_SECONDS.labels(kind="delta").observe(time.perf_counter() - start)
+        return updated
+
+    def _store(self, org_id: int, index: ImpactIndex):
+        self._indexes[org_id] = index
+        self._indexes.move_to_end(org_id)
+        while len(self._indexes) > self.max_tenants:
+            evicted, _ = self._indexes.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    def clear(self):
+        self._indexes.clear()
+        self._locks.clear()
+
+
+impact_indexes = ImpactIndexCache(
+    max_tenants=settings.IMPACT_INDEX_MAX_TENANTS,
+    max_age=settings.IMPACT_INDEX_MAX_AGE,
+    max_changes=settings.IMPACT_INDEX_MAX_CHANGES
+)
+
+
+async def analyze(
+    db: AsyncSession,
+    org_id: int,
+    control_id: int,
+    max_depth: int = 3,
+    min_confidence: float = 0.5,
+    limit: int = 10000,
+    indexes: Optional[ImpactIndexCache] = None,
+    graphs=None
+) -> dict:
+    """
+    Everything affected when `control_id` is not implemented (shaped as
+    app.schemas.impact.ImpactResponse). Inactive controls, inactive
+    policies and closed risks are left out.
+    """
+    start = time.perf_counter()
+    graph = await (graphs or control_graphs).get(db, org_id)
+    index = await (indexes or impact_indexes).get(db, org_id)
+
+    cascade_start = time.perf_counter()
+    hits = graph.satisfies(control_id, max_depth, min_confidence, limit=limit)
+    affected = [control_id] + [hit[0] for hit in hits]
+    policy_via, risk_via = index.dependents(affected)
+    IMPACT_QUERY_SECONDS.observe(time.perf_counter() - cascade_start)
+
+    controls = {row.control_id: row for row in (await db.execute(
+        select(
+            Control.control_id, Control.internal_code, Control.original_code, Control.title,
+            Control.framework_id, Control.status
+        ).where(Control.org_id == org_id, Control.control_id.in_(affected), Control.is_active == True)
+    )).all()}
+    policies = (await db.execute(
+        select(Policy.policy_id, Policy.policy_name, Policy.owner)
+        .where(Policy.org_id == org_id, Policy.policy_id.in_(list(policy_via)), Policy.is_active == True)
+        .order_by(Policy.policy_id)
+    )).all() if policy_via else []
+    risks = (await db.execute(
+        select(Risk.risk_id, Risk.risk_title, Risk.status, Risk.likelihood, Risk.impact, Risk.risk_score)
+        .where(Risk.org_id == org_id, Risk.risk_id.in_(list(risk_via)), or_(Risk.status.is_(None), Risk.status != "closed"))
+        .order_by(Risk.risk_id)
+    )).all() if risk_via else []
+
+    framework_controls = defaultdict(int)
+    for row in controls.values():
+        framework_controls[row.framework_id] += 1
+    frameworks = (await db.execute(
+        select(Framework.framework_id, Framework.framework_code, Framework.framework_name)
+        .where(Framework.framework_id.in_(list(framework_controls)))
+        .order_by(Framework.framework_id)
+    )).all() if framework_controls else []
+
+    def codes(control_ids):
+        return sorted({controls[c].internal_code for c in control_ids if c in controls})
+
+    affected_policies = []
+    for row in policies:
+        via = codes(policy_via[row.policy_id].control.tolist())
+        if via:
+            affected_policies.append(
+                {"policy_id": row.policy_id, "policy_name": row.policy_name, "owner": row.owner, "via": via}
+            )
+    affected_risks = []
+    for row in risks:
+        via = risk_via[row.risk_id]
+        links = [(c, e) for c, e in zip(via.control.tolist(), via.value.tolist()) if c in controls]
+        if links:
+            affected_risks.append({
+                "risk_id": row.risk_id,
+                "risk_title": row.risk_title,
+                "status": row.status,
+                "likelihood": row.likelihood,
+                "impact": row.impact,
+                "risk_score": row.risk_score,
+                "via": codes(c for c, _ in links),
+                "mitigation_effectiveness": max((round(e, 4) for _, e in links if e == e), default=None),  # NaN = unknown
+            })
+
+    source = controls.get(control_id)
+    return {
+        "control": {
+            "control_id": control_id,
+            "internal_code": source.internal_code if source else str(control_id),
+            "title": source.title if source else None,
+            "framework_id": source.framework_id if source else None,
+            "status": source.status if source else None,
+        },
+        "frameworks": [
+            {
+                "framework_id": row.framework_id,
+                "framework_code": row.framework_code,
+                "framework_name": row.framework_name,
+                "controls": framework_controls[row.framework_id],
+            }
+            for row in frameworks
+        ],
+        "policies": affected_policies,
+        "risks": affected_risks,
+        "mapped_controls": [
+            {
+                "control_id": target,
+                "internal_code": controls[target].internal_code,
+                "original_code": controls[target].original_code,
+                "title": controls[target].title,
+                "framework_id": controls[target].framework_id,
+                "confidence": round(confidence, 4),
+                "hops": hops,
+                "path": [controls[i].internal_code if i in controls else str(i) for i in path],
+            }
+            for target, confidence, hops, path in hits
+            if target in controls
+        ],
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
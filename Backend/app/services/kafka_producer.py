@@ -1,39 +1,59 @@
-from kafka import KafkaProducer
-from kafka.errors import KafkaError
 import json
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 from app.config import settings
+from app.lazy import lazy_import
+from app.services.connector import BackgroundConnector
+from app.services.outbox import build_audit_event, instrumented_send
 
 logger = logging.getLogger(__name__)
 
+# Loaded by the first connection attempt, off the startup path
+kafka = lazy_import("kafka")
+kafka_errors = lazy_import("kafka.errors")
+
 class KafkaProducerService:
     """
     Kafka producer service for immutable audit trail and event sourcing.
+    Does not connect on construction: the API calls start() from its
+    lifespan (background connection with retry), CLIs call connect().
     """
     
     def __init__(self):
-        self.producer: Optional[KafkaProducer] = None
-        self._initialize_producer()
+        self.producer: Optional["kafka.KafkaProducer"] = None
+        self._connector = BackgroundConnector("kafka", self._initialize_producer)
+    
+    def connect(self) -> bool:
+        """Connect now if not connected (one attempt, blocks up to the bootstrap timeout)"""
+        return self.producer is not None or self._initialize_producer()
+    
+    def start(self):
+        """Connect in the background, retrying until the broker is reachable"""
+        if self.producer is None:
+            self._connector.start()
     
-    def _initialize_producer(self):
-        """Initialize Kafka producer with retry logic"""
+    def _initialize_producer(self) -> bool:
+        """Initialize Kafka producer (one attempt)"""
         try:
-            self.producer = KafkaProducer(
+            self.producer = kafka.KafkaProducer(
                 bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS.split(','),
                 value_serializer=lambda v: json.dumps(v, default=str).encode('utf-8'),
                 key_serializer=lambda k: k.encode('utf-8') if k else None,
                 acks='all',  # Wait for all replicas
                 retries=3,
-                max_in_flight_requests_per_connection=1,
-                compression_type='gzip'
+                max_in_flight_requests_per_connection=1,  # retries cannot reorder a key
+                compression_type='gzip',
+                linger_ms=settings.KAFKA_LINGER_MS,
+                batch_size=settings.KAFKA_BATCH_SIZE
             )
             logger.info(f"Kafka producer initialized: {settings.KAFKA_BOOTSTRAP_SERVERS}")
+            return True
         except Exception as e:
             logger.error(f"Failed to initialize Kafka producer: {e}")
             self.producer = None
+            return False
     
     def send_audit_event(
         self,
@@ -46,7 +66,9 @@ class KafkaProducerService:
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
         """
-        Send audit trail event to Kafka.
+        Send audit trail event to Kafka and wait for the acknowledgement.
+        Request handlers should use app.services.outbox.audit_event instead,
+        which commits the event with the change and never blocks on the broker.
         
         Args:
             event_type: Type of event (control_update, policy_create, etc.)
@@ -64,19 +86,11 @@ class KafkaProducerService:
             logger.warning("Kafka producer not available, skipping audit event")
             return False
         
-        event = {
-            "event_type": event_type,
-            "resource_type": resource_type,
-            "resource_id": resource_id,
-            "action": action,
-            "user_id": user_id,
-            "org_id": org_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "metadata": metadata or {}
-        }
+        event = build_audit_event(event_type, resource_type, resource_id, action, user_id, org_id, metadata)
         
         try:
-            future = self.producer.send(
+            future = instrumented_send(
+                self.producer,
                 topic=settings.KAFKA_TOPIC_AUDIT,
                 key=f"{org_id}:{resource_type}:{resource_id}",
                 value=event
@@ -91,7 +105,7 @@ class KafkaProducerService:
             )
             return True
             
-        except KafkaError as e:
+        except kafka_errors.KafkaError as e:
             logger.error(f"Failed to send audit event: {e}")
             return False
     
@@ -117,14 +131,15 @@ class KafkaProducerService:
         }
         
         try:
-            self.producer.send(
+            instrumented_send(
+                self.producer,
                 topic=settings.KAFKA_TOPIC_CONTROLS_SCANS,
                 key=control_id,
                 value=event
             )
             logger.info(f"Control scan result sent for {control_id}")
             return True
-        except KafkaError as e:
+        except kafka_errors.KafkaError as e:
             logger.error(f"Failed to send control scan: {e}")
             return False
     
@@ -156,22 +171,24 @@ class KafkaProducerService:
         }
         
         try:
-            self.producer.send(
+            instrumented_send(
+                self.producer,
                 topic=settings.KAFKA_TOPIC_NOTIFICATIONS,
                 value=event
             )
             logger.info(f"Notification sent: {title}")
             return True
-        except KafkaError as e:
+        except kafka_errors.KafkaError as e:
             logger.error(f"Failed to send notification: {e}")
             return False
     
     def close(self):
         """Close Kafka producer connection"""
+        self._connector.stop(timeout=5)
         if self.producer:
             self.producer.flush()
             self.producer.close()
             logger.info("Kafka producer closed")
 
-# Global instance
+# Global instance (not connected until start() / connect())
 kafka_producer = KafkaProducerService()
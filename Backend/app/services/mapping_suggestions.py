@@ -0,0 +1,392 @@
+"""
+Cross-framework mapping suggestions.
+
+Scores every pair of a tenant's active controls from different frameworks by
+the cosine similarity of their text and writes the best candidates as
+ControlMapping rows:
+
+  vectorize  title (counted TITLE_WEIGHT times), description and
+             implementation_guidance are tokenized into words and adjacent
+             word pairs, hashed into HASH_FEATURES columns (no shared
+             vocabulary, so chunks tokenize in parallel) and weighted by
+             sublinear TF-IDF. Terms in fewer than MIN_DOCUMENT_FREQUENCY
+             controls or in more than MAX_DOCUMENT_SHARE of them are
+             dropped; rows are L2-normalized.
+  similarity the sparse matrix is multiplied with its transpose one block of
+             MAPPING_SUGGEST_BLOCK_ROWS controls at a time on a process pool.
+             Each block keeps, per control and other framework, the top_k
+             controls scoring at least the threshold, so memory stays
+             bounded by the block and never by controls x controls.
+  write      candidates are deduplicated as unordered pairs (the source is
+             the lower control_id). Pairs already mapped either way are
+             left alone, except that a mapping without a confidence_score
+             gets its similarity. New pairs are bulk inserted as
+             "equivalent" from MAPPING_SUGGEST_EQUIVALENT up and "related"
+             below (both undirected in the mapping graph, so the stored
+             direction does not matter), and every touched mapping goes
+             through control_graph.record_changes in the same transaction.
+
+Rerunning is safe: an unchanged catalog inserts nothing.
+
+Run:
+    python -m app.services.mapping_suggestions suggest --org-id N [--top-k 3] [--threshold 0.35] [--workers 8] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.models.control import Control, ControlMapping
+from app.services import control_graph
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+sparse = lazy_import("scipy.sparse")
+
+HASH_FEATURES = 1 << 20
+TITLE_WEIGHT = 2
+MIN_DOCUMENT_FREQUENCY = 2
+MAX_DOCUMENT_SHARE = 0.5
+TOKENIZE_CHUNK = 2000  # documents per tokenize task
+INSERT_BATCH = 5000
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]+")
+STOP_WORDS = frozenset("""
+    a an and are as at be been being but by can could do does for from has have if in into is it its
+    may more must no not of on or other shall should so such than that the their them then there these
+    they this those to was were what when where which while who will with within without would
+""".split())
+
+_worker = {}  # similarity process state, set by _init_similarity
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words minus stop words, plural s stripped, followed by adjacent word pairs"""
+    words = []
+    for word in TOKEN_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if word.endswith("ies") and len(word) > 4:
+            word = word[:-3] + "y"
+        elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            word = word[:-1]
+        words.append(word)
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def control_document(title: Optional[str], description: Optional[str], guidance: Optional[str]) -> str:
+    return " ".join([title or ""] * TITLE_WEIGHT + [description or "", guidance or ""])
+
+
+def _feature(token: str) -> int:
+    return zlib.crc32(token.encode()) & (HASH_FEATURES - 1)
+
+
+def _tokenize_chunk(documents: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Per-document feature counts as (row lengths, feature indices, counts)"""
+    lengths, indices, counts = [], [], []
+    for document in documents:
+        features = Counter(_feature(token) for token in tokenize(document))
+        lengths.append(len(features))
+        indices.extend(features.keys())
+        counts.extend(features.values())
+    return (
+        np.array(lengths, dtype=np.int64),
+        np.array(indices, dtype=np.int32),
+        np.array(counts, dtype=np.float32)
+    )
+
+
+def vectorize(documents: Sequence[str], pool: Optional[ProcessPoolExecutor] = None) -> "sparse.csr_matrix":
+    """L2-normalized TF-IDF rows (float32 CSR, HASH_FEATURES columns)"""
+    chunks = [documents[i:i + TOKENIZE_CHUNK] for i in range(0, len(documents), TOKENIZE_CHUNK)]
+    parts = list(pool.map(_tokenize_chunk, chunks) if pool else map(_tokenize_chunk, chunks))
+    n = len(documents)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    if parts:
+        np.cumsum(np.concatenate([part[0] for part in parts]), out=indptr[1:])
+        indices = np.concatenate([part[1] for part in parts])
+        counts = np.concatenate([part[2] for part in parts])
+    else:
+        indices, counts = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    frequency = np.bincount(indices, minlength=HASH_FEATURES)
+    idf = (np.log((1 + n) / (1 + frequency)) + 1).astype(np.float32)
+    keep = (frequency >= MIN_DOCUMENT_FREQUENCY) & (frequency <= max(MAX_DOCUMENT_SHARE * n, MIN_DOCUMENT_FREQUENCY))
+    data = np.where(keep[indices], (1 + np.log(counts)) * idf[indices], 0).astype(np.float32)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(n, HASH_FEATURES))
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = sparse.diags(np.where(norms > 0, 1 / np.maximum(norms, 1e-12), 0).astype(np.float32)) @ matrix
+    return matrix.tocsr()
+
+
+def _init_similarity(matrix, frameworks, top_k: int, threshold: float):
+    _worker.update(
+        matrix=matrix,
+        transposed=matrix.T.tocsr(),
+        frameworks=frameworks,
+        top_k=top_k,
+        threshold=threshold
+    )
+
+
+def _similar_block(bounds: Tuple[int, int]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    For rows start:stop, the top_k most similar controls per other framework
+    scoring at least the threshold, as (row, column, score) arrays
+    """
+    start, stop = bounds
+    frameworks, top_k = _worker["frameworks"], _worker["top_k"]
+    product = _worker["matrix"][start:stop] @ _worker["transposed"]
+    # Most of the block's products are below the threshold: drop them before anything else touches them
+    positions = np.flatnonzero(product.data >= _worker["threshold"])
+    rows = (np.searchsorted(product.indptr, positions, side="right") - 1).astype(np.int32) + start
+    columns = product.indices[positions].astype(np.int32)
+    scores = product.data[positions]
+    keep = frameworks[rows] != frameworks[columns]
+    rows, columns, scores = rows[keep], columns[keep], scores[keep]
+
+    target_framework = frameworks[columns]
+    order = np.lexsort((columns, -scores, target_framework, rows))
+    rows, columns, scores, target_framework = rows[order], columns[order], scores[order], target_framework[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (target_framework[1:] != target_framework[:-1])
+    positions = np.arange(len(rows))
+    rank = positions - np.maximum.accumulate(np.where(first, positions, 0))
+    keep = rank < top_k
+    return rows[keep], columns[keep], scores[keep]
+
+
+class Candidates(NamedTuple):
+    """Unordered control pairs (row indices, source < target) and their similarity"""
+    source: "np.ndarray"
+    target: "np.ndarray"
+    score: "np.ndarray"
+
+
+def find_candidates(
+    matrix,
+    frameworks,
+    top_k: int,
+    threshold: float,
+    workers: int = 1,
+    block_rows: int = 1024
+) -> Candidates:
+    """Top-k cross-framework pairs of the rows of a vectorize() matrix"""
+    frameworks = np.asarray(frameworks, dtype=np.int32)
+    n = matrix.shape[0]
+    blocks = [(start, min(start + block_rows, n)) for start in range(0, n, block_rows)]
+    args = (matrix, frameworks, top_k, threshold)
+    if workers > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_similarity, initargs=args
+        ) as pool:
+            parts = list(pool.map(_similar_block, blocks))
+    else:
+        _init_similarity(*args)
+        parts = [_similar_block(bounds) for bounds in blocks]
+        _worker.clear()
+    if not parts:
+        return Candidates(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+
+    rows, columns, scores = (np.concatenate(arrays) for arrays in zip(*parts))
+    source, target = np.minimum(rows, columns), np.maximum(rows, columns)
+    keys = source.astype(np.int64) * n + target
+    order = np.lexsort((-scores, keys))
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    chosen = order[first]
+    return Candidates(source[chosen], target[chosen], scores[chosen])
+
+
+def pair_scores(matrix, source, target) -> "np.ndarray":
+    """Cosine similarity of row pairs"""
+    if len(source) == 0:
+        return np.empty(0, dtype=np.float32)
+    return np.asarray(matrix[source].multiply(matrix[target]).sum(axis=1)).ravel().astype(np.float32)
+
+
+def _score_catalog(documents, frameworks, pairs, top_k, threshold, workers, block_rows):
+    """Vectorize, find candidates and score the given (source, target) row pairs"""
+    start = time.perf_counter()
+    if workers > 1 and len(documents) > TOKENIZE_CHUNK:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            matrix = vectorize(documents, pool)
+    else:
+        matrix = vectorize(documents)
+    vectorized = time.perf_counter()
+    candidates = find_candidates(matrix, frameworks, top_k, threshold, workers, block_rows)
+    scored = pair_scores(matrix, *pairs)
+    timings = {"vectorize_s": round(vectorized - start, 2), "similarity_s": round(time.perf_counter() - vectorized, 2)}
+    return candidates, scored, timings
+
+
+async def suggest_mappings(
+    db: AsyncSession,
+    org_id: int,
+    top_k: Optional[int] = None,
+    threshold: Optional[float] = None,
+    workers: Optional[int] = None,
+    dry_run: bool = False
+) -> dict:
+    """
+    Insert candidate mappings for a tenant and fill in missing confidence
+    scores (the caller commits).
+
+    Args:
+        dry_run: Compute everything but write nothing
+
+    Returns:
+        dict: Counts and phase timings
+    """
+    top_k = top_k or settings.MAPPING_SUGGEST_TOP_K
+    threshold = settings.MAPPING_SUGGEST_THRESHOLD if threshold is None else threshold
+    workers = workers or settings.MAPPING_SUGGEST_WORKERS or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    controls = (await db.execute(
+        select(
+            Control.control_id, Control.framework_id, Control.title,
+            Control.description, Control.implementation_guidance
+        )
+        .where(Control.org_id == org_id, Control.is_active == True)
+        .order_by(Control.control_id)
+    )).all()
+    existing = (await db.execute(
+        select(
+            ControlMapping.mapping_id, ControlMapping.source_control_id,
+            ControlMapping.target_control_id, ControlMapping.confidence_score
+        )
+        .where(ControlMapping.org_id == org_id)
+    )).all()
+    loaded = time.perf_counter()
+
+    node_ids = np.array([row.control_id for row in controls], dtype=np.int64)
+    n = len(node_ids)
+
+    def index_of(control_ids):
+        position = np.searchsorted(node_ids, control_ids)
+        position = np.minimum(position, max(n - 1, 0))
+        found = (node_ids[position] == control_ids) if n else np.zeros(len(control_ids), dtype=bool)
+        return position.astype(np.int32), found
+
+    mapping_ids = np.array([row.mapping_id for row in existing], dtype=np.int64)
+    mapped_source, source_found = index_of(np.array([row.source_control_id for row in existing], dtype=np.int64))
+    mapped_target, target_found = index_of(np.array([row.target_control_id for row in existing], dtype=np.int64))
+    both_active = source_found & target_found
+    mapped_keys = (
+        np.minimum(mapped_source, mapped_target).astype(np.int64) * n + np.maximum(mapped_source, mapped_target)
+    )[both_active]
+    unscored = both_active & np.array([row.confidence_score is None for row in existing], dtype=bool)
+
+    documents = [control_document(row.title, row.description, row.implementation_guidance) for row in controls]
+    frameworks = [row.framework_id for row in controls]
+    candidates, filled, timings = await asyncio.to_thread(
+        _score_catalog, documents, frameworks, (mapped_source[unscored], mapped_target[unscored]),
+        top_k, threshold, workers, settings.MAPPING_SUGGEST_BLOCK_ROWS
+    )
+
+    new = ~np.isin(candidates.source.astype(np.int64) * n + candidates.target, mapped_keys)
+    source, target, score = candidates.source[new], candidates.target[new], candidates.score[new]
+    equivalent = score >= settings.MAPPING_SUGGEST_EQUIVALENT
+    writing = time.perf_counter()
+
+    changed = []
+    if not dry_run:
+        rows = [
+            {
+                "org_id": org_id,
+                "source_control_id": int(node_ids[s]),
+                "target_control_id": int(node_ids[t]),
+                "mapping_type": "equivalent" if eq else "related",
+                "confidence_score": round(float(c), 4),
+            }
+            for s, t, c, eq in zip(source, target, score, equivalent)
+        ]
+        for offset in range(0, len(rows), INSERT_BATCH):
+            result = await db.execute(
+                insert(ControlMapping).returning(ControlMapping.mapping_id), rows[offset:offset + INSERT_BATCH]
+            )
+            changed.extend(result.scalars())
+        updates = [
+            {"mapping_id": int(mapping_id), "confidence_score": round(float(c), 4)}
+            for mapping_id, c in zip(mapping_ids[unscored], filled)
+        ]
+        for offset in range(0, len(updates), INSERT_BATCH):
+            await db.execute(update(ControlMapping), updates[offset:offset + INSERT_BATCH])
+        changed.extend(row["mapping_id"] for row in updates)
+        if changed:
+            await control_graph.record_changes(db, org_id, changed)
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "org_id": org_id,
+        "controls": n,
+        "frameworks": len(set(frameworks)),
+        "existing": len(existing),
+        "candidates": len(candidates.score),
+        "inserted": int(len(score)) if not dry_run else 0,
+        "equivalent": int(equivalent.sum()),
+        "scored": int(unscored.sum()),
+        "load_s": round(loaded - start, 2),
+        **timings,
+        "write_s": round(time.perf_counter() - writing, 2),
+        "elapsed_s": round(elapsed, 2),
+        "dry_run": dry_run,
+    }
+    logger.info(
+        f"Mapping suggestions org={org_id}: {n} controls, {len(score)} new mappings "
+        f"({report['equivalent']} equivalent), {report['scored']} scored, {elapsed:.1f} s"
+    )
+    return report
+
+
+async def _suggest_command(args):
+    from app.database import AsyncSessionLocal
+    import app.models.init  # noqa: F401  (register all mappers)
+
+    async with AsyncSessionLocal() as db:
+        report = await suggest_mappings(
+            db, args.org_id, top_k=args.top_k, threshold=args.threshold,
+            workers=args.workers, dry_run=args.dry_run
+        )
+        if not args.dry_run:
+            await db.commit()
+    for key, value in report.items():
+        print(f"{key:<14} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-framework mapping suggestions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    suggest_parser = subparsers.add_parser("suggest", help="Insert mappings between similar controls of different frameworks")
+    suggest_parser.add_argument("--org-id", type=int, required=True)
+    suggest_parser.add_argument("--top-k", type=int, default=None, help="Candidates per control and other framework")
+    suggest_parser.add_argument("--threshold", type=float, default=None, help="Minimum cosine similarity")
+    suggest_parser.add_argument("--workers", type=int, default=None)
+    suggest_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "suggest":
+        asyncio.run(_suggest_command(args))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
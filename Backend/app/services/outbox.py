@@ -0,0 +1,280 @@
+"""
+Transactional outbox for Kafka events.
+
+Request handlers add events to their own session (`audit_event`,
+`notification_event`), so an event commits or rolls back together with the
+business change and no broker round trip happens inside the request.
+
+OutboxRelay drains outbox_events in event_id order: it sends a batch through
+a producer configured for batching (linger_ms/batch_size), waits for the
+broker to acknowledge all of it, then deletes the rows in the same
+transaction that read them. Delivery is at-least-once; every record carries
+an `outbox-id` header so consumers can drop replays after a relay crash.
+
+Ordering: only one relay publishes at a time (transaction-scoped advisory
+lock) and the producer never has more than one request in flight per
+connection, so records reach Kafka in event_id order. event_id is allocated
+at INSERT, not at commit, so that is commit order only for events whose
+writers serialize on a row lock before adding the event: control status
+audit events (the control row is selected FOR UPDATE by the API, approval
+and decision engine writers) keep per-key order. For any other event,
+ordering between concurrent transactions is best-effort; consumers that
+need it must compare payload timestamps.
+
+Run the relay:
+    python -m app.services.outbox relay
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.metrics import (
+    KAFKA_PRODUCER_PENDING,
+    KAFKA_SEND_SECONDS,
+    OUTBOX_EVENTS_PUBLISHED,
+    OUTBOX_PUBLISH_FAILURES,
+    OUTBOX_BATCH_SECONDS,
+    OUTBOX_DELIVERY_LAG_SECONDS,
+)
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# pg advisory lock key held by the active relay for the duration of a batch
+RELAY_LOCK_ID = 0x6f7574626f78  # "outbox"
+OUTBOX_ID_HEADER = "outbox-id"
+
+
+def instrumented_send(producer, topic: str, **kwargs):
+    """
+    producer.send() that tracks the pending-record gauge and send-to-ack
+    latency (callbacks run on the producer's I/O thread). Returns the future.
+    """
+    start = time.perf_counter()
+    KAFKA_PRODUCER_PENDING.inc()
+    try:
+        future = producer.send(topic, **kwargs)
+    except Exception:
+        KAFKA_PRODUCER_PENDING.dec()
+        KAFKA_SEND_SECONDS.labels(topic=topic, outcome="error").observe(time.perf_counter() - start)
+        raise
+
+    def done(outcome):
+        def callback(_):
+            KAFKA_PRODUCER_PENDING.dec()
+            KAFKA_SEND_SECONDS.labels(topic=topic, outcome=outcome).observe(time.perf_counter() - start)
+        return callback
+
+    future.add_callback(done("ok"))
+    future.add_errback(done("error"))
+    return future
+
+
+def build_audit_event(
+    event_type: str,
+    resource_type: str,
+    resource_id: str,
+    action: str,
+    user_id: int,
+    org_id: int,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Audit trail record (same shape whether sent directly or via the outbox)"""
+    return {
+        "event_type": event_type,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "action": action,
+        "user_id": user_id,
+        "org_id": org_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        "metadata": metadata or {}
+    }
+
+
+def enqueue(db, topic: str, key: Optional[str], payload: Dict[str, Any]) -> OutboxEvent:
+    """Add an event to the caller's transaction (works with sync and async sessions)"""
+    event = OutboxEvent(topic=topic, event_key=key, payload=payload)
+    db.add(event)
+    return event
+
+
+def audit_row(
+    event_type: str,
+    resource_type: str,
+    resource_id: str,
+    action: str,
+    user_id: int,
+    org_id: int,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """outbox_events column values for an audit event (for bulk inserts)"""
+    return {
+        "topic": settings.KAFKA_TOPIC_AUDIT,
+        "event_key": f"{org_id}:{resource_type}:{resource_id}",
+        "payload": build_audit_event(event_type, resource_type, resource_id, action, user_id, org_id, metadata)
+    }
+
+
+def audit_event(
+    db,
+    event_type: str,
+    resource_type: str,
+    resource_id: str,
+    action: str,
+    user_id: int,
+    org_id: int,
+    metadata: Optional[Dict[str, Any]] = None
+) -> OutboxEvent:
+    """Record an audit trail event, keyed per org:resource (see the module docstring on ordering)"""
+    row = audit_row(event_type, resource_type, resource_id, action, user_id, org_id, metadata)
+    return enqueue(db, row["topic"], row["event_key"], row["payload"])
+
+
+def notification_event(
+    db,
+    notification_type: str,
+    severity: str,
+    title: str,
+    message: str,
+    recipients: list,
+    key: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> OutboxEvent:
+    """Record a notification for ElastAlert processing"""
+    return enqueue(db, settings.KAFKA_TOPIC_NOTIFICATIONS, key, {
+        "notification_type": notification_type,
+        "severity": severity,
+        "title": title,
+        "message": message,
+        "recipients": recipients,
+        "timestamp": datetime.utcnow().isoformat(),
+        "metadata": metadata or {}
+    })
+
+
+class OutboxRelay:
+    """
+    Publishes outbox_events to Kafka in batches.
+
+    `producer` is a kafka-python KafkaProducer (or anything with the same
+    send()/flush() surface returning futures with add_callback/add_errback,
+    e.g. the benchmark's fake broker).
+    """
+
+    def __init__(
+        self,
+        producer,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: Optional[int] = None,
+        poll_interval_ms: Optional[int] = None,
+        send_timeout: Optional[float] = None
+    ):
+        if session_factory is None:
+            from app.database import SessionLocal as session_factory
+        self.producer = producer
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = (poll_interval_ms if poll_interval_ms is not None else settings.OUTBOX_POLL_INTERVAL_MS) / 1000.0
+        self.send_timeout = send_timeout or settings.OUTBOX_SEND_TIMEOUT
+        self._stop = threading.Event()
+
+    def relay_batch(self) -> int:
+        """
+        Publish and delete one batch.
+
+        Returns:
+            int: Events published (0 if the outbox is empty or another relay holds the lock)
+        """
+        start = time.perf_counter()
+        with self.session_factory() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                if not db.scalar(select(func.pg_try_advisory_xact_lock(RELAY_LOCK_ID))):
+                    return 0
+
+            events = db.execute(
+                select(OutboxEvent).order_by(OutboxEvent.event_id).limit(self.batch_size)
+            ).scalars().all()
+            if not events:
+                return 0
+
+            futures = [
+                instrumented_send(
+                    self.producer,
+                    event.topic,
+                    key=event.event_key,
+                    value=event.payload,
+                    headers=[(OUTBOX_ID_HEADER, str(event.event_id).encode("ascii"))]
+                )
+                for event in events
+            ]
+            self.producer.flush(timeout=self.send_timeout)
+            for future in futures:
+                future.get(timeout=0)  # raises if any record was not acknowledged
+
+            # Delete by id, not by range: a lower id may still be in an uncommitted transaction
+            db.execute(delete(OutboxEvent).where(OutboxEvent.event_id.in_([e.event_id for e in events])))
+            db.commit()
+
+        acked_at = datetime.utcnow()
+        for event in events:
+            OUTBOX_EVENTS_PUBLISHED.labels(topic=event.topic).inc()
+            OUTBOX_DELIVERY_LAG_SECONDS.observe((acked_at - event.created_at).total_seconds())
+        OUTBOX_BATCH_SECONDS.observe(time.perf_counter() - start)
+        return len(events)
+
+    def run(self):
+        """Relay until stop() is called; idles for poll_interval when caught up"""
+        backoff = self.poll_interval
+        logger.info(f"Outbox relay started (batch_size={self.batch_size})")
+        while not self._stop.is_set():
+            try:
+                published = self.relay_batch()
+                backoff = self.poll_interval
+            except Exception as e:
+                # Rows stay in the outbox and are retried with the same ids
+                OUTBOX_PUBLISH_FAILURES.inc()
+                logger.error(f"Outbox batch failed, retrying in {backoff:.2f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            if published < self.batch_size:
+                self._stop.wait(self.poll_interval)
+        logger.info("Outbox relay stopped")
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transactional outbox relay")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    relay_parser = subparsers.add_parser("relay", help="Drain outbox_events to Kafka until interrupted")
+    relay_parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "relay":
+        import app.models.init  # noqa: F401  (register all mappers)
+        from app.services.kafka_producer import kafka_producer
+
+        if not kafka_producer.connect():
+            raise SystemExit("Kafka producer not available")
+        relay = OutboxRelay(kafka_producer.producer, batch_size=args.batch_size)
+        try:
+            relay.run()
+        except KeyboardInterrupt:
+            relay.stop()
+        finally:
+            kafka_producer.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
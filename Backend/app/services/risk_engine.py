@@ -0,0 +1,436 @@
+"""
+Inherent and residual risk.
+
+  inherent   LEVELS[likelihood] x LEVELS[impact] (1 - 16), the value
+             Risk.risk_score documents; unscored when either is missing
+  residual   inherent x prod(1 - effectiveness x credit) over the risk's
+             RiskControl links, where credit is the control's 3-state status
+             as compliance scores count it (implemented 1, partial 0.5,
+             not-implemented and inactive controls 0) and a link without a
+             mitigation_effectiveness counts as RISK_DEFAULT_EFFECTIVENESS
+
+A tenant's risks and links are held per worker in a RiskModel: one array
+per risk attribute and the links sorted by control, with each risk's
+sum(log(1 - effectiveness x credit)) kept alongside, so residual risk for
+every risk is one bincount and one exp. A control status change only moves
+the terms of that control's links: `with_statuses` subtracts their old terms
+and adds the new ones for a copy of the model.
+
+Control status writers log the changed control ids under a new "controls"
+version (app.services.compliance_stats.record_status_changes). A query that
+finds a newer version re-reads the status of just the controls logged since
+the model's version and applies them. A newer "links" version
+(app.services.impact change log), a model older than RISK_ENGINE_MAX_AGE or
+more than RISK_ENGINE_MAX_CHANGES changed controls reload the tenant in full.
+
+Persist inherent scores to risks.risk_score:
+    python -m app.services.risk_engine rescore [--org-id N]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import RISK_MODEL_BUILD_SECONDS, RISK_MODEL_BUILDS
+from app.models.control import Control
+from app.models.risk import Risk
+from app.services import compliance_stats, tenant_versions
+from app.services.impact import Links, _risk_links
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+
+# Likelihood / impact value -> level on the heatmap axes
+LEVELS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+LEVEL_NAMES = ["low", "medium", "high", "critical"]
+
+# Lowest score of each rating (index into LEVEL_NAMES), on the 1 - 16 scale
+SCORE_RATINGS = [0, 3, 6, 12]
+
+# 3-state status -> share of a link's effectiveness the control delivers
+STATUS_CREDIT = {"implemented": 1.0, "partial": 0.5, "not-implemented": 0.0}
+
+MIN_REMAINING = 1e-9  # floor of (1 - effectiveness x credit), keeps the logs finite
+
+
+def credit(status: Optional[str], is_active: Optional[bool]) -> float:
+    """Mitigation credit of a control's status"""
+    if is_active is False:
+        return 0.0
+    return STATUS_CREDIT.get(status or "not-implemented", 0.0)
+
+
+def rating(scores) -> "np.ndarray":
+    """Index into LEVEL_NAMES of each score"""
+    return np.searchsorted(SCORE_RATINGS, scores, side="right") - 1
+
+
+def _terms(effect, credits) -> "np.ndarray":
+    return np.log(np.maximum(1.0 - effect * credits, MIN_REMAINING))
+
+
+class RiskModel:
+    """
+    Immutable snapshot of one tenant's risks and risk links. `with_statuses`
+    returns a new snapshot, so queries never see a half-applied change.
+    """
+
+    def __init__(
+        self,
+        org_id: int,
+        links_version: int,
+        controls_version: int,
+        risk_ids,
+        likelihood,
+        impact,
+        is_open,
+        control_ids,
+        credits,
+        links: Links,
+        log_remaining,
+        mitigating,
+        built_at: Optional[float] = None
+    ):
+        self.org_id = org_id
+        self.links_version = links_version
+        self.controls_version = controls_version
+        self.built_at = built_at if built_at is not None else time.monotonic()
+        self.risk_ids = risk_ids  # ascending
+        self.likelihood = likelihood  # level 1 - 4, 0 = unknown
+        self.impact = impact
+        self.is_open = is_open  # not closed
+        self.inherent = (likelihood * impact).astype(np.float64)
+        self.control_ids = control_ids  # linked controls, ascending
+        self.credits = credits  # per linked control
+        self.links = links  # control and risk positions, effectiveness; sorted by control
+        self.log_remaining = log_remaining  # per risk: sum of its links' terms
+        self.mitigating = mitigating  # per risk: links to controls with credit
+        self.residual = self.inherent * np.exp(log_remaining)
+
+    @classmethod
+    def build(
+        cls,
+        org_id: int,
+        links_version: int,
+        controls_version: int,
+        risks: Sequence[tuple],
+        links: Sequence[tuple],
+        controls: Sequence[tuple],
+        default_effectiveness: float = 0.5
+    ) -> "RiskModel":
+        """
+        Model from (risk_id, likelihood, impact, status) rows,
+        (control_id, risk_id, effectiveness) rows and
+        (control_id, status, is_active) rows
+        """
+        risks = sorted(risks)
+        risk_ids = np.array([row[0] for row in risks], dtype=np.int64)
+        likelihood = np.array([LEVELS.get((row[1] or "").lower(), 0) for row in risks], dtype=np.int8)
+        impact = np.array([LEVELS.get((row[2] or "").lower(), 0) for row in risks], dtype=np.int8)
+        is_open = np.array([row[3] != "closed" for row in risks], dtype=bool)
+
+        edges = Links.from_rows(links)
+        known = np.isin(edges.linked, risk_ids)
+        link_control, link_risk = edges.control[known], edges.linked[known]
+        effect = np.clip(np.nan_to_num(edges.value[known].astype(np.float64), nan=default_effectiveness), 0.0, 1.0)
+        control_ids = np.unique(link_control)
+        # from_rows sorts by control_id, so the positions stay sorted too
+        links = Links(np.searchsorted(control_ids, link_control), np.searchsorted(risk_ids, link_risk), effect)
+
+        credits = np.zeros(len(control_ids), dtype=np.float64)
+        if controls:
+            ids = np.array([row[0] for row in controls], dtype=np.int64)
+            values = np.array([credit(row[1], row[2]) for row in controls], dtype=np.float64)
+            positions, found = cls._positions(control_ids, ids)
+            credits[positions] = values[found]
+
+        link_credits = credits[links.control]
+        return cls(
+            org_id, links_version, controls_version,
+            risk_ids, likelihood, impact, is_open, control_ids, credits, links,
+            np.bincount(links.linked, weights=_terms(links.value, link_credits), minlength=len(risk_ids)),
+            np.bincount(links.linked, weights=link_credits > 0, minlength=len(risk_ids)).astype(np.int64)
+        )
+
+    @staticmethod
+    def _positions(sorted_ids, ids):
+        """Positions in sorted_ids of the ids found there, and the mask of those ids"""
+        positions = np.searchsorted(sorted_ids, ids)
+        found = positions < len(sorted_ids)
+        found[found] = sorted_ids[positions[found]] == ids[found]
+        return positions[found], found
+
+    def with_statuses(self, controls_version: int, controls: Sequence[tuple]) -> "RiskModel":
+        """Snapshot with the (control_id, status, is_active) rows applied"""
+        credits = self.credits
+        log_remaining, mitigating = self.log_remaining, self.mitigating
+        if controls:
+            ids = np.array([row[0] for row in controls], dtype=np.int64)
+            values = np.array([credit(row[1], row[2]) for row in controls], dtype=np.float64)
+            positions, found = self._positions(self.control_ids, ids)
+            values = values[found]
+            moved = self.credits[positions] != values
+            positions, values = positions[moved], values[moved]
+            if len(positions):
+                credits = self.credits.copy()
+                credits[positions] = values
+                edges = self.links.of(np.unique(positions))
+                old, new = self.credits[edges.control], credits[edges.control]
+                delta = _terms(edges.value, new) - _terms(edges.value, old)
+                log_remaining = self.log_remaining + np.bincount(edges.linked, weights=delta, minlength=len(self.risk_ids))
+                mitigating = self.mitigating + np.bincount(
+                    edges.linked, weights=(new > 0).astype(np.int64) - (old > 0), minlength=len(self.risk_ids)
+                ).astype(np.int64)
+        return RiskModel(
+            self.org_id, self.links_version, controls_version,
+            self.risk_ids, self.likelihood, self.impact, self.is_open, self.control_ids, credits, self.links,
+            log_remaining, mitigating, built_at=self.built_at
+        )
+
+    @property
+    def link_count(self) -> int:
+        return len(self.links.control)
+
+    @cached_property
+    def link_counts(self) -> "np.ndarray":
+        """Links per risk"""
+        return np.bincount(self.links.linked, minlength=len(self.risk_ids))
+
+    def heatmap(self) -> dict:
+        """Open risks per likelihood x impact cell with their inherent and residual totals"""
+        scored = self.is_open & (self.likelihood > 0) & (self.impact > 0)
+        cells = (self.likelihood[scored].astype(np.int64) - 1) * 4 + self.impact[scored] - 1
+        inherent, residual = self.inherent[scored], self.residual[scored]
+        counts = np.bincount(cells, minlength=16)
+        residual_sum = np.bincount(cells, weights=residual, minlength=16)
+        residual_max = np.zeros(16)
+        np.maximum.at(residual_max, cells, residual)
+        inherent_total, residual_total = float(inherent.sum()), float(residual.sum())
+        return {
+            "cells": [
+                {
+                    "likelihood": LEVEL_NAMES[cell // 4],
+                    "impact": LEVEL_NAMES[cell % 4],
+                    "risks": int(counts[cell]),
+                    "inherent_score": float((cell // 4 + 1) * (cell % 4 + 1)),
+                    "residual_avg": round(float(residual_sum[cell] / counts[cell]), 4) if counts[cell] else 0.0,
+                    "residual_max": round(float(residual_max[cell]), 4),
+                }
+                for cell in range(16)
+            ],
+            "inherent_ratings": dict(zip(LEVEL_NAMES, np.bincount(rating(inherent), minlength=4).tolist())),
+            "residual_ratings": dict(zip(LEVEL_NAMES, np.bincount(rating(residual), minlength=4).tolist())),
+            "open_risks": int(self.is_open.sum()),
+            "unscored": int((self.is_open & ~scored).sum()),
+            "inherent_total": round(inherent_total, 4),
+            "residual_total": round(residual_total, 4),
+            "reduction_pct": round((1 - residual_total / inherent_total) * 100, 2) if inherent_total else 0.0,
+        }
+
+    def top(self, limit: int) -> "np.ndarray":
+        """Positions of the open risks with the highest residual risk, highest first"""
+        candidates = np.flatnonzero(self.is_open & (self.inherent > 0))
+        if limit < len(candidates):
+            candidates = candidates[np.argpartition(-self.residual[candidates], limit - 1)[:limit]]
+        # Ties (the partition cut included) by risk_id
+        return candidates[np.lexsort((self.risk_ids[candidates], -self.residual[candidates]))][:limit]
+
+
+class RiskModelCache:
+    """Per-tenant risk models, least recently used evicted beyond max_tenants"""
+
+    def __init__(
+        self,
+        max_tenants: int = 16,
+        max_age: float = 3600,
+        max_changes: int = 50000,
+        default_effectiveness: float = 0.5
+    ):
+        self.max_tenants = max_tenants
+        self.max_age = max_age
+        self.max_changes = max_changes  # more changed controls than this reload the tenant
+        self.default_effectiveness = default_effectiveness
+        self._models: "OrderedDict[int, RiskModel]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def _fresh(self, model: Optional[RiskModel], links_version: int) -> bool:
+        return (
+            model is not None and model.links_version >= links_version
+            and time.monotonic() - model.built_at < self.max_age
+        )
+
+    async def get(self, db: AsyncSession, org_id: int) -> RiskModel:
+        """The tenant's model as of its latest committed link and control status changes"""
+        links_version = await tenant_versions.current(db, org_id, tenant_versions.LINKS)
+        controls_version = await tenant_versions.current(db, org_id, tenant_versions.CONTROLS)
+        model = self._models.get(org_id)
+        if self._fresh(model, links_version) and model.controls_version >= controls_version:
+            self._models.move_to_end(org_id)
+            return model
+        async with self._locks.setdefault(org_id, asyncio.Lock()):
+            model = self._models.get(org_id)  # refreshed while this request waited
+            if self._fresh(model, links_version):
+                if model.controls_version >= controls_version:
+                    return model
+                model = await self._sync(db, model, controls_version)
+            else:
+                model = None
+            if model is None:
+                model = await self._load(db, org_id)
+            self._store(org_id, model)
+            return model
+
+    async def _load(self, db: AsyncSession, org_id: int) -> RiskModel:
+        start = time.perf_counter()
+        # Versions first: a change committed during the load is applied again next time (idempotent)
+        links_version = await tenant_versions.current(db, org_id, tenant_versions.LINKS)
+        controls_version = await tenant_versions.current(db, org_id, tenant_versions.CONTROLS)
+        risks = (await db.execute(
+            select(Risk.risk_id, Risk.likelihood, Risk.impact, Risk.status).where(Risk.org_id == org_id)
+        )).all()
+        links = (await db.execute(_risk_links(org_id))).all()
+        controls = (await db.execute(
+            select(Control.control_id, Control.status, Control.is_active).where(Control.org_id == org_id)
+        )).all()
+        model = await asyncio.to_thread(
+            RiskModel.build, org_id, links_version, controls_version,
+            risks, links, controls, self.default_effectiveness
+        )
+        elapsed = time.perf_counter() - start
+        RISK_MODEL_BUILDS.labels(kind="full").inc()
+        RISK_MODEL_BUILD_SECONDS.labels(kind="full").observe(elapsed)
+        logger.info(f"Risk model for org {org_id}: {len(risks)} risks, {len(links)} links, {elapsed * 1000:.0f} ms")
+        return model
+
+    async def _sync(self, db: AsyncSession, model: RiskModel, controls_version: int) -> Optional[RiskModel]:
+        start = time.perf_counter()
+        controls = await compliance_stats.status_changes(db, model.org_id, model.controls_version, self.max_changes)
+        if controls is None:
+            return None
+        updated = await asyncio.to_thread(model.with_statuses, controls_version, controls)
+        RISK_MODEL_BUILDS.labels(kind="status").inc()
+        RISK_MODEL_BUILD_SECONDS.labels(kind="status").observe(time.perf_counter() - start)
+        return updated
+
+    def _store(self, org_id: int, model: RiskModel):
+        self._models[org_id] = model
+        self._models.move_to_end(org_id)
+        while len(self._models) > self.max_tenants:
+            evicted, _ = self._models.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    def clear(self):
+        self._models.clear()
+        self._locks.clear()
+
+
+risk_models = RiskModelCache(
+    max_tenants=settings.RISK_ENGINE_MAX_TENANTS,
+    max_age=settings.RISK_ENGINE_MAX_AGE,
+    max_changes=settings.RISK_ENGINE_MAX_CHANGES,
+    default_effectiveness=settings.RISK_DEFAULT_EFFECTIVENESS
+)
+
+
+async def heatmap(db: AsyncSession, org_id: int, models: Optional[RiskModelCache] = None) -> dict:
+    """Likelihood x impact heatmap of the open risks (app.schemas.risk.RiskHeatmapResponse)"""
+    start = time.perf_counter()
+    model = await (models or risk_models).get(db, org_id)
+    return {**model.heatmap(), "took_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+async def top_risks(db: AsyncSession, org_id: int, limit: int = 10, models: Optional[RiskModelCache] = None) -> dict:
+    """Open risks with the highest residual risk (app.schemas.risk.TopRisksResponse)"""
+    start = time.perf_counter()
+    model = await (models or risk_models).get(db, org_id)
+    positions = model.top(limit)
+    risk_ids = model.risk_ids[positions].tolist()
+    rows = {row.risk_id: row for row in (await db.execute(
+        select(Risk.risk_id, Risk.risk_title, Risk.category, Risk.status, Risk.owner, Risk.likelihood, Risk.impact)
+        .where(Risk.org_id == org_id, Risk.risk_id.in_(risk_ids))
+    )).all()} if risk_ids else {}
+
+    risks: List[dict] = []
+    for position, risk_id in zip(positions.tolist(), risk_ids):
+        row = rows.get(risk_id)
+        if row is None:  # deleted since the model was built
+            continue
+        inherent, residual = float(model.inherent[position]), float(model.residual[position])
+        risks.append({
+            "risk_id": risk_id,
+            "risk_title": row.risk_title,
+            "category": row.category,
+            "status": row.status,
+            "owner": row.owner,
+            "likelihood": row.likelihood,
+            "impact": row.impact,
+            "inherent_score": inherent,
+            "residual_score": round(residual, 4),
+            "residual_rating": LEVEL_NAMES[int(rating(residual))],
+            "reduction_pct": round((1 - residual / inherent) * 100, 2),
+            "controls": int(model.link_counts[position]),
+            "mitigating_controls": int(model.mitigating[position]),
+        })
+    return {"risks": risks, "took_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def _level(column):
+    return case(*[(column == name, level) for name, level in LEVELS.items()], else_=None)
+
+
+async def rescore(db: AsyncSession, org_id: Optional[int] = None) -> int:
+    """
+    Write likelihood x impact to risks.risk_score where it differs (the
+    caller commits).
+
+    Returns:
+        int: Number of risks rescored
+    """
+    score = _level(Risk.likelihood) * _level(Risk.impact)
+    stmt = (
+        update(Risk)
+        .where(and_(
+            Risk.likelihood.in_(list(LEVELS)), Risk.impact.in_(list(LEVELS)),
+            or_(Risk.risk_score.is_(None), Risk.risk_score != score)
+        ))
+        .values(risk_score=score)
+        .execution_options(synchronize_session=False)
+    )
+    if org_id is not None:
+        stmt = stmt.where(Risk.org_id == org_id)
+    return (await db.execute(stmt)).rowcount
+
+
+async def _rescore_command(org_id: Optional[int]):
+    from app.database import AsyncSessionLocal
+    import app.models.init  # noqa: F401  (register all mappers)
+
+    async with AsyncSessionLocal() as db:
+        count = await rescore(db, org_id=org_id)
+        await db.commit()
+    print(f"Rescored {count} risks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Risk scoring")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rescore_parser = subparsers.add_parser("rescore", help="Write likelihood x impact to risks.risk_score")
+    rescore_parser.add_argument("--org-id", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "rescore":
+        asyncio.run(_rescore_command(args.org_id))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
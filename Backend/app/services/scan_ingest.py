@@ -0,0 +1,317 @@
+"""
+Bulk scan-result ingestion.
+
+Agents POST NDJSON batches, one result per line:
+
+    {"internal_code": "BR-001", "status": "pass", "scan_timestamp": "2026-10-18T09:00:00Z",
+     "agent_id": "win-agent-17", "details": {...}}
+
+Lines are validated with plain type checks (no per-row ORM or pydantic
+objects), internal codes are resolved through the shared per-org
+PolicyLinkIndex, and repeated controls within a batch collapse to the newest
+scan. The batch is then upserted into control_scan_results with one
+statement: on PostgreSQL the rows are COPYed into a session temp table and
+merged with INSERT ... SELECT ... ON CONFLICT; other dialects use an
+executemany upsert. An older scan never overwrites a newer one. Controls
+whose pass/fail outcome flipped are handed to the decision engine in the
+same transaction, so status, framework stats and audit events stay in step.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.scan import ControlScanResult
+from app.services.decision_engine import (
+    DecisionEngine,
+    PASSING_RESULTS,
+    decision_engine,
+    policy_link_index,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "scan_ingest_staging"
+STAGING_COLUMNS = ["control_id", "org_id", "status", "passed", "details", "agent_id", "scan_timestamp"]
+STAGING_DDL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    control_id integer NOT NULL,
+    org_id integer NOT NULL,
+    status varchar(20) NOT NULL,
+    passed boolean NOT NULL,
+    details text,
+    agent_id varchar(100),
+    scan_timestamp timestamp NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+MERGE_SQL = f"""
+INSERT INTO control_scan_results (control_id, org_id, status, passed, details, agent_id, scan_timestamp, received_at)
+SELECT control_id, org_id, status, passed, CAST(details AS json), agent_id, scan_timestamp, :received_at
+FROM {STAGING_TABLE}
+ON CONFLICT (control_id) DO UPDATE SET
+    status = excluded.status,
+    passed = excluded.passed,
+    details = excluded.details,
+    agent_id = excluded.agent_id,
+    scan_timestamp = excluded.scan_timestamp,
+    received_at = excluded.received_at
+WHERE control_scan_results.scan_timestamp <= excluded.scan_timestamp
+RETURNING control_id
+"""
+LOCK_EXISTING_SQL = f"""
+SELECT r.control_id, r.passed
+FROM control_scan_results r
+JOIN {STAGING_TABLE} s ON s.control_id = r.control_id
+ORDER BY r.control_id
+FOR UPDATE OF r
+"""
+
+
+class ScanRow(NamedTuple):
+    control_id: int
+    org_id: int
+    status: str
+    passed: bool
+    details: Optional[Dict[str, Any]]
+    agent_id: Optional[str]
+    scan_timestamp: datetime
+
+
+class ParsedBatch:
+    def __init__(self):
+        self.received = 0
+        self.rows: Dict[int, ScanRow] = {}  # newest scan per control
+        self.accepted = 0
+        self.unknown_controls = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.rejected = 0
+
+    def reject(self, line_number: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < settings.SCAN_INGEST_MAX_ERRORS:
+            self.errors.append({"line": line_number, "error": error})
+
+
+def _parse_timestamp(value: Any, default: datetime) -> datetime:
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError("scan_timestamp must be an ISO 8601 string")
+    if value.endswith("Z"):
+        # Common case: already UTC, skip the astimezone() round trip
+        return datetime.fromisoformat(value[:-1])
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+_INVALID = object()
+_decoder = json.JSONDecoder()
+
+
+def _decode_each(lines: List[str]) -> list:
+    """
+    Decode each line on its own; a line that is not exactly one JSON value
+    (malformed, or "{...}, {...}") decodes to _INVALID. Joining lines into
+    one array per block would be fewer calls, but a value split across lines
+    can then parse with the right element count and shift records between
+    line numbers.
+    """
+    records = []
+    for line in lines:
+        line = line.strip()
+        try:
+            record, end = _decoder.raw_decode(line)
+            records.append(record if end == len(line) else _INVALID)
+        except ValueError:
+            records.append(_INVALID)
+    return records
+
+
+def parse_lines(lines: List[str], org_id: int, index, received_at: datetime) -> tuple:
+    """
+    Validate NDJSON lines against one org's index.
+
+    Returns:
+        tuple: (ParsedBatch, [(line_number, internal_code)] not found in the index)
+    """
+    batch = ParsedBatch()
+    unresolved = []
+    codes = index.codes
+    numbered = [(line_number, line) for line_number, line in enumerate(lines, start=1) if line.strip()]
+    batch.received = len(numbered)
+    for (line_number, _), record in zip(numbered, _decode_each([line for _, line in numbered])):
+        if record is _INVALID:
+            batch.reject(line_number, "invalid JSON")
+            continue
+        if not isinstance(record, dict):
+            batch.reject(line_number, "line must be a JSON object")
+            continue
+
+        code = record.get("internal_code")
+        status = record.get("status")
+        if not isinstance(code, str) or not code:
+            batch.reject(line_number, "internal_code is required")
+            continue
+        if not isinstance(status, str) or not status or len(status) > 20:
+            batch.reject(line_number, "status is required (max 20 characters)")
+            continue
+        agent_id = record.get("agent_id")
+        if agent_id is not None and (not isinstance(agent_id, str) or len(agent_id) > 100):
+            batch.reject(line_number, "agent_id must be a string (max 100 characters)")
+            continue
+        details = record.get("details")
+        if details is not None and not isinstance(details, dict):
+            batch.reject(line_number, "details must be an object")
+            continue
+        try:
+            scanned_at = _parse_timestamp(record.get("scan_timestamp"), received_at)
+        except ValueError:
+            batch.reject(line_number, "scan_timestamp must be an ISO 8601 timestamp")
+            continue
+
+        control_id = codes.get(code)
+        if control_id is None:
+            unresolved.append((line_number, code))
+            continue
+        _keep_newest(batch, ScanRow(
+            control_id, org_id, status, status.lower() in PASSING_RESULTS, details, agent_id, scanned_at
+        ))
+    return batch, unresolved
+
+
+def _keep_newest(batch: ParsedBatch, row: ScanRow):
+    batch.accepted += 1
+    current = batch.rows.get(row.control_id)
+    if current is None or row.scan_timestamp >= current.scan_timestamp:
+        batch.rows[row.control_id] = row
+
+
+async def _stage_copy(db: AsyncSession, rows: List[ScanRow]):
+    """COPY rows into the transaction-scoped staging table (asyncpg binary COPY)"""
+    await db.execute(text(STAGING_DDL))  # also opens the transaction COPY joins
+    raw = await (await db.connection()).get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records=[
+            (r.control_id, r.org_id, r.status, r.passed,
+             json.dumps(r.details) if r.details is not None else None, r.agent_id, r.scan_timestamp)
+            for r in rows
+        ],
+        columns=STAGING_COLUMNS
+    )
+
+
+async def _upsert_copy(db: AsyncSession, rows: List[ScanRow], received_at: datetime) -> tuple:
+    await _stage_copy(db, rows)
+    previous = dict((await db.execute(text(LOCK_EXISTING_SQL))).all())
+    written = (await db.execute(text(MERGE_SQL), {"received_at": received_at})).scalars().all()
+    return previous, written
+
+
+async def _upsert_many(db: AsyncSession, rows: List[ScanRow], received_at: datetime) -> tuple:
+    dialect = db.get_bind().dialect.name
+    insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+    previous = dict((await db.execute(
+        select(ControlScanResult.control_id, ControlScanResult.passed)
+        .where(ControlScanResult.control_id.in_([r.control_id for r in rows]))
+        .order_by(ControlScanResult.control_id)
+        .with_for_update()
+    )).all())
+    stmt = insert(ControlScanResult)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ControlScanResult.control_id],
+        set_={
+            column: getattr(stmt.excluded, column)
+            for column in ("status", "passed", "details", "agent_id", "scan_timestamp", "received_at")
+        },
+        where=ControlScanResult.scan_timestamp <= stmt.excluded.scan_timestamp
+    ).returning(ControlScanResult.control_id)
+    written = (await db.execute(stmt, [
+        {**r._asdict(), "received_at": received_at} for r in rows
+    ])).scalars().all()
+    return previous, written
+
+
+async def ingest(
+    db: AsyncSession,
+    org_id: int,
+    body: bytes,
+    use_copy: Optional[bool] = None,
+    decisions: Optional[DecisionEngine] = None
+) -> dict:
+    """
+    Validate, store and decide one NDJSON batch for a tenant, then commit.
+
+    Args:
+        use_copy: Force the COPY path on/off (default: on for PostgreSQL)
+
+    Returns:
+        dict: Counts matching ScanIngestResponse
+    """
+    start = time.perf_counter()
+    received_at = datetime.utcnow()
+    lines = body.decode("utf-8", errors="replace").split("\n")
+    if len(lines) > settings.SCAN_INGEST_MAX_LINES:
+        raise ValueError(f"Batch exceeds {settings.SCAN_INGEST_MAX_LINES} lines")
+
+    index = await policy_link_index.get(db, org_id)
+    batch, unresolved = parse_lines(lines, org_id, index, received_at)
+    if unresolved:
+        # Controls created since the index was loaded: one lookup for just these codes
+        index = await policy_link_index.add_missing(db, org_id, {code for _, code in unresolved})
+        for line_number, code in unresolved:
+            if code not in index.codes:
+                batch.unknown_controls += 1
+                batch.reject(line_number, f"unknown internal_code {code}")
+        if len(unresolved) > batch.unknown_controls:
+            # Re-parse only the lines that now resolve
+            resolved, _ = parse_lines(
+                [lines[n - 1] for n, code in unresolved if code in index.codes], org_id, index, received_at
+            )
+            for row in resolved.rows.values():
+                _keep_newest(batch, row)
+            batch.accepted += resolved.accepted - len(resolved.rows)
+
+    rows = list(batch.rows.values())
+    stale = 0
+    status_changes = 0
+    if rows:
+        if use_copy is None:
+            use_copy = db.get_bind().dialect.name == "postgresql"
+        upsert = _upsert_copy if use_copy else _upsert_many
+        previous, written = await upsert(db, rows, received_at)
+        stale = len(rows) - len(written)
+
+        # Only a changed pass/fail outcome can change the decided status
+        flipped = {}
+        for control_id in written:
+            row = batch.rows[control_id]
+            if previous.get(control_id) != row.passed:
+                flipped[control_id] = (control_id in index.enforced, row.passed, row.scan_timestamp.isoformat())
+        decisions = decisions or decision_engine
+        status_changes = await decisions.apply(db, flipped)
+        await db.commit()
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Scan ingest org={org_id}: {batch.received} received, {batch.accepted} accepted, "
+        f"{batch.rejected} rejected, {status_changes} status changes in {elapsed_ms:.1f} ms"
+    )
+    return {
+        "received": batch.received,
+        "accepted": batch.accepted,
+        "rejected": batch.rejected,
+        "unknown_controls": batch.unknown_controls,
+        "stale": stale,
+        "status_changes": status_changes,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "errors": batch.errors
+    }
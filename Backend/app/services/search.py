@@ -0,0 +1,224 @@
+"""
+Control and policy search.
+
+On PostgreSQL, matches use the generated `search_vector` columns (GIN
+indexed, see the full_text_search migration):
+
+  words   - websearch_to_tsquery('english', q): stemmed words, "quoted
+            phrases", -exclusions, OR
+  prefix  - every token of q as a 'simple' prefix (as-you-type, codes like
+            "CIS 1.1" or "BR-00")
+  codes   - with pg_trgm installed: substring (ILIKE, trigram indexed) and
+            fuzzy (similarity) matches on control codes and policy names
+
+`control_match` / `policy_match` are the filters behind the list
+endpoints' `search` parameter (keyset order is kept); `search` ranks hits
+with ts_rank_cd (title > description, codes highest) and builds
+ts_headline snippets for the returned rows only. Other dialects fall back
+to ILIKE substring matching without ranking.
+"""
+import logging
+import re
+from typing import Dict, List
+
+from sqlalchemy import cast, func, literal, literal_column, or_, select, text, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.control import Control
+from app.models.policy import Policy
+
+logger = logging.getLogger(__name__)
+
+TEXT_CONFIG = "english"
+MAX_TOKENS = 8  # prefix terms per query; longer input still matches through `words`
+TOKEN = re.compile(r"[\w][\w.\-]*")
+# ts_rank_cd normalization 32: rank / (rank + 1), keeps ranks in [0, 1) next to similarity()
+RANK_NORMALIZATION = 32
+# Rows ranked per kind: a term matching more (a word in most controls) is ranked among the
+# first RANK_CANDIDATES matches found, which keeps ts_rank_cd off hundreds of thousands of rows
+RANK_CANDIDATES = 5000
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+
+CONTROL_VECTOR = literal_column("controls.search_vector", TSVECTOR)
+POLICY_VECTOR = literal_column("policies.search_vector", TSVECTOR)
+
+_trigram_available: Dict[str, bool] = {}
+
+
+def is_postgres(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def trigram_available(db: AsyncSession) -> bool:
+    """Whether pg_trgm is installed (checked once per database)"""
+    key = str(db.get_bind().url)
+    if key not in _trigram_available:
+        _trigram_available[key] = bool(await db.scalar(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        ))
+        if not _trigram_available[key]:
+            logger.warning("pg_trgm not installed: search without substring / fuzzy code matching")
+    return _trigram_available[key]
+
+
+def _words_query(term: str):
+    return func.websearch_to_tsquery(cast(TEXT_CONFIG, REGCONFIG), term)
+
+
+def _prefix_query(term: str):
+    tokens = TOKEN.findall(term.lower())[:MAX_TOKENS]
+    if not tokens:
+        return None
+    # Quoted lexemes: the token characters cannot break out of tsquery syntax
+    return func.to_tsquery(cast("simple", REGCONFIG), " & ".join(f"'{token}':*" for token in tokens))
+
+
+def _tsquery(term: str):
+    """Combined query for ranking and snippets"""
+    prefix = _prefix_query(term)
+    words = _words_query(term)
+    return words if prefix is None else words.op("||")(prefix)
+
+
+def _vector_match(vector, term: str) -> list:
+    clauses = [vector.op("@@")(_words_query(term))]
+    prefix = _prefix_query(term)
+    if prefix is not None:
+        clauses.append(vector.op("@@")(prefix))
+    return clauses
+
+
+def control_match(term: str, postgres: bool, trigram: bool = False):
+    """WHERE clause for controls matching `term`"""
+    if not postgres:
+        return or_(
+            Control.title.icontains(term, autoescape=True),
+            Control.internal_code.icontains(term, autoescape=True),
+            Control.original_code.icontains(term, autoescape=True)
+        )
+    clauses = _vector_match(CONTROL_VECTOR, term)
+    if trigram:
+        clauses += [
+            Control.internal_code.icontains(term, autoescape=True),
+            Control.original_code.icontains(term, autoescape=True),
+            Control.original_code.op("%")(term),  # fuzzy: "CIS1.1" finds "CIS 1.1"
+        ]
+    return or_(*clauses)
+
+
+def policy_match(term: str, postgres: bool, trigram: bool = False):
+    """WHERE clause for policies matching `term`"""
+    if not postgres:
+        return or_(
+            Policy.policy_name.icontains(term, autoescape=True),
+            Policy.policy_document.icontains(term, autoescape=True)
+        )
+    clauses = _vector_match(POLICY_VECTOR, term)
+    if trigram:
+        clauses += [
+            Policy.policy_name.icontains(term, autoescape=True),
+            Policy.policy_name.op("%")(term),
+        ]
+    return or_(*clauses)
+
+
+async def _custom_plans(db: AsyncSession):
+    """
+    Plan this transaction's statements with the actual search terms. asyncpg
+    prepares every statement, and after five runs PostgreSQL may switch to a
+    generic plan that cannot see how selective the tsquery is (~2x slower).
+    """
+    await db.execute(text("SET LOCAL plan_cache_mode = force_custom_plan"))
+
+
+async def match_clauses(db: AsyncSession, term: str):
+    """(control clause, policy clause) for the current database"""
+    postgres = is_postgres(db)
+    trigram = postgres and await trigram_available(db)
+    if postgres:
+        await _custom_plans(db)
+    return control_match(term, postgres, trigram), policy_match(term, postgres, trigram)
+
+
+def _rank(vector, term: str, code_columns, trigram: bool):
+    rank = func.ts_rank_cd(vector, _tsquery(term), RANK_NORMALIZATION)
+    if trigram:
+        rank = rank + func.greatest(*(func.similarity(column, term) for column in code_columns))
+    return rank
+
+
+async def search(
+    db: AsyncSession,
+    org_id: int,
+    term: str,
+    kinds: List[str],
+    limit: int
+) -> List[dict]:
+    """
+    Ranked hits across controls and policies with highlight snippets.
+
+    Returns:
+        list: {kind, id, code, title, rank, snippet}, best first
+    """
+    postgres = is_postgres(db)
+    trigram = postgres and await trigram_available(db)
+    if postgres:
+        await _custom_plans(db)
+    parts = []
+    if "controls" in kinds:
+        rank = _rank(CONTROL_VECTOR, term, (Control.internal_code, Control.original_code), trigram) if postgres else literal(0.0)
+        parts.append(
+            select(
+                literal("control").label("kind"),
+                Control.control_id.label("id"),
+                Control.internal_code.label("code"),
+                Control.title.label("title"),
+                (Control.title + " — " + func.coalesce(Control.description, "")).label("body"),
+                rank.label("rank"),
+            )
+            .where(Control.control_id.in_(
+                select(Control.control_id)
+                .where(Control.org_id == org_id, control_match(term, postgres, trigram))
+                .limit(RANK_CANDIDATES)
+            ))
+            .order_by(rank.desc(), Control.control_id)
+            .limit(limit)
+        )
+    if "policies" in kinds:
+        rank = _rank(POLICY_VECTOR, term, (Policy.policy_name,), trigram) if postgres else literal(0.0)
+        parts.append(
+            select(
+                literal("policy").label("kind"),
+                Policy.policy_id.label("id"),
+                literal(None).label("code"),
+                Policy.policy_name.label("title"),
+                (Policy.policy_name + " — " + func.coalesce(Policy.policy_document, "")).label("body"),
+                rank.label("rank"),
+            )
+            .where(Policy.policy_id.in_(
+                select(Policy.policy_id)
+                .where(Policy.org_id == org_id, policy_match(term, postgres, trigram))
+                .limit(RANK_CANDIDATES)
+            ))
+            .order_by(rank.desc(), Policy.policy_id)
+            .limit(limit)
+        )
+    if not parts:
+        return []
+
+    # Rank per kind, merge, then build snippets for the `limit` returned rows only (ts_headline is costly)
+    top = union_all(*(part.subquery().select() for part in parts)).subquery()
+    top = select(top).order_by(top.c.rank.desc(), top.c.kind, top.c.id).limit(limit).subquery()
+    snippet = (
+        func.ts_headline(cast(TEXT_CONFIG, REGCONFIG), top.c.body, _tsquery(term), SNIPPET_OPTIONS)
+        if postgres else literal(None)
+    )
+    rows = await db.execute(
+        select(top.c.kind, top.c.id, top.c.code, top.c.title, top.c.rank, snippet.label("snippet"))
+        .order_by(top.c.rank.desc(), top.c.kind, top.c.id)
+    )
+    return [
+        {"kind": kind, "id": id_, "code": code, "title": title, "rank": round(float(rank or 0), 4), "snippet": snippet}
+        for kind, id_, code, title, rank, snippet in rows.all()
+    ]
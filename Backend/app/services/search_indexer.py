@@ -0,0 +1,645 @@
+"""
+Elasticsearch indexing for controls and evidence.
+
+ELASTICSEARCH_INDEX_CONTROLS / _EVIDENCE are aliases over a physical index.
+
+  reindex - builds a new physical index: the id range is split into slices
+            loaded in parallel through the _bulk API (refresh and replicas
+            off during the load), then the alias is moved to it and the old
+            index removed in one atomic _aliases call. Searches keep hitting
+            the old index until then.
+  sync    - incremental: rows whose (updated_at, id) is past the index's
+            watermark (search_index_watermarks) are sent in keyset order,
+            together with tombstones of hard-deleted rows; the watermark
+            advances in the transaction that follows the acknowledged bulk
+            request, so an interrupted sync resends at most one batch.
+
+Documents carry an external version (updated_at in microseconds,
+version_type=external_gte): a stale write never replaces a newer one,
+whichever of reindex and sync gets there first. The resulting version
+conflicts are counted as `stale`, not as failures.
+
+Backpressure: requests are bounded by SEARCH_INDEX_BULK_DOCS and _BYTES,
+each slice has at most one in flight, and all slices share an AIMD limit on
+requests in flight: a 429 (a full write queue, for the whole request or per
+item) halves it, every acknowledged request grows it back by ~1 per round.
+Only the rejected items are resent, after an exponential backoff with
+jitter; connection errors and 502 / 503 / 504 (gateway and unavailable
+node responses) are retried the same way, up to SEARCH_INDEX_MAX_RETRIES. A
+500 is an error inside Elasticsearch that a resend would likely repeat, so
+it fails the item like any other status.
+
+Sync only picks up rows older than SEARCH_INDEX_SETTLE_MS, so a transaction
+committing shortly after it stamped updated_at is not skipped; one open for
+longer than that can be, until the next reindex.
+
+Run:
+    python -m app.services.search_indexer reindex [--index controls] [--slices 4]
+    python -m app.services.search_indexer sync [--index evidence]
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import (
+    SEARCH_INDEX_BULK_SECONDS,
+    SEARCH_INDEX_DOCUMENTS,
+    SEARCH_INDEX_LAG_SECONDS,
+    SEARCH_INDEX_RETRIES,
+)
+from app.models.control import Control
+from app.models.evidence import EvidenceFile
+from app.models.search_index import SearchIndexTombstone, SearchIndexWatermark
+
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+CONTROLS = "controls"
+EVIDENCE = "evidence"
+
+# pg advisory lock per index: held by a reindex for its whole run, by sync for one batch
+LOCK_IDS = {CONTROLS: 0x736561726368_01, EVIDENCE: 0x736561726368_02}  # "search"
+RETRY_STATUS = {429, 502, 503, 504}  # 500 is not retried
+MAX_IN_FLIGHT = 64  # bulk requests across all slices (also the HTTP connection pool size)
+EPOCH = datetime(1970, 1, 1)
+
+TEXT_WITH_KEYWORD = {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}}
+
+
+class IndexSource(NamedTuple):
+    key: str
+    alias: str
+    model: type
+    id_column: object
+    columns: Tuple
+    mappings: dict
+    is_deleted: Callable  # row -> bool (soft-deleted rows leave the index)
+
+
+SOURCES: Dict[str, IndexSource] = {
+    CONTROLS: IndexSource(
+        CONTROLS,
+        settings.ELASTICSEARCH_INDEX_CONTROLS,
+        Control,
+        Control.control_id,
+        (
+            Control.control_id, Control.org_id, Control.internal_code, Control.original_code,
+            Control.framework_id, Control.group_id, Control.title, Control.description, Control.severity,
+            Control.category, Control.status, Control.is_active, Control.updated_at,
+        ),
+        {"properties": {
+            "control_id": {"type": "integer"},
+            "org_id": {"type": "integer"},
+            "internal_code": {"type": "keyword"},
+            "original_code": {"type": "keyword"},
+            "framework_id": {"type": "integer"},
+            "group_id": {"type": "integer"},
+            "title": TEXT_WITH_KEYWORD,
+            "description": {"type": "text"},
+            "severity": {"type": "keyword"},
+            "category": {"type": "keyword"},
+            "status": {"type": "keyword"},
+            "updated_at": {"type": "date"},
+        }},
+        lambda row: row.is_active is False,
+    ),
+    EVIDENCE: IndexSource(
+        EVIDENCE,
+        settings.ELASTICSEARCH_INDEX_EVIDENCE,
+        EvidenceFile,
+        EvidenceFile.evidence_id,
+        (
+            EvidenceFile.evidence_id, EvidenceFile.org_id, EvidenceFile.control_id, EvidenceFile.file_name,
+            EvidenceFile.file_type, EvidenceFile.file_size, EvidenceFile.source, EvidenceFile.status,
+            EvidenceFile.integrity_status, EvidenceFile.compliance_period, EvidenceFile.notes,
+            EvidenceFile.uploaded_date, EvidenceFile.updated_at,
+        ),
+        {"properties": {
+            "evidence_id": {"type": "integer"},
+            "org_id": {"type": "integer"},
+            "control_id": {"type": "integer"},
+            "file_name": TEXT_WITH_KEYWORD,
+            "file_type": {"type": "keyword"},
+            "file_size": {"type": "long"},
+            "source": {"type": "keyword"},
+            "status": {"type": "keyword"},
+            "integrity_status": {"type": "keyword"},
+            "compliance_period": {"type": "keyword"},
+            "notes": {"type": "text"},
+            "uploaded_date": {"type": "date"},
+            "updated_at": {"type": "date"},
+        }},
+        lambda row: False,
+    ),
+}
+
+
+class BulkIndexError(Exception):
+    """A bulk request still failed after SEARCH_INDEX_MAX_RETRIES"""
+
+
+def tombstone(db, source_key: str, document_id: int) -> SearchIndexTombstone:
+    """Queue removal of a hard-deleted row's document (caller's transaction; sync and async sessions)"""
+    row = SearchIndexTombstone(index_name=SOURCES[source_key].alias, document_id=document_id)
+    db.add(row)
+    return row
+
+
+def _version(changed_at: Optional[datetime]) -> int:
+    """External document version: microseconds since the epoch (1 for rows never stamped)"""
+    if changed_at is None:
+        return 1
+    return (changed_at - EPOCH) // timedelta(microseconds=1)
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def index_action(index: str, doc_id: int, version: int, document: Optional[dict]) -> bytes:
+    """NDJSON lines for one document (delete when `document` is None)"""
+    meta = {"_index": index, "_id": str(doc_id), "version": version, "version_type": "external_gte"}
+    if document is None:
+        return (json.dumps({"delete": meta}) + "\n").encode()
+    return (json.dumps({"index": meta}) + "\n" + json.dumps(document) + "\n").encode()
+
+
+def row_action(source: IndexSource, index: str, row) -> bytes:
+    doc_id = row[0]
+    if source.is_deleted(row):
+        return index_action(index, doc_id, _version(row.updated_at), None)
+    document = {key: _value(value) for key, value in row._mapping.items() if key != "is_active"}
+    return index_action(index, doc_id, _version(row.updated_at), document)
+
+
+def _chunks(actions: List[bytes], max_docs: int, max_bytes: int) -> Iterable[List[bytes]]:
+    """Split actions into bulk requests bounded by document count and body size"""
+    chunk: List[bytes] = []
+    size = 0
+    for action in actions:
+        if chunk and (len(chunk) >= max_docs or size + len(action) > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(action)
+        size += len(action)
+    if chunk:
+        yield chunk
+
+
+class ElasticsearchBulkClient:
+    """
+    _bulk and index management calls with retry and shared backpressure.
+    Thread-safe; one instance is shared by all slices of a run.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        retry_initial: Optional[float] = None,
+        retry_max: Optional[float] = None,
+        timeout: Optional[float] = None,
+        max_docs: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.max_retries = max_retries if max_retries is not None else settings.SEARCH_INDEX_MAX_RETRIES
+        self.retry_initial = retry_initial or settings.SEARCH_INDEX_RETRY_INITIAL
+        self.retry_max = retry_max or settings.SEARCH_INDEX_RETRY_MAX
+        self.max_docs = max_docs or settings.SEARCH_INDEX_BULK_DOCS
+        self.max_bytes = max_bytes or settings.SEARCH_INDEX_BULK_BYTES
+        self._http = httpx.Client(
+            base_url=url or settings.ELASTICSEARCH_URL,
+            timeout=timeout or settings.SEARCH_INDEX_REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT)
+        )
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self.limit = float(MAX_IN_FLIGHT)
+        self.retries = Counter()
+
+    def close(self):
+        self._http.close()
+
+    # Backpressure: AIMD limit on bulk requests in flight, shared by every slice
+    def _acquire(self):
+        with self._cond:
+            while self._in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def _release(self, rejected: bool):
+        with self._cond:
+            if rejected:
+                self.limit = max(1.0, min(self.limit, self._in_flight) / 2)
+            else:
+                self.limit = min(float(MAX_IN_FLIGHT), self.limit + 1 / self.limit)
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _backoff(self, attempt: int, reason: str):
+        with self._cond:
+            self.retries[reason] += 1
+        SEARCH_INDEX_RETRIES.labels(reason=reason).inc()
+        time.sleep(min(self.retry_max, self.retry_initial * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+    def request(self, method: str, path: str, **kwargs) -> dict:
+        response = self._http.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def bulk(self, actions: List[bytes], index_label: str) -> Counter:
+        """
+        Send actions in bounded requests, resending rejected items.
+
+        Returns:
+            Counter: indexed / deleted / stale / failed document counts
+        """
+        counts = Counter()
+        for chunk in _chunks(actions, self.max_docs, self.max_bytes):
+            counts.update(self._send(chunk, index_label))
+        return counts
+
+    @staticmethod
+    def _tally(pending: List[bytes], items: list, counts: Counter) -> List[bytes]:
+        """Count item outcomes; returns the actions to resend"""
+        rejected = []
+        for action, item in zip(pending, items):
+            op, result = next(iter(item.items()))
+            status = result.get("status", 500)
+            if status < 300:
+                counts["deleted" if op == "delete" else "indexed"] += 1
+            elif status == 404 and op == "delete":
+                counts["deleted"] += 1  # already gone
+            elif status == 409:
+                counts["stale"] += 1  # a newer version is indexed
+            elif status in RETRY_STATUS:
+                rejected.append(action)
+            else:
+                counts["failed"] += 1
+                logger.error(f"Document {result.get('_id')} not indexed: {result.get('error')}")
+        return rejected
+
+    def _send(self, chunk: List[bytes], index_label: str) -> Counter:
+        counts = Counter()
+        pending = chunk
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            response = None
+            rejected = []
+            try:
+                response = self._http.post(
+                    "/_bulk", content=b"".join(pending), headers={"Content-Type": "application/x-ndjson"}
+                )
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    rejected = self._tally(pending, response.json()["items"], counts)
+            except httpx.TransportError as e:
+                logger.warning(f"Bulk request failed ({type(e).__name__}), retrying {len(pending)} documents")
+            finally:
+                self._release(rejected=response is None or response.status_code in RETRY_STATUS or bool(rejected))
+
+            if response is None:
+                reason = "error"
+            elif response.status_code in RETRY_STATUS:
+                reason = "rejected" if response.status_code == 429 else "error"
+            elif rejected:
+                reason = "rejected"
+                pending = rejected
+            else:
+                break
+            self._backoff(attempt, reason)
+        else:
+            SEARCH_INDEX_BULK_SECONDS.labels(outcome="error").observe(time.perf_counter() - start)
+            raise BulkIndexError(f"{len(pending)} documents still rejected after {self.max_retries} retries")
+
+        SEARCH_INDEX_BULK_SECONDS.labels(outcome="ok").observe(time.perf_counter() - start)
+        for outcome, count in counts.items():
+            SEARCH_INDEX_DOCUMENTS.labels(index=index_label, outcome=outcome).inc(count)
+        return counts
+
+    # Index management
+    def create_index(self, index: str, body: dict):
+        self.request("PUT", f"/{index}", json=body)
+
+    def put_settings(self, index: str, index_settings: dict):
+        self.request("PUT", f"/{index}/_settings", json={"index": index_settings})
+
+    def refresh(self, index: str):
+        self.request("POST", f"/{index}/_refresh")
+
+    def alias_targets(self, alias: str) -> List[str]:
+        response = self._http.get(f"/_alias/{alias}")
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return list(response.json())
+
+    def swap_alias(self, alias: str, index: str) -> List[str]:
+        """Point `alias` at `index` and remove its previous indexes atomically; returns the removed ones"""
+        previous = [name for name in self.alias_targets(alias) if name != index]
+        actions = [{"add": {"index": index, "alias": alias}}]
+        actions += [{"remove_index": {"index": name}} for name in previous]
+        self.request("POST", "/_aliases", json={"actions": actions})
+        return previous
+
+
+def _try_lock(db: Session, source: IndexSource) -> bool:
+    """Transaction-scoped advisory lock for one sync batch (always granted off PostgreSQL)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(db.scalar(select(func.pg_try_advisory_xact_lock(LOCK_IDS[source.key]))))
+
+
+@contextmanager
+def _reindex_lock(session_factory, source: IndexSource):
+    """Session-level advisory lock held on a dedicated connection for a whole reindex"""
+    with session_factory() as db:
+        bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        yield
+        return
+    with bind.connect() as conn:
+        conn.execute(select(func.pg_advisory_lock(LOCK_IDS[source.key])))
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(select(func.pg_advisory_unlock(LOCK_IDS[source.key])))
+            conn.commit()
+
+
+def _slice_ranges(low: int, high: int, slices: int) -> List[Tuple[int, int]]:
+    """Contiguous, inclusive id ranges covering [low, high]"""
+    step = max(1, -(-(high - low + 1) // slices))
+    return [(start, min(high, start + step - 1)) for start in range(low, high + 1, step)]
+
+
+def _load_slice(source: IndexSource, index: str, id_range: Tuple[int, int], client, session_factory) -> Counter:
+    counts = Counter()
+    last_id, high = id_range[0] - 1, id_range[1]
+    while True:
+        # Short read transactions: a long reindex must not pin one snapshot
+        with session_factory() as db:
+            rows = db.execute(
+                select(*source.columns)
+                .where(source.id_column > last_id, source.id_column <= high)
+                .order_by(source.id_column)
+                .limit(client.max_docs)
+            ).all()
+        if not rows:
+            return counts
+        last_id = rows[-1][0]
+        counts.update(client.bulk([row_action(source, index, row) for row in rows if not source.is_deleted(row)], source.key))
+        counts["rows"] += len(rows)
+
+
+def reindex(
+    source_key: str,
+    client: Optional[ElasticsearchBulkClient] = None,
+    session_factory: Optional[Callable[[], Session]] = None,
+    slices: Optional[int] = None
+) -> dict:
+    """
+    Build a fresh index for `source_key` and move its alias to it.
+
+    Returns:
+        dict: Document counts and throughput
+    """
+    if session_factory is None:
+        from app.database import SessionLocal as session_factory
+    own_client = client is None
+    client = client or ElasticsearchBulkClient()
+    source = SOURCES[source_key]
+    slices = slices or settings.SEARCH_INDEX_SLICES
+    start = time.perf_counter()
+
+    try:
+        with _reindex_lock(session_factory, source):
+            started_at = datetime.utcnow()
+            with session_factory() as db:
+                low, high = db.execute(select(func.min(source.id_column), func.max(source.id_column))).one()
+            index = f"{source.alias}-{started_at:%Y%m%d%H%M%S%f}"
+            client.create_index(index, {
+                "settings": {"index": {
+                    "number_of_shards": settings.SEARCH_INDEX_SHARDS,
+                    "number_of_replicas": 0,
+                    "refresh_interval": "-1",
+                }},
+                "mappings": source.mappings,
+            })
+
+            counts = Counter()
+            try:
+                if low is not None:
+                    ranges = _slice_ranges(low, high, slices)
+                    with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="search-reindex") as pool:
+                        for slice_counts in pool.map(
+                            lambda id_range: _load_slice(source, index, id_range, client, session_factory), ranges
+                        ):
+                            counts.update(slice_counts)
+                client.put_settings(index, {
+                    "number_of_replicas": settings.SEARCH_INDEX_REPLICAS,
+                    "refresh_interval": settings.SEARCH_INDEX_REFRESH_INTERVAL,
+                })
+                client.refresh(index)
+                removed = client.swap_alias(source.alias, index)
+            except Exception:
+                # The alias still points at the previous index; drop the partial one
+                logger.error(f"Reindex of {source.alias} failed, deleting {index}")
+                client.request("DELETE", f"/{index}")
+                raise
+
+            # Rows changed while the slices were reading are resent by the next sync
+            with session_factory() as db:
+                watermark = db.get(SearchIndexWatermark, source.alias)
+                if watermark is None:
+                    watermark = SearchIndexWatermark(index_name=source.alias)
+                    db.add(watermark)
+                watermark.last_updated_at = started_at - timedelta(milliseconds=settings.SEARCH_INDEX_SETTLE_MS)
+                watermark.last_id = 0
+                watermark.documents_indexed = counts["indexed"]
+                db.commit()
+    finally:
+        if own_client:
+            client.close()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "index": index,
+        "alias": source.alias,
+        "removed": ",".join(removed) or "-",
+        "slices": slices,
+        "rows": counts["rows"],
+        "indexed": counts["indexed"],
+        "failed": counts["failed"],
+        "retries": sum(client.retries.values()),
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(counts["indexed"] / elapsed, 1) if elapsed else 0.0,
+    }
+    logger.info(
+        f"Reindexed {source.alias} -> {index}: {counts['indexed']} documents, "
+        f"{report['docs_per_s']} docs/s, {counts['failed']} failed"
+    )
+    return report
+
+
+class SearchIndexSync:
+    """Incremental sync of one or more indexes from updated_at watermarks and tombstones"""
+
+    def __init__(
+        self,
+        source_keys: Iterable[str] = (CONTROLS, EVIDENCE),
+        client: Optional[ElasticsearchBulkClient] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: Optional[int] = None,
+        poll_interval_ms: Optional[int] = None,
+        settle_ms: Optional[int] = None
+    ):
+        if session_factory is None:
+            from app.database import SessionLocal as session_factory
+        self.sources = [SOURCES[key] for key in source_keys]
+        self.client = client or ElasticsearchBulkClient()
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.SEARCH_INDEX_BULK_DOCS
+        self.poll_interval = (poll_interval_ms if poll_interval_ms is not None else settings.SEARCH_INDEX_POLL_INTERVAL_MS) / 1000.0
+        self.settle = timedelta(milliseconds=settle_ms if settle_ms is not None else settings.SEARCH_INDEX_SETTLE_MS)
+        self._stop = threading.Event()
+
+    def sync_batch(self, source: IndexSource) -> int:
+        """
+        Index one batch of changed rows and tombstones.
+
+        Returns:
+            int: Changes sent (0 when caught up or a reindex holds the lock)
+        """
+        with self.session_factory() as db:
+            if not _try_lock(db, source):
+                return 0
+            watermark = db.get(SearchIndexWatermark, source.alias)
+            if watermark is None:
+                watermark = SearchIndexWatermark(index_name=source.alias, last_id=0, documents_indexed=0)
+                db.add(watermark)
+
+            query = select(*source.columns).where(source.model.updated_at <= datetime.utcnow() - self.settle)
+            if watermark.last_updated_at is not None:
+                query = query.where(
+                    tuple_(source.model.updated_at, source.id_column) > tuple_(watermark.last_updated_at, watermark.last_id)
+                )
+            rows = db.execute(
+                query.order_by(source.model.updated_at, source.id_column).limit(self.batch_size)
+            ).all()
+            tombstones = db.execute(
+                select(SearchIndexTombstone)
+                .where(SearchIndexTombstone.index_name == source.alias)
+                .order_by(SearchIndexTombstone.tombstone_id)
+                .limit(self.batch_size)
+            ).scalars().all()
+            if not rows and not tombstones:
+                return 0
+
+            actions = [row_action(source, source.alias, row) for row in rows]
+            actions += [index_action(source.alias, t.document_id, _version(t.deleted_at), None) for t in tombstones]
+            counts = self.client.bulk(actions, source.key)  # raises: nothing below runs, the batch is resent
+
+            if rows:
+                watermark.last_updated_at = rows[-1].updated_at
+                watermark.last_id = rows[-1][0]
+            watermark.documents_indexed += counts["indexed"]
+            if tombstones:
+                db.execute(delete(SearchIndexTombstone).where(
+                    SearchIndexTombstone.tombstone_id.in_([t.tombstone_id for t in tombstones])
+                ))
+            db.commit()
+
+        acked_at = datetime.utcnow()
+        for changed_at in [row.updated_at for row in rows] + [t.deleted_at for t in tombstones]:
+            SEARCH_INDEX_LAG_SECONDS.labels(index=source.key).observe((acked_at - changed_at).total_seconds())
+        return len(rows) + len(tombstones)
+
+    def bootstrap(self):
+        """Full reindex of every index never loaded (sync alone would create a plain index under the alias name)"""
+        with self.session_factory() as db:
+            loaded = set(db.scalars(
+                select(SearchIndexWatermark.index_name).where(SearchIndexWatermark.last_updated_at.is_not(None))
+            ))
+        for source in self.sources:
+            if source.alias not in loaded:
+                reindex(source.key, client=self.client, session_factory=self.session_factory)
+
+    def run(self):
+        """Sync until stop() is called; idles for poll_interval when every index is caught up"""
+        backoff = self.poll_interval
+        logger.info(f"Search index sync started ({', '.join(s.alias for s in self.sources)})")
+        while not self._stop.is_set():
+            try:
+                self.bootstrap()
+                break
+            except Exception as e:
+                logger.error(f"Initial reindex failed, retrying in {backoff:.2f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, settings.SEARCH_INDEX_RETRY_MAX)
+        backoff = self.poll_interval
+        while not self._stop.is_set():
+            busy = False
+            try:
+                for source in self.sources:
+                    busy = self.sync_batch(source) >= self.batch_size or busy
+                backoff = self.poll_interval
+            except Exception as e:
+                logger.error(f"Search index sync failed, retrying in {backoff:.2f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, settings.SEARCH_INDEX_RETRY_MAX)
+                continue
+            if not busy:
+                self._stop.wait(self.poll_interval)
+        logger.info("Search index sync stopped")
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elasticsearch indexer for controls and evidence")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reindex_parser = subparsers.add_parser("reindex", help="Bulk load a new index and swap the alias")
+    reindex_parser.add_argument("--index", choices=list(SOURCES), action="append")
+    reindex_parser.add_argument("--slices", type=int, default=None)
+    sync_parser = subparsers.add_parser("sync", help="Index changes until interrupted")
+    sync_parser.add_argument("--index", choices=list(SOURCES), action="append")
+    args = parser.parse_args()
+
+    import app.models.init  # noqa: F401  (register all mappers)
+    keys = args.index or list(SOURCES)
+    if args.command == "reindex":
+        for key in keys:
+            report = reindex(key, slices=args.slices)
+            for name, value in report.items():
+                print(f"{name:<12} {value}")
+    elif args.command == "sync":
+        sync = SearchIndexSync(keys)
+        try:
+            sync.run()
+        except KeyboardInterrupt:
+            sync.stop()
+        finally:
+            sync.client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
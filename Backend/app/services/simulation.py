@@ -0,0 +1,458 @@
+"""
+What-if compliance simulation.
+
+A scenario proposes control changes, either a 3-state status or the two
+signals the decision engine derives it from (policy enforced, scan passed;
+the one not given keeps its current value). Simulating it overlays the
+changes on an in-memory snapshot of the tenant and recomputes, without
+writing anything:
+
+  controls    the 3-state outcome of every proposed control, plus, with
+              follow_mappings, the controls an upgraded control satisfies
+              through ControlMapping at min_confidence or more
+              (app.services.control_graph), raised to at most that status
+  frameworks  per-framework counts and compliance score against the
+              baseline, from the snapshot's counts plus the moved controls
+  risk        residual risk through the tenant's RiskModel
+              (app.services.risk_engine) with the changed controls' credit,
+              and the risks whose residual risk moves most
+
+Snapshots (ComplianceSnapshot: status, active flag, framework and policy
+coverage per control, as arrays) are cached per worker and tenant like the
+risk models: a newer "controls" version re-reads the controls logged under
+it (app.services.compliance_stats status change log); a newer "frameworks",
+"policies" or "links" version, a control the snapshot does not know or a snapshot older
+than SIMULATION_MAX_AGE reload the tenant. Snapshots are immutable and a
+simulation only reads them, so any number of scenarios run concurrently,
+each in a worker thread.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.metrics import SIMULATION_SECONDS, SIMULATION_SNAPSHOT_BUILDS
+from app.models.control import Control
+from app.models.framework import Framework
+from app.models.policy import Policy, PolicyControlLink
+from app.models.risk import Risk
+from app.services import compliance_stats, risk_engine, tenant_versions
+from app.services.compliance_stats import DEFAULT_STATUS, compliance_score
+from app.services.control_graph import control_graphs
+from app.services.decision_engine import decide
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+
+# Status code per 3-state status, ordered from least to most implemented
+STATUSES = ["not-implemented", "partial", "implemented"]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+IMPLEMENTED = STATUS_CODES["implemented"]
+PARTIAL = STATUS_CODES["partial"]
+
+
+class Change(NamedTuple):
+    """A proposed change to one control (None = keep the current value)"""
+    control: str  # internal_code
+    status: Optional[str] = None
+    policy_enforced: Optional[bool] = None
+    scan_passed: Optional[bool] = None
+
+
+class Scenario(NamedTuple):
+    name: Optional[str]
+    changes: Sequence[Change]
+    follow_mappings: bool = False
+    min_confidence: float = 0.8
+    max_depth: int = 2
+
+
+class ComplianceSnapshot:
+    """
+    Immutable snapshot of one tenant's controls. `with_statuses` returns a new
+    snapshot, so simulations never see a half-applied change.
+    """
+
+    def __init__(
+        self,
+        org_id: int,
+        versions: Dict[str, int],
+        control_ids,
+        internal_codes: Sequence[str],
+        framework,
+        status,
+        active,
+        enforced,
+        frameworks: Sequence[tuple],
+        built_at: Optional[float] = None,
+        codes: Optional[Dict[str, int]] = None
+    ):
+        self.org_id = org_id
+        self.versions = versions  # tenant version per scope, as of the load / last sync
+        self.built_at = built_at if built_at is not None else time.monotonic()
+        self.control_ids = control_ids  # ascending
+        self.internal_codes = internal_codes  # per position
+        self.codes = codes if codes is not None else {code: position for position, code in enumerate(internal_codes)}
+        self.framework = framework  # position in `frameworks`, -1 = inactive framework
+        self.status = status  # STATUS_CODES
+        self.active = active
+        self.enforced = enforced  # linked to an active policy
+        self.frameworks = frameworks  # active (framework_id, framework_code, framework_name), by code
+        counted = active & (framework >= 0)
+        self.counts = np.bincount(
+            framework[counted].astype(np.int64) * 3 + status[counted], minlength=3 * len(frameworks)
+        ).reshape(-1, 3)  # per framework: not-implemented, partial, implemented
+
+    @classmethod
+    def build(
+        cls,
+        org_id: int,
+        versions: Dict[str, int],
+        controls: Sequence[tuple],
+        enforced_ids: Sequence[int],
+        frameworks: Sequence[tuple]
+    ) -> "ComplianceSnapshot":
+        """
+        Snapshot from (control_id, internal_code, framework_id, status,
+        is_active) rows, the control ids linked to an active policy and
+        (framework_id, framework_code, framework_name) rows of the active
+        frameworks
+        """
+        controls = sorted(controls)
+        control_ids = np.array([row[0] for row in controls], dtype=np.int64)
+        framework_positions = {row[0]: position for position, row in enumerate(frameworks)}
+        return cls(
+            org_id, versions, control_ids,
+            [row[1] for row in controls],
+            np.array([framework_positions.get(row[2], -1) for row in controls], dtype=np.int32),
+            np.array([STATUS_CODES.get(row[3] or DEFAULT_STATUS, 0) for row in controls], dtype=np.int8),
+            np.array([row[4] is not False for row in controls], dtype=bool),
+            np.isin(control_ids, np.fromiter(enforced_ids, dtype=np.int64)),
+            list(frameworks)
+        )
+
+    def with_statuses(self, controls_version: int, controls: Sequence[tuple]) -> Optional["ComplianceSnapshot"]:
+        """
+        Snapshot with the (control_id, status, is_active) rows applied, None
+        when a row is for a control the snapshot does not know
+        """
+        status, active = self.status, self.active
+        if controls:
+            ids = np.array([row[0] for row in controls], dtype=np.int64)
+            positions = np.searchsorted(self.control_ids, ids)
+            if (positions >= len(self.control_ids)).any() or (self.control_ids[positions] != ids).any():
+                return None
+            status, active = self.status.copy(), self.active.copy()
+            status[positions] = [STATUS_CODES.get(row[1] or DEFAULT_STATUS, 0) for row in controls]
+            active[positions] = [row[2] is not False for row in controls]
+        return ComplianceSnapshot(
+            self.org_id, {**self.versions, tenant_versions.CONTROLS: controls_version},
+            self.control_ids, self.internal_codes, self.framework, status, active, self.enforced, self.frameworks,
+            built_at=self.built_at, codes=self.codes
+        )
+
+    def proposed(self, changes: Sequence[Change]):
+        """(positions, new status codes, unknown codes) of the proposed changes; later changes win"""
+        positions, targets, unknown = [], [], []
+        for change in changes:
+            position = self.codes.get(change.control)
+            if position is None:
+                unknown.append(change.control)
+                continue
+            if change.status is not None:
+                target = STATUS_CODES[change.status]
+            else:
+                current, enforced = int(self.status[position]), bool(self.enforced[position])
+                # The scan signal behind the current status (decide() inverted)
+                passed = current == IMPLEMENTED or (current == PARTIAL and not enforced)
+                target = STATUS_CODES[decide(
+                    enforced if change.policy_enforced is None else change.policy_enforced,
+                    passed if change.scan_passed is None else change.scan_passed
+                )]
+            positions.append(position)
+            targets.append(target)
+        positions = np.array(positions, dtype=np.int64)
+        targets = np.array(targets, dtype=np.int8)
+        if len(positions):
+            # Last change per control
+            _, last = np.unique(positions[::-1], return_index=True)
+            keep = np.sort(len(positions) - 1 - last)
+            positions, targets = positions[keep], targets[keep]
+        return positions, targets, unknown
+
+    def framework_counts(self, positions, targets) -> "np.ndarray":
+        """Per-framework counts with the controls at `positions` moved to `targets`"""
+        counts = self.counts.copy()
+        counted = self.active[positions] & (self.framework[positions] >= 0)
+        framework = self.framework[positions][counted]
+        np.add.at(counts, (framework, self.status[positions][counted]), -1)
+        np.add.at(counts, (framework, targets[counted]), 1)
+        return counts
+
+
+def _scores(counts) -> List[float]:
+    return [compliance_score(int(c[IMPLEMENTED]), int(c[PARTIAL]), int(c.sum())) for c in counts]
+
+
+def simulate(snapshot: ComplianceSnapshot, model, graph, scenario: Scenario, framework_codes=None, top_risks: int = 10) -> dict:
+    """One scenario against the snapshot, risk model and mapping graph (pure; runs in a worker thread)"""
+    positions, targets, unknown = snapshot.proposed(scenario.changes)
+    sources = {int(p): "proposed" for p in positions}
+    confidence: Dict[int, float] = {}
+
+    if scenario.follow_mappings and graph is not None and len(positions):
+        upgraded = targets > snapshot.status[positions]
+        raised: Dict[int, tuple] = {}  # position -> (status code, confidence)
+        for position, target in zip(positions[upgraded].tolist(), targets[upgraded].tolist()):
+            hits = graph.satisfies(
+                int(snapshot.control_ids[position]), scenario.max_depth, scenario.min_confidence, limit=len(snapshot.control_ids)
+            )
+            if not hits:
+                continue
+            ids = np.array([hit[0] for hit in hits], dtype=np.int64)
+            found = np.searchsorted(snapshot.control_ids, ids)
+            for hit, mapped in zip(hits, found.tolist()):
+                if mapped >= len(snapshot.control_ids) or snapshot.control_ids[mapped] != hit[0] or mapped in sources:
+                    continue
+                if target > snapshot.status[mapped] and (target, hit[1]) > raised.get(mapped, (-1, 0.0)):
+                    raised[mapped] = (target, hit[1])
+        if raised:
+            mapped = np.fromiter(raised, dtype=np.int64)
+            positions = np.concatenate([positions, mapped])
+            targets = np.concatenate([targets, np.array([raised[p][0] for p in mapped.tolist()], dtype=np.int8)])
+            for position, (_, path_confidence) in raised.items():
+                sources[position] = "mapping"
+                confidence[position] = round(path_confidence, 4)
+
+    moved = targets != snapshot.status[positions]
+    positions, targets = positions[moved], targets[moved]
+
+    baseline = _scores(snapshot.counts)
+    counts = snapshot.framework_counts(positions, targets)
+    scores = _scores(counts)
+    wanted = {code.upper() for code in framework_codes} if framework_codes else None
+    frameworks = []
+    for index, (framework_id, code, name) in enumerate(snapshot.frameworks):
+        if wanted is not None and code.upper() not in wanted:
+            continue
+        frameworks.append({
+            "framework_id": framework_id,
+            "framework_code": code,
+            "framework_name": name,
+            "total": int(counts[index].sum()),
+            "implemented": int(counts[index][IMPLEMENTED]),
+            "partial": int(counts[index][PARTIAL]),
+            "not_implemented": int(counts[index][0]),
+            "compliance_score": scores[index],
+            "baseline_score": baseline[index],
+            "delta": round(scores[index] - baseline[index], 2),
+        })
+    total_before, total_after = snapshot.counts.sum(axis=0), counts.sum(axis=0)
+    score_before = compliance_score(int(total_before[IMPLEMENTED]), int(total_before[PARTIAL]), int(total_before.sum()))
+    score_after = compliance_score(int(total_after[IMPLEMENTED]), int(total_after[PARTIAL]), int(total_after.sum()))
+
+    risk, moved_risks = None, []
+    if model is not None:
+        after = model.with_statuses(model.controls_version, [
+            (control_id, STATUSES[target], bool(active))
+            for control_id, target, active in zip(
+                snapshot.control_ids[positions].tolist(), targets.tolist(), snapshot.active[positions].tolist()
+            )
+        ])
+        before_map, after_map = model.heatmap(), after.heatmap()
+        risk = {
+            "inherent_total": before_map["inherent_total"],
+            "residual_before": before_map["residual_total"],
+            "residual_after": after_map["residual_total"],
+            "reduction_pct": after_map["reduction_pct"],
+            "residual_ratings_before": before_map["residual_ratings"],
+            "residual_ratings_after": after_map["residual_ratings"],
+        }
+        change = np.where(model.is_open, model.residual - after.residual, 0.0)
+        moved_positions = np.flatnonzero(np.abs(change) > 1e-9)
+        if top_risks and len(moved_positions):
+            order = np.lexsort((model.risk_ids[moved_positions], -np.abs(change[moved_positions])))[:top_risks]
+            moved_risks = [
+                {
+                    "risk_id": int(model.risk_ids[p]),
+                    "residual_before": round(float(model.residual[p]), 4),
+                    "residual_after": round(float(after.residual[p]), 4),
+                }
+                for p in moved_positions[order].tolist()
+            ]
+
+    return {
+        "name": scenario.name,
+        "controls": [
+            {
+                "control_id": int(snapshot.control_ids[position]),
+                "internal_code": snapshot.internal_codes[position],
+                "framework_id": snapshot.frameworks[snapshot.framework[position]][0] if snapshot.framework[position] >= 0 else None,
+                "status_before": STATUSES[snapshot.status[position]],
+                "status_after": STATUSES[target],
+                "source": sources[position],
+                "confidence": confidence.get(position),
+            }
+            for position, target in zip(positions.tolist(), targets.tolist())
+        ],
+        "unknown_controls": unknown,
+        "frameworks": frameworks,
+        "compliance_score": score_after,
+        "baseline_score": score_before,
+        "delta": round(score_after - score_before, 2),
+        "risk": risk,
+        "risks": moved_risks,
+    }
+
+
+class SnapshotCache:
+    """Per-tenant compliance snapshots, least recently used evicted beyond max_tenants"""
+
+    # A newer version of these reloads the tenant; "controls" is synced
+    RELOAD_SCOPES = (tenant_versions.FRAMEWORKS, tenant_versions.POLICIES, tenant_versions.LINKS)
+
+    def __init__(
+        self,
+        max_tenants: int = 16,
+        max_age: float = 3600,
+        max_changes: int = 50000
+    ):
+        self.max_tenants = max_tenants
+        self.max_age = max_age
+        self.max_changes = max_changes  # more changed controls than this reload the tenant
+        self._snapshots: "OrderedDict[int, ComplianceSnapshot]" = OrderedDict()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def _versions(self, db: AsyncSession, org_id: int) -> Dict[str, int]:
+        return {
+            scope: await tenant_versions.current(db, org_id, scope)
+            for scope in self.RELOAD_SCOPES + (tenant_versions.CONTROLS,)
+        }
+
+    def _fresh(self, snapshot: Optional[ComplianceSnapshot], versions: Dict[str, int]) -> bool:
+        return (
+            snapshot is not None
+            and all(snapshot.versions[scope] >= versions[scope] for scope in self.RELOAD_SCOPES)
+            and time.monotonic() - snapshot.built_at < self.max_age
+        )
+
+    async def get(self, db: AsyncSession, org_id: int) -> ComplianceSnapshot:
+        """The tenant's snapshot as of its latest committed changes"""
+        versions = await self._versions(db, org_id)
+        snapshot = self._snapshots.get(org_id)
+        if self._fresh(snapshot, versions) and snapshot.versions[tenant_versions.CONTROLS] >= versions[tenant_versions.CONTROLS]:
+            self._snapshots.move_to_end(org_id)
+            return snapshot
+        async with self._locks.setdefault(org_id, asyncio.Lock()):
+            snapshot = self._snapshots.get(org_id)  # refreshed while this request waited
+            if self._fresh(snapshot, versions):
+                if snapshot.versions[tenant_versions.CONTROLS] >= versions[tenant_versions.CONTROLS]:
+                    return snapshot
+                snapshot = await self._sync(db, snapshot, versions[tenant_versions.CONTROLS])
+            else:
+                snapshot = None
+            if snapshot is None:
+                snapshot = await self._load(db, org_id)
+            self._store(org_id, snapshot)
+            return snapshot
+
+    async def _load(self, db: AsyncSession, org_id: int) -> ComplianceSnapshot:
+        start = time.perf_counter()
+        # Versions first: a change committed during the load is applied again next time (idempotent)
+        versions = await self._versions(db, org_id)
+        controls = (await db.execute(
+            select(Control.control_id, Control.internal_code, Control.framework_id, Control.status, Control.is_active)
+            .where(Control.org_id == org_id)
+        )).all()
+        enforced = (await db.execute(
+            select(PolicyControlLink.control_id)
+            .join(Policy, Policy.policy_id == PolicyControlLink.policy_id)
+            .where(Policy.org_id == org_id, Policy.is_active.is_(True))
+            .distinct()
+        )).scalars().all()
+        frameworks = (await db.execute(
+            select(Framework.framework_id, Framework.framework_code, Framework.framework_name)
+            .where(Framework.org_id == org_id, Framework.is_active.is_(True))
+            .order_by(Framework.framework_code)
+        )).all()
+        snapshot = await asyncio.to_thread(
+            ComplianceSnapshot.build, org_id, versions, controls, enforced, frameworks
+        )
+        SIMULATION_SNAPSHOT_BUILDS.labels(kind="full").inc()
+        logger.info(
+            f"Compliance snapshot for org {org_id}: {len(controls)} controls, "
+            f"{len(frameworks)} frameworks, {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return snapshot
+
+    async def _sync(self, db: AsyncSession, snapshot: ComplianceSnapshot, controls_version: int) -> Optional[ComplianceSnapshot]:
+        controls = await compliance_stats.status_changes(
+            db, snapshot.org_id, snapshot.versions[tenant_versions.CONTROLS], self.max_changes
+        )
+        if controls is None:
+            return None
+        updated = await asyncio.to_thread(snapshot.with_statuses, controls_version, controls)
+        if updated is not None:
+            SIMULATION_SNAPSHOT_BUILDS.labels(kind="status").inc()
+        return updated
+
+    def _store(self, org_id: int, snapshot: ComplianceSnapshot):
+        self._snapshots[org_id] = snapshot
+        self._snapshots.move_to_end(org_id)
+        while len(self._snapshots) > self.max_tenants:
+            evicted, _ = self._snapshots.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    def clear(self):
+        self._snapshots.clear()
+        self._locks.clear()
+
+
+snapshots = SnapshotCache(
+    max_tenants=settings.SIMULATION_MAX_TENANTS,
+    max_age=settings.SIMULATION_MAX_AGE,
+    max_changes=settings.SIMULATION_MAX_CHANGES
+)
+
+
+async def run(
+    db: AsyncSession,
+    org_id: int,
+    scenarios: Sequence[Scenario],
+    framework_codes: Optional[Sequence[str]] = None,
+    top_risks: int = 10,
+    snapshot_cache: Optional[SnapshotCache] = None,
+    models=None,
+    graphs=None
+) -> dict:
+    """
+    Simulate the scenarios (shaped as app.schemas.simulation.SimulationResponse).
+    Reads only: nothing is written and the cached snapshots are not modified.
+    """
+    start = time.perf_counter()
+    snapshot = await (snapshot_cache or snapshots).get(db, org_id)
+    model = await (models or risk_engine.risk_models).get(db, org_id)
+    graph = await (graphs or control_graphs).get(db, org_id) if any(s.follow_mappings for s in scenarios) else None
+
+    simulate_start = time.perf_counter()
+    results = await asyncio.gather(*[
+        asyncio.to_thread(simulate, snapshot, model, graph, scenario, framework_codes, top_risks)
+        for scenario in scenarios
+    ])
+    SIMULATION_SECONDS.observe(time.perf_counter() - simulate_start)
+
+    risk_ids = sorted({r["risk_id"] for result in results for r in result["risks"]})
+    titles = dict((await db.execute(
+        select(Risk.risk_id, Risk.risk_title).where(Risk.org_id == org_id, Risk.risk_id.in_(risk_ids))
+    )).all()) if risk_ids else {}
+    for result in results:
+        for moved in result["risks"]:
+            moved["risk_title"] = titles.get(moved["risk_id"], "")
+    return {"scenarios": list(results), "took_ms": round((time.perf_counter() - start) * 1000, 2)}
@@ -0,0 +1,52 @@
+"""
+Per-tenant version counters for conditional GETs.
+
+Every write to the data a list endpoint returns bumps the tenant's counter
+for that scope in the same transaction, so a committed change is always
+visible as a new version. app.etags turns (scope, org, version, request)
+into the ETag.
+
+Scopes:
+    frameworks - framework rows (GET /frameworks/)
+    controls   - control rows, status, policy links, evidence (GET /controls/;
+                 app.services.compliance_stats status change log)
+    policies   - policy rows and their links (GET /policies/)
+    mappings   - control mappings (app.services.control_graph change log)
+    links      - policy and risk links of controls (app.services.impact change log)
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tenant_version import TenantVersion
+
+FRAMEWORKS = "frameworks"
+CONTROLS = "controls"
+POLICIES = "policies"
+MAPPINGS = "mappings"
+LINKS = "links"
+
+
+async def bump(db: AsyncSession, org_id: int, *scopes: str):
+    """
+    Increment the tenant's counters (the caller commits). Call after the
+    write's other row locks so writers keep one lock order.
+    """
+    insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    now = datetime.utcnow()
+    for scope in sorted(scopes):
+        stmt = insert(TenantVersion).values(org_id=org_id, scope=scope, version=1, updated_at=now)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[TenantVersion.org_id, TenantVersion.scope],
+            set_={"version": TenantVersion.version + 1, "updated_at": stmt.excluded.updated_at}
+        ))
+
+
+async def current(db: AsyncSession, org_id: int, scope: str) -> int:
+    """Current version (0 until the first bump)"""
+    version = await db.scalar(
+        select(TenantVersion.version).where(TenantVersion.org_id == org_id, TenantVersion.scope == scope)
+    )
+    return version or 0
@@ -0,0 +1,4 @@
+"""
+BlackRoses backend benchmarks.
+Run from the Backend directory, e.g. python -m benchmarks.bench_controls_list --help
+"""
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark for the authentication dependency.
+
+Compares a cold JWT decode (cache disabled) with the verified-token cache,
+both for verify_token alone and for the full get_current_user dependency.
+
+Usage:
+    python -m benchmarks.bench_auth --iterations 50000
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.dependencies import create_access_token, verify_token, get_current_user, token_cache
+from benchmarks.common import print_report
+
+
+def _bench(fn, iterations: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "iterations": iterations,
+        "total_s": round(elapsed, 3),
+        "per_call_us": round(elapsed / iterations * 1e6, 2),
+        "calls_per_s": round(iterations / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    token = create_access_token(
+        {"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": 1},
+        expires_delta=timedelta(hours=1)
+    )
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    loop = asyncio.new_event_loop()
+
+    def uncached_verify():
+        token_cache.clear()
+        verify_token(token)
+
+    def uncached_dependency():
+        token_cache.clear()
+        loop.run_until_complete(get_current_user(credentials))
+
+    print_report("verify_token (cold decode)", _bench(uncached_verify, args.iterations))
+    verify_token(token)
+    print_report("verify_token (cached)", _bench(lambda: verify_token(token), args.iterations))
+    print_report("get_current_user (cold decode)", _bench(uncached_dependency, args.iterations))
+    verify_token(token)
+    print_report("get_current_user (cached)", _bench(lambda: loop.run_until_complete(get_current_user(credentials)), args.iterations))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Catalog read-through cache: framework / control reads with and without it.
+
+Seeds one tenant with frameworks and controls, then drives the catalog
+endpoints in-process (GET /frameworks/, /frameworks/{code},
+/controls/{internal_code}; a skewed mix like UI page loads) with the cache
+disabled and enabled. Reports requests/sec, latency, hit ratio and the local
+tier's footprint, then checks that cached bodies equal uncached ones, that
+create/update/delete invalidate the tenant, and that a write committed by
+another worker (version bump, no invalidate in this process) is read back.
+
+Usage:
+    python -m benchmarks.bench_catalog_cache --database-url postgresql://... --requests 5000
+    python -m benchmarks.bench_catalog_cache --redis-url redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, _async_url, get_async_db
+from app.dependencies import create_access_token
+from app.main import app as fastapi_app
+from app.models.control import Control
+from app.models.framework import Framework
+from app.services import tenant_versions
+from app.services.catalog_cache import CatalogCache, catalog_cache
+from benchmarks.common import print_report, summarize
+
+ORG_ID = 900013
+
+
+async def seed(session_factory, frameworks: int, controls: int):
+    """Returns (framework codes, control internal codes)"""
+    async with session_factory() as db:
+        existing = (await db.execute(
+            select(Framework.framework_id, Framework.framework_code).where(Framework.org_id == ORG_ID)
+        )).all()
+        if len(existing) < frameworks:
+            await db.execute(insert(Framework), [{
+                "org_id": ORG_ID, "framework_code": f"CACHE{ORG_ID}-{i}", "framework_name": f"Catalog {i}",
+                "version": "1.0", "region": "Global", "description": "Catalog cache benchmark " * 10,
+            } for i in range(len(existing), frameworks)])
+            existing = (await db.execute(
+                select(Framework.framework_id, Framework.framework_code).where(Framework.org_id == ORG_ID)
+            )).all()
+        count = len((await db.execute(select(Control.control_id).where(Control.org_id == ORG_ID))).all())
+        if count < controls:
+            await db.execute(insert(Control), [{
+                "org_id": ORG_ID, "internal_code": f"CACHE-{ORG_ID}-{i:05d}", "original_code": f"C {i}",
+                "framework_id": existing[i % len(existing)].framework_id, "title": f"Catalog control {i}",
+                "description": "Control text " * 20, "severity": "medium",
+                "implementation_guidance": "Guidance " * 20,
+            } for i in range(count, controls)])
+        await db.commit()
+        codes = (await db.execute(
+            select(Control.internal_code).where(Control.org_id == ORG_ID).order_by(Control.control_id)
+        )).scalars().all()
+    return [code for _, code in existing], codes
+
+
+def request_mix(frameworks, controls, count: int):
+    """Skewed like UI traffic: list pages, a few hot frameworks, popular controls"""
+    rng = random.Random(13)
+    paths = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            paths.append("/api/v1/frameworks/")
+        elif roll < 0.5:
+            paths.append(f"/api/v1/frameworks/{frameworks[min(int(rng.expovariate(0.5)), len(frameworks) - 1)]}")
+        else:
+            index = min(int(rng.paretovariate(0.5)) - 1, len(controls) - 1)
+            paths.append(f"/api/v1/controls/{controls[index * 7 % len(controls)]}")
+    return paths
+
+
+async def drive(client, paths):
+    latencies = []
+    start = time.perf_counter()
+    for path in paths:
+        t = time.perf_counter()
+        response = await client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status_code}")
+        latencies.append((time.perf_counter() - t) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def configure(cache: CatalogCache, max_bytes: int, redis_url=None):
+    cache.clear()
+    cache.max_bytes = max_bytes
+    cache.redis_url = redis_url
+    cache.local_ttl = min(1, cache.ttl) if redis_url else cache.ttl
+    cache.hits = cache.misses = 0
+
+
+async def check_invalidation(client, frameworks, controls) -> bool:
+    ok = True
+    code = frameworks[0]
+    await client.get(f"/api/v1/frameworks/{code}")
+    await client.get("/api/v1/frameworks/")
+    renamed = f"Renamed {time.time():.0f}"
+    await client.put(f"/api/v1/frameworks/{code}", json={"framework_name": renamed})
+    if (await client.get(f"/api/v1/frameworks/{code}")).json()["framework_name"] != renamed:
+        print("\nFAIL: framework read after update returned the cached name")
+        ok = False
+    listed = {f["framework_code"]: f for f in (await client.get("/api/v1/frameworks/")).json()}
+    if listed[code]["framework_name"] != renamed:
+        print("\nFAIL: framework list after update returned the cached name")
+        ok = False
+
+    victim = controls[-1]
+    await client.get(f"/api/v1/controls/{victim}")
+    await client.delete(f"/api/v1/controls/{victim}")
+    if (await client.get(f"/api/v1/controls/{victim}")).json()["is_active"]:
+        print("\nFAIL: control read after delete returned the cached row")
+        ok = False
+
+    framework_id = listed[code]["framework_id"]
+    created = (await client.post("/api/v1/controls/", json={
+        "org_id": ORG_ID, "framework_id": framework_id, "original_code": "NEW 1",
+        "title": "Created after caching", "severity": "low",
+    })).json()
+    if (await client.get(f"/api/v1/controls/{created['internal_code']}")).status_code != 200:
+        print("\nFAIL: new control not readable")
+        ok = False
+
+    await client.put(f"/api/v1/frameworks/{code}", json={"is_active": False})
+    active = {f["framework_code"] for f in (await client.get("/api/v1/frameworks/", params={"is_active": True})).json()}
+    if code in active:
+        print("\nFAIL: deactivated framework still in the cached active list")
+        ok = False
+    await client.put(f"/api/v1/frameworks/{code}", json={"is_active": True})
+    return ok
+
+
+async def check_other_worker(client, session_factory, frameworks, controls) -> bool:
+    """Rows changed the way another worker changes them: committed with a version bump, nothing invalidated here"""
+    ok = True
+    code, control = frameworks[1 % len(frameworks)], controls[0]
+    await client.get(f"/api/v1/frameworks/{code}")
+    await client.get("/api/v1/frameworks/")
+    await client.get(f"/api/v1/controls/{control}")
+    renamed = f"Elsewhere {time.time():.0f}"
+    async with session_factory() as db:
+        await db.execute(update(Framework).where(
+            Framework.org_id == ORG_ID, Framework.framework_code == code
+        ).values(framework_name=renamed))
+        await db.execute(update(Control).where(
+            Control.org_id == ORG_ID, Control.internal_code == control
+        ).values(title=renamed))
+        await tenant_versions.bump(db, ORG_ID, tenant_versions.FRAMEWORKS, tenant_versions.CONTROLS)
+        await db.commit()
+    if (await client.get(f"/api/v1/frameworks/{code}")).json()["framework_name"] != renamed:
+        print("\nFAIL: framework read after another worker's update returned the cached name")
+        ok = False
+    listed = {f["framework_code"]: f for f in (await client.get("/api/v1/frameworks/")).json()}
+    if listed[code]["framework_name"] != renamed:
+        print("\nFAIL: framework list after another worker's update returned the cached name")
+        ok = False
+    if (await client.get(f"/api/v1/controls/{control}")).json()["title"] != renamed:
+        print("\nFAIL: control read after another worker's update returned the cached title")
+        ok = False
+    return ok
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    frameworks, controls = await seed(session_factory, args.frameworks, args.controls)
+    paths = request_mix(frameworks, controls, args.requests)
+    print_report("catalog", {"frameworks": len(frameworks), "controls": len(controls),
+                             "distinct_paths": len(set(paths))})
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    fastapi_app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": ORG_ID})
+    saved = (catalog_cache.max_bytes, catalog_cache.redis_url, catalog_cache.local_ttl)
+    ok = True
+    async with httpx.AsyncClient(app=fastapi_app, base_url="http://bench",
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        configure(catalog_cache, 0)
+        await drive(client, paths[:200])  # warm the connection pool and code paths
+        uncached = await drive(client, paths)
+        print_report("no cache", uncached)
+        reference = {path: (await client.get(path)).json() for path in set(paths[:500])}
+
+        tiers = [("local cache", args.max_bytes, None)]
+        if args.redis_url:
+            tiers.append(("redis + 1s local tier", args.max_bytes, args.redis_url))
+        for label, max_bytes, redis_url in tiers:
+            configure(catalog_cache, max_bytes, redis_url)
+            if redis_url:
+                await catalog_cache.invalidate(ORG_ID)
+            stats = await drive(client, paths)
+            stats.update({
+                "speedup": round(stats["rps"] / uncached["rps"], 1) if uncached["rps"] else 0.0,
+                "hit_ratio": round(catalog_cache.hits / (catalog_cache.hits + catalog_cache.misses), 3),
+                "entries": len(catalog_cache),
+                "cache_kb": round(catalog_cache.size_bytes / 1024, 1),
+            })
+            print_report(label, stats)
+            stale = [path for path, body in reference.items() if (await client.get(path)).json() != body]
+            if stale:
+                print(f"\nFAIL ({label}): {len(stale)} cached responses differ, e.g. {stale[0]}")
+                ok = False
+            ok &= await check_invalidation(client, frameworks, controls)
+            ok &= await check_other_worker(client, session_factory, frameworks, controls)
+
+        # Byte bound: a cache smaller than the working set evicts instead of growing
+        configure(catalog_cache, 64 * 1024)
+        await drive(client, paths)
+        print_report("64 KiB local cache", {
+            "hit_ratio": round(catalog_cache.hits / (catalog_cache.hits + catalog_cache.misses), 3),
+            "entries": len(catalog_cache),
+            "cache_kb": round(catalog_cache.size_bytes / 1024, 1),
+        })
+        if catalog_cache.size_bytes > 64 * 1024:
+            print("\nFAIL: local tier exceeded its byte bound")
+            ok = False
+
+    catalog_cache.max_bytes, catalog_cache.redis_url, catalog_cache.local_ttl = saved
+    fastapi_app.dependency_overrides.clear()
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--redis-url", default=None, help="Also run with the shared Redis tier")
+    parser.add_argument("--frameworks", type=int, default=20)
+    parser.add_argument("--controls", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024 * 1024)
+    args = parser.parse_args()
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_catalog_')}/catalog.db")
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Statement count and latency of the enriched controls listing.
+
+Seeds a tenant with controls, evidence and policy links, then calls
+GET /api/v1/controls/ in-process at several page sizes and counts SQL
+statements per request. The count must not grow with page size (no N+1);
+the script exits non-zero if it does. tests/test_controls_enrichment.py runs
+the same check on a small SQLite tenant under pytest.
+
+Usage:
+    python -m benchmarks.bench_controls_enrichment --database-url postgresql+asyncpg://... --controls 5000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event, insert, select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base, get_async_db, _async_url
+from app.dependencies import create_access_token
+from app.main import app as fastapi_app
+from app.models.control import Control
+from app.models.evidence import EvidenceFile
+from app.models.framework import Framework
+from app.models.policy import Policy, PolicyControlLink
+from benchmarks.common import print_report
+
+ORG_ID = 900002
+
+
+async def seed(session_factory, count: int):
+    async with session_factory() as db:
+        existing = await db.scalar(select(func.count()).select_from(Control).where(Control.org_id == ORG_ID))
+        if existing >= count:
+            return
+        framework = Framework(org_id=ORG_ID, framework_code=f"ENRICH{ORG_ID}", framework_name="Enrichment benchmark")
+        policy = Policy(org_id=ORG_ID, policy_name="Benchmark policy")
+        db.add_all([framework, policy])
+        await db.flush()
+        controls = [{
+            "org_id": ORG_ID,
+            "internal_code": f"ENR-{ORG_ID}-{i:07d}",
+            "original_code": f"E {i}",
+            "framework_id": framework.framework_id,
+            "title": f"Synthetic control {i}",
+            "severity": "high",
+            "status": ("implemented", "partial", "not-implemented")[i % 3],
+        } for i in range(existing, count)]
+        ids = (await db.execute(insert(Control).returning(Control.control_id), controls)).scalars().all()
+        now = datetime.utcnow()
+        evidence = [{
+            "org_id": ORG_ID,
+            "control_id": control_id,
+            "file_name": f"scan-{n}.json",
+            "file_path": f"evidence/{ORG_ID}/{control_id}/scan-{n}.json",
+            "file_hash": "0" * 64,
+            "source": "automated" if n % 2 == 0 else "manual",
+            "uploaded_date": now - timedelta(hours=n),
+        } for control_id in ids for n in range(control_id % 4)]
+        if evidence:
+            await db.execute(insert(EvidenceFile), evidence)
+        links = [{"policy_id": policy.policy_id, "control_id": control_id} for control_id in ids if control_id % 2]
+        if links:
+            await db.execute(insert(PolicyControlLink), links)
+        await db.commit()
+
+
+async def run(args) -> dict:
+    """SQL statements per request, by page size"""
+    engine = create_async_engine(args.database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.controls)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a, **k: statements.append(1))
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    fastapi_app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": ORG_ID})
+    counts = {}
+    async with httpx.AsyncClient(app=fastapi_app, base_url="http://bench", headers={"Authorization": f"Bearer {token}"}) as client:
+        for limit in args.page_sizes:
+            await client.get("/api/v1/controls/", params={"limit": limit})  # warm up
+            statements.clear()
+            start = time.perf_counter()
+            response = await client.get("/api/v1/controls/", params={"limit": limit})
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            response.raise_for_status()
+            counts[limit] = len(statements)
+            print_report(f"limit={limit}", {
+                "rows": len(response.json()),
+                "sql_statements": len(statements),
+                "latency_ms": round(elapsed_ms, 2),
+            })
+    fastapi_app.dependency_overrides.clear()
+    await engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL))
+    parser.add_argument("--controls", type=int, default=5000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 200, 1000])
+    args = parser.parse_args()
+
+    constant = len(set(asyncio.run(run(args)).values())) == 1
+    print("\nstatement count constant across page sizes:", constant)
+    sys.exit(0 if constant else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load test for GET /api/v1/controls/ under concurrent clients.
+
+Runs against a live backend (uvicorn or gunicorn) and reports requests/sec
+and p50/p95/p99 latency. Run it once against the sync-session build and once
+against the async-session build to compare.
+
+Usage:
+    python -m benchmarks.bench_controls_list --url http://localhost:8000 \
+        --concurrency 64 --requests 5000 --org-id 1
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+import httpx
+
+from app.dependencies import create_access_token
+from benchmarks.common import summarize, print_report
+
+
+async def _worker(client: httpx.AsyncClient, path: str, params: dict, remaining: list, latencies: list, errors: list):
+    while remaining:
+        remaining.pop()
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(args) -> dict:
+    token = create_access_token(
+        {"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": args.org_id},
+        expires_delta=timedelta(hours=1)
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    params = {"limit": args.limit}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limits, timeout=30.0) as client:
+        # Warm up connections and server-side pools
+        for _ in range(min(args.concurrency, 20)):
+            await client.get(args.path, params=params)
+
+        remaining = list(range(args.requests))
+        latencies: list = []
+        errors: list = []
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _worker(client, args.path, params, remaining, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    stats = summarize(latencies, elapsed)
+    stats["errors"] = len(errors)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/controls/")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--org-id", type=int, default=1)
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args))
+    print_report(f"GET {args.path} x{args.requests} @ concurrency {args.concurrency}", stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Decision engine replay: events/sec from a recorded controls.scans file.
+
+Seeds tenants with controls and policy links (some controls covered only by
+an inactive policy), records a scan file in send_control_scan_result's event
+shape (repeated scan rounds where most outcomes do not change, a few unknown
+control codes, some numeric control ids) and replays it through
+DecisionEngine:
+
+  per-event   - batch size 1 over the first --baseline events
+  batched     - the whole file at --batch-size
+  partitioned - the file split by key into --partitions slices, one
+                process per slice (as consumers in one group would split
+                the topic's partitions); PostgreSQL recommended
+
+After each run the final statuses must equal the decision for each
+control's last scan, framework_compliance_stats must match a fresh count,
+and there must be one outbox audit event per status change. Re-running the
+last batch must change nothing.
+
+Usage:
+    python -m benchmarks.bench_decision_engine --database-url postgresql://... --orgs 20 --controls 500 --rounds 20 --partitions 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, _async_url
+from app.models.compliance import FrameworkComplianceStats
+from app.models.control import Control
+from app.models.framework import Framework
+from app.models.outbox import OutboxEvent
+from app.models.policy import Policy, PolicyControlLink
+from app.services import compliance_stats
+from app.services.decision_engine import DecisionEngine, decide
+from benchmarks.common import print_report
+
+ORG_BASE = 910000  # --orgs tenants from here; clear of the single-tenant 9000NN benchmark ids
+
+
+def engine_for(url: str):
+    connect_args = {"timeout": 30} if url.startswith("sqlite") else {}
+    return create_async_engine(url, connect_args=connect_args)
+
+
+async def seed(session_factory, orgs: int, controls: int):
+    """Returns {control_id: (org_id, internal_code, policy_enforced)}"""
+    org_ids = list(range(ORG_BASE, ORG_BASE + orgs))
+    rng = random.Random(11)
+    async with session_factory() as db:
+        await db.execute(delete(OutboxEvent))
+        existing = await db.scalar(select(func.count()).select_from(Control).where(Control.org_id.in_(org_ids)))
+        if existing < orgs * controls:
+            for org_id in org_ids:
+                framework = Framework(org_id=org_id, framework_code=f"DEC{org_id}", framework_name="Decision benchmark")
+                active = Policy(org_id=org_id, policy_name="Active policy")
+                retired = Policy(org_id=org_id, policy_name="Retired policy", is_active=False)
+                db.add_all([framework, active, retired])
+                await db.flush()
+                ids = (await db.execute(insert(Control).returning(Control.control_id), [{
+                    "org_id": org_id, "internal_code": f"DEC-{org_id}-{i:05d}", "original_code": f"D {i}",
+                    "framework_id": framework.framework_id, "title": "Decision benchmark", "severity": "medium",
+                } for i in range(controls)])).scalars().all()
+                links = []
+                for control_id in ids:
+                    roll = rng.random()
+                    if roll < 0.6:
+                        links.append({"policy_id": active.policy_id, "control_id": control_id})
+                    elif roll < 0.8:
+                        links.append({"policy_id": retired.policy_id, "control_id": control_id})
+                await db.execute(insert(PolicyControlLink), links)
+            await db.commit()
+
+        enforced = set((await db.execute(
+            select(PolicyControlLink.control_id)
+            .join(Policy, Policy.policy_id == PolicyControlLink.policy_id)
+            .where(Policy.org_id.in_(org_ids), Policy.is_active.is_(True))
+        )).scalars().all())
+        rows = (await db.execute(
+            select(Control.control_id, Control.org_id, Control.internal_code).where(Control.org_id.in_(org_ids))
+        )).all()
+    return {row.control_id: (row.org_id, row.internal_code, row.control_id in enforced) for row in rows}
+
+
+async def reset(session_factory, catalog):
+    async with session_factory() as db:
+        await db.execute(
+            update(Control).where(Control.org_id.in_({org for org, _, _ in catalog.values()}))
+            .values(status="not-implemented", status_updated_at=None)
+        )
+        await db.execute(delete(OutboxEvent))
+        await compliance_stats.rebuild(db)
+        await db.commit()
+
+
+def record_scans(path: str, catalog, rounds: int, flip_rate: float) -> dict:
+    """Write the scan file; returns the last scan outcome per control"""
+    rng = random.Random(42)
+    passing = {control_id: rng.random() < 0.5 for control_id in catalog}
+    last = {}
+    with open(path, "w") as f:
+        for round_number in range(rounds):
+            order = list(catalog)
+            rng.shuffle(order)
+            for control_id in order:
+                org_id, code, _ = catalog[control_id]
+                if rng.random() < flip_rate:
+                    passing[control_id] = not passing[control_id]
+                status = "pass" if passing[control_id] else "fail"
+                ref = str(control_id) if rng.random() < 0.1 else code
+                f.write(json.dumps({
+                    "control_id": ref, "org_id": org_id,
+                    "scan_timestamp": f"2026-01-01T00:{round_number:02d}:00",
+                    "result": {"status": status, "check": "registry", "round": round_number}
+                }) + "\n")
+                last[control_id] = passing[control_id]
+                if rng.random() < 0.01:
+                    f.write(json.dumps({
+                        "control_id": f"UNKNOWN-{rng.randint(0, 999)}", "org_id": org_id,
+                        "scan_timestamp": f"2026-01-01T00:{round_number:02d}:00", "result": {"status": "pass"}
+                    }) + "\n")
+    return last
+
+
+async def check(session_factory, catalog, last_scans, label: str):
+    """Returns (passed, outbox event count)"""
+    ok = True
+    async with session_factory() as db:
+        statuses = dict((await db.execute(
+            select(Control.control_id, Control.status).where(Control.control_id.in_(catalog.keys()))
+        )).all())
+        stats = {row.framework_id: row for row in (await db.execute(
+            select(FrameworkComplianceStats).where(
+                FrameworkComplianceStats.org_id.in_({org for org, _, _ in catalog.values()})
+            )
+        )).scalars().all()}
+        counts = Counter()
+        for framework_id, status, count in (await db.execute(
+            select(Control.framework_id, Control.status, func.count())
+            .where(Control.control_id.in_(catalog.keys()))
+            .group_by(Control.framework_id, Control.status)
+        )).all():
+            counts[(framework_id, compliance_stats.STATUS_COLUMNS[status])] += count
+        outbox_events = await db.scalar(select(func.count()).select_from(OutboxEvent))
+
+    wrong = sum(
+        1 for control_id, passed in last_scans.items()
+        if statuses[control_id] != decide(catalog[control_id][2], passed)
+    )
+    if wrong:
+        print(f"\nFAIL ({label}): {wrong} controls do not match their last scan")
+        ok = False
+    for framework_id, row in stats.items():
+        for column in ("implemented", "partial", "not_implemented"):
+            if getattr(row, column) != counts[(framework_id, column)]:
+                print(f"\nFAIL ({label}): framework {framework_id} {column}={getattr(row, column)}, "
+                      f"actual {counts[(framework_id, column)]}")
+                ok = False
+                break
+    return ok, outbox_events
+
+
+def _replay_slice(url: str, path: str, batch_size: int, queue):
+    """Child process: one consumer's share of the partitions"""
+    async def run():
+        engine = engine_for(url)
+        with open(path) as f:
+            report = await DecisionEngine(async_sessionmaker(engine, expire_on_commit=False)).replay(
+                f, batch_size=batch_size
+            )
+        await engine.dispose()
+        return report
+    # Wall-clock bounds, so process start-up is not counted as replay time
+    start = time.time()
+    report = asyncio.run(run())
+    queue.put((report, start, time.time()))
+
+
+async def run(args, url: str, workdir: str) -> bool:
+    engine = engine_for(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    catalog = await seed(session_factory, args.orgs, args.controls)
+    path = os.path.join(workdir, "scans.ndjson")
+    last_scans = record_scans(path, catalog, args.rounds, args.flip_rate)
+    with open(path) as f:
+        lines = f.readlines()
+    print_report("recorded scans", {
+        "controls": len(catalog),
+        "events": len(lines),
+        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+    })
+    ok = True
+
+    # Per-event baseline (what a one-message-per-transaction consumer does)
+    await reset(session_factory, catalog)
+    baseline = await DecisionEngine(session_factory).replay(lines[:args.baseline], batch_size=1)
+    print_report("per-event (batch 1)", baseline)
+
+    await reset(session_factory, catalog)
+    engine_under_test = DecisionEngine(session_factory)
+    report = await engine_under_test.replay(lines, batch_size=args.batch_size)
+    report["speedup"] = round(report["events_per_s"] / baseline["events_per_s"], 1) if baseline["events_per_s"] else 0.0
+    print_report(f"batched (batch {args.batch_size})", report)
+    passed, outbox_events = await check(session_factory, catalog, last_scans, "batched")
+    ok &= passed
+    if outbox_events != report["changed"]:
+        print(f"\nFAIL: {outbox_events} audit events for {report['changed']} status changes")
+        ok = False
+
+    # At-least-once redelivery of the last batch must be a no-op
+    tail = [json.loads(line) for line in lines[-args.batch_size:]]
+    redelivered = await engine_under_test.process_batch(tail)
+    if redelivered.get("changed", 0):
+        print(f"\nFAIL: redelivered batch changed {redelivered['changed']} controls")
+        ok = False
+
+    if args.partitions > 1:
+        await reset(session_factory, catalog)
+        slices = [open(os.path.join(workdir, f"scans-p{p}.ndjson"), "w") for p in range(args.partitions)]
+        for line in lines:
+            key = json.loads(line)["control_id"]
+            # Producer keys by the control reference; map numeric ids back to the code's partition
+            if key.isdigit() and int(key) in catalog:
+                key = catalog[int(key)][1]
+            slices[zlib.crc32(key.encode()) % args.partitions].write(line)
+        for f in slices:
+            f.close()
+
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        workers = [
+            ctx.Process(target=_replay_slice, args=(url, f.name, args.batch_size, queue))
+            for f in slices
+        ]
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        reports = [report for report, _, _ in results]
+        elapsed = max(end for _, _, end in results) - min(start for _, start, _ in results)
+        events = sum(r["events"] for r in reports)
+        print_report(f"partitioned ({args.partitions} processes)", {
+            "events": events,
+            "changed": sum(r["changed"] for r in reports),
+            "elapsed_s": round(elapsed, 3),
+            "events_per_s": round(events / elapsed, 1),
+            "slowest_slice_s": max(r["elapsed_s"] for r in reports),
+            "cpus": os.cpu_count(),
+        })
+        passed, _ = await check(session_factory, catalog, last_scans, "partitioned")
+        ok &= passed
+
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--orgs", type=int, default=10)
+    parser.add_argument("--controls", type=int, default=500, help="Controls per org")
+    parser.add_argument("--rounds", type=int, default=10, help="Scan rounds recorded (every control once per round)")
+    parser.add_argument("--flip-rate", type=float, default=0.05, help="Chance a control's outcome changes per round")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--baseline", type=int, default=2000, help="Events replayed one per transaction")
+    parser.add_argument("--partitions", type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_decisions_")
+    url = _async_url(args.database_url) if args.database_url else f"sqlite+aiosqlite:///{workdir}/decisions.db"
+    ok = asyncio.run(run(args, url, workdir))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
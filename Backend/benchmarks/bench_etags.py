@@ -0,0 +1,205 @@
+"""
+Conditional GETs: replayed UI session with and without If-None-Match.
+
+Seeds one tenant (frameworks, controls, policies) and replays a recorded UI
+session in-process: page loads of GET /frameworks/, /controls/ (first pages
+and a few cursor pages) and /policies/, with occasional writes in between
+(control status changes, a new policy) as other users would make. The
+session runs twice:
+
+  full        - client ignores ETags (every response has a body)
+  conditional - client revalidates with If-None-Match from its cache
+
+Reports wire bytes (gzip, as a browser gets them), latency and the 304
+share, and checks that every 304 stood for a body identical to a fresh
+response, i.e. writes always changed the tag.
+
+Usage:
+    python -m benchmarks.bench_etags --database-url postgresql://... --page-loads 300
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, _async_url, get_async_db
+from app.dependencies import create_access_token
+from app.main import app as fastapi_app
+from app.models.control import Control
+from app.models.framework import Framework
+from app.models.policy import Policy
+from app.pagination import NEXT_CURSOR_HEADER
+from benchmarks.common import percentile, print_report
+
+ORG_ID = 900014
+STATUSES = ("implemented", "partial", "not-implemented")
+
+
+async def seed(session_factory, frameworks: int, controls: int, policies: int):
+    """Returns control internal codes"""
+    async with session_factory() as db:
+        if not await db.scalar(select(Framework.framework_id).where(Framework.org_id == ORG_ID).limit(1)):
+            await db.execute(insert(Framework), [{
+                "org_id": ORG_ID, "framework_code": f"ETAG{ORG_ID}-{i}", "framework_name": f"Framework {i}",
+                "description": "Framework description " * 10,
+            } for i in range(frameworks)])
+            framework_ids = (await db.execute(
+                select(Framework.framework_id).where(Framework.org_id == ORG_ID)
+            )).scalars().all()
+            await db.execute(insert(Control), [{
+                "org_id": ORG_ID, "internal_code": f"ETAG-{ORG_ID}-{i:05d}", "original_code": f"E {i}",
+                "framework_id": framework_ids[i % len(framework_ids)], "title": f"Control {i}",
+                "description": "Control text " * 20, "severity": "high",
+            } for i in range(controls)])
+            await db.execute(insert(Policy), [{
+                "org_id": ORG_ID, "policy_name": f"Policy {i}", "policy_document": "Policy text " * 30,
+            } for i in range(policies)])
+            await db.commit()
+        return (await db.execute(
+            select(Control.internal_code).where(Control.org_id == ORG_ID).order_by(Control.control_id)
+        )).scalars().all()
+
+
+def record_session(codes, page_loads: int, write_every: int):
+    """[("get" | "next", path, params) | ("status", code, None) | ("policy", name, None)]"""
+    rng = random.Random(14)
+    steps = []
+    for load in range(page_loads):
+        steps.append(("get", "/api/v1/frameworks/", {}))
+        steps.append(("get", "/api/v1/controls/", {"limit": 50}))
+        if rng.random() < 0.3:
+            steps.append(("next", "/api/v1/controls/", {"limit": 50}))
+        steps.append(("get", "/api/v1/policies/", {"limit": 50}))
+        if load and load % write_every == 0:
+            if rng.random() < 0.8:
+                steps.append(("status", rng.choice(codes), None))
+            else:
+                steps.append(("policy", f"Session policy {load}", None))
+    return steps
+
+
+async def replay(client, steps, statuses: dict, conditional: bool, check: bool):
+    """`statuses` carries control status across replays so every status write is a real change"""
+    cache = {}  # url -> (etag, body, next cursor)
+    latencies = []
+    wire_bytes = 0
+    not_modified = 0
+    stale = 0
+    last_cursor = None
+    start = time.perf_counter()
+    for kind, target, arg in steps:
+        if kind == "status":
+            statuses[target] = STATUSES[(STATUSES.index(statuses.get(target, "not-implemented")) + 1) % 3]
+            response = await client.patch(f"/api/v1/controls/{target}/status",
+                                          json={"status": statuses[target], "request_approval": False})
+            response.raise_for_status()
+            continue
+        if kind == "policy":
+            response = await client.post("/api/v1/policies/", json={"org_id": ORG_ID, "policy_name": target})
+            response.raise_for_status()
+            continue
+
+        params = dict(arg)
+        if kind == "next" and last_cursor:
+            params["cursor"] = last_cursor
+        url = str(client.build_request("GET", target, params=params).url)
+        headers = {}
+        if conditional and url in cache:
+            headers["If-None-Match"] = cache[url][0]
+        t = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - t) * 1000)
+        wire_bytes += response.num_bytes_downloaded + sum(len(k) + len(v) + 4 for k, v in response.headers.raw)
+
+        if response.status_code == 304:
+            not_modified += 1
+            etag, body, cursor = cache[url]
+            if check:
+                fresh = await client.get(url)
+                if fresh.content != body:
+                    stale += 1
+        else:
+            body, cursor = response.content, response.headers.get(NEXT_CURSOR_HEADER)
+            if "etag" in response.headers:
+                cache[url] = (response.headers["etag"], body, cursor)
+        if target == "/api/v1/controls/" and kind == "get":
+            last_cursor = cursor
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "not_modified": not_modified,
+        "wire_kb": round(wire_bytes / 1024, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "elapsed_s": round(elapsed, 3),
+    }, stale
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    codes = await seed(session_factory, args.frameworks, args.controls, args.policies)
+    steps = record_session(codes, args.page_loads, args.write_every)
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    fastapi_app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": ORG_ID})
+    ok = True
+    async with httpx.AsyncClient(app=fastapi_app, base_url="http://bench", headers={
+        "Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"
+    }) as client:
+        statuses = {}
+        await replay(client, steps[:40], statuses, conditional=False, check=False)  # warm up
+        full, _ = await replay(client, steps, statuses, conditional=False, check=False)
+        print_report("full responses", full)
+        conditional, _ = await replay(client, steps, statuses, conditional=True, check=False)
+        conditional.update({
+            "bytes_saved_pct": round((1 - conditional["wire_kb"] / full["wire_kb"]) * 100, 1),
+            "mean_saved_pct": round((1 - conditional["mean_ms"] / full["mean_ms"]) * 100, 1),
+        })
+        print_report("conditional (If-None-Match)", conditional)
+
+        _, stale = await replay(client, steps, statuses, conditional=True, check=True)
+        if stale:
+            print(f"\nFAIL: {stale} 304 responses for content that had changed")
+            ok = False
+        if not conditional["not_modified"]:
+            print("\nFAIL: no request was answered with 304")
+            ok = False
+
+    fastapi_app.dependency_overrides.clear()
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--frameworks", type=int, default=15)
+    parser.add_argument("--controls", type=int, default=2000)
+    parser.add_argument("--policies", type=int, default=120)
+    parser.add_argument("--page-loads", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=10, help="Page loads between writes by other users")
+    args = parser.parse_args()
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_etags_')}/etags.db")
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
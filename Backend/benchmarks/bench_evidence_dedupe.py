@@ -0,0 +1,132 @@
+"""
+Content-addressed evidence migration: space saved and reference integrity.
+
+Seeds a tenant with legacy per-upload objects where each distinct report is
+attached to many controls (the same scan report stored once per control),
+runs `evidence_blobs.dedupe` (dry run, then for real, then again to check it
+is idempotent) against a MinIO stand-in, and checks that every row points at
+an existing content-addressed object whose ref_count equals its row count.
+
+Runs against a throwaway SQLite file by default (or --database-url).
+
+Usage:
+    python -m benchmarks.bench_evidence_dedupe --reports 300 --max-copies 40 --report-kb 512
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, delete, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base
+from app.models.control import Control
+from app.models.evidence import EvidenceFile, EvidenceBlob
+from app.models.framework import Framework
+from app.services.evidence_blobs import dedupe
+from app.services.evidence_service import EvidenceService
+from benchmarks.common import print_report, timer
+from benchmarks.minio_standin import StandInMinio
+
+ORG_ID = 900009
+
+
+def seed(Session, client: StandInMinio, reports: int, max_copies: int, report_size: int) -> int:
+    rng = random.Random(9)
+    with Session() as db:
+        db.execute(delete(EvidenceFile).where(EvidenceFile.org_id == ORG_ID))
+        db.execute(delete(EvidenceBlob).where(EvidenceBlob.org_id == ORG_ID))
+        control_id = db.scalar(select(Control.control_id).where(Control.org_id == ORG_ID))
+        if control_id is None:
+            framework = Framework(org_id=ORG_ID, framework_code=f"BENCH{ORG_ID}", framework_name="Benchmark")
+            db.add(framework)
+            db.flush()
+            control = Control(org_id=ORG_ID, internal_code=f"BENCH-{ORG_ID}", original_code="B",
+                              framework_id=framework.framework_id, title="Dedupe benchmark", severity="low")
+            db.add(control)
+            db.flush()
+            control_id = control.control_id
+
+        rows = []
+        for i in range(reports):
+            data = os.urandom(report_size)
+            file_hash = hashlib.sha256(data).hexdigest()
+            for copy in range(rng.randint(1, max_copies)):
+                # Legacy layout: one object per upload
+                path = f"evidence/{ORG_ID}/BR-{copy:03d}/20250101_000000_report{i}.pdf"
+                client.seed(path, data)
+                rows.append({
+                    "org_id": ORG_ID, "control_id": control_id, "file_name": f"report{i}.pdf", "file_path": path,
+                    "file_hash": file_hash, "file_size": report_size, "source": "automated",
+                })
+        db.execute(insert(EvidenceFile), rows)
+        db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--reports", type=int, default=300)
+    parser.add_argument("--max-copies", type=int, default=40)
+    parser.add_argument("--report-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='bench_dedupe_')}/dedupe.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    client = StandInMinio()
+    rows = seed(Session, client, args.reports, args.max_copies, args.report_kb * 1024)
+    service = EvidenceService.__new__(EvidenceService)
+    service.client = client
+    stored_before = sum(obj.size for obj in client.objects.values())
+
+    print_report("dry run", dedupe(org_id=ORG_ID, service=service, session_factory=Session, dry_run=True))
+    with timer() as elapsed:
+        report = dedupe(org_id=ORG_ID, service=service, session_factory=Session)
+        seconds = elapsed()
+    report["elapsed_s"] = round(seconds, 3)
+    report["rows_per_s"] = round(rows / seconds, 1) if seconds else 0.0
+    print_report("dedupe", report)
+    rerun = dedupe(org_id=ORG_ID, service=service, session_factory=Session)
+    print_report("re-run", {k: rerun.get(k, 0) for k in ("groups", "rows_relinked", "saved_bytes")})
+
+    stored_after = sum(obj.size for obj in client.objects.values())
+    print_report("object store", {
+        "objects": len(client.objects),
+        "mb_before": round(stored_before / 1024 / 1024, 1),
+        "mb_after": round(stored_after / 1024 / 1024, 1),
+    })
+
+    failed = False
+    with Session() as db:
+        refs = dict(db.execute(
+            select(EvidenceFile.file_path, func.count())
+            .where(EvidenceFile.org_id == ORG_ID)
+            .group_by(EvidenceFile.file_path)
+        ).all())
+        blobs = db.execute(select(EvidenceBlob).where(EvidenceBlob.org_id == ORG_ID)).scalars().all()
+    if len(blobs) != args.reports or len(client.objects) != args.reports:
+        print(f"\nFAIL: expected {args.reports} blobs/objects, got {len(blobs)}/{len(client.objects)}")
+        failed = True
+    for blob in blobs:
+        if refs.get(blob.object_path) != blob.ref_count or blob.object_path not in client.objects:
+            print(f"\nFAIL: blob {blob.sha256[:16]} has ref_count {blob.ref_count}, rows {refs.get(blob.object_path)}")
+            failed = True
+            break
+    if rerun.get("rows_relinked", 0):
+        print("\nFAIL: re-run relinked rows again")
+        failed = True
+
+    engine.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Evidence integrity verification and scrubber throughput.
+
+1. Peak memory of verifying one large object: buffered download + hash
+   (old verify_file_integrity) vs streamed hash_object.
+2. Scrubber throughput (objects/s, MB/s) with 1 vs N workers against a
+   MinIO stand-in with simulated per-request latency.
+3. Interrupt/resume: stop after a few batches, resume from the checkpoint
+   and check every row was verified with the expected status counts.
+
+Runs against a throwaway SQLite file by default (or --database-url).
+
+Usage:
+    python -m benchmarks.bench_evidence_scrub --objects 2000 --object-kb 256 --latency-ms 5
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from sqlalchemy import create_engine, delete, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base
+from app.models.control import Control
+from app.models.evidence import EvidenceFile, EvidenceScrubCheckpoint
+from app.models.framework import Framework
+from app.services.evidence_service import EvidenceService
+from app.services.evidence_scrubber import scrub_org
+from benchmarks.common import print_report, timer
+from benchmarks.minio_standin import StandInMinio
+
+ORG_ID = 900008
+
+
+def _service(client: StandInMinio) -> EvidenceService:
+    service = EvidenceService.__new__(EvidenceService)
+    service.client = client
+    return service
+
+
+def seed(Session, client: StandInMinio, objects: int, object_size: int, corrupt: int, missing: int):
+    pool = os.urandom(object_size + objects)
+    with Session() as db:
+        db.execute(delete(EvidenceFile).where(EvidenceFile.org_id == ORG_ID))
+        db.execute(delete(EvidenceScrubCheckpoint).where(EvidenceScrubCheckpoint.org_id == ORG_ID))
+        control_id = db.scalar(select(Control.control_id).where(Control.org_id == ORG_ID))
+        if control_id is None:
+            framework = Framework(org_id=ORG_ID, framework_code=f"BENCH{ORG_ID}", framework_name="Benchmark")
+            db.add(framework)
+            db.flush()
+            control = Control(org_id=ORG_ID, internal_code=f"BENCH-{ORG_ID}", original_code="B",
+                              framework_id=framework.framework_id, title="Scrub benchmark", severity="low")
+            db.add(control)
+            db.flush()
+            control_id = control.control_id
+
+        rows = []
+        for i in range(objects):
+            path = f"evidence/{ORG_ID}/BENCH/{i:07d}.bin"
+            data = pool[i:i + object_size]
+            file_hash = hashlib.sha256(data).hexdigest()
+            if i < missing:
+                pass  # row without an object
+            else:
+                client.seed(path, data)
+            if missing <= i < missing + corrupt:
+                file_hash = "0" * 64  # stored hash no longer matches the object
+            rows.append({
+                "org_id": ORG_ID, "control_id": control_id, "file_name": f"{i}.bin", "file_path": path,
+                "file_hash": file_hash, "file_size": object_size, "source": "automated",
+            })
+        db.execute(insert(EvidenceFile), rows)
+        db.commit()
+
+
+def _updated_at(Session) -> dict:
+    with Session() as db:
+        return dict(db.execute(
+            select(EvidenceFile.evidence_id, EvidenceFile.updated_at).where(EvidenceFile.org_id == ORG_ID)
+        ).all())
+
+
+def bench_memory(object_mb: int):
+    client = StandInMinio()
+    client.seed("evidence/large.bin", os.urandom(object_mb * 1024 * 1024))
+    service = _service(client)
+    expected = client.objects["evidence/large.bin"].sha256
+
+    def buffered():
+        # Old verify_file_integrity: download_file() then hash the bytes
+        data = service.client.get_object("bucket", "evidence/large.bin").read()
+        return hashlib.sha256(data).hexdigest() == expected
+
+    def streamed():
+        return service.verify_file_integrity("evidence/large.bin", expected)
+
+    for title, fn in (("buffered verify", buffered), ("streamed verify", streamed)):
+        tracemalloc.start()
+        with timer() as elapsed:
+            ok = fn()
+            seconds = elapsed()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print_report(f"{title} ({object_mb} MB object)", {
+            "ok": ok, "elapsed_s": round(seconds, 3), "peak_heap_mb": round(peak / 1024 / 1024, 2)
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--object-kb", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--large-object-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.mkdtemp(prefix="bench_scrub_")
+        url = f"sqlite:///{tmpdir}/scrub.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    bench_memory(args.large_object_mb)
+
+    corrupt, missing = 7, 3
+    client = StandInMinio(latency_ms=args.latency_ms)
+    seed(Session, client, args.objects, args.object_kb * 1024, corrupt, missing)
+    service = _service(client)
+    failed = False
+
+    for workers in (1, args.workers):
+        report = scrub_org(ORG_ID, service=service, session_factory=Session,
+                           batch_size=args.batch_size, workers=workers, restart=True)
+        print_report(f"scrub, {workers} worker(s), {args.latency_ms} ms latency", report)
+        if workers == 1:
+            stamped = _updated_at(Session)
+
+    # Interrupted pass: two batches, then resume from the checkpoint
+    first = scrub_org(ORG_ID, service=service, session_factory=Session,
+                      batch_size=args.batch_size, workers=args.workers, restart=True, max_batches=2)
+    resumed = scrub_org(ORG_ID, service=service, session_factory=Session,
+                        batch_size=args.batch_size, workers=args.workers)
+    print_report("interrupted pass", {k: first[k] for k in ("objects", "last_evidence_id", "completed")})
+    print_report("resumed pass", {k: resumed[k] for k in ("resumed_from", "objects", "completed", "mismatch", "missing")})
+
+    with Session() as db:
+        statuses = dict(db.execute(
+            select(EvidenceFile.integrity_status, func.count())
+            .where(EvidenceFile.org_id == ORG_ID)
+            .group_by(EvidenceFile.integrity_status)
+        ).all())
+    print_report("row statuses", statuses)
+
+    if first["objects"] + resumed["objects"] != args.objects or not resumed["completed"]:
+        print("\nFAIL: resume did not cover every row exactly once")
+        failed = True
+    if statuses != {"ok": args.objects - corrupt - missing, "mismatch": corrupt, "missing": missing}:
+        print("\nFAIL: unexpected verification results")
+        failed = True
+    restamped = sum(1 for evidence_id, at in _updated_at(Session).items() if stamped[evidence_id] != at)
+    print_report("search sync", {"rows_restamped_by_repeat_passes": restamped})
+    if restamped:
+        print("\nFAIL: repeat passes with unchanged results moved updated_at")
+        failed = True
+
+    engine.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
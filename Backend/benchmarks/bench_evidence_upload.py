@@ -0,0 +1,147 @@
+"""
+Peak memory of evidence uploads: buffered vs streaming.
+
+Uploads a generated file through EvidenceService against an in-process MinIO
+stand-in (no network) that only hashes and counts the bytes it receives.
+The buffered path mirrors the old endpoint (read whole file, hash, BytesIO
+copy); the streaming path is EvidenceService.upload_stream. Peak Python heap
+is measured with tracemalloc. Exits 1 if the streamed object does not match
+the source hash, if the streaming peak exceeds 4x EVIDENCE_UPLOAD_PART_SIZE,
+or if it grows by more than one part between the --small-mb and --size-mb
+uploads (memory growing with file size).
+
+Usage:
+    python -m benchmarks.bench_evidence_upload --size-mb 100 --small-mb 10
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from app.config import settings
+from app.services.evidence_service import EvidenceService, EvidenceTooLargeError
+from benchmarks.common import print_report, timer
+from benchmarks.minio_standin import StandInMinio
+
+
+def _service() -> EvidenceService:
+    service = EvidenceService.__new__(EvidenceService)
+    service.client = StandInMinio()
+    return service
+
+
+def _write_source(size: int) -> tuple[str, str]:
+    digest = hashlib.sha256()
+    block = os.urandom(1024 * 1024)
+    fd, path = tempfile.mkstemp(prefix="bench_evidence_", suffix=".bin")
+    with os.fdopen(fd, "wb") as f:
+        remaining = size
+        while remaining:
+            chunk = block[:min(remaining, len(block))]
+            f.write(chunk)
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return path, digest.hexdigest()
+
+
+def _buffered(service: EvidenceService, path: str):
+    # Old endpoint: await file.read() + upload_file's BytesIO copy
+    with open(path, "rb") as f:
+        contents = f.read()
+    return service.upload_file(contents, "bench.bin", "BR-001", 1)
+
+
+def _streaming(service: EvidenceService, path: str):
+    with open(path, "rb") as f:
+        return service.upload_stream(f, "bench.bin", "BR-001", 1, max_size=settings.MAX_UPLOAD_SIZE)
+
+
+def _measure(fn) -> tuple[dict, tuple]:
+    tracemalloc.start()
+    with timer() as elapsed:
+        result = fn()
+        seconds = elapsed()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"elapsed_s": round(seconds, 3), "peak_heap_mb": round(peak / 1024 / 1024, 2)}, result
+
+
+def run(args: argparse.Namespace) -> dict:
+    """
+    Run the comparison and print the reports.
+
+    Returns:
+        dict: failure messages under "failures" plus the streaming peaks (MB)
+    """
+    size = args.size_mb * 1024 * 1024
+    small_path, _ = _write_source(args.small_mb * 1024 * 1024)
+    path, source_hash = _write_source(size)
+    failures = []
+    try:
+        service = _service()
+        stats, _ = _measure(lambda: _buffered(service, path))
+        print_report(f"buffered upload ({args.size_mb} MB)", stats)
+
+        small_stats, _ = _measure(lambda: _streaming(_service(), small_path))
+        stats, (file_path, file_hash, file_size) = _measure(lambda: _streaming(service, path))
+        stored = service.client.objects[file_path]
+        stored_hash, stored_size = stored.sha256, stored.size
+        part_mb = settings.EVIDENCE_UPLOAD_PART_SIZE / 1024 / 1024
+        stats.update({
+            "throughput_mb_s": round(args.size_mb / stats["elapsed_s"], 1) if stats["elapsed_s"] else 0.0,
+            "part_size_mb": part_mb,
+            "chunk_size_mb": settings.EVIDENCE_UPLOAD_CHUNK_SIZE / 1024 / 1024,
+            "hash_matches": file_hash == source_hash == stored_hash,
+            "size_matches": file_size == stored_size == size,
+        })
+        print_report(f"streaming upload ({args.size_mb} MB)", stats)
+        print_report(f"streaming upload ({args.small_mb} MB)", small_stats)
+
+        # Peak must be a function of part size, not file size
+        bound_mb = 4 * part_mb
+        if not (stats["hash_matches"] and stats["size_matches"]):
+            failures.append("stored object does not match the source file")
+        if stats["peak_heap_mb"] > bound_mb:
+            failures.append(f"streaming peak {stats['peak_heap_mb']} MB exceeds {bound_mb} MB")
+        if stats["peak_heap_mb"] > small_stats["peak_heap_mb"] + part_mb:
+            failures.append(
+                f"streaming peak grew from {small_stats['peak_heap_mb']} MB ({args.small_mb} MB file) "
+                f"to {stats['peak_heap_mb']} MB ({args.size_mb} MB file)"
+            )
+
+        limited = _service()
+        with open(path, "rb") as f:
+            try:
+                limited.upload_stream(f, "bench.bin", "BR-001", 1, max_size=size // 2)
+                failures.append("oversized upload was accepted")
+            except EvidenceTooLargeError:
+                print(f"\nOversized upload rejected after {size // 2 // 1024 // 1024} MB "
+                      f"(multipart aborts: {limited.client.aborted})")
+    finally:
+        os.unlink(path)
+        os.unlink(small_path)
+
+    return {
+        "failures": failures,
+        "small_peak_mb": small_stats["peak_heap_mb"],
+        "peak_mb": stats["peak_heap_mb"],
+        "bound_mb": bound_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--small-mb", type=int, default=10)
+    args = parser.parse_args()
+
+    result = run(args)
+    for failure in result["failures"]:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if result["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
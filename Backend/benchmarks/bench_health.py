@@ -0,0 +1,166 @@
+"""
+Readiness probes: backend load under polling, concurrency and timeouts.
+
+Serves /health/ready in-process with a real Postgres probe (against
+--database-url) and stand-in Kafka / MinIO / Elasticsearch probes that sleep
+for a typical round trip, counting every probe execution:
+
+  polling     - --pollers load balancer targets poll concurrently for
+                --duration seconds, with the report uncached (ttl 0; only
+                in-flight refreshes are shared) and cached (--ttl); probe
+                executions must stay at one per ttl however many pollers
+  concurrency - one report's wall time vs the sum of its probe latencies
+  timeouts    - a hanging optional dependency answers "degraded" (200) and a
+                hanging critical one 503, both within the probe timeout
+
+Usage:
+    python -m benchmarks.bench_health --database-url postgresql://... --pollers 50
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import _async_url
+from app import main as app_main
+from app.main import app as fastapi_app
+from app.services.health import HealthChecker
+from benchmarks.common import print_report, summarize
+
+STAND_IN_LATENCY = {"kafka": 0.02, "minio": 0.03, "elasticsearch": 0.05}
+
+
+def build_probes(engine, counts: dict, hang: str = None):
+    def counted(name, body):
+        async def probe():
+            counts[name] = counts.get(name, 0) + 1
+            if name == hang:
+                await asyncio.Event().wait()  # never answers
+            return await body()
+        return probe
+
+    async def postgres():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    def stand_in(delay):
+        async def probe():
+            await asyncio.sleep(delay)
+        return probe
+
+    probes = {"postgres": counted("postgres", postgres)}
+    for name, delay in STAND_IN_LATENCY.items():
+        probes[name] = counted(name, stand_in(delay))
+    return probes
+
+
+def install(checker: HealthChecker):
+    """Serve /health/ready from `checker`"""
+    app_main.health_checker = checker
+
+
+async def poll(client, pollers: int, duration: float, interval: float):
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+
+    async def target():
+        while time.perf_counter() < deadline:
+            t = time.perf_counter()
+            response = await client.get("/health/ready")
+            latencies.append((time.perf_counter() - t) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            await asyncio.sleep(interval)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(target() for _ in range(pollers)))
+    return summarize(latencies, time.perf_counter() - start), statuses
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url)
+    ok = True
+    saved = app_main.health_checker
+    async with httpx.AsyncClient(app=fastapi_app, base_url="http://bench") as client:
+        for label, ttl in (("uncached (ttl 0)", 0), (f"cached (ttl {args.ttl}s)", args.ttl)):
+            counts = {}
+            install(HealthChecker(build_probes(engine, counts), timeout=args.timeout, ttl=ttl, critical=["postgres"]))
+            stats, statuses = await poll(client, args.pollers, args.duration, args.interval)
+            stats.update({
+                "probes_unshared": stats["requests"],  # one per request, as a naive endpoint would
+                "postgres_probes": counts.get("postgres", 0),
+                "probes_per_s": round(counts.get("postgres", 0) / args.duration, 1),
+                "statuses": statuses,
+            })
+            print_report(f"{args.pollers} pollers, {label}", stats)
+            if ttl and counts.get("postgres", 0) > args.duration / ttl + 2:
+                print("\nFAIL: cached report refreshed more than once per ttl")
+                ok = False
+
+        counts = {}
+        checker = HealthChecker(build_probes(engine, counts), timeout=args.timeout, ttl=0, critical=["postgres"])
+        install(checker)
+        report = (await client.get("/health/ready")).json()
+        latency_sum = sum(dep["latency_ms"] for dep in report["dependencies"].values())
+        print_report("one report", {
+            "wall_ms": report["probe_ms"],
+            "sum_of_probes_ms": round(latency_sum, 1),
+            **{f"{name}_ms": dep["latency_ms"] for name, dep in report["dependencies"].items()},
+        })
+        if report["probe_ms"] > max(STAND_IN_LATENCY.values()) * 1000 + latency_sum / 2:
+            print("\nFAIL: probes did not run concurrently")
+            ok = False
+
+        for hang, expected_status, expected_code in (("kafka", "degraded", 200), ("postgres", "down", 503)):
+            install(HealthChecker(build_probes(engine, {}, hang=hang), timeout=args.timeout, ttl=0,
+                                  critical=["postgres"]))
+            t = time.perf_counter()
+            response = await client.get("/health/ready")
+            elapsed = time.perf_counter() - t
+            body = response.json()
+            print_report(f"{hang} hanging", {
+                "http_status": response.status_code,
+                "status": body["status"],
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "error": body["dependencies"][hang].get("error"),
+            })
+            if (response.status_code, body["status"]) != (expected_code, expected_status):
+                print(f"\nFAIL: expected {expected_code} {expected_status} with {hang} hanging")
+                ok = False
+            if elapsed > args.timeout + 0.5:
+                print("\nFAIL: report not bounded by the probe timeout")
+                ok = False
+
+        live = await client.get("/health/live")
+        if live.status_code != 200:
+            print("\nFAIL: liveness depends on dependency probes")
+            ok = False
+
+    install(saved)
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--pollers", type=int, default=50, help="Concurrent load balancer targets")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between polls per target")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--ttl", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_health_')}/health.db")
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Compliance impact analysis (app.services.impact).
+
+Seeds one tenant with --frameworks frameworks of --controls-per-framework
+controls, --policies policies with --policy-links links, --risks risks with
+--risk-links links and --mappings random mappings, plus --hubs hub controls
+that each map directly to --hub-fanout controls of other frameworks (the
+"thousands of downstream dependents" case). Then measures:
+
+  hub          impact of each hub control end to end (index and graph
+               version checks, cascade, name lookups), warm caches.
+               The target is p95 under --target-ms.
+  random       the same for random controls
+  incremental  --rounds rounds of link / unlink writes through
+               record_link_changes, each followed by an impact query that
+               has to apply them (delta reload)
+
+Correctness: every measured cascade's policies and risks are compared with
+a plain SQL join over the same affected controls, and after each
+incremental round the written link must (or must no longer) show up.
+Exits 1 on any mismatch or a missed target.
+
+Usage:
+    python -m benchmarks.bench_impact
+    python -m benchmarks.bench_impact --database-url postgresql://... --policy-links 1000000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, _async_url
+from app.models.control import Control, ControlMapping
+from app.models.framework import Framework
+from app.models.policy import Policy, PolicyControlLink
+from app.models.risk import Risk, RiskControl
+from app.services import impact
+from app.services.control_graph import ControlGraphCache
+from app.services.impact import ImpactIndexCache
+from benchmarks.common import percentile, print_report
+
+ORG_ID = 900023
+SEED_BATCH = 20000
+
+
+async def seed(Session, args) -> dict:
+    rng = random.Random(23)
+    async with Session() as db:
+        framework_controls = []
+        for f in range(args.frameworks):
+            framework = Framework(org_id=ORG_ID, framework_code=f"IMP{ORG_ID}-{f}", framework_name=f"Impact benchmark {f}")
+            db.add(framework)
+            await db.flush()
+            for start in range(0, args.controls_per_framework, SEED_BATCH):
+                await db.execute(insert(Control), [
+                    {
+                        "org_id": ORG_ID, "internal_code": f"G23-{f}-{i:06d}", "original_code": f"F{f} {i}",
+                        "framework_id": framework.framework_id, "title": f"Control {i} of framework {f}",
+                        "severity": "medium", "status": "implemented", "is_active": True,
+                    }
+                    for i in range(start, min(args.controls_per_framework, start + SEED_BATCH))
+                ])
+            framework_controls.append((await db.scalars(
+                select(Control.control_id).where(Control.framework_id == framework.framework_id)
+            )).all())
+        controls = [c for ids in framework_controls for c in ids]
+
+        await db.execute(insert(Policy), [
+            {"org_id": ORG_ID, "policy_name": f"Policy {p}", "is_active": p % 10 != 0} for p in range(args.policies)
+        ])
+        policy_ids = (await db.scalars(select(Policy.policy_id).where(Policy.org_id == ORG_ID))).all()
+        await db.execute(insert(Risk), [
+            {"org_id": ORG_ID, "risk_title": f"Risk {r}", "likelihood": "medium", "impact": "high",
+             "status": "closed" if r % 20 == 0 else "open"}
+            for r in range(args.risks)
+        ])
+        risk_ids = (await db.scalars(select(Risk.risk_id).where(Risk.org_id == ORG_ID))).all()
+
+        links = {(rng.choice(controls), rng.choice(policy_ids)) for _ in range(args.policy_links)}
+        links = [{"control_id": c, "policy_id": p} for c, p in links]
+        for start in range(0, len(links), SEED_BATCH):
+            await db.execute(insert(PolicyControlLink), links[start:start + SEED_BATCH])
+        risk_links = [
+            {"control_id": rng.choice(controls), "risk_id": rng.choice(risk_ids),
+             "mitigation_effectiveness": round(rng.uniform(0.2, 0.9), 2)}
+            for _ in range(args.risk_links)
+        ]
+        for start in range(0, len(risk_links), SEED_BATCH):
+            await db.execute(insert(RiskControl), risk_links[start:start + SEED_BATCH])
+
+        mappings = []
+        for _ in range(args.mappings):
+            source, target = rng.sample(range(args.frameworks), 2)
+            mappings.append((rng.choice(framework_controls[source]), rng.choice(framework_controls[target])))
+        hubs = rng.sample(framework_controls[0], args.hubs)
+        others = [c for ids in framework_controls[1:] for c in ids]
+        for hub in hubs:
+            mappings.extend((hub, target) for target in rng.sample(others, args.hub_fanout))
+        rows = [
+            {"org_id": ORG_ID, "source_control_id": s, "target_control_id": t,
+             "mapping_type": "equivalent", "confidence_score": round(rng.uniform(0.6, 1.0), 3)}
+            for s, t in mappings
+        ]
+        for start in range(0, len(rows), SEED_BATCH):
+            await db.execute(insert(ControlMapping), rows[start:start + SEED_BATCH])
+        await db.commit()
+    return {"controls": controls, "policies": policy_ids, "risks": risk_ids, "hubs": hubs}
+
+
+async def reference(db, result: dict) -> tuple:
+    """Policies and risks of the reported affected controls by plain joins"""
+    affected = [result["control"]["control_id"]] + [c["control_id"] for c in result["mapped_controls"]]
+    policies, risks = set(), set()
+    for start in range(0, len(affected), 5000):
+        chunk = affected[start:start + 5000]
+        policies.update((await db.execute(
+            select(Policy.policy_id)
+            .join(PolicyControlLink, PolicyControlLink.policy_id == Policy.policy_id)
+            .join(Control, Control.control_id == PolicyControlLink.control_id)
+            .where(PolicyControlLink.control_id.in_(chunk), Policy.is_active == True, Control.is_active == True)
+        )).scalars())
+        risks.update((await db.execute(
+            select(Risk.risk_id)
+            .join(RiskControl, RiskControl.risk_id == Risk.risk_id)
+            .where(RiskControl.control_id.in_(chunk), or_(Risk.status.is_(None), Risk.status != "closed"))
+        )).scalars())
+    return policies, risks
+
+
+async def measure(Session, indexes, graphs, control_ids, args) -> tuple:
+    latencies, dependents, problems = [], [], []
+    async with Session() as db:
+        for control_id in control_ids:
+            start = time.perf_counter()
+            result = await impact.analyze(
+                db, ORG_ID, control_id, args.max_depth, args.min_confidence, indexes=indexes, graphs=graphs
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            dependents.append(
+                len(result["mapped_controls"]) + len(result["policies"]) + len(result["risks"]) + len(result["frameworks"])
+            )
+        # Verify after timing (the reference queries would skew the latencies)
+        for control_id in control_ids[:args.verify]:
+            result = await impact.analyze(
+                db, ORG_ID, control_id, args.max_depth, args.min_confidence, indexes=indexes, graphs=graphs
+            )
+            policies, risks = await reference(db, result)
+            if {p["policy_id"] for p in result["policies"]} != policies:
+                problems.append(f"control {control_id}: policies differ from the join")
+            if {r["risk_id"] for r in result["risks"]} != risks:
+                problems.append(f"control {control_id}: risks differ from the join")
+    stats = {
+        "queries": len(control_ids),
+        "dependents_p50": percentile(dependents, 50),
+        "dependents_max": max(dependents),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+    return stats, problems
+
+
+async def incremental(Session, indexes, graphs, seeded, args) -> tuple:
+    rng = random.Random(7)
+    latencies, problems = [], []
+    for round_ in range(args.rounds):
+        control_id = rng.choice(seeded["hubs"])
+        policy_id = rng.choice([p for i, p in enumerate(seeded["policies"]) if i % 10 != 0])
+        async with Session() as db:
+            linked = await db.scalar(select(PolicyControlLink.link_id).where(
+                PolicyControlLink.control_id == control_id, PolicyControlLink.policy_id == policy_id
+            ))
+            if linked:
+                await db.execute(delete(PolicyControlLink).where(PolicyControlLink.link_id == linked))
+            else:
+                db.add(PolicyControlLink(control_id=control_id, policy_id=policy_id))
+            await impact.record_link_changes(db, ORG_ID, [control_id])
+            await db.commit()
+        async with Session() as db:
+            start = time.perf_counter()
+            result = await impact.analyze(db, ORG_ID, control_id, 0, args.min_confidence, indexes=indexes, graphs=graphs)
+            latencies.append((time.perf_counter() - start) * 1000)
+        reported = policy_id in {p["policy_id"] for p in result["policies"]}
+        if reported == bool(linked):
+            problems.append(f"round {round_}: policy {policy_id} {'still' if linked else 'not'} reported for {control_id}")
+    stats = {
+        "rounds": args.rounds,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+    return stats, problems
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url, pool_size=2) if not url.startswith("sqlite") else create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    ok = True
+
+    start = time.perf_counter()
+    seeded = await seed(Session, args)
+    print_report("seed", {
+        "controls": len(seeded["controls"]),
+        "policy_links": args.policy_links,
+        "risk_links": args.risk_links,
+        "mappings": args.mappings + args.hubs * args.hub_fanout,
+        "seconds": round(time.perf_counter() - start, 1),
+    })
+
+    indexes, graphs = ImpactIndexCache(max_tenants=2), ControlGraphCache(max_tenants=2)
+    async with Session() as db:
+        start = time.perf_counter()
+        index = await indexes.get(db, ORG_ID)
+        await graphs.get(db, ORG_ID)
+    print_report("cold load (index and graph)", {
+        "links": index.link_count,
+        "seconds": round(time.perf_counter() - start, 2),
+    })
+
+    rng = random.Random(5)
+    problems = []
+    for title, control_ids in (
+        ("hub", seeded["hubs"] * max(1, args.queries // len(seeded["hubs"]))),
+        ("random", rng.sample(seeded["controls"], args.queries)),
+    ):
+        stats, found = await measure(Session, indexes, graphs, control_ids, args)
+        print_report(f"{title} (max depth {args.max_depth}, min confidence {args.min_confidence})", stats)
+        problems += found
+        if stats["p95_ms"] > args.target_ms:
+            print(f"\nFAIL: {title} p95 {stats['p95_ms']} ms over {args.target_ms} ms")
+            ok = False
+
+    stats, found = await incremental(Session, indexes, graphs, seeded, args)
+    print_report("incremental (link / unlink, then query)", stats)
+    problems += found
+
+    print_report("verification", {"problems": len(problems)})
+    for problem in problems[:10]:
+        print(f"\nFAIL: {problem}")
+    await engine.dispose()
+    return ok and not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--frameworks", type=int, default=20)
+    parser.add_argument("--controls-per-framework", type=int, default=2500)
+    parser.add_argument("--policies", type=int, default=2000)
+    parser.add_argument("--policy-links", type=int, default=200000)
+    parser.add_argument("--risks", type=int, default=5000)
+    parser.add_argument("--risk-links", type=int, default=100000)
+    parser.add_argument("--mappings", type=int, default=100000)
+    parser.add_argument("--hubs", type=int, default=10)
+    parser.add_argument("--hub-fanout", type=int, default=3000)
+    parser.add_argument("--max-depth", type=int, default=1)
+    parser.add_argument("--min-confidence", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--verify", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_impact_')}/impact.db")
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
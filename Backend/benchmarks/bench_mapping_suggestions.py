@@ -0,0 +1,245 @@
+"""
+Cross-framework mapping suggestions (app.services.mapping_suggestions).
+
+Scenarios:
+
+  spot check  - the paraphrased CIS / NIST / ISO controls in
+                fixtures/mapping_spot_check.json, whose true equivalents are
+                listed there. Precision and recall of the suggestions at the
+                configured threshold; precision must reach --min-precision.
+  scale       - --controls synthetic controls spread over --frameworks
+                frameworks. Every framework phrases the same set of topics
+                with its own mix of topic words, shared boilerplate and noise,
+                so a suggestion is correct when both controls share a topic.
+                Vectorize and similarity time on --workers processes must
+                stay under --target-s.
+  database    - --db-controls of the same controls seeded into one tenant
+                together with some hand-made mappings without a confidence
+                score. suggest_mappings inserts the candidates and scores the
+                hand-made mappings; a second run must insert nothing, and the
+                control graph must hold the new edges afterwards.
+
+Usage:
+    python -m benchmarks.bench_mapping_suggestions --controls 100000 --workers 8
+    python -m benchmarks.bench_mapping_suggestions --database-url postgresql://... --db-controls 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base, _async_url
+from app.models.control import Control, ControlMapping
+from app.models.framework import Framework
+from app.services import mapping_suggestions
+from app.services.control_graph import ControlGraphCache
+from benchmarks.common import print_report
+
+ORG_ID = 900022
+FIXTURE = Path(__file__).parent / "fixtures" / "mapping_spot_check.json"
+BOILERPLATE = [
+    "access", "security", "system", "control", "information", "policy", "review",
+    "ensure", "management", "organization", "process", "procedure", "periodically",
+]
+SEED_BATCH = 20000
+
+
+def synthetic_catalog(controls: int, frameworks: int, seed: int = 22):
+    """(title, description, guidance) per control, its framework index and its topic"""
+    rng = random.Random(seed)
+    topics = controls // frameworks
+    vocabulary = [f"{rng.choice('bcdfghklmnprstvz')}{rng.choice('aeiou')}{i:05d}" for i in range(30000)]
+    topic_words = [rng.sample(vocabulary, 8) for _ in range(topics)]
+    texts, framework_of, topic_of = [], [], []
+    for framework in range(frameworks):
+        for topic in range(topics):
+            words = rng.sample(topic_words[topic], 6)
+            title = " ".join(words[:3] + rng.sample(BOILERPLATE, 2))
+            description = " ".join(words[3:] + rng.sample(vocabulary, 3) + rng.sample(BOILERPLATE, 3))
+            guidance = " ".join(rng.sample(words, 2) + rng.sample(vocabulary, 2))
+            texts.append((title, description, guidance))
+            framework_of.append(framework)
+            topic_of.append(topic)
+    return texts, np.array(framework_of), np.array(topic_of)
+
+
+def spot_check(top_k: int, threshold: float) -> dict:
+    fixture = json.loads(FIXTURE.read_text())
+    controls = fixture["controls"]
+    keys = [control["key"] for control in controls]
+    matrix = mapping_suggestions.vectorize([
+        mapping_suggestions.control_document(control["title"], control["description"], control["guidance"])
+        for control in controls
+    ])
+    frameworks = [fixture["frameworks"].index(control["framework"]) for control in controls]
+    candidates = mapping_suggestions.find_candidates(matrix, frameworks, top_k, threshold)
+    suggested = {frozenset((keys[s], keys[t])) for s, t in zip(candidates.source, candidates.target)}
+    expected = {frozenset(pair) for pair in fixture["expected"]}
+    correct = len(suggested & expected)
+    return {
+        "controls": len(controls),
+        "expected": len(expected),
+        "suggested": len(suggested),
+        "precision": round(correct / len(suggested), 3) if suggested else 0.0,
+        "recall": round(correct / len(expected), 3),
+        "wrong": ", ".join(sorted("/".join(sorted(pair)) for pair in suggested - expected)) or "-",
+    }
+
+
+def scale(args) -> dict:
+    texts, frameworks, topics = synthetic_catalog(args.controls, args.frameworks)
+    documents = [mapping_suggestions.control_document(*text) for text in texts]
+    candidates, _, timings = mapping_suggestions._score_catalog(
+        documents, frameworks, (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)),
+        args.top_k, args.threshold, args.workers, args.block_rows
+    )
+    correct = topics[candidates.source] == topics[candidates.target]
+    pairs = len(candidates.score)
+    # Every topic appears once per framework, so each topic has frameworks choose 2 true pairs
+    true_pairs = (args.controls // args.frameworks) * args.frameworks * (args.frameworks - 1) // 2
+    return {
+        "controls": len(documents),
+        "frameworks": args.frameworks,
+        "workers": args.workers,
+        **timings,
+        "total_s": round(timings["vectorize_s"] + timings["similarity_s"], 2),
+        "candidates": pairs,
+        "precision": round(float(correct.mean()), 3) if pairs else 0.0,
+        "true_pairs_found": f"{int(correct.sum())} / {true_pairs}",
+    }
+
+
+async def seed(Session, args) -> list:
+    texts, frameworks, _ = synthetic_catalog(args.db_controls, args.db_frameworks, seed=23)
+    async with Session() as db:
+        framework_ids = []
+        for f in range(args.db_frameworks):
+            framework = Framework(org_id=ORG_ID, framework_code=f"SUG{ORG_ID}-{f}", framework_name=f"Suggestion benchmark {f}")
+            db.add(framework)
+            await db.flush()
+            framework_ids.append(framework.framework_id)
+        rows = [
+            {
+                "org_id": ORG_ID, "internal_code": f"G22-{i:07d}", "original_code": f"F{frameworks[i]} {i}",
+                "framework_id": framework_ids[frameworks[i]], "title": title, "description": description,
+                "implementation_guidance": guidance, "severity": "medium", "status": "not-implemented",
+                "is_active": True,
+            }
+            for i, (title, description, guidance) in enumerate(texts)
+        ]
+        for start in range(0, len(rows), SEED_BATCH):
+            await db.execute(insert(Control), rows[start:start + SEED_BATCH])
+        control_ids = (await db.scalars(
+            select(Control.control_id).where(Control.org_id == ORG_ID).order_by(Control.control_id)
+        )).all()
+        # Hand-made mappings without a score: the same topic in the first two frameworks
+        topics = args.db_controls // args.db_frameworks
+        manual = [
+            {"org_id": ORG_ID, "source_control_id": control_ids[t], "target_control_id": control_ids[topics + t],
+             "mapping_type": "related", "confidence_score": None}
+            for t in range(min(args.manual_mappings, topics))
+        ]
+        if manual:
+            await db.execute(insert(ControlMapping), manual)
+        await db.commit()
+    return control_ids
+
+
+async def database(args, url: str) -> tuple:
+    engine = create_async_engine(url, pool_size=2) if not url.startswith("sqlite") else create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    problems = []
+
+    await seed(Session, args)
+    reports = []
+    for _ in range(2):
+        async with Session() as db:
+            reports.append(await mapping_suggestions.suggest_mappings(
+                db, ORG_ID, top_k=args.top_k, threshold=args.threshold, workers=args.workers
+            ))
+            await db.commit()
+    first, second = reports
+    async with Session() as db:
+        mappings = await db.scalar(select(func.count()).where(ControlMapping.org_id == ORG_ID))
+        unscored = await db.scalar(select(func.count()).where(
+            ControlMapping.org_id == ORG_ID, ControlMapping.confidence_score.is_(None)
+        ))
+        graph = await ControlGraphCache(max_tenants=1).get(db, ORG_ID)
+    await engine.dispose()
+
+    if second["inserted"] or second["scored"]:
+        problems.append(f"second run inserted {second['inserted']} and scored {second['scored']}")
+    if mappings != first["inserted"] + args.manual_mappings:
+        problems.append(f"{mappings} mappings stored, expected {first['inserted'] + args.manual_mappings}")
+    if unscored:
+        problems.append(f"{unscored} mappings still have no confidence score")
+    if graph.edge_count < first["inserted"]:
+        problems.append(f"control graph has {graph.edge_count} edges for {first['inserted']} new mappings")
+    report = {
+        "controls": first["controls"],
+        "inserted": first["inserted"],
+        "equivalent": first["equivalent"],
+        "scored": first["scored"],
+        "first_run_s": first["elapsed_s"],
+        "write_s": first["write_s"],
+        "rerun_inserted": second["inserted"],
+        "rerun_s": second["elapsed_s"],
+        "graph_edges": graph.edge_count,
+    }
+    return report, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--controls", type=int, default=100000)
+    parser.add_argument("--frameworks", type=int, default=50)
+    parser.add_argument("--db-controls", type=int, default=20000)
+    parser.add_argument("--db-frameworks", type=int, default=20)
+    parser.add_argument("--manual-mappings", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=settings.MAPPING_SUGGEST_TOP_K)
+    parser.add_argument("--threshold", type=float, default=settings.MAPPING_SUGGEST_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--block-rows", type=int, default=settings.MAPPING_SUGGEST_BLOCK_ROWS)
+    parser.add_argument("--min-precision", type=float, default=0.9)
+    parser.add_argument("--target-s", type=float, default=600.0)
+    args = parser.parse_args()
+    ok = True
+
+    stats = spot_check(args.top_k, args.threshold)
+    print_report(f"spot check (top {args.top_k}, threshold {args.threshold})", stats)
+    if stats["precision"] < args.min_precision:
+        print(f"\nFAIL: spot check precision {stats['precision']} below {args.min_precision}")
+        ok = False
+
+    start = time.perf_counter()
+    stats = scale(args)
+    print_report("scale", stats)
+    if time.perf_counter() - start > args.target_s:
+        print(f"\nFAIL: {args.controls} controls took over {args.target_s} s")
+        ok = False
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_mapping_suggestions_')}/suggest.db")
+    stats, problems = asyncio.run(database(args, url))
+    print_report("database", stats)
+    for problem in problems:
+        print(f"\nFAIL: {problem}")
+    sys.exit(0 if ok and not problems else 1)
+
+
+if __name__ == "__main__":
+    main()
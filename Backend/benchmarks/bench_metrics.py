@@ -0,0 +1,249 @@
+"""
+Request instrumentation overhead and multiprocess aggregation.
+
+Drives the ASGI app directly (no HTTP client in the measurement) with and
+without MetricsMiddleware + the per-request query listeners, alternating
+rounds, and reports the added cost per request for a route without database
+access (/api/v1/info) and a list route (/api/v1/controls/). The same
+comparison runs again in a child process with PROMETHEUS_MULTIPROC_DIR set,
+where every metric update is an mmap write.
+
+Then two worker processes serve requests into one multiprocess directory
+and the aggregated exposition (what /metrics returns under gunicorn) must
+count both workers' requests. The per-request statement histogram must
+match an independent count of executed statements.
+
+Usage:
+    python -m benchmarks.bench_metrics --database-url postgresql://... --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from prometheus_client import CollectorRegistry, multiprocess
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, _async_url, get_async_db, track_queries, _before_cursor_execute, _after_cursor_execute
+from app.dependencies import create_access_token
+from app.main import app as fastapi_app
+from app.middleware import MetricsMiddleware
+from app.models.control import Control
+from app.models.framework import Framework
+from benchmarks.common import print_report
+
+ORG_ID = 900015
+ROUTES = [("/api/v1/info", b""), ("/api/v1/controls/", b"limit=50")]
+
+
+async def seed(session_factory):
+    async with session_factory() as db:
+        if await db.scalar(select(Framework.framework_id).where(Framework.org_id == ORG_ID).limit(1)) is None:
+            framework = Framework(org_id=ORG_ID, framework_code=f"METRICS{ORG_ID}", framework_name="Metrics benchmark")
+            db.add(framework)
+            await db.flush()
+            await db.execute(insert(Control), [{
+                "org_id": ORG_ID, "internal_code": f"MET-{ORG_ID}-{i:04d}", "original_code": f"M {i}",
+                "framework_id": framework.framework_id, "title": f"Control {i}", "severity": "low",
+            } for i in range(200)])
+            await db.commit()
+
+
+async def call(asgi_app, path: str, query: bytes, headers) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await asgi_app({
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query,
+        "headers": headers, "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }, receive, send)
+    return status
+
+
+def set_instrumented(sync_engine, enabled: bool):
+    """Toggle MetricsMiddleware and the query listeners, then rebuild the middleware stack"""
+    without = [m for m in fastapi_app.user_middleware if m.cls is not MetricsMiddleware]
+    if enabled:
+        if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+            track_queries(sync_engine)
+        fastapi_app.user_middleware = without + [m for m in set_instrumented.saved if m.cls is MetricsMiddleware]
+    else:
+        if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+            event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        fastapi_app.user_middleware = without
+    fastapi_app.middleware_stack = fastapi_app.build_middleware_stack()
+
+
+async def measure(url: str, requests: int, rounds: int) -> dict:
+    """Median per-request microseconds per route, instrumented vs not"""
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory)
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    fastapi_app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": ORG_ID})
+    headers = [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())]
+    set_instrumented.saved = list(fastapi_app.user_middleware)
+
+    samples = {(path, mode): [] for path, _ in ROUTES for mode in ("plain", "instrumented")}
+    for path, query in ROUTES:
+        for _ in range(50):  # warm up
+            assert await call(fastapi_app, path, query, headers) == 200
+        for _ in range(rounds):
+            for mode in ("plain", "instrumented"):
+                set_instrumented(engine.sync_engine, mode == "instrumented")
+                start = time.perf_counter()
+                for _ in range(requests):
+                    await call(fastapi_app, path, query, headers)
+                samples[(path, mode)].append((time.perf_counter() - start) / requests * 1e6)
+
+    set_instrumented(engine.sync_engine, True)
+    fastapi_app.dependency_overrides.clear()
+    await engine.dispose()
+    report = {}
+    for path, _ in ROUTES:
+        plain = statistics.median(samples[(path, "plain")])
+        instrumented = statistics.median(samples[(path, "instrumented")])
+        report[path] = {
+            "plain_us": round(plain, 1),
+            "instrumented_us": round(instrumented, 1),
+            "overhead_us": round(instrumented - plain, 1),
+            "overhead_pct": round((instrumented - plain) / plain * 100, 1),
+        }
+    return report
+
+
+async def serve(url: str, requests: int) -> dict:
+    """Worker: instrumented requests; returns statements counted independently of the middleware"""
+    engine = create_async_engine(url)
+    track_queries(engine.sync_engine)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    statements = [0]
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count(*_):
+        statements[0] += 1
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    fastapi_app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": ORG_ID})
+    headers = [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())]
+    for i in range(requests):
+        path, query = ROUTES[i % len(ROUTES)]
+        assert await call(fastapi_app, path, query, headers) == 200
+    await engine.dispose()
+    return {"statements": statements[0]}
+
+
+def samples_by_name(text: str) -> dict:
+    totals = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            key = (sample.name, tuple(sorted(sample.labels.items())))
+            totals[key] = totals.get(key, 0) + sample.value
+    return totals
+
+
+def child(args, mode: str):
+    if mode == "measure":
+        print(json.dumps(asyncio.run(measure(args.url, args.requests, args.rounds))))
+    else:
+        print(json.dumps(asyncio.run(serve(args.url, args.requests))))
+
+
+def run_child(url: str, mode: str, requests: int, rounds: int, multiproc_dir: str) -> dict:
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=multiproc_dir)
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_metrics", "--child", mode, "--url", url,
+         "--requests", str(requests), "--rounds", str(rounds)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per route per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--child", choices=["measure", "serve"], help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args, args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_metrics_")
+    url = _async_url(args.database_url) if args.database_url else f"sqlite+aiosqlite:///{workdir}/metrics.db"
+    ok = True
+
+    for path, stats in asyncio.run(measure(url, args.requests, args.rounds)).items():
+        print_report(f"single process: {path}", stats)
+
+    measure_dir = os.path.join(workdir, "prom-measure")
+    os.makedirs(measure_dir)
+    for path, stats in run_child(url, "measure", args.requests, args.rounds, measure_dir).items():
+        print_report(f"multiprocess mode: {path}", stats)
+
+    # Two workers into one directory; the scrape must see both
+    serve_dir = os.path.join(workdir, "prom-serve")
+    os.makedirs(serve_dir)
+    per_worker = args.requests
+    workers = [run_child(url, "serve", per_worker, 1, serve_dir) for _ in range(2)]
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=serve_dir)
+    from prometheus_client import generate_latest
+    totals = samples_by_name(generate_latest(registry).decode())
+
+    requests_counted = sum(
+        value for (name, labels), value in totals.items()
+        if name == "blackroses_http_request_duration_seconds_count"
+    )
+    statements_counted = sum(
+        value for (name, labels), value in totals.items()
+        if name == "blackroses_http_request_db_queries_sum"
+    )
+    statements_executed = sum(w["statements"] for w in workers)
+    print_report("multiprocess aggregation (2 workers)", {
+        "requests_sent": 2 * per_worker,
+        "requests_counted": int(requests_counted),
+        "statements_executed": statements_executed,
+        "statements_counted": int(statements_counted),
+    })
+    if requests_counted != 2 * per_worker:
+        print("\nFAIL: aggregated request count does not cover both workers")
+        ok = False
+    if statements_counted != statements_executed:
+        print("\nFAIL: per-request statement histogram does not match executed statements")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
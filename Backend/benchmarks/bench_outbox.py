@@ -0,0 +1,300 @@
+"""
+Audit events: blocking Kafka send in the handler vs transactional outbox.
+
+Writer threads simulate audited handlers (UPDATE a control + commit). Three
+modes are timed per request:
+
+  plain   - business change only (reference)
+  sync    - change, commit, then send_audit_event-style send + future.get()
+  outbox  - change + outbox row in the same commit; OutboxRelay publishes
+
+against an in-process fake broker with a simulated request round trip.
+Reports handler p50/p99 (and p99 added over plain), relay throughput and
+end-to-end delivery lag, then checks per-key ordering and that every event
+arrived exactly once after consumer-side dedupe on the outbox-id header,
+including a run where the broker drops acknowledgements.
+
+Usage:
+    python -m benchmarks.bench_outbox --database-url postgresql://... --events 5000 --writers 4 --rtt-ms 2
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import create_engine, delete, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base
+from app.models.control import Control
+from app.models.framework import Framework
+from app.models.outbox import OutboxEvent
+from app.services.outbox import OutboxRelay, OUTBOX_ID_HEADER, audit_event, build_audit_event
+from benchmarks.common import percentile, print_report
+
+ORG_ID = 900010
+
+
+class FakeFuture:
+    def __init__(self):
+        self._done = threading.Event()
+        self._error = None
+        self._callbacks = []
+        self._errbacks = []
+
+    def add_callback(self, fn):
+        self._callbacks.append(fn)
+
+    def add_errback(self, fn):
+        self._errbacks.append(fn)
+
+    def _resolve(self, error=None):
+        self._error = error
+        self._done.set()
+        for fn in (self._errbacks if error else self._callbacks):
+            fn(error or self)
+
+    def get(self, timeout=None):
+        if not self._done.wait(timeout if timeout else None):
+            raise TimeoutError("record not acknowledged")
+        if self._error:
+            raise self._error
+        return self
+
+
+class FakeBroker:
+    """
+    Partitioned in-memory log behind a KafkaProducer-like send()/flush().
+    Each flush sends one produce request per partition batch, serialized as
+    with max_in_flight_requests_per_connection=1, each costing `rtt`.
+    """
+
+    def __init__(self, partitions: int = 6, rtt_ms: float = 2.0, batch_records: int = 1000):
+        self.partitions = partitions
+        self.rtt = rtt_ms / 1000.0
+        self.batch_records = batch_records
+        self.logs = defaultdict(list)  # (topic, partition) -> [(key, value, headers, acked_at)]
+        self.requests = 0
+        self.drop_acks = 0  # next N produce requests are written but not acknowledged
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def partition_for(self, key):
+        return hash(key) % self.partitions if key is not None else 0
+
+    def send(self, topic, key=None, value=None, headers=None):
+        future = FakeFuture()
+        with self._lock:
+            self._pending.append((topic, key, value, headers or [], future))
+        return future
+
+    def flush(self, timeout=None):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        batches = defaultdict(list)
+        for record in pending:
+            batches[(record[0], self.partition_for(record[1]))].append(record)
+        for target, records in batches.items():
+            for i in range(0, len(records), self.batch_records):
+                chunk = records[i:i + self.batch_records]
+                time.sleep(self.rtt)
+                self.requests += 1
+                acked_at = time.time()
+                self.logs[target].extend((key, value, headers, acked_at) for _, key, value, headers, _ in chunk)
+                error = None
+                if self.drop_acks:
+                    self.drop_acks -= 1
+                    error = TimeoutError("acknowledgement lost")
+                for record in chunk:
+                    record[4]._resolve(error)
+
+
+def seed(Session, controls: int):
+    with Session() as db:
+        db.execute(delete(OutboxEvent))
+        existing = db.scalars(select(Control.control_id).where(Control.org_id == ORG_ID).order_by(Control.control_id)).all()
+        if len(existing) >= controls:
+            return existing[:controls]
+        framework = db.scalar(select(Framework).where(Framework.org_id == ORG_ID))
+        if framework is None:
+            framework = Framework(org_id=ORG_ID, framework_code=f"BENCH{ORG_ID}", framework_name="Benchmark")
+            db.add(framework)
+            db.flush()
+        db.execute(insert(Control), [{
+            "org_id": ORG_ID, "internal_code": f"BENCH-{ORG_ID}-{i:05d}", "original_code": f"B {i}",
+            "framework_id": framework.framework_id, "title": "Outbox benchmark", "severity": "low",
+        } for i in range(len(existing), controls)])
+        db.commit()
+        return db.scalars(select(Control.control_id).where(Control.org_id == ORG_ID).order_by(Control.control_id)).all()
+
+
+def run_writers(Session, broker, mode: str, control_ids, events: int, writers: int):
+    """Each writer owns a disjoint slice of controls, so per-key order == commit order"""
+    latencies = []
+    lock = threading.Lock()
+    per_writer = events // writers
+
+    def writer(index):
+        owned = control_ids[index::writers]
+        local = []
+        with Session() as db:
+            for seq in range(per_writer):
+                control_id = owned[seq % len(owned)]
+                status = ("implemented", "partial", "not-implemented")[seq % 3]
+                start = time.perf_counter()
+                db.execute(update(Control).where(Control.control_id == control_id).values(status=status))
+                metadata = {"seq": seq, "new_status": status}
+                if mode == "outbox":
+                    audit_event(db, "control_status_change", "control", str(control_id), "update", 1, ORG_ID, metadata)
+                db.commit()
+                if mode == "sync":
+                    # KafkaProducerService.send_audit_event: send, then block on the ack
+                    broker.send(settings.KAFKA_TOPIC_AUDIT, key=f"{ORG_ID}:control:{control_id}",
+                                value=build_audit_event("control_status_change", "control", str(control_id),
+                                                        "update", 1, ORG_ID, metadata))
+                    broker.flush()
+                local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - start
+
+
+def consume(broker):
+    """Dedupe on the outbox-id header; returns events, duplicates, ordering violations and lags (ms)"""
+    seen = set()
+    duplicates = 0
+    last_seq = {}
+    violations = 0
+    lags = []
+    for records in broker.logs.values():
+        for key, value, headers, acked_at in records:
+            outbox_id = dict(headers).get(OUTBOX_ID_HEADER)
+            if outbox_id in seen:
+                duplicates += 1
+                continue
+            seen.add(outbox_id)
+            seq = value["metadata"]["seq"]
+            if key in last_seq and seq <= last_seq[key]:
+                violations += 1
+            last_seq[key] = seq
+            created = datetime.fromisoformat(value["timestamp"])
+            lags.append((datetime.utcfromtimestamp(acked_at) - created).total_seconds() * 1000)
+    return len(seen), duplicates, violations, lags
+
+
+def latency_stats(latencies):
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--events", type=int, default=4000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--controls", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='bench_outbox_')}/outbox.db"
+    engine = create_engine(url, pool_size=args.writers + 2)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    control_ids = seed(Session, args.controls)
+    failed = False
+
+    plain, _ = run_writers(Session, None, "plain", control_ids, args.events, args.writers)
+    print_report("plain (no audit)", latency_stats(plain))
+    plain_p99 = percentile(plain, 99)
+
+    broker = FakeBroker(rtt_ms=args.rtt_ms)
+    sync, elapsed = run_writers(Session, broker, "sync", control_ids, args.events, args.writers)
+    stats = latency_stats(sync)
+    stats["added_p99_ms"] = round(stats["p99_ms"] - plain_p99, 3)
+    stats["events_per_s"] = round(len(sync) / elapsed, 1)
+    print_report(f"sync send in handler ({args.rtt_ms} ms rtt)", stats)
+
+    expected = (args.events // args.writers) * args.writers
+
+    # Handler cost alone: outbox rows written while the relay is paused
+    outbox_latencies, _ = run_writers(Session, None, "outbox", control_ids, args.events, args.writers)
+    stats = latency_stats(outbox_latencies)
+    stats["added_p99_ms"] = round(stats["p99_ms"] - plain_p99, 3)
+    print_report("outbox write in handler", stats)
+
+    # Relay throughput: drain that backlog
+    broker = FakeBroker(rtt_ms=args.rtt_ms)
+    relay = OutboxRelay(broker, session_factory=Session, batch_size=args.batch_size)
+    start = time.perf_counter()
+    while relay.relay_batch():
+        pass
+    elapsed = time.perf_counter() - start
+    delivered, _, violations, _ = consume(broker)
+    print_report(f"relay drain ({args.rtt_ms} ms rtt, batch {args.batch_size})", {
+        "events": delivered,
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(delivered / elapsed, 1) if elapsed else 0.0,
+        "produce_requests": broker.requests,
+        "order_violations": violations,
+    })
+    if delivered != expected or violations:
+        print(f"\nFAIL: drained {delivered}/{expected} events, {violations} ordering violations")
+        failed = True
+
+    # End to end, relay running alongside the writers, broker losing some acks
+    broker = FakeBroker(rtt_ms=args.rtt_ms)
+    broker.drop_acks = 3
+    relay = OutboxRelay(broker, session_factory=Session, batch_size=args.batch_size, poll_interval_ms=10)
+    relay_thread = threading.Thread(target=relay.run, daemon=True)
+    relay_thread.start()
+
+    outbox_latencies, write_elapsed = run_writers(Session, broker, "outbox", control_ids, args.events, args.writers)
+    drain_start = time.perf_counter()
+    while True:
+        with Session() as db:
+            if db.scalar(select(OutboxEvent.event_id).limit(1)) is None:
+                break
+        time.sleep(0.005)
+    total_elapsed = write_elapsed + (time.perf_counter() - drain_start)
+    relay.stop()
+    relay_thread.join()
+
+    delivered, duplicates, violations, lags = consume(broker)
+    stats = latency_stats(outbox_latencies)
+    stats.update({
+        "added_p99_ms": round(stats["p99_ms"] - plain_p99, 3),
+        "e2e_events_per_s": round(delivered / total_elapsed, 1),
+        "delivery_lag_p50_ms": round(percentile(lags, 50), 1),
+        "delivery_lag_p99_ms": round(percentile(lags, 99), 1),
+        "produce_requests": broker.requests,
+        "delivered": delivered,
+        "duplicates": duplicates,
+        "order_violations": violations,
+    })
+    print_report("outbox + concurrent relay (3 lost acks)", stats)
+    if delivered != expected or violations:
+        print(f"\nFAIL: delivered {delivered}/{expected} events, {violations} ordering violations")
+        failed = True
+
+    engine.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
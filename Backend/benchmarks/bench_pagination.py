@@ -0,0 +1,101 @@
+"""
+Offset vs keyset pagination latency at increasing page depth.
+
+Seeds a synthetic tenant with N controls, then times fetching page k with
+OFFSET/LIMIT and with the keyset cursor used by GET /api/v1/controls/.
+Offset latency grows with depth; keyset should stay flat.
+
+Usage:
+    python -m benchmarks.bench_pagination --database-url postgresql://... --controls 200000
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, select, insert, func, text
+from sqlalchemy.orm import Session
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base
+from app.models.framework import Framework
+from app.models.control import Control
+from app.pagination import Keyset
+from benchmarks.common import print_report
+
+ORG_ID = 900001
+
+
+def seed(engine, count: int):
+    with Session(engine) as db:
+        existing = db.scalar(select(func.count()).select_from(Control).where(Control.org_id == ORG_ID))
+        if existing >= count:
+            return
+        framework = Framework(org_id=ORG_ID, framework_code=f"BENCH{ORG_ID}", framework_name="Benchmark")
+        db.add(framework)
+        db.flush()
+        batch = []
+        for i in range(existing, count):
+            batch.append({
+                "org_id": ORG_ID,
+                "internal_code": f"BENCH-{ORG_ID}-{i:07d}",
+                "original_code": f"B {i}",
+                "framework_id": framework.framework_id,
+                "title": f"Synthetic control {i}",
+                "severity": "medium",
+            })
+            if len(batch) == 5000:
+                db.execute(insert(Control), batch)
+                batch = []
+        if batch:
+            db.execute(insert(Control), batch)
+        db.commit()
+        if engine.dialect.name == "postgresql":
+            db.execute(text("ANALYZE controls"))
+            db.commit()
+
+
+def time_query(db, query, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute(query).scalars().all()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--controls", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    seed(engine, args.controls)
+
+    base = select(Control).where(Control.org_id == ORG_ID)
+    keyset = Keyset(Control.org_id, Control.control_id, pinned=1)
+    total_pages = args.controls // args.limit
+    depths = sorted({1, 10, 100, total_pages // 4, total_pages // 2, total_pages - 1} - {0})
+
+    with Session(engine) as db:
+        ids = db.execute(
+            base.with_only_columns(Control.control_id).order_by(Control.control_id)
+        ).scalars().all()
+        for page in depths:
+            offset_ms = time_query(
+                db, base.order_by(Control.org_id, Control.control_id).offset(page * args.limit).limit(args.limit), args.repeat
+            )
+            anchor = ids[page * args.limit - 1]
+            cursor = keyset.cursor_for(Control(org_id=ORG_ID, control_id=anchor))
+            keyset_ms = time_query(db, keyset.apply(base, cursor, args.limit), args.repeat)
+            print_report(f"page {page} (row {page * args.limit})", {
+                "offset_ms": round(offset_ms, 3),
+                "keyset_ms": round(keyset_ms, 3),
+            })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Inherent and residual risk (app.services.risk_engine).
+
+Seeds one tenant with --controls controls, --risks risks (every likelihood
+and impact, some unscored or closed) and --links risk-control links, one in
+ten without a mitigation_effectiveness. Then measures:
+
+  cold load    the tenant's model from the database
+  heatmap      warm heatmap queries (version checks included)
+  top          warm top --top residual risks, names looked up
+  status       --rounds rounds of --changes control status updates written
+               the way the decision engine writes them (UPDATE, status
+               change log), each followed by a heatmap query that has to
+               apply them
+  reference    residual risk of every risk recomputed in plain Python from
+               the same rows, for comparison
+
+Correctness: after the status rounds every risk's residual score must match
+the plain Python computation over the current database rows (within 1e-4),
+and `rescore` must write likelihood x impact to every scored risk. Exits 1
+on any mismatch.
+
+Usage:
+    python -m benchmarks.bench_risk_engine
+    python -m benchmarks.bench_risk_engine --database-url postgresql://... --links 1000000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base, _async_url
+from app.models.control import Control
+from app.models.framework import Framework
+from app.models.risk import Risk, RiskControl
+from app.services import compliance_stats, risk_engine
+from app.services.risk_engine import RiskModelCache
+from benchmarks.common import percentile, print_report
+
+ORG_ID = 900024
+SEED_BATCH = 20000
+STATUSES = ["implemented", "partial", "not-implemented"]
+VALUES = ["low", "medium", "high", "critical"]
+
+
+async def seed(Session, args) -> list:
+    rng = random.Random(24)
+    async with Session() as db:
+        framework = Framework(org_id=ORG_ID, framework_code=f"RSK{ORG_ID}", framework_name="Risk benchmark")
+        db.add(framework)
+        await db.flush()
+        for start in range(0, args.controls, SEED_BATCH):
+            await db.execute(insert(Control), [
+                {
+                    "org_id": ORG_ID, "internal_code": f"G24-{i:07d}", "original_code": f"R {i}",
+                    "framework_id": framework.framework_id, "title": f"Control {i}", "severity": "medium",
+                    "status": rng.choice(STATUSES), "is_active": i % 50 != 0,
+                }
+                for i in range(start, min(args.controls, start + SEED_BATCH))
+            ])
+        controls = (await db.scalars(select(Control.control_id).where(Control.org_id == ORG_ID))).all()
+
+        for start in range(0, args.risks, SEED_BATCH):
+            await db.execute(insert(Risk), [
+                {
+                    "org_id": ORG_ID, "risk_title": f"Risk {r}",
+                    "likelihood": None if r % 40 == 1 else rng.choice(VALUES), "impact": rng.choice(VALUES),
+                    "status": "closed" if r % 20 == 0 else rng.choice(["open", "mitigating", "accepted"]),
+                }
+                for r in range(start, min(args.risks, start + SEED_BATCH))
+            ])
+        risks = (await db.scalars(select(Risk.risk_id).where(Risk.org_id == ORG_ID))).all()
+
+        links = set()
+        while len(links) < args.links:
+            links.add((rng.choice(controls), rng.choice(risks)))
+        links = [
+            {"control_id": c, "risk_id": r,
+             "mitigation_effectiveness": None if rng.random() < 0.1 else round(rng.uniform(0.1, 0.9), 2)}
+            for c, r in links
+        ]
+        for start in range(0, len(links), SEED_BATCH):
+            await db.execute(insert(RiskControl), links[start:start + SEED_BATCH])
+        await db.commit()
+    return controls
+
+
+async def reference(db) -> dict:
+    """risk_id -> (inherent, residual, open), one Python loop over the rows"""
+    credits = {
+        row.control_id: risk_engine.credit(row.status, row.is_active)
+        for row in (await db.execute(
+            select(Control.control_id, Control.status, Control.is_active).where(Control.org_id == ORG_ID)
+        )).all()
+    }
+    remaining = defaultdict(lambda: 1.0)
+    for row in (await db.execute(
+        select(RiskControl.control_id, RiskControl.risk_id, RiskControl.mitigation_effectiveness)
+        .join(Risk, Risk.risk_id == RiskControl.risk_id).where(Risk.org_id == ORG_ID)
+    )).all():
+        effect = settings.RISK_DEFAULT_EFFECTIVENESS if row.mitigation_effectiveness is None else row.mitigation_effectiveness
+        remaining[row.risk_id] *= max(1.0 - effect * credits.get(row.control_id, 0.0), risk_engine.MIN_REMAINING)
+    scores = {}
+    for row in (await db.execute(
+        select(Risk.risk_id, Risk.likelihood, Risk.impact, Risk.status).where(Risk.org_id == ORG_ID)
+    )).all():
+        inherent = risk_engine.LEVELS.get(row.likelihood or "", 0) * risk_engine.LEVELS.get(row.impact or "", 0)
+        scores[row.risk_id] = (inherent, inherent * remaining[row.risk_id], row.status != "closed")
+    return scores
+
+
+async def timed(Session, queries: int, call) -> dict:
+    latencies = []
+    async with Session() as db:
+        for _ in range(queries):
+            start = time.perf_counter()
+            await call(db)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "queries": queries,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def status_rounds(Session, models, controls, args) -> dict:
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(args.rounds):
+        by_status = defaultdict(list)
+        changed = rng.sample(controls, args.changes)
+        for control_id in changed:
+            by_status[rng.choice(STATUSES)].append(control_id)
+        async with Session() as db:
+            for status, control_ids in by_status.items():
+                await db.execute(
+                    update(Control).where(Control.control_id.in_(control_ids))
+                    .values(status=status, status_updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+            await compliance_stats.record_status_changes(db, ORG_ID, changed)
+            await db.commit()
+        async with Session() as db:
+            start = time.perf_counter()
+            await risk_engine.heatmap(db, ORG_ID, models=models)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "rounds": args.rounds,
+        "changes": args.changes,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url, pool_size=2) if not url.startswith("sqlite") else create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    problems = []
+
+    start = time.perf_counter()
+    controls = await seed(Session, args)
+    print_report("seed", {
+        "controls": len(controls),
+        "risks": args.risks,
+        "links": args.links,
+        "seconds": round(time.perf_counter() - start, 1),
+    })
+
+    models = RiskModelCache(max_tenants=2)
+    async with Session() as db:
+        start = time.perf_counter()
+        model = await models.get(db, ORG_ID)
+    print_report("cold load", {"links": model.link_count, "seconds": round(time.perf_counter() - start, 2)})
+
+    print_report("heatmap (warm)", await timed(
+        Session, args.queries, lambda db: risk_engine.heatmap(db, ORG_ID, models=models)
+    ))
+    print_report(f"top {args.top} (warm)", await timed(
+        Session, args.queries, lambda db: risk_engine.top_risks(db, ORG_ID, args.top, models=models)
+    ))
+    print_report("status changes, then heatmap", await status_rounds(Session, models, controls, args))
+
+    async with Session() as db:
+        model = await models.get(db, ORG_ID)
+        start = time.perf_counter()
+        expected = await reference(db)
+        reference_s = time.perf_counter() - start
+        top = await risk_engine.top_risks(db, ORG_ID, args.top, models=models)
+        rescored = await risk_engine.rescore(db, ORG_ID)
+        await db.commit()
+        wrong_scores = await db.scalar(select(func.count()).where(
+            Risk.org_id == ORG_ID, Risk.likelihood.is_not(None), Risk.risk_score.is_(None)
+        ))
+    print_report("reference (plain Python, database rows)", {"seconds": round(reference_s, 2)})
+
+    residual = dict(zip(model.risk_ids.tolist(), model.residual.tolist()))
+    mismatched = [
+        risk_id for risk_id, (_, score, _) in expected.items() if abs(residual.get(risk_id, -1.0) - score) > 1e-4
+    ]
+    if mismatched:
+        problems.append(f"{len(mismatched)} risks differ from the reference, e.g. {mismatched[:5]}")
+    ranking = sorted(
+        (score for inherent, score, is_open in expected.values() if is_open and inherent), reverse=True
+    )[:args.top]
+    if len(ranking) != len(top["risks"]) or any(
+        abs(risk["residual_score"] - score) > 1e-4 for risk, score in zip(top["risks"], ranking)
+    ):
+        problems.append("top risks differ from the reference ranking")
+    scored = sum(1 for inherent, _, _ in expected.values() if inherent)
+    if rescored != scored or wrong_scores:
+        problems.append(f"rescore wrote {rescored} of {scored} scored risks ({wrong_scores} left unscored)")
+
+    print_report("verification", {"risks": len(expected), "problems": len(problems)})
+    for problem in problems:
+        print(f"\nFAIL: {problem}")
+    await engine.dispose()
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--controls", type=int, default=100000)
+    parser.add_argument("--risks", type=int, default=50000)
+    parser.add_argument("--links", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_risk_engine_')}/risk.db")
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
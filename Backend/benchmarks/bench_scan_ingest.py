@@ -0,0 +1,311 @@
+"""
+Bulk scan ingestion: results/sec per worker for POST /api/v1/scans/bulk.
+
+Seeds a tenant with controls (some covered by an active policy) and builds
+NDJSON batches of agent scan results with a few malformed lines, unknown
+internal codes and repeated controls. Measures, in one process:
+
+  parse        - scan_ingest.parse_lines alone (validation + code lookup)
+  orm-per-row  - baseline: one ORM merge per result, one commit per batch
+  executemany  - scan_ingest.ingest with the executemany upsert
+  copy         - scan_ingest.ingest with COPY + INSERT ... SELECT ON CONFLICT
+                 (PostgreSQL only)
+  http         - the endpoint in-process through httpx, default write path
+
+then checks that control_scan_results holds the newest scan per control,
+that a replayed older batch is reported stale and changes nothing, that
+control statuses match the decision for the stored result and that
+framework_compliance_stats matches a fresh count.
+
+Usage:
+    python -m benchmarks.bench_scan_ingest --database-url postgresql://... --controls 20000 --batches 10 --batch-lines 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, get_async_db, _async_url
+from app.dependencies import create_access_token
+from app.main import app as fastapi_app
+from app.models.compliance import FrameworkComplianceStats
+from app.models.control import Control
+from app.models.framework import Framework
+from app.models.outbox import OutboxEvent
+from app.models.policy import Policy, PolicyControlLink
+from app.models.scan import ControlScanResult
+from app.services import compliance_stats, scan_ingest
+from app.services.decision_engine import decide, policy_link_index
+from benchmarks.common import print_report
+
+ORG_ID = 900012
+TARGET_PER_S = 50000
+
+
+async def seed(session_factory, controls: int):
+    """Returns ({internal_code: control_id}, {enforced control_id})"""
+    rng = random.Random(12)
+    async with session_factory() as db:
+        existing = await db.scalar(select(func.count()).select_from(Control).where(Control.org_id == ORG_ID))
+        if existing < controls:
+            framework = await db.scalar(select(Framework).where(Framework.org_id == ORG_ID))
+            policy = await db.scalar(select(Policy).where(Policy.org_id == ORG_ID))
+            if framework is None:
+                framework = Framework(org_id=ORG_ID, framework_code=f"SCAN{ORG_ID}", framework_name="Scan ingest benchmark")
+                policy = Policy(org_id=ORG_ID, policy_name="Benchmark policy")
+                db.add_all([framework, policy])
+                await db.flush()
+            ids = (await db.execute(insert(Control).returning(Control.control_id), [{
+                "org_id": ORG_ID, "internal_code": f"SCN-{ORG_ID}-{i:06d}", "original_code": f"S {i}",
+                "framework_id": framework.framework_id, "title": "Scan ingest benchmark", "severity": "low",
+            } for i in range(existing, controls)])).scalars().all()
+            links = [{"policy_id": policy.policy_id, "control_id": control_id} for control_id in ids if rng.random() < 0.5]
+            if links:
+                await db.execute(insert(PolicyControlLink), links)
+            await db.commit()
+        codes = dict((await db.execute(
+            select(Control.internal_code, Control.control_id).where(Control.org_id == ORG_ID)
+        )).all())
+        enforced = set((await db.execute(
+            select(PolicyControlLink.control_id)
+            .join(Policy, Policy.policy_id == PolicyControlLink.policy_id)
+            .where(Policy.org_id == ORG_ID, Policy.is_active.is_(True))
+        )).scalars().all())
+    return codes, enforced
+
+
+async def reset(session_factory):
+    async with session_factory() as db:
+        await db.execute(delete(ControlScanResult).where(ControlScanResult.org_id == ORG_ID))
+        await db.execute(delete(OutboxEvent))
+        await db.execute(
+            update(Control).where(Control.org_id == ORG_ID).values(status="not-implemented", status_updated_at=None)
+        )
+        await compliance_stats.rebuild(db, org_id=ORG_ID)
+        await db.commit()
+    policy_link_index.invalidate(ORG_ID)
+
+
+class ScanFeed:
+    """Agent scan batches; each control keeps its outcome unless it flips"""
+
+    def __init__(self, codes, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.codes = list(codes)
+        self.passing = {code: self.rng.random() < 0.6 for code in self.codes}
+        self.newest = {}  # code -> (scan_timestamp, status) expected in control_scan_results
+        self.clock = datetime(2026, 1, 1)
+
+    def batches(self, count: int, lines_per_batch: int, flip_rate: float):
+        rng = self.rng
+        bodies = []
+        for _ in range(count):
+            lines = []
+            for i in range(lines_per_batch):
+                roll = rng.random()
+                if roll < 0.002:
+                    lines.append(b'{"internal_code": "SCN-broken", "status": ')
+                    continue
+                if roll < 0.004:
+                    lines.append(json.dumps({"internal_code": f"UNKNOWN-{i}", "status": "pass"}).encode())
+                    continue
+                code = rng.choice(self.codes)
+                if rng.random() < flip_rate:
+                    self.passing[code] = not self.passing[code]
+                self.clock += timedelta(seconds=1)
+                status = "pass" if self.passing[code] else "fail"
+                lines.append(json.dumps({
+                    "internal_code": code,
+                    "status": status,
+                    "scan_timestamp": self.clock.isoformat() + "Z",
+                    "agent_id": f"agent-{i % 50}",
+                    "details": {"check": "registry", "value": rng.randint(0, 10)},
+                }).encode())
+                self.newest[code] = (self.clock, status)
+            bodies.append(b"\n".join(lines))
+        return bodies
+
+
+async def orm_baseline(session_factory, codes, body: bytes, received_at: datetime) -> float:
+    """What a straightforward per-row implementation costs"""
+    start = time.perf_counter()
+    async with session_factory() as db:
+        for line in body.split(b"\n"):
+            try:
+                record = json.loads(line)
+                control_id = codes[record["internal_code"]]
+            except (ValueError, KeyError):
+                continue
+            await db.merge(ControlScanResult(
+                control_id=control_id, org_id=ORG_ID, status=record["status"],
+                passed=record["status"] == "pass", details=record.get("details"), agent_id=record.get("agent_id"),
+                scan_timestamp=datetime.fromisoformat(record["scan_timestamp"]).replace(tzinfo=None),
+                received_at=received_at
+            ))
+        await db.commit()
+    return time.perf_counter() - start
+
+
+async def run_service(session_factory, bodies, use_copy: bool) -> dict:
+    totals = Counter()
+    start = time.perf_counter()
+    for body in bodies:
+        async with session_factory() as db:
+            totals.update({k: v for k, v in (await scan_ingest.ingest(db, ORG_ID, body, use_copy=use_copy)).items()
+                           if isinstance(v, int)})
+    elapsed = time.perf_counter() - start
+    return {
+        "results": totals["received"],
+        "accepted": totals["accepted"],
+        "rejected": totals["rejected"],
+        "status_changes": totals["status_changes"],
+        "elapsed_s": round(elapsed, 3),
+        "results_per_s": round(totals["received"] / elapsed, 1),
+    }
+
+
+async def verify(session_factory, codes, enforced, newest, label: str) -> bool:
+    ok = True
+    async with session_factory() as db:
+        stored = {row.control_id: row for row in (await db.execute(
+            select(ControlScanResult.control_id, ControlScanResult.status, ControlScanResult.passed,
+                   ControlScanResult.scan_timestamp)
+            .where(ControlScanResult.org_id == ORG_ID)
+        )).all()}
+        statuses = dict((await db.execute(
+            select(Control.control_id, Control.status).where(Control.org_id == ORG_ID)
+        )).all())
+        stats = (await db.execute(
+            select(FrameworkComplianceStats).where(FrameworkComplianceStats.org_id == ORG_ID)
+        )).scalars().all()
+    counts = Counter(compliance_stats.STATUS_COLUMNS[s] for s in statuses.values())
+
+    for code, (scanned_at, status) in newest.items():
+        row = stored.get(codes[code])
+        if row is None or row.scan_timestamp != scanned_at or row.status != status:
+            print(f"\nFAIL ({label}): {code} stored {row and (row.scan_timestamp, row.status)}, expected {scanned_at} {status}")
+            ok = False
+            break
+    wrong = sum(1 for control_id, row in stored.items() if statuses[control_id] != decide(control_id in enforced, row.passed))
+    if wrong:
+        print(f"\nFAIL ({label}): {wrong} control statuses do not match their stored scan")
+        ok = False
+    for row in stats:
+        if (row.implemented, row.partial, row.not_implemented) != (
+            counts["implemented"], counts["partial"], counts["not_implemented"]
+        ):
+            print(f"\nFAIL ({label}): stats {row.implemented}/{row.partial}/{row.not_implemented}, actual {dict(counts)}")
+            ok = False
+    return ok
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    is_pg = engine.dialect.name == "postgresql"
+
+    codes, enforced = await seed(session_factory, args.controls)
+    feed = ScanFeed(codes)
+    # First sighting of every control, then periodic rescans where few outcomes change
+    initial = feed.batches(args.batches, args.batch_lines, 0.0)
+    rescans = feed.batches(args.batches, args.batch_lines, args.flip_rate)
+    newest = feed.newest
+    ok = True
+
+    async with session_factory() as db:
+        index = await policy_link_index.load(db, ORG_ID)
+    start = time.perf_counter()
+    lines = 0
+    for body in initial:
+        batch, _ = scan_ingest.parse_lines(body.decode().split("\n"), ORG_ID, index, feed.clock)
+        lines += batch.received
+    elapsed = time.perf_counter() - start
+    print_report("parse only", {"results": lines, "results_per_s": round(lines / elapsed, 1)})
+
+    await reset(session_factory)
+    elapsed = await orm_baseline(session_factory, codes, initial[0], feed.clock)
+    print_report("orm per-row merge (1 batch)", {
+        "results": args.batch_lines,
+        "elapsed_s": round(elapsed, 3),
+        "results_per_s": round(args.batch_lines / elapsed, 1),
+    })
+
+    paths = [("executemany", False)] + ([("copy", True)] if is_pg else [])
+    for name, use_copy in paths:
+        await reset(session_factory)
+        print_report(f"initial load ({name})", await run_service(session_factory, initial, use_copy))
+        report = await run_service(session_factory, rescans, use_copy)
+        report["target_met"] = report["results_per_s"] >= TARGET_PER_S
+        print_report(f"rescans, {args.flip_rate:.0%} flips ({name})", report)
+        ok &= await verify(session_factory, codes, enforced, newest, name)
+
+    # Re-sending the oldest batch: rows superseded by later batches are stale, nothing changes
+    async with session_factory() as db:
+        replay = await scan_ingest.ingest(db, ORG_ID, initial[0])
+    print_report("replay oldest batch", {k: replay[k] for k in ("received", "accepted", "stale", "status_changes")})
+    if replay["status_changes"] or not replay["stale"]:
+        print("\nFAIL: replayed old batch was not treated as stale")
+        ok = False
+    ok &= await verify(session_factory, codes, enforced, newest, "replay")
+
+    # Through the HTTP endpoint (auth, body streaming, response model)
+    await reset(session_factory)
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    fastapi_app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "email": "bench@blackroses.local", "role": "admin", "org_id": ORG_ID})
+    async with httpx.AsyncClient(app=fastapi_app, base_url="http://bench", headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"
+    }) as client:
+        received = 0
+        start = time.perf_counter()
+        for body in initial + rescans:
+            response = await client.post("/api/v1/scans/bulk", content=body)
+            response.raise_for_status()
+            received += response.json()["received"]
+        elapsed = time.perf_counter() - start
+        print_report("http endpoint", {
+            "results": received,
+            "elapsed_s": round(elapsed, 3),
+            "results_per_s": round(received / elapsed, 1),
+            "errors_reported": len(response.json()["errors"]),
+        })
+    fastapi_app.dependency_overrides.clear()
+    ok &= await verify(session_factory, codes, enforced, newest, "http")
+
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--controls", type=int, default=20000)
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--batch-lines", type=int, default=10000)
+    parser.add_argument("--flip-rate", type=float, default=0.02, help="Chance a rescan changes the outcome")
+    args = parser.parse_args()
+
+    url = _async_url(args.database_url) if args.database_url else \
+        f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_scans_')}/scans.db"
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
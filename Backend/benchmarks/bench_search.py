@@ -0,0 +1,275 @@
+"""
+Control search: ILIKE scan vs full-text (tsvector + GIN) on PostgreSQL.
+
+Seeds --controls synthetic controls into one tenant with COPY (titles and
+descriptions drawn from a Zipf-distributed vocabulary, codes like
+"CIS 4.1.2"), then applies the full_text_search migration's DDL (timing the
+table rewrite and each index build) and compares, per query:
+
+  ilike page  - the old list filter: ILIKE '%q%' on title / codes, first
+                page (LIMIT 50) in keyset order
+  fts page    - search.control_match, same page
+  ranked      - search.search: ts_rank_cd ordered hits with ts_headline
+                snippets (what GET /api/v1/search runs)
+
+Queries cover rare, common and multi-word terms, a phrase, an as-you-type
+prefix, framework and internal codes, and a term with no match. The target
+is ranked p95 under --target-ms, except for the phrase: GIN stores no
+positions, so every row containing all its words is rechecked on the heap
+(I/O bound; reported, not held to the target). Without pg_trgm (not every PostgreSQL
+build ships contrib) the trigram indexes and code ILIKE / fuzzy clauses are
+skipped and reported as such.
+
+Usage:
+    python -m benchmarks.bench_search --database-url postgresql://... --controls 1000000
+"""
+import argparse
+import asyncio
+import importlib.util
+import io
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine, func, or_, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.database import Base, _async_url
+from app.models.control import Control
+from app.models.framework import Framework
+from app.services import search as search_service
+from benchmarks.common import percentile, print_report
+
+ORG_ID = 900019
+PAGE = 50
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), os.pardir, "alembic", "versions", "2026_10_18_1100-6e2a9c4f8d13_full_text_search.py"
+)
+
+DOMAIN_WORDS = (
+    "access control account management audit logging authentication authorization backup recovery "
+    "baseline configuration change incident response encryption key rotation vulnerability scanning patch "
+    "network segmentation firewall monitoring privileged user password policy multi factor session timeout "
+    "data classification retention disposal asset inventory software hardware vendor risk assessment "
+    "third party contract review training awareness phishing malware endpoint protection secure boot "
+    "integrity verification certificate transport layer wireless remote maintenance physical facility "
+    "visitor badge media sanitization continuity disaster testing exercise governance board approval "
+    "exception register threat intelligence penetration evidence retention cloud storage bucket identity "
+    "federation token secret vault container image registry pipeline deployment code repository branch"
+).split()
+FRAMEWORKS = ("CIS", "NIST AC", "NIST AU", "ISO A", "PCI", "HIPAA", "SOC2 CC", "NCA ECC")
+
+
+def vocabulary(size: int, rng: random.Random):
+    """Domain words first (most frequent), then pronounceable filler words for the long tail"""
+    syllables = ["ka", "lo", "ri", "sen", "tor", "mi", "ven", "da", "pel", "qu", "ast", "ron", "ul", "bex", "fi"]
+    words = list(DOMAIN_WORDS)
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    weights = [1.0 / (rank + 1) ** 1.05 for rank in range(size)]
+    return words, weights
+
+
+def generate(count: int, start: int, framework_id: int, seed: int):
+    """Tab-separated COPY rows"""
+    rng = random.Random(seed)
+    words, weights = vocabulary(20000, random.Random(19))
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    for i in range(start, start + count):
+        title = " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(5, 10))).capitalize()
+        description = " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(20, 40))) + "."
+        code = f"{FRAMEWORKS[i % len(FRAMEWORKS)]} {i % 23 + 1}.{i % 17 + 1}.{i % 11 + 1}"
+        yield f"{ORG_ID}\tS19-{i:07d}\t{code}\t{framework_id}\t{title}\t{description}\tmedium\tnot-implemented\tt\n"
+
+
+def seed(sync_url: str, controls: int) -> float:
+    """COPY missing controls; returns seconds spent"""
+    engine = create_engine(sync_url)
+    Base.metadata.create_all(engine)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        framework_id = conn.scalar(select(Framework.framework_id).where(Framework.org_id == ORG_ID))
+        if framework_id is None:
+            framework_id = conn.scalar(
+                Framework.__table__.insert()
+                .values(org_id=ORG_ID, framework_code=f"SEARCH{ORG_ID}", framework_name="Search benchmark")
+                .returning(Framework.framework_id)
+            )
+        existing = conn.scalar(select(func.count()).select_from(Control).where(Control.org_id == ORG_ID))
+    missing = controls - existing
+    if missing > 0:
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            rows = generate(missing, existing, framework_id, seed=existing)
+            batch = 50000
+            for offset in range(0, missing, batch):
+                buffer = io.StringIO("".join(next(rows) for _ in range(min(batch, missing - offset))))
+                cursor.copy_expert(
+                    "COPY controls (org_id, internal_code, original_code, framework_id, title, description, "
+                    "severity, status, is_active) FROM STDIN",
+                    buffer
+                )
+            raw.commit()
+        finally:
+            raw.close()
+    engine.dispose()
+    return time.perf_counter() - start
+
+
+def apply_migration(sync_url: str) -> dict:
+    """Run the migration's DDL (idempotent); returns timings and whether pg_trgm is available"""
+    spec = importlib.util.spec_from_file_location("full_text_search", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = create_engine(sync_url, isolation_level="AUTOCOMMIT")
+    report = {}
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            report["pg_trgm"] = "installed"
+        except Exception as e:
+            report["pg_trgm"] = f"unavailable ({type(e.orig).__name__ if hasattr(e, 'orig') else e})"
+        trigram = report["pg_trgm"] == "installed"
+        for table, expression in migration.COLUMNS:
+            start = time.perf_counter()
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({expression}) STORED"
+            ))
+            report[f"{table}_column_s"] = round(time.perf_counter() - start, 1)
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN search_vector SET STATISTICS {migration.STATISTICS_TARGET}"))
+        for name, table, method in migration.INDEXES + (migration.TRIGRAM_INDEXES if trigram else []):
+            start = time.perf_counter()
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {method}"))
+            report[f"{name}_s"] = round(time.perf_counter() - start, 1)
+        conn.execute(text("ANALYZE controls"))
+        report["table_mb"] = round(conn.scalar(text("SELECT pg_table_size('controls')")) / 1e6)
+        report["fts_index_mb"] = round(conn.scalar(text("SELECT pg_relation_size('ix_controls_search_vector')")) / 1e6)
+    engine.dispose()
+    return report
+
+
+def ilike_filter(term: str):
+    pattern = f"%{term}%"
+    return or_(Control.title.ilike(pattern), Control.internal_code.ilike(pattern), Control.original_code.ilike(pattern))
+
+
+async def timed(runs: int, fn):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+
+def queries(controls: int):
+    words, _ = vocabulary(20000, random.Random(19))
+    return [
+        ("common word", "access"),
+        ("two words", "password rotation"),
+        ("phrase", '"incident response"'),
+        ("prefix (typing)", "encryp"),
+        ("rare word", words[15000]),
+        ("framework code", "CIS 4.1"),
+        ("internal code", f"S19-{controls // 2:07d}"),
+        ("no match", "zzqxv"),
+    ]
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url, pool_size=2)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    ok = True
+    async with session_factory() as db:
+        trigram = await search_service.trigram_available(db)
+        for label, term in queries(args.controls):
+            org = Control.org_id == ORG_ID
+            page_order = (Control.org_id, Control.control_id)
+
+            async def ilike_page():
+                return (await db.execute(
+                    select(Control.control_id).where(org, ilike_filter(term)).order_by(*page_order).limit(PAGE)
+                )).scalars().all()
+
+            async def fts_page():
+                match, _ = await search_service.match_clauses(db, term)
+                return (await db.execute(
+                    select(Control.control_id).where(org, match).order_by(*page_order).limit(PAGE)
+                )).scalars().all()
+
+            async def ranked():
+                return await search_service.search(db, ORG_ID, term, ["controls"], args.limit)
+
+            ilike_rows, ilike_ms = await timed(args.runs, ilike_page)
+            fts_rows, fts_ms = await timed(args.runs, fts_page)
+            hits, ranked_ms = await timed(args.runs, ranked)
+            matches = await db.scalar(
+                select(func.count()).select_from(Control)
+                .where(org, search_service.control_match(term, True, trigram))
+            )
+            stats = {
+                "query": term,
+                "fts_matches": matches,
+                "ilike_page_p50_ms": round(percentile(ilike_ms, 50), 1),
+                "fts_page_p50_ms": round(percentile(fts_ms, 50), 1),
+                "ranked_p50_ms": round(percentile(ranked_ms, 50), 1),
+                "ranked_p95_ms": round(percentile(ranked_ms, 95), 1),
+                "page_rows": f"{len(ilike_rows)} ilike / {len(fts_rows)} fts",
+            }
+            if hits:
+                stats["top_hit"] = f"{hits[0]['code']} rank={hits[0]['rank']}"
+                stats["snippet"] = (hits[0]["snippet"] or "")[:90]
+            print_report(label, stats)
+
+            if label != "phrase" and percentile(ranked_ms, 95) > args.target_ms:
+                print(f"\nFAIL: ranked search p95 {percentile(ranked_ms, 95):.0f} ms over {args.target_ms} ms")
+                ok = False
+            if label == "internal code" and (not hits or hits[0]["code"] != term):
+                print("\nFAIL: exact internal code is not the top hit")
+                ok = False
+            if label == "no match" and hits:
+                print("\nFAIL: hits for a term that occurs nowhere")
+                ok = False
+            if label == "phrase" and hits and any("<mark>" not in (hit["snippet"] or "") for hit in hits):
+                print("\nFAIL: snippet without a highlighted match")
+                ok = False
+    await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="PostgreSQL (tsvector / GIN are PostgreSQL features)")
+    parser.add_argument("--controls", type=int, default=1000000)
+    parser.add_argument("--runs", type=int, default=20, help="Repetitions per query and path")
+    parser.add_argument("--limit", type=int, default=20, help="Ranked hits per search")
+    parser.add_argument("--target-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    url = _async_url(args.database_url)
+    if not url.startswith("postgresql"):
+        raise SystemExit("bench_search needs PostgreSQL")
+    sync_url = url.replace("+asyncpg", "+psycopg2")
+    seconds = seed(sync_url, args.controls)
+    print_report("seed", {"controls": args.controls, "copy_s": round(seconds, 1)})
+    print_report("full_text_search migration", apply_migration(sync_url))
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
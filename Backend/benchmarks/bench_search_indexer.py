@@ -0,0 +1,259 @@
+"""
+Elasticsearch indexing: full reindex throughput and incremental sync lag.
+
+Seeds --controls controls (a share soft-deleted) and --evidence evidence
+rows, then runs app.services.search_indexer against an in-process
+Elasticsearch stand-in (benchmarks/elasticsearch_standin.py) over real HTTP:
+
+  reindex         - full load for each --slices value: docs/sec into a new
+                    index behind the alias
+  backpressure    - 8 slices against a single write thread with no queue:
+                    most bulk requests are rejected (429) and resent
+  errors          - 20% of bulk requests answered 503
+  incremental     - SearchIndexSync running while a writer updates and
+                    soft-deletes controls, deletes and adds evidence for
+                    --duration seconds; reports index lag (commit to the
+                    document being written) and sync throughput
+
+After every scenario the stand-in is compared with the database: every
+active control and every evidence row indexed with its current content,
+nothing else. Exits 1 on any mismatch.
+
+Usage:
+    python -m benchmarks.bench_search_indexer --controls 100000 --evidence 20000 --slices 1 4
+"""
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, delete, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base
+from app.models.control import Control
+from app.models.evidence import EvidenceFile
+from app.models.framework import Framework
+from app.models.search_index import SearchIndexWatermark
+from app.services import search_indexer
+from app.services.search_indexer import ElasticsearchBulkClient, SearchIndexSync, reindex
+from benchmarks.common import percentile, print_report
+from benchmarks.elasticsearch_standin import ElasticsearchStandIn
+
+ORG_ID = 900020
+WORDS = "access audit backup encryption firewall incident logging monitoring password patch recovery review".split()
+
+
+def seed(Session, controls: int, evidence: int):
+    rng = random.Random(20)
+    with Session() as db:
+        framework = Framework(org_id=ORG_ID, framework_code=f"INDEX{ORG_ID}", framework_name="Indexer benchmark")
+        db.add(framework)
+        db.flush()
+        now = datetime.utcnow()
+        for start in range(0, controls, 10000):
+            db.execute(insert(Control), [
+                {
+                    "org_id": ORG_ID, "internal_code": f"S20-{i:07d}", "original_code": f"CIS {i % 20}.{i % 7}",
+                    "framework_id": framework.framework_id, "title": " ".join(rng.choices(WORDS, k=6)),
+                    "description": " ".join(rng.choices(WORDS, k=30)), "severity": "medium",
+                    "status": "not-implemented", "is_active": i % 20 != 0, "updated_at": now,
+                }
+                for i in range(start, min(controls, start + 10000))
+            ])
+        first_control = db.scalar(select(func.min(Control.control_id)).where(Control.org_id == ORG_ID))
+        for start in range(0, evidence, 10000):
+            db.execute(insert(EvidenceFile), [
+                {
+                    "org_id": ORG_ID, "control_id": first_control + i % controls, "file_name": f"evidence-{i}.pdf",
+                    "file_path": f"{ORG_ID}/evidence-{i}.pdf", "file_hash": f"{i:064x}", "file_type": "pdf",
+                    "file_size": 1024 + i, "source": "manual", "uploaded_date": now, "updated_at": now,
+                }
+                for i in range(start, min(evidence, start + 10000))
+            ])
+        db.commit()
+
+
+def expected_documents(Session):
+    with Session() as db:
+        controls = dict(db.execute(select(Control.control_id, Control.title).where(Control.is_active.is_(True))).all())
+        evidence = dict(db.execute(select(EvidenceFile.evidence_id, EvidenceFile.status)).all())
+    return controls, evidence
+
+
+def verify(label: str, standin: ElasticsearchStandIn, Session) -> bool:
+    """The stand-in holds exactly the database's current documents"""
+    controls, evidence = expected_documents(Session)
+    indexed_controls = standin.documents(settings.ELASTICSEARCH_INDEX_CONTROLS)
+    indexed_evidence = standin.documents(settings.ELASTICSEARCH_INDEX_EVIDENCE)
+    problems = []
+    if set(map(int, indexed_controls)) != set(controls):
+        problems.append(f"controls: {len(indexed_controls)} indexed, {len(controls)} active")
+    elif any(indexed_controls[str(i)][1]["title"] != title for i, title in controls.items()):
+        problems.append("controls: stale titles")
+    if set(map(int, indexed_evidence)) != set(evidence):
+        problems.append(f"evidence: {len(indexed_evidence)} indexed, {len(evidence)} rows")
+    elif any(indexed_evidence[str(i)][1]["status"] != status for i, status in evidence.items()):
+        problems.append("evidence: stale status")
+    for problem in problems:
+        print(f"\nFAIL ({label}): {problem}")
+    return not problems
+
+
+def full_reindex(Session, standin: ElasticsearchStandIn, slices: int, **client_options) -> dict:
+    url = standin.start()
+    client = ElasticsearchBulkClient(url, **client_options)
+    try:
+        reports = [reindex(key, client=client, session_factory=Session, slices=slices) for key in search_indexer.SOURCES]
+    finally:
+        client.close()
+    indexed = sum(r["indexed"] for r in reports)
+    elapsed = sum(r["elapsed_s"] for r in reports)
+    return {
+        "slices": slices,
+        "documents": indexed,
+        "elapsed_s": round(elapsed, 2),
+        "docs_per_s": round(indexed / elapsed) if elapsed else 0,
+        "bulk_requests": standin.stats["bulk_requests"],
+        "rejected_requests": standin.stats["rejected_requests"],
+        "http_errors": standin.stats["errors"],
+        "client_retries": dict(client.retries) or "-",
+    }
+
+
+def incremental(Session, args) -> bool:
+    standin = ElasticsearchStandIn(latency_ms=args.latency_ms, per_doc_us=args.per_doc_us)
+    url = standin.start()
+    client = ElasticsearchBulkClient(url, retry_initial=0.05)
+    with Session() as db:
+        db.execute(delete(SearchIndexWatermark))  # earlier scenarios loaded other stand-ins
+        db.commit()
+    sync = SearchIndexSync(client=client, session_factory=Session, poll_interval_ms=args.poll_ms, settle_ms=args.settle_ms)
+    sync.bootstrap()
+
+    with Session() as db:
+        control_ids = db.scalars(select(Control.control_id).where(Control.is_active.is_(True))).all()
+        evidence_ids = db.scalars(select(EvidenceFile.evidence_id)).all()
+    rng = random.Random(7)
+    rng.shuffle(control_ids)
+    rng.shuffle(evidence_ids)
+    updated = {}  # control_id -> (commit time, title)
+    changes = 0
+    stop_at = time.monotonic() + args.duration
+
+    thread = threading.Thread(target=sync.run, name="search-sync", daemon=True)
+    thread.start()
+    while time.monotonic() < stop_at and control_ids:
+        with Session() as db:
+            batch = [control_ids.pop() for _ in range(min(args.changes_per_commit, len(control_ids)))]
+            for control in db.scalars(select(Control).where(Control.control_id.in_(batch))):
+                if rng.random() < 0.1:
+                    control.is_active = False
+                else:
+                    control.title = f"updated {control.control_id} {rng.choice(WORDS)}"
+            if evidence_ids and rng.random() < 0.5:
+                evidence = db.get(EvidenceFile, evidence_ids.pop())
+                db.delete(evidence)
+                search_indexer.tombstone(db, search_indexer.EVIDENCE, evidence.evidence_id)
+            db.add(EvidenceFile(
+                org_id=ORG_ID, control_id=batch[0], file_name="new.pdf", file_path=f"{ORG_ID}/new-{changes}.pdf",
+                file_hash=f"{changes:064x}", source="automated", status="approved"
+            ))
+            titles = {c.control_id: c.title for c in db.scalars(select(Control).where(Control.control_id.in_(batch))) if c.is_active}
+            db.commit()
+            committed = time.time()
+        for control_id, title in titles.items():
+            updated[control_id] = (committed, title)
+        changes += len(batch) + 1
+        time.sleep(args.commit_interval_ms / 1000.0)
+
+    # Caught up: every updated control carries its new title
+    deadline = time.monotonic() + 30
+    docs = {}
+    while time.monotonic() < deadline:
+        docs = standin.documents(settings.ELASTICSEARCH_INDEX_CONTROLS)
+        if all(str(i) in docs and docs[str(i)][1]["title"] == title for i, (_, title) in updated.items()):
+            break
+        time.sleep(0.05)
+    time.sleep((args.settle_ms + args.poll_ms) / 1000.0 * 2)  # last tombstones / evidence rows
+    sync.stop()
+    thread.join()
+    client.close()
+
+    lags = [(docs[str(i)][2] - committed) * 1000 for i, (committed, _) in updated.items() if str(i) in docs]
+    print_report("incremental sync", {
+        "changes": changes,
+        "change_rate_per_s": round(changes / args.duration),
+        "settle_ms": args.settle_ms,
+        "poll_ms": args.poll_ms,
+        "lag_p50_ms": round(percentile(lags, 50)) if lags else "-",
+        "lag_p95_ms": round(percentile(lags, 95)) if lags else "-",
+        "lag_max_ms": round(max(lags)) if lags else "-",
+        "bulk_requests": standin.stats["bulk_requests"],
+        "version_conflicts": standin.stats["conflicts"],
+    })
+    ok = verify("incremental", standin, Session)
+    standin.stop()
+    if lags and percentile(lags, 95) > args.max_lag_ms:
+        print(f"\nFAIL: index lag p95 {percentile(lags, 95):.0f} ms over {args.max_lag_ms} ms")
+        ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--controls", type=int, default=100000)
+    parser.add_argument("--evidence", type=int, default=20000)
+    parser.add_argument("--slices", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stand-in cost per bulk request")
+    parser.add_argument("--per-doc-us", type=float, default=20.0, help="Stand-in cost per document")
+    parser.add_argument("--duration", type=float, default=10.0, help="Incremental scenario length (seconds)")
+    parser.add_argument("--changes-per-commit", type=int, default=20)
+    parser.add_argument("--commit-interval-ms", type=float, default=20.0)
+    parser.add_argument("--poll-ms", type=int, default=200)
+    parser.add_argument("--settle-ms", type=int, default=500)
+    parser.add_argument("--max-lag-ms", type=float, default=3000.0)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='bench_search_indexer_')}/indexer.db"
+    engine = create_engine(url, pool_size=max(args.slices) + 4, connect_args={"timeout": 30} if url.startswith("sqlite") else {})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    start = time.perf_counter()
+    seed(Session, args.controls, args.evidence)
+    print_report("seed", {"controls": args.controls, "evidence": args.evidence, "seconds": round(time.perf_counter() - start, 1)})
+
+    ok = True
+    for slices in args.slices:
+        standin = ElasticsearchStandIn(latency_ms=args.latency_ms, per_doc_us=args.per_doc_us)
+        print_report(f"reindex ({slices} slices)", full_reindex(Session, standin, slices))
+        ok = verify(f"reindex {slices}", standin, Session) and ok
+        standin.stop()
+
+    standin = ElasticsearchStandIn(latency_ms=args.latency_ms, per_doc_us=args.per_doc_us, write_threads=1, queue_size=0)
+    print_report("backpressure (8 slices, 1 write thread, no queue)", full_reindex(
+        Session, standin, 8, retry_initial=0.02, retry_max=0.5, max_retries=30
+    ))
+    ok = verify("backpressure", standin, Session) and ok
+    standin.stop()
+
+    standin = ElasticsearchStandIn(latency_ms=args.latency_ms, per_doc_us=args.per_doc_us, error_rate=0.2)
+    print_report("errors (20% of bulk requests 503)", full_reindex(
+        Session, standin, 4, retry_initial=0.02, retry_max=0.5, max_retries=30
+    ))
+    ok = verify("errors", standin, Session) and ok
+    standin.stop()
+
+    ok = incremental(Session, args) and ok
+    engine.dispose()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
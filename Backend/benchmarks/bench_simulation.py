@@ -0,0 +1,304 @@
+"""
+What-if compliance simulation (app.services.simulation).
+
+Seeds one tenant with --frameworks frameworks of --controls-per-framework
+controls, --policies policies with --policy-links links, --risks risks with
+--risk-links links and --mappings mappings. Then measures:
+
+  cold load    snapshot, risk model and mapping graph from the database
+  single       one scenario of --changes proposed controls per request
+               (target: p95 under --target-ms)
+  mappings     the same with follow_mappings
+  batch        --scenarios scenarios in one request
+  concurrent   --concurrency requests of one scenario at a time
+
+Correctness: --status-changes control status and active flag changes are
+committed the way the API writes them (status change log), then for
+--verify scenarios the per-framework counts are compared with the controls'
+rows overlaid with the reported outcome and the residual risk with a
+RiskModel built from scratch on those statuses, so the cached snapshot and
+model must have applied the committed changes. Simulating must
+not write: the tenant versions and the control status counts are the same
+before and after. Exits 1 on any mismatch or a missed target.
+
+Usage:
+    python -m benchmarks.bench_simulation
+    python -m benchmarks.bench_simulation --database-url postgresql://... --risk-links 1000000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models.init  # noqa: F401  (register all mappers)
+from app.config import settings
+from app.database import Base, _async_url
+from app.models.control import Control, ControlMapping
+from app.models.framework import Framework
+from app.models.policy import Policy, PolicyControlLink
+from app.models.risk import Risk, RiskControl
+from app.models.tenant_version import TenantVersion
+from app.services import compliance_stats, simulation
+from app.services.control_graph import ControlGraphCache
+from app.services.impact import _risk_links
+from app.services.risk_engine import RiskModel, RiskModelCache
+from app.services.simulation import SnapshotCache
+from benchmarks.common import percentile, print_report
+
+ORG_ID = 900025
+SEED_BATCH = 20000
+STATUSES = ["implemented", "partial", "not-implemented"]
+VALUES = ["low", "medium", "high", "critical"]
+
+
+async def seed(Session, args) -> list:
+    rng = random.Random(25)
+    async with Session() as db:
+        framework_controls = []
+        for f in range(args.frameworks):
+            framework = Framework(org_id=ORG_ID, framework_code=f"SIM{ORG_ID}-{f:02d}", framework_name=f"Simulation benchmark {f}")
+            db.add(framework)
+            await db.flush()
+            for start in range(0, args.controls_per_framework, SEED_BATCH):
+                await db.execute(insert(Control), [
+                    {
+                        "org_id": ORG_ID, "internal_code": f"G25-{f:02d}-{i:06d}", "original_code": f"F{f} {i}",
+                        "framework_id": framework.framework_id, "title": f"Control {i} of framework {f}",
+                        "severity": "medium", "status": rng.choice(STATUSES), "is_active": i % 40 != 0,
+                    }
+                    for i in range(start, min(args.controls_per_framework, start + SEED_BATCH))
+                ])
+            framework_controls.append((await db.scalars(
+                select(Control.control_id).where(Control.framework_id == framework.framework_id)
+            )).all())
+        controls = [c for ids in framework_controls for c in ids]
+
+        await db.execute(insert(Policy), [
+            {"org_id": ORG_ID, "policy_name": f"Policy {p}", "is_active": p % 10 != 0} for p in range(args.policies)
+        ])
+        policies = (await db.scalars(select(Policy.policy_id).where(Policy.org_id == ORG_ID))).all()
+        links = list({(rng.choice(controls), rng.choice(policies)) for _ in range(args.policy_links)})
+        for start in range(0, len(links), SEED_BATCH):
+            await db.execute(insert(PolicyControlLink), [
+                {"control_id": c, "policy_id": p} for c, p in links[start:start + SEED_BATCH]
+            ])
+
+        for start in range(0, args.risks, SEED_BATCH):
+            await db.execute(insert(Risk), [
+                {"org_id": ORG_ID, "risk_title": f"Risk {r}", "likelihood": rng.choice(VALUES),
+                 "impact": rng.choice(VALUES), "status": "closed" if r % 20 == 0 else "open"}
+                for r in range(start, min(args.risks, start + SEED_BATCH))
+            ])
+        risks = (await db.scalars(select(Risk.risk_id).where(Risk.org_id == ORG_ID))).all()
+        risk_links = list({(rng.choice(controls), rng.choice(risks)) for _ in range(args.risk_links)})
+        for start in range(0, len(risk_links), SEED_BATCH):
+            await db.execute(insert(RiskControl), [
+                {"control_id": c, "risk_id": r, "mitigation_effectiveness": round(rng.uniform(0.1, 0.9), 2)}
+                for c, r in risk_links[start:start + SEED_BATCH]
+            ])
+
+        rows = []
+        for _ in range(args.mappings):
+            source, target = rng.sample(range(args.frameworks), 2)
+            rows.append({
+                "org_id": ORG_ID, "source_control_id": rng.choice(framework_controls[source]),
+                "target_control_id": rng.choice(framework_controls[target]),
+                "mapping_type": "equivalent", "confidence_score": round(rng.uniform(0.6, 1.0), 3),
+            })
+        for start in range(0, len(rows), SEED_BATCH):
+            await db.execute(insert(ControlMapping), rows[start:start + SEED_BATCH])
+        await db.commit()
+
+        codes = (await db.scalars(select(Control.internal_code).where(Control.org_id == ORG_ID))).all()
+    return codes
+
+
+def scenarios(codes, count: int, args, follow_mappings: bool = False, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    result = []
+    for s in range(count):
+        changes = []
+        for code in rng.sample(codes, args.changes):
+            if rng.random() < 0.8:
+                changes.append(simulation.Change(code, "implemented"))
+            else:
+                changes.append(simulation.Change(code, policy_enforced=True))
+        result.append(simulation.Scenario(f"scenario {s}", changes, follow_mappings=follow_mappings))
+    return result
+
+
+async def measure(Session, caches, batches, concurrency: int = 1) -> dict:
+    latencies = []
+
+    async def one(batch):
+        async with Session() as db:
+            start = time.perf_counter()
+            await simulation.run(db, ORG_ID, batch, **caches)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for offset in range(0, len(batches), concurrency):
+        await asyncio.gather(*[one(batch) for batch in batches[offset:offset + concurrency]])
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(batches),
+        "scenarios": sum(len(batch) for batch in batches),
+        "rps": round(len(batches) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def state(db) -> tuple:
+    """Tenant versions and status counts, to show simulating writes nothing"""
+    versions = (await db.execute(
+        select(TenantVersion.scope, TenantVersion.version).where(TenantVersion.org_id == ORG_ID)
+    )).all()
+    counts = (await db.execute(
+        select(Control.status, func.count()).where(Control.org_id == ORG_ID).group_by(Control.status)
+    )).all()
+    return sorted(versions), sorted(counts)
+
+
+async def status_writes(Session, args):
+    """Status and active flag changes committed through the status change log"""
+    rng = random.Random(13)
+    async with Session() as db:
+        control_ids = (await db.scalars(select(Control.control_id).where(Control.org_id == ORG_ID))).all()
+        changed = rng.sample(control_ids, min(args.status_changes, len(control_ids)))
+        for position, control_id in enumerate(changed):
+            values = {"status": rng.choice(STATUSES)}
+            if position % 10 == 0:
+                values["is_active"] = rng.random() < 0.5
+            await db.execute(update(Control).where(Control.control_id == control_id).values(**values))
+        await compliance_stats.record_status_changes(db, ORG_ID, changed)
+        await db.commit()
+
+
+async def verify(db, result: dict) -> list:
+    """Framework counts and residual risk recomputed from the rows with the outcome overlaid"""
+    problems = []
+    after = {c["control_id"]: c["status_after"] for c in result["controls"]}
+    rows = (await db.execute(
+        select(Control.control_id, Control.framework_id, Control.status, Control.is_active).where(Control.org_id == ORG_ID)
+    )).all()
+    counts = Counter()
+    for row in rows:
+        if row.is_active:
+            counts[(row.framework_id, after.get(row.control_id, row.status))] += 1
+    for framework in result["frameworks"]:
+        expected = (
+            counts[(framework["framework_id"], "implemented")],
+            counts[(framework["framework_id"], "partial")],
+            counts[(framework["framework_id"], "not-implemented")],
+        )
+        if (framework["implemented"], framework["partial"], framework["not_implemented"]) != expected:
+            problems.append(f"{result['name']}: {framework['framework_code']} counts differ from the rows")
+
+    risks = (await db.execute(
+        select(Risk.risk_id, Risk.likelihood, Risk.impact, Risk.status).where(Risk.org_id == ORG_ID)
+    )).all()
+    links = (await db.execute(_risk_links(ORG_ID))).all()
+    model = RiskModel.build(
+        ORG_ID, 0, 0, risks, links,
+        [(row.control_id, after.get(row.control_id, row.status), row.is_active) for row in rows],
+        settings.RISK_DEFAULT_EFFECTIVENESS
+    )
+    expected = model.heatmap()["residual_total"]
+    if abs(expected - result["risk"]["residual_after"]) > 1e-3:
+        problems.append(f"{result['name']}: residual {result['risk']['residual_after']}, rebuilt model {expected}")
+    return problems
+
+
+async def run(args, url: str) -> bool:
+    engine = create_async_engine(url, pool_size=args.concurrency + 2) if not url.startswith("sqlite") else create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    ok, problems = True, []
+
+    start = time.perf_counter()
+    codes = await seed(Session, args)
+    print_report("seed", {
+        "controls": len(codes),
+        "frameworks": args.frameworks,
+        "policy_links": args.policy_links,
+        "risk_links": args.risk_links,
+        "mappings": args.mappings,
+        "seconds": round(time.perf_counter() - start, 1),
+    })
+
+    caches = {
+        "snapshot_cache": SnapshotCache(max_tenants=2),
+        "models": RiskModelCache(max_tenants=2, default_effectiveness=settings.RISK_DEFAULT_EFFECTIVENESS),
+        "graphs": ControlGraphCache(max_tenants=2),
+    }
+    async with Session() as db:
+        start = time.perf_counter()
+        await caches["snapshot_cache"].get(db, ORG_ID)
+        await caches["models"].get(db, ORG_ID)
+        await caches["graphs"].get(db, ORG_ID)
+    print_report("cold load (snapshot, risk model, graph)", {"seconds": round(time.perf_counter() - start, 2)})
+
+    for title, batches, concurrency in (
+        (f"single ({args.changes} changes)", [[s] for s in scenarios(codes, args.requests, args)], 1),
+        ("mappings (follow_mappings)", [[s] for s in scenarios(codes, args.requests, args, follow_mappings=True, seed=2)], 1),
+        (f"batch ({args.scenarios} scenarios per request)", [scenarios(codes, args.scenarios, args, seed=3 + r) for r in range(5)], 1),
+        (f"concurrent ({args.concurrency} at a time)", [[s] for s in scenarios(codes, args.requests, args, seed=9)], args.concurrency),
+    ):
+        stats = await measure(Session, caches, batches, concurrency)
+        print_report(title, stats)
+        if concurrency == 1 and len(batches[0]) == 1 and stats["p95_ms"] > args.target_ms:
+            print(f"\nFAIL: {title} p95 {stats['p95_ms']} ms over {args.target_ms} ms")
+            ok = False
+
+    await status_writes(Session, args)
+    async with Session() as db:
+        before = await state(db)
+        result = await simulation.run(db, ORG_ID, scenarios(codes, args.verify, args, seed=11), **caches)
+        for scenario in result["scenarios"]:
+            problems += await verify(db, scenario)
+        if await state(db) != before:
+            problems.append("simulating changed the tenant versions or control statuses")
+
+    print_report("verification", {"scenarios": args.verify, "problems": len(problems)})
+    for problem in problems[:10]:
+        print(f"\nFAIL: {problem}")
+    await engine.dispose()
+    return ok and not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--frameworks", type=int, default=50)
+    parser.add_argument("--controls-per-framework", type=int, default=400)
+    parser.add_argument("--policies", type=int, default=1000)
+    parser.add_argument("--policy-links", type=int, default=50000)
+    parser.add_argument("--risks", type=int, default=5000)
+    parser.add_argument("--risk-links", type=int, default=100000)
+    parser.add_argument("--mappings", type=int, default=50000)
+    parser.add_argument("--changes", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--scenarios", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--verify", type=int, default=3)
+    parser.add_argument("--status-changes", type=int, default=200)
+    parser.add_argument("--target-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    url = (_async_url(args.database_url) if args.database_url
+           else f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='bench_simulation_')}/simulation.db")
+    ok = asyncio.run(run(args, url))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
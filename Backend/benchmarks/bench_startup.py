@@ -0,0 +1,140 @@
+"""
+Worker cold start: import time and time to first response.
+
+Each measurement is a fresh interpreter (as a gunicorn worker or a
+container restart would be):
+
+  importtime - `import app.main` total and the slowest app modules
+               (cumulative; benchmarks/import_report.py has the full report)
+  first req  - process spawn until the first GET /api/v1/info response,
+               running the app's lifespan startup first; in-process ASGI, so
+               no server startup is included. Also reported from the end of
+               the imports, which is what the dependencies can delay
+
+First-request latency runs with Kafka and MinIO pointed at
+  refused   - a closed port (connection refused at once)
+  blackhole - a listener that accepts and never answers (a hung broker)
+and in two modes:
+  eager - the child connects both clients before serving, as importing
+          app.services used to
+  lazy  - the lifespan starts background connections (current behaviour)
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5 --budget 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import print_report
+from benchmarks.import_report import report as import_report
+
+GIVE_UP_AFTER = 60.0  # seconds; an eager start against a blackhole can take minutes
+
+
+def blackhole() -> int:
+    """Listener that accepts connections and never replies; returns its port"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    held = []
+
+    def accept():
+        while True:
+            held.append(server.accept()[0])
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def closed_port() -> int:
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+async def serve_first_request(eager: bool):
+    import httpx
+    from app.main import app as fastapi_app
+    from app.services.evidence_service import evidence_service
+    from app.services.kafka_producer import kafka_producer
+
+    imported = time.time()
+    if eager:
+        kafka_producer.connect()
+        evidence_service.connect()
+    async with fastapi_app.router.lifespan_context(fastapi_app):
+        async with httpx.AsyncClient(app=fastapi_app, base_url="http://bench") as client:
+            response = await client.get("/api/v1/info")
+            response.raise_for_status()
+            first = time.time()
+        print(json.dumps({"imported_at": imported, "first_response_at": first}))
+        os._exit(0)  # skip shutdown: a blackholed close() would only add noise
+
+
+def first_request(mode: str, kafka_port: int, minio_port: int) -> tuple:
+    """(seconds from spawn, seconds after imports) to the first response"""
+    env = dict(
+        os.environ,
+        KAFKA_BOOTSTRAP_SERVERS=f"127.0.0.1:{kafka_port}",
+        MINIO_ENDPOINT=f"127.0.0.1:{minio_port}",
+    )
+    start = time.time()
+    try:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+            env=env, capture_output=True, text=True, timeout=GIVE_UP_AFTER
+        ).stdout
+    except subprocess.TimeoutExpired:
+        return float("inf"), float("inf")
+    times = json.loads(output.strip().splitlines()[-1])
+    return times["first_response_at"] - start, times["first_response_at"] - times["imported_at"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=0.25,
+                        help="Seconds from end of imports to first response (lazy mode) before FAIL")
+    parser.add_argument("--child", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(serve_first_request(args.child == "eager"))
+        return
+
+    imports = import_report("app.main", args.runs)
+    slowest = sorted(imports["app"].items(), key=lambda item: -item[1][1])[1:8]
+    print_report("python -X importtime -c 'import app.main'", {
+        "import_s": round(imports["total_s"], 3),
+        **{name: f"{cumulative_us / 1e3:.0f} ms" for name, (_, cumulative_us) in slowest},
+    })
+
+    ok = True
+    targets = {"refused": closed_port(), "blackhole": blackhole()}
+    for target, port in targets.items():
+        stats = {}
+        for mode in ("eager", "lazy"):
+            runs = [first_request(mode, port, port) for _ in range(args.runs if mode == "lazy" else 1)]
+            for label, values in (("from_spawn", [r[0] for r in runs]), ("after_import", [r[1] for r in runs])):
+                median = statistics.median(values)
+                stats[f"{mode}_{label}_s"] = f">{GIVE_UP_AFTER:.0f}" if median == float("inf") else round(median, 3)
+            after_import = statistics.median(r[1] for r in runs)
+            if mode == "lazy" and after_import > args.budget:
+                print(f"\nFAIL: first response {after_import:.2f}s after imports with {target} dependencies "
+                      f"(budget {args.budget}s)")
+                ok = False
+        print_report(f"spawn to first response, Kafka + MinIO {target}", stats)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
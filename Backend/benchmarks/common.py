@@ -0,0 +1,42 @@
+"""Shared helpers for the benchmark scripts"""
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms: List[float], elapsed_s: float) -> Dict[str, float]:
+    """Throughput and latency summary for a benchmark run"""
+    count = len(latencies_ms)
+    return {
+        "requests": count,
+        "elapsed_s": round(elapsed_s, 3),
+        "rps": round(count / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+def print_report(title: str, stats: Dict[str, float]):
+    """Print a summary dict as aligned key/value lines"""
+    print(f"\n== {title}")
+    for key, value in stats.items():
+        print(f"  {key:<14} {value}")
+
+
+@contextmanager
+def timer():
+    """Yield a callable returning elapsed seconds since entering the block"""
+    start = time.perf_counter()
+    yield lambda: time.perf_counter() - start
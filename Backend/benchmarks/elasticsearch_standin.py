@@ -0,0 +1,218 @@
+"""
+In-process Elasticsearch stand-in for the search indexer benchmark.
+
+A threaded HTTP server implementing the part of the REST API that
+app.services.search_indexer uses: index create / settings / refresh /
+delete, aliases, _bulk with external versions, _count, _doc and
+_cluster/health. Documents live in memory together with the time they were
+written (for index lag).
+
+Bulk requests cost `latency_ms` plus `per_doc_us` per item and at most
+`write_threads` execute at once. Like Elasticsearch's write thread pool,
+up to `queue_size` more wait and any beyond that are rejected: HTTP 200 with
+status 429 (es_rejected_execution_exception) on every item. `error_rate`
+answers that fraction of bulk requests with a 503.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+
+class StandInIndex:
+    def __init__(self, body: dict):
+        self.body = body
+        self.docs: Dict[str, Tuple[int, dict, float]] = {}  # id -> (version, source, written_at)
+
+
+class ElasticsearchStandIn:
+    def __init__(
+        self,
+        latency_ms: float = 2.0,
+        per_doc_us: float = 20.0,
+        write_threads: int = 4,
+        queue_size: int = 8,
+        error_rate: float = 0.0
+    ):
+        self.latency = latency_ms / 1000.0
+        self.per_doc = per_doc_us / 1e6
+        self.write_threads = write_threads
+        self.queue_size = queue_size
+        self.error_rate = error_rate
+        self.indices: Dict[str, StandInIndex] = {}
+        self.aliases: Dict[str, Set[str]] = {}
+        self.stats = {"bulk_requests": 0, "rejected_requests": 0, "errors": 0, "items": 0, "conflicts": 0}
+        self._lock = threading.Lock()
+        self._writers = threading.Semaphore(write_threads)
+        self._queued = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # Lifecycle
+    def start(self) -> str:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload = standin.handle(self.command, urlsplit(self.path).path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="es-standin", daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # Inspection
+    def resolve(self, name: str) -> Optional[str]:
+        with self._lock:
+            targets = self.aliases.get(name)
+            if targets:
+                return next(iter(targets))
+            return name if name in self.indices else None
+
+    def documents(self, name: str) -> Dict[str, Tuple[int, dict, float]]:
+        index = self.resolve(name)
+        return dict(self.indices[index].docs) if index else {}
+
+    # REST API
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        parts = [part for part in path.split("/") if part]
+        if parts == ["_cluster", "health"]:
+            return 200, {"status": "green"}
+        if parts == ["_bulk"] and method == "POST":
+            return self._bulk(body)
+        if parts == ["_aliases"] and method == "POST":
+            return self._update_aliases(json.loads(body))
+        if len(parts) == 2 and parts[0] == "_alias":
+            with self._lock:
+                targets = self.aliases.get(parts[1])
+                if not targets:
+                    return 404, {"error": "alias missing", "status": 404}
+                return 200, {index: {"aliases": {parts[1]: {}}} for index in targets}
+        if len(parts) == 1 and method == "PUT":
+            with self._lock:
+                if parts[0] in self.indices:
+                    return 400, {"error": {"type": "resource_already_exists_exception"}, "status": 400}
+                self.indices[parts[0]] = StandInIndex(json.loads(body or b"{}"))
+            return 200, {"acknowledged": True, "index": parts[0]}
+        if len(parts) == 1 and method == "DELETE":
+            with self._lock:
+                self.indices.pop(parts[0], None)
+                for targets in self.aliases.values():
+                    targets.discard(parts[0])
+            return 200, {"acknowledged": True}
+
+        index = self.resolve(parts[0]) if parts else None
+        if index is None:
+            return 404, {"error": {"type": "index_not_found_exception"}, "status": 404}
+        if parts[1:] == ["_settings"] and method == "PUT":
+            self.indices[index].body.setdefault("settings", {}).update(json.loads(body))
+            return 200, {"acknowledged": True}
+        if parts[1:] == ["_refresh"]:
+            return 200, {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+        if parts[1:] == ["_count"]:
+            return 200, {"count": len(self.indices[index].docs)}
+        if len(parts) == 3 and parts[1] == "_doc":
+            doc = self.indices[index].docs.get(parts[2])
+            if doc is None:
+                return 404, {"_index": index, "_id": parts[2], "found": False}
+            return 200, {"_index": index, "_id": parts[2], "_version": doc[0], "found": True, "_source": doc[1]}
+        return 400, {"error": f"unsupported: {method} {path}", "status": 400}
+
+    def _update_aliases(self, body: dict) -> Tuple[int, dict]:
+        with self._lock:
+            for action in body["actions"]:
+                (name, spec), = action.items()
+                if name == "add":
+                    self.aliases.setdefault(spec["alias"], set()).add(spec["index"])
+                elif name == "remove":
+                    self.aliases.get(spec["alias"], set()).discard(spec["index"])
+                elif name == "remove_index":
+                    self.indices.pop(spec["index"], None)
+                    for targets in self.aliases.values():
+                        targets.discard(spec["index"])
+        return 200, {"acknowledged": True}
+
+    def _bulk(self, body: bytes) -> Tuple[int, dict]:
+        lines = body.decode().splitlines()
+        with self._lock:
+            self.stats["bulk_requests"] += 1
+            if self.error_rate and random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 503, {"error": "unavailable", "status": 503}
+            if self._queued >= self.write_threads + self.queue_size:
+                self.stats["rejected_requests"] += 1
+                return 200, {"errors": True, "items": self._rejections(lines)}
+            self._queued += 1
+        try:
+            with self._writers:
+                time.sleep(self.latency + self.per_doc * (len(lines) // 2))
+                return 200, self._apply(lines)
+        finally:
+            with self._lock:
+                self._queued -= 1
+
+    @staticmethod
+    def _rejections(lines) -> list:
+        items = []
+        position = 0
+        while position < len(lines):
+            (op, meta), = json.loads(lines[position]).items()
+            position += 1 if op == "delete" else 2
+            items.append({op: {"_index": meta["_index"], "_id": meta["_id"], "status": 429,
+                               "error": {"type": "es_rejected_execution_exception"}}})
+        return items
+
+    def _apply(self, lines) -> dict:
+        items = []
+        errors = False
+        position = 0
+        now = time.time()
+        with self._lock:
+            while position < len(lines):
+                (op, meta), = json.loads(lines[position]).items()
+                source = json.loads(lines[position + 1]) if op != "delete" else None
+                position += 1 if op == "delete" else 2
+                index = self.aliases.get(meta["_index"]) or {meta["_index"]}
+                name = next(iter(index))
+                docs = self.indices.setdefault(name, StandInIndex({})).docs
+                version = meta.get("version", 1)
+                current = docs.get(meta["_id"])
+                result = {"_index": name, "_id": meta["_id"]}
+                if current is not None and version < current[0]:
+                    result.update(status=409, error={"type": "version_conflict_engine_exception"})
+                    self.stats["conflicts"] += 1
+                    errors = True
+                elif op == "delete":
+                    if current is None:
+                        result.update(status=404, result="not_found")
+                    else:
+                        del docs[meta["_id"]]
+                        result.update(status=200, result="deleted")
+                else:
+                    docs[meta["_id"]] = (version, source, now)
+                    result.update(status=201 if current is None else 200, result="created" if current is None else "updated")
+                self.stats["items"] += 1
+                items.append({op: result})
+        return {"took": 1, "errors": errors, "items": items}
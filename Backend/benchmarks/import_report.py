@@ -0,0 +1,139 @@
+"""
+Cold-start import report and budget check for the backend package.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+reports, as medians over --runs:
+
+  - total import time of the target module
+  - every app.* module: self and cumulative time
+  - third-party packages by self time, with the app module that first
+    imported them (the one to look at when a package should not be there)
+  - which optional subsystems (app.lazy.SUBSYSTEMS) ended up imported
+
+Exits 1 when the import takes longer than --budget seconds or when an
+optional subsystem is imported by `import app.main`; they are meant to load
+on first use through app.lazy. tests/test_import_budget.py runs both checks
+under pytest.
+
+Usage:
+    python -m benchmarks.import_report --runs 5 --budget 3.0
+    python -m benchmarks.import_report --module app.services.decision_engine --top 40
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.common import print_report
+
+DEFAULT_BUDGET_S = 3.0  # a shared 1-CPU runner with requirements.txt installed measures 1.4 - 2.3s for app.main
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def parse(stderr: str) -> List[Tuple[str, int, int, str]]:
+    """
+    -X importtime lines as (module, self_us, cumulative_us, importer), where
+    importer is the nearest enclosing app.* module ("" at top level).
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3))))
+    # Children are printed before their parent, one level deeper: walk backwards keeping the ancestors
+    parsed = []
+    ancestors: List[Tuple[int, str]] = []
+    for name, self_us, cumulative_us, depth in reversed(rows):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        importer = next((a for _, a in reversed(ancestors) if a == "app" or a.startswith("app.")), "")
+        parsed.append((name, self_us, cumulative_us, importer))
+        ancestors.append((depth, name))
+    parsed.reverse()
+    return parsed
+
+
+def measure(module: str) -> Tuple[List[Tuple[str, int, int, str]], Dict[str, bool]]:
+    statement = f"import {module}; import json, app.lazy; print(json.dumps(app.lazy.loaded_subsystems()))"
+    # Without pytest-cov's subprocess hooks, which would measure coverage start-up too
+    env = {name: value for name, value in os.environ.items() if not name.startswith("COV_CORE_")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True, env=env
+    )
+    # Read right after the target import, before anything else can load a subsystem
+    return parse(result.stderr), json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def report(module: str, runs: int) -> dict:
+    totals = []
+    app_modules = defaultdict(lambda: ([], []))
+    packages = defaultdict(list)
+    importers = {}
+    subsystems = {}
+    for _ in range(runs):
+        rows, subsystems = measure(module)
+        per_package = defaultdict(int)
+        for name, self_us, cumulative_us, importer in rows:
+            if name == module:
+                totals.append(cumulative_us / 1e6)
+            if name == "app" or name.startswith("app."):
+                app_modules[name][0].append(self_us)
+                app_modules[name][1].append(cumulative_us)
+            else:
+                top = name.split(".")[0]
+                per_package[top] += self_us
+                importers.setdefault(top, importer)
+        for top, self_us in per_package.items():
+            packages[top].append(self_us)
+    return {
+        "total_s": statistics.median(totals),
+        "app": {name: (statistics.median(s), statistics.median(c)) for name, (s, c) in app_modules.items()},
+        "packages": {name: statistics.median(values) for name, values in packages.items()},
+        "importers": importers,
+        "subsystems": subsystems,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S, help="Seconds; 0 disables the check")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    args = parser.parse_args()
+
+    result = report(args.module, args.runs)
+    print_report(f"import {args.module} ({args.runs} runs, median)", {
+        "total_s": round(result["total_s"], 3),
+        "budget_s": args.budget or "off",
+    })
+    print(f"\n== app modules by cumulative time\n  {'cumulative':>10} {'self':>8}  module")
+    for name, (self_us, cumulative_us) in sorted(result["app"].items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1e3:8.1f}ms {self_us / 1e3:6.1f}ms  {name}")
+    print(f"\n== third-party packages by self time\n  {'self':>8}  package (first imported by)")
+    for name, self_us in sorted(result["packages"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1e3:6.1f}ms  {name} ({result['importers'].get(name) or 'interpreter'})")
+    print_report("optional subsystems imported", {
+        name: "loaded" if loaded else "-" for name, loaded in result["subsystems"].items()
+    })
+
+    ok = True
+    if args.budget and result["total_s"] > args.budget:
+        print(f"\nFAIL: import {args.module} took {result['total_s']:.3f}s (budget {args.budget}s)")
+        ok = False
+    if args.module == "app.main":
+        loaded = [name for name, is_loaded in result["subsystems"].items() if is_loaded]
+        if loaded:
+            print(f"\nFAIL: import app.main loads optional subsystems: {', '.join(loaded)} (use app.lazy)")
+            ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
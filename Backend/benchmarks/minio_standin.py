@@ -0,0 +1,143 @@
+"""
+In-process MinIO stand-in for the evidence benchmarks.
+
+Subclasses the real Minio client and replaces only its S3 wire calls, so
+put_object's multipart logic, get_object streaming and error handling in
+EvidenceService run unchanged. Uploaded payloads are folded into a running
+SHA256 (nothing retained) unless `keep_data` is set; objects seeded with
+`seed()` are served from memory, optionally after a simulated first-byte
+latency.
+"""
+import hashlib
+import time
+from typing import Dict, Optional
+
+from minio import Minio
+from minio.datatypes import Object
+from minio.error import S3Error
+from minio.helpers import ObjectWriteResult
+
+
+class StoredObject:
+    def __init__(self, sha256: str, size: int, data: Optional[bytes] = None):
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+
+
+class StandInResponse:
+    """Minimal urllib3 response surface used by EvidenceService"""
+
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._offset = 0
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        end = len(self._data) if amt is None else min(len(self._data), self._offset + amt)
+        chunk = bytes(self._data[self._offset:end])
+        self._offset = end
+        return chunk
+
+    def stream(self, amt: int = 65536):
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class StandInMinio(Minio):
+    """Minio client whose S3 calls are served in memory"""
+
+    def __init__(self, latency_ms: float = 0.0, keep_data: bool = False):
+        super().__init__("minio.invalid:9000", access_key="bench", secret_key="bench", secure=False)
+        self.latency = latency_ms / 1000.0
+        self.keep_data = keep_data
+        self.objects: Dict[str, StoredObject] = {}
+        self.aborted = 0
+        self.requests = 0
+        self._parts = {}
+
+    def seed(self, object_name: str, data: bytes):
+        self.objects[object_name] = StoredObject(hashlib.sha256(data).hexdigest(), len(data), data)
+
+    def _wait(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _missing(self, object_name: str) -> S3Error:
+        return S3Error("NoSuchKey", "Object does not exist", object_name, "standin", "standin", None,
+                       bucket_name="standin", object_name=object_name)
+
+    # Upload path
+    def _put_object(self, bucket_name, object_name, data, headers, query_params=None):
+        self._wait()
+        self.objects[object_name] = StoredObject(
+            hashlib.sha256(data).hexdigest(), len(data), bytes(data) if self.keep_data else None
+        )
+        return ObjectWriteResult(bucket_name, object_name, None, hashlib.md5(data).hexdigest(), {})
+
+    def _create_multipart_upload(self, bucket_name, object_name, headers):
+        self._wait()
+        upload_id = f"upload-{len(self._parts) + 1}-{object_name}"
+        self._parts[upload_id] = (hashlib.sha256(), 0, [] if self.keep_data else None)
+        return upload_id
+
+    def _upload_part(self, bucket_name, object_name, data, headers, upload_id, part_number):
+        # Fold each part into a running hash so the stand-in holds no payload
+        self._wait()
+        digest, size, chunks = self._parts[upload_id]
+        digest.update(data)
+        if chunks is not None:
+            chunks.append(bytes(data))
+        self._parts[upload_id] = (digest, size + len(data), chunks)
+        return hashlib.md5(data).hexdigest()
+
+    def _complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+        self._wait()
+        digest, size, chunks = self._parts.pop(upload_id)
+        self.objects[object_name] = StoredObject(
+            digest.hexdigest(), size, b"".join(chunks) if chunks is not None else None
+        )
+        return ObjectWriteResult(bucket_name, object_name, None, "multipart", {})
+
+    def _abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        self._parts.pop(upload_id, None)
+        self.aborted += 1
+
+    # Read / management path
+    def get_object(self, bucket_name, object_name, *args, **kwargs):
+        self._wait()
+        stored = self.objects.get(object_name)
+        if stored is None or stored.data is None:
+            raise self._missing(object_name)
+        return StandInResponse(stored.data)
+
+    def stat_object(self, bucket_name, object_name, *args, **kwargs):
+        self._wait()
+        stored = self.objects.get(object_name)
+        if stored is None:
+            raise self._missing(object_name)
+        return Object(bucket_name, object_name, size=stored.size, etag=stored.sha256)
+
+    def copy_object(self, bucket_name, object_name, source, *args, **kwargs):
+        self._wait()
+        stored = self.objects.get(source.object_name)
+        if stored is None:
+            raise self._missing(source.object_name)
+        self.objects[object_name] = StoredObject(stored.sha256, stored.size, stored.data)
+        return ObjectWriteResult(bucket_name, object_name, None, stored.sha256, {})
+
+    def remove_object(self, bucket_name, object_name, version_id=None):
+        self._wait()
+        self.objects.pop(object_name, None)
+
+    def bucket_exists(self, bucket_name):
+        return True
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for running several Uvicorn workers.
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus gunicorn app.main:app -c gunicorn.conf.py
+
+With PROMETHEUS_MULTIPROC_DIR set, metrics are kept in per-worker mmap files
+and /metrics aggregates every worker (app.metrics.render). The directory is
+wiped on start so values from a previous run are not reported.
+"""
+import glob
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)  # drop the worker's live gauges
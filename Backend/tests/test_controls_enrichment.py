@@ -0,0 +1,20 @@
+"""
+GET /api/v1/controls/ issues the same number of SQL statements at every
+page size (enrichment is one query, not one per control).
+"""
+import argparse
+
+import pytest
+
+from benchmarks import bench_controls_enrichment
+
+pytestmark = [pytest.mark.api, pytest.mark.database, pytest.mark.asyncio]
+
+
+async def test_statement_count_does_not_grow_with_page_size(tmp_path):
+    counts = await bench_controls_enrichment.run(argparse.Namespace(
+        database_url=f"sqlite+aiosqlite:///{tmp_path}/enrichment.db",
+        controls=300,
+        page_sizes=[10, 50, 200],
+    ))
+    assert len(set(counts.values())) == 1, f"SQL statements per page size: {counts}"
@@ -0,0 +1,17 @@
+"""
+Streaming evidence uploads keep peak memory bounded by the multipart part
+size, not the file size (against the in-process MinIO stand-in).
+"""
+import argparse
+
+import pytest
+
+from benchmarks import bench_evidence_upload
+
+pytestmark = [pytest.mark.unit, pytest.mark.slow]
+
+
+def test_streaming_peak_is_bounded_by_part_size():
+    result = bench_evidence_upload.run(argparse.Namespace(size_mb=40, small_mb=10))
+    assert not result["failures"], result["failures"]
+    assert result["peak_mb"] <= result["bound_mb"]
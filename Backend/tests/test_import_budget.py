@@ -0,0 +1,30 @@
+"""
+Cold-start budget for `import app.main` (benchmarks/import_report.py).
+
+The budget defaults to import_report.DEFAULT_BUDGET_S; set IMPORT_BUDGET_S
+for slower or faster runners.
+"""
+import os
+
+import pytest
+
+from benchmarks import import_report
+
+pytestmark = [pytest.mark.unit, pytest.mark.slow]
+
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def result():
+    return import_report.report("app.main", RUNS)
+
+
+def test_import_within_budget(result):
+    budget = float(os.environ.get("IMPORT_BUDGET_S", import_report.DEFAULT_BUDGET_S))
+    assert result["total_s"] <= budget, f"import app.main took {result['total_s']:.3f}s (budget {budget}s)"
+
+
+def test_no_optional_subsystem_imported(result):
+    loaded = [name for name, is_loaded in result["subsystems"].items() if is_loaded]
+    assert not loaded, f"import app.main loads {', '.join(loaded)} (use app.lazy)"
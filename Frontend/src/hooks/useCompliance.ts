@@ -26,28 +26,35 @@ export function useCompliance(frameworkCode?: string) {
       try {
         setLoading(true)
         
-        // TODO: Replace with actual API call
+        const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
         const endpoint = frameworkCode 
-          ? `/api/compliance/frameworks/${frameworkCode}`
-          : '/api/compliance/summary'
+          ? `${apiUrl}/api/v1/compliance/frameworks/${frameworkCode}`
+          : `${apiUrl}/api/v1/compliance/summary`
         
-        // Mock data for now
-        await new Promise(resolve => setTimeout(resolve, 500))
-        
-        const mockData: ComplianceData = {
-          totalControls: 1547,
-          implemented: 892,
-          partial: 423,
-          notImplemented: 232,
-          complianceScore: 58,
-          frameworkBreakdown: [
-            { framework: 'CIS', total: 270, implemented: 185, score: 68 },
-            { framework: 'NIST', total: 300, implemented: 198, score: 66 },
-            { framework: 'ISO27001', total: 114, implemented: 89, score: 78 }
-          ]
+        const token = typeof window !== 'undefined' ? window.localStorage.getItem('access_token') : null
+        const response = await fetch(endpoint, {
+          headers: token ? { Authorization: `Bearer ${token}` } : {}
+        })
+        if (!response.ok) {
+          throw new Error(`Failed to fetch compliance data (${response.status})`)
         }
+        const body = await response.json()
         
-        setData(mockData)
+        // Summary returns a per-framework breakdown; a single framework returns its own counts
+        const frameworks = body.frameworks ?? [body]
+        setData({
+          totalControls: body.total_controls ?? body.total,
+          implemented: body.implemented,
+          partial: body.partial,
+          notImplemented: body.not_implemented,
+          complianceScore: body.compliance_score,
+          frameworkBreakdown: frameworks.map((fw: any) => ({
+            framework: fw.framework_code,
+            total: fw.total,
+            implemented: fw.implemented,
+            score: fw.compliance_score
+          }))
+        })
         setError(null)
       } catch (err) {
         setError(err instanceof Error ? err : new Error('Failed to fetch compliance data'))